@@ -10,6 +10,7 @@ from datetime import datetime
 import logging
 import json
 from services.ai_service import GeminiAIService
+from services.gemini_priority_queue import Priority
 
 router = APIRouter(prefix="/api/ai/event", tags=["ai-assistant"])
 logger = logging.getLogger(__name__)
@@ -122,7 +123,11 @@ class EventAIAssistant:
         
         return analysis
 
-    async def generate_conversational_summary(self, event: Dict[str, Any]) -> List[Dict[str, str]]:
+    async def generate_conversational_summary(
+        self,
+        event: Dict[str, Any],
+        priority: Priority = Priority.LOW
+    ) -> List[Dict[str, str]]:
         """Genera una conversación dinámica usando la API de Gemini."""
         
         try:
@@ -167,7 +172,9 @@ Eres un guionista experto en diálogos de comedia. Tu tarea es escribir una conv
 ]
 '''
             ai_service = GeminiAIService()
-            llm_response = await ai_service._call_gemini_api(prompt)
+            # Comentarios de Sofia/Juan: prioridad baja en el scheduler de IA
+            # (BACKGROUND cuando la precalcula services/event_insights)
+            llm_response = await ai_service._call_gemini_api(prompt, priority=priority)
 
             if llm_response:
                 try:
@@ -448,9 +455,13 @@ async def get_event_conversation(event_data: Dict[str, Any]):
     Genera una conversación de IA sobre un evento específico.
     """
     try:
-        assistant = EventAIAssistant()
-        conversation = await assistant.generate_conversational_summary(event_data)
-        
+        from services.event_insights import CONVERSATION, event_insights
+
+        # 💡 Precalculada por el job post-importación; on-demand si el evento cambió
+        conversation = await event_insights.get_or_generate(CONVERSATION, event_data, priority=Priority.LOW)
+        if conversation is None:
+            conversation = EventAIAssistant().get_scripted_fallback_conversation(event_data)
+
         return {
             "success": True,
             "conversation": conversation,
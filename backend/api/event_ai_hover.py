@@ -7,71 +7,38 @@ CON SISTEMA DE PRIORIDADES Y STREAMING
 from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import StreamingResponse
 from typing import Dict, Any
+import asyncio
 import os
 import logging
 import json
-import asyncio
+import time
 
 router = APIRouter(prefix="/api/ai", tags=["ai-hover"])
 logger = logging.getLogger(__name__)
 
-# 💾 Caché en memoria para insights (evitar llamadas repetidas a IA)
-_insights_cache = {}
-
 @router.post("/event-insight")
-async def get_event_insight(event_data: Dict[str, Any]):
+async def get_event_insight(event_data: Dict[str, Any], stream: bool = Query(False)):
     """
     Obtiene insights rápidos de IA para un evento al hacer hover
     ACTUALIZADO: Usa Grok/Groq/Gemini con fallback automático
-    """
-    try:
-        from services.ai_manager import AIServiceManager
-
-        title = event_data.get("title", "")
-        venue = event_data.get("venue_name", "")
-        category = event_data.get("category", "")
-        location = event_data.get("location", "Buenos Aires")
-
-        # 💾 Crear cache key
-        cache_key = f"{title}:{venue}:{category}"
-
-        # ✅ Revisar caché primero
-        if cache_key in _insights_cache:
-            logger.info(f"✅ Insight CACHEADO para: {title[:40]}...")
-            return _insights_cache[cache_key]
-
-        logger.info(f"🎭 Generando insight NUEVO con IA para: {title[:40]}...")
 
-        # 🎯 Prompt COMPLETO con toda la información rica
-        prompt = f"""Evento: {title}
-Lugar: {venue}
-Categoría: {category}
-Ciudad: {location}
-
-Dame información SUPER CONCISA y ÚTIL sobre este evento.
-
-FORMATO de respuesta (JSON):
-{{
-    "quick_insight": "1 línea sobre qué esperar del evento",
-    "venue_tip": "1 tip sobre el lugar",
-    "transport": "Colectivos/transporte que llegan ahí",
-    "nearby": "1 lugar copado para ir antes/después",
-    "vibe": "En 3 palabras el ambiente",
-    "pro_tip": "1 consejo que solo un local sabría",
-    "best_for": "Para quién es ideal este evento"
-}}
+    💡 Se sirve del store de insights precalculados (services/event_insights);
+    solo se genera on-demand si el evento cambió o el job no lo cubrió.
+    ?stream=true → misma respuesta que /event-insight-stream (SSE token a token)
+    """
+    if stream:
+        return await get_event_insight_stream(event_data)
 
-Respondé SOLO el JSON, sin explicaciones adicionales."""
+    try:
+        from services.event_insights import INSIGHT, event_insights
+        from services.gemini_priority_queue import Priority
 
-        # Usar AIServiceManager con Grok/Groq (ultra rápido)
-        manager = AIServiceManager()
-        response_text = await manager.generate(
-            prompt=prompt,
-            temperature=0.7,
-            use_fallback=True
+        insight_data = await event_insights.get_or_generate(
+            INSIGHT, event_data,
+            priority=Priority.CRITICAL  # Análisis Inteligente primero en el scheduler
         )
 
-        if not response_text:
+        if insight_data is None:
             logger.warning("⚠️ No AI response, usando fallback")
             fallback = generate_fallback_insight(event_data)
             return {
@@ -80,34 +47,13 @@ Respondé SOLO el JSON, sin explicaciones adicionales."""
                 "powered_by": "Fallback"
             }
 
-        # Parsear JSON
-        try:
-            json_str = response_text.strip()
-            # Limpiar markdown si viene
-            if json_str.startswith("```json"):
-                json_str = json_str[7:]
-            if json_str.startswith("```"):
-                json_str = json_str[3:]
-            if json_str.endswith("```"):
-                json_str = json_str[:-3]
-
-            insight_data = json.loads(json_str.strip())
-        except json.JSONDecodeError as e:
-            logger.warning(f"⚠️ JSON parse error, usando fallback: {e}")
-            # Si falla el parseo, usar fallback
-            insight_data = generate_fallback_insight(event_data)
-
-        result = {
+        return {
             "success": True,
             "event_id": event_data.get("id", "unknown"),
             "insight": insight_data,
             "powered_by": "Grok AI"
         }
 
-        # 💾 Guardar en caché
-        _insights_cache[cache_key] = result
-        return result
-
     except Exception as e:
         logger.error(f"Error getting AI insight: {e}")
         return {
@@ -208,69 +154,51 @@ async def quick_hover_info(event_id: str):
 @router.post("/event-insight-stream")
 async def get_event_insight_stream(event_data: Dict[str, Any]):
     """
-    🌊 STREAMING VERSION - Insights aparecen progresivamente
-    ACTUALIZADO: Usa Grok/Groq/Gemini con fallback automático
+    🌊 STREAMING VERSION - El texto de la IA llega token a token
+
+    Eventos SSE:
+    - start: arrancó el análisis
+    - token: {"text": fragmento} a medida que el provider lo genera
+    - complete: {"insight": JSON parseado, "ttft_ms", "total_ms"} al terminar
+      ({"stored": true} sin tokens si el insight ya estaba precalculado)
+    - error: el stream se cortó a mitad de camino ({"fallback": insight genérico})
     """
     async def event_stream():
-        try:
-            from services.ai_manager import AIServiceManager
-
-            title = event_data.get("title", "")
-            venue = event_data.get("venue_name", "")
-            category = event_data.get("category", "")
-            location = event_data.get("location", "Buenos Aires")
+        from services.ai_manager import AIServiceManager
+        from services.event_insights import (
+            INSIGHT, build_insight_prompt, event_insights, parse_insight_json
+        )
 
+        started = time.perf_counter()
+        ttft_ms = None
+        parts = []
+        try:
             # Enviar evento de inicio
             yield f"data: {json.dumps({'type': 'start', 'message': 'Analizando evento...'})}\n\n"
-            await asyncio.sleep(0.1)
-
-            # Prompt específico
-            prompt = f"""
-            Evento: {title}
-            Lugar: {venue}
-            Categoría: {category}
-            Ciudad: {location}
-
-            Dame información SUPER CONCISA y ÚTIL sobre este evento.
-
-            FORMATO de respuesta (JSON):
-            {{
-                "quick_insight": "1 línea sobre qué esperar del evento",
-                "venue_tip": "1 tip sobre el lugar",
-                "transport": "Colectivos que llegan ahí",
-                "nearby": "1 lugar copado para ir antes/después",
-                "vibe": "En 3 palabras el ambiente",
-                "pro_tip": "1 consejo que solo un local sabría",
-                "best_for": "Para quién es ideal este evento"
-            }}
 
-            Respondé SOLO el JSON, sin explicaciones adicionales.
-            """
+            # 💡 Precalculado: nada que streamear (hash sobre la fila canónica de la DB)
+            event = await event_insights.resolve(event_data)
+            stored = await asyncio.to_thread(event_insights.lookup, INSIGHT, event)
+            if stored is not None:
+                yield f"data: {json.dumps({'type': 'complete', 'insight': stored, 'stored': True})}\n\n"
+                return
 
-            # Generar con AIServiceManager
             manager = AIServiceManager()
-            response_text = await manager.generate(
-                prompt=prompt,
+            async for chunk in manager.generate_stream(
+                prompt=build_insight_prompt(event),
                 temperature=0.7,
                 use_fallback=True
-            )
+            ):
+                if ttft_ms is None:
+                    ttft_ms = round((time.perf_counter() - started) * 1000)
+                parts.append(chunk)
+                yield f"data: {json.dumps({'type': 'token', 'text': chunk})}\n\n"
 
-            if not response_text:
-                fallback = generate_fallback_insight(event_data)
-                yield f"data: {json.dumps({'type': 'complete', 'insight': fallback})}\n\n"
-                return
-
-            # Parsear JSON final
+            response_text = ''.join(parts)
             try:
-                json_str = response_text.strip()
-                if json_str.startswith("```json"):
-                    json_str = json_str[7:]
-                if json_str.startswith("```"):
-                    json_str = json_str[3:]
-                if json_str.endswith("```"):
-                    json_str = json_str[:-3]
-
-                insight_data = json.loads(json_str.strip())
+                insight_data = parse_insight_json(response_text)
+                # 💾 Mismo store que el endpoint sin streaming
+                await asyncio.to_thread(event_insights.save, INSIGHT, event, insight_data)
             except json.JSONDecodeError:
                 insight_data = {
                     "quick_insight": response_text[:100] if response_text else "Evento interesante",
@@ -280,11 +208,17 @@ async def get_event_insight_stream(event_data: Dict[str, Any]):
                 }
 
             # Enviar resultado final
-            yield f"data: {json.dumps({'type': 'complete', 'insight': insight_data})}\n\n"
+            total_ms = round((time.perf_counter() - started) * 1000)
+            yield f"data: {json.dumps({'type': 'complete', 'insight': insight_data, 'ttft_ms': ttft_ms, 'total_ms': total_ms})}\n\n"
 
         except Exception as e:
-            logger.error(f"Error en streaming: {e}")
             fallback = generate_fallback_insight(event_data)
+            if not parts:
+                # Ningún provider arrancó: mismo resultado que sin streaming
+                logger.warning(f"⚠️ Stream sin respuesta de IA, usando fallback: {e}")
+                yield f"data: {json.dumps({'type': 'complete', 'insight': fallback})}\n\n"
+                return
+            logger.error(f"Error en streaming: {e}")
             yield f"data: {json.dumps({'type': 'error', 'error': str(e), 'fallback': fallback})}\n\n"
 
     return StreamingResponse(
@@ -15,6 +15,7 @@ import asyncio
 
 # Import cultural context
 from ai.cultural_context import detect_user_type, get_cultural_prompt, localize_event_description
+from services.intent_parser import intent_parser
 
 router = APIRouter()
 
@@ -268,6 +269,36 @@ async def get_smart_recommendations(request: SmartRecommendationRequest):
             detail=f"Error generando recomendaciones: {str(e)}"
         )
 
+def _fast_path_intent(parsed) -> Dict[str, Any]:
+    """Respuesta de analyze_user_intent armada con el parser determinístico (sin Gemini)"""
+    if parsed.subcategory == 'theater':
+        category = 'theater'
+    elif parsed.category == 'nightlife':
+        category = 'party'
+    elif parsed.category in ('music', 'sports', 'cultural'):
+        category = parsed.category
+    else:
+        category = 'general'
+
+    date_preference = parsed.date_preference
+    if date_preference not in ('today', 'tomorrow', 'weekend', 'next_week'):
+        date_preference = 'flexible'
+
+    return {
+        "intent": "search_events",
+        "confidence": parsed.confidence,
+        "extracted_filters": {
+            "category": category,
+            "date_preference": date_preference,
+            "date_range": {"from": parsed.date_from, "to": parsed.date_to} if parsed.date_from else None,
+            "price_preference": parsed.price_preference or 'any',
+            "location": parsed.location
+        },
+        "suggested_search_strategy": "exact_match" if parsed.category else "broad_search",
+        "resolved_by": "fast_path"
+    }
+
+
 @router.post("/analyze-intent")
 async def analyze_user_intent(request: Dict[str, Any]):
     """
@@ -277,8 +308,13 @@ async def analyze_user_intent(request: Dict[str, Any]):
     query = request.get('query', '')
     context = request.get('context', {})
     
+    # ⚡ Consultas simples ("rock en Córdoba este finde") no necesitan a Gemini
+    parsed = intent_parser.parse(query)
+    if parsed.confident:
+        return _fast_path_intent(parsed)
+    
     if not GEMINI_API_KEY:
-        return {"intent": "general_search", "confidence": 0.5}
+        return {"intent": "general_search", "confidence": 0.5, "resolved_by": "fallback"}
     
     try:
         prompt = f"""
@@ -309,9 +345,10 @@ async def analyze_user_intent(request: Dict[str, Any]):
         
         try:
             result = json.loads(response.text)
+            result["resolved_by"] = "llm"
             return result
         except:
-            return {"intent": "general_search", "confidence": 0.5}
+            return {"intent": "general_search", "confidence": 0.5, "resolved_by": "fallback"}
             
     except Exception as e:
-        return {"intent": "general_search", "confidence": 0.1, "error": str(e)}
\ No newline at end of file
+        return {"intent": "general_search", "confidence": 0.1, "error": str(e), "resolved_by": "fallback"}
\ No newline at end of file
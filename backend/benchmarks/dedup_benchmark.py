@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+🧹 BENCHMARK DEDUP - DedupEngine vs deduplicate_events_by_title original (O(n²))
+
+Usa los eventos grabados en data/cache/images/eventos_*.json y
+data/scrapper_results/**.json como fixtures, arma lotes de 100, 1k y 10k
+eventos y verifica que ambos marquen EXACTAMENTE los mismos duplicados.
+
+Uso:
+    python benchmarks/dedup_benchmark.py
+    python benchmarks/dedup_benchmark.py --sizes 100 1000 10000 --skip-legacy-above 20000
+"""
+
+import argparse
+import copy
+import glob
+import json
+import os
+import random
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from services.dedup_engine import DedupEngine, SOURCE_PRIORITY  # noqa: E402
+
+FIXTURE_GLOBS = [
+    'data/cache/images/eventos_*.json',
+    'data/scrapper_results/**/*.json',
+]
+
+FIXTURE_SOURCES = list(SOURCE_PRIORITY) + ['eventbrite_scraper', 'meetup_scraper']
+
+
+def legacy_deduplicate_events_by_title(events: list) -> list:
+    """Copia fiel del main.deduplicate_events_by_title original (referencia O(n²))"""
+    if not events:
+        return events
+
+    def get_source_priority(source: str) -> int:
+        return SOURCE_PRIORITY.get(source, 1)
+
+    def calculate_title_similarity(title1: str, title2: str) -> float:
+        if not title1 or not title2:
+            return 0.0
+        t1 = title1.lower().replace('-', ' ').replace('(', '').replace(')', '')
+        t2 = title2.lower().replace('-', ' ').replace('(', '').replace(')', '')
+        words1 = set(t1.split())
+        words2 = set(t2.split())
+        if not words1 or not words2:
+            return 0.0
+        common = words1 & words2
+        total_unique = words1 | words2
+        return len(common) / len(total_unique) if total_unique else 0.0
+
+    def is_better_event(event1: dict, event2: dict) -> bool:
+        priority1 = get_source_priority(event1.get('source', ''))
+        priority2 = get_source_priority(event2.get('source', ''))
+        if priority1 != priority2:
+            return priority1 > priority2
+        has_image1 = bool(event1.get('image_url'))
+        has_image2 = bool(event2.get('image_url'))
+        if has_image1 != has_image2:
+            return has_image1
+        return len(event1.get('title', '')) > len(event2.get('title', ''))
+
+    all_events = []
+    for event in events:
+        title = event.get('title', '')
+        event['is_duplicate'] = False
+        event['duplicate_of'] = None
+        for existing in all_events:
+            if existing.get('is_duplicate'):
+                continue
+            similarity = calculate_title_similarity(title, existing.get('title', ''))
+            if similarity >= 0.80:
+                if is_better_event(event, existing):
+                    existing['is_duplicate'] = True
+                    existing['duplicate_of'] = event.get('id')
+                else:
+                    event['is_duplicate'] = True
+                    event['duplicate_of'] = existing.get('id')
+                break
+        all_events.append(event)
+    return all_events
+
+
+def load_fixture_events() -> list:
+    """Carga eventos grabados y los normaliza al formato de /api/events/stream"""
+    raw_events = []
+    for pattern in FIXTURE_GLOBS:
+        for path in sorted(glob.glob(os.path.join(BACKEND_DIR, pattern), recursive=True)):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except Exception:
+                continue
+            if isinstance(data, dict):
+                data = data.get('eventos') or data.get('events') or []
+            if isinstance(data, list):
+                raw_events.extend(e for e in data if isinstance(e, dict))
+
+    rng = random.Random(42)
+    events = []
+    for i, raw in enumerate(raw_events):
+        title = raw.get('titulo') or raw.get('nombre') or raw.get('title') or ''
+        events.append({
+            'id': f'fx-{i}',
+            'title': title,
+            'image_url': raw.get('image_url') or '',
+            'source': raw.get('source') or rng.choice(FIXTURE_SOURCES),
+        })
+    return events
+
+
+def build_batch(fixtures: list, size: int, seed: int) -> list:
+    """
+    Lote de `size` eventos. Si faltan fixtures se agregan variantes realistas
+    (mismo título con sufijos, otra fuente, con/sin imagen) para generar casi-duplicados.
+    """
+    rng = random.Random(seed)
+    batch = []
+    suffixes = ['', ' - Edición 2025', ' (Sold Out)', ' en vivo', ' Tour', ' 2da fecha']
+    while len(batch) < size:
+        base = rng.choice(fixtures)
+        title = base['title']
+        if rng.random() < 0.35:
+            title = title + rng.choice(suffixes)
+        batch.append({
+            'id': f"{base['id']}-{len(batch)}",
+            'title': title,
+            'image_url': base['image_url'] if rng.random() < 0.7 else '',
+            'source': rng.choice(FIXTURE_SOURCES),
+        })
+    return batch
+
+
+def snapshot(events: list) -> list:
+    return [(e['id'], e['is_duplicate'], e['duplicate_of']) for e in events]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark DedupEngine vs dedup O(n²)')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--skip-legacy-above', type=int, default=20000,
+                        help='No correr la versión O(n²) para lotes mayores')
+    args = parser.parse_args()
+
+    fixtures = load_fixture_events()
+    print(f"📂 Fixtures cargados: {len(fixtures)} eventos grabados")
+    print("=" * 72)
+    print(f"{'n':>7} | {'legacy':>10} | {'engine':>10} | {'speedup':>8} | {'dups':>6} | idéntico")
+    print("-" * 72)
+
+    engine = DedupEngine()
+    all_identical = True
+
+    for size in args.sizes:
+        batch = build_batch(fixtures, size, seed=size)
+
+        engine_events = copy.deepcopy(batch)
+        start = time.perf_counter()
+        engine.mark_duplicates(engine_events)
+        engine_time = time.perf_counter() - start
+        dups = sum(1 for e in engine_events if e['is_duplicate'])
+
+        if size <= args.skip_legacy_above:
+            legacy_events = copy.deepcopy(batch)
+            start = time.perf_counter()
+            legacy_deduplicate_events_by_title(legacy_events)
+            legacy_time = time.perf_counter() - start
+            identical = snapshot(legacy_events) == snapshot(engine_events)
+            all_identical &= identical
+            speedup = f"{legacy_time / engine_time:7.1f}x" if engine_time else '      -'
+            print(f"{size:>7} | {legacy_time * 1000:>8.1f}ms | {engine_time * 1000:>8.1f}ms | "
+                  f"{speedup} | {dups:>6} | {'✅' if identical else '❌'}")
+        else:
+            print(f"{size:>7} | {'-':>10} | {engine_time * 1000:>8.1f}ms | {'-':>8} | {dups:>6} | (sin referencia)")
+
+    print("=" * 72)
+    print(f"Comparaciones de la última corrida: {engine.last_stats.get('comparisons')}")
+    return 0 if all_identical else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+🖼️ BENCHMARK GLOBAL IMAGE SERVICE - improve_event_images original vs LRU + reglas precompiladas
+
+Arma lotes sintéticos de eventos (títulos/venues/descripciones realistas con
+imágenes buenas, pobres y vacías), corre la implementación original (dict sin
+límite, listas reconstruidas en cada llamada) y la actual, y verifica que ambas
+asignen EXACTAMENTE las mismas imágenes.
+
+Uso:
+    python benchmarks/global_image_benchmark.py
+    python benchmarks/global_image_benchmark.py --sizes 1000 10000 --max-entries 2000
+"""
+
+import argparse
+import asyncio
+import copy
+import hashlib
+import os
+import random
+import re
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from services.global_image_service import GlobalImageService  # noqa: E402
+
+TITLES = [
+    'Concierto de Rock Nacional', 'Festival de Jazz en el Parque', 'Cata de vinos Malbec',
+    'Hackathon de innovación digital', 'Obra de teatro: La Casa de Bernarda Alba',
+    'Fiesta de fin de año', 'Partido de fútbol amistoso', 'Workshop de networking para startups',
+    'Exposición de arte contemporáneo', 'Feria gastronómica de cocina regional',
+    'Trekking y camping en la montaña', 'Seminario de educación financiera', 'Stand-up comedy',
+    'Noche de tango', 'Maratón solidaria', 'Muestra de fotografía', 'Cine al aire libre',
+]
+SUFFIXES = ['', ' 2025', ' - Edición especial', ' (Sold Out)', ' en vivo', ' Tour', ' 2da fecha']
+VENUES = ['Luna Park', 'Teatro Colón', 'Centro Cultural Kirchner', 'Estadio Único', 'Bodega La Rural',
+          'Parque Centenario', 'Palacio de los Deportes', 'Sala Caras y Caretas', '']
+CATEGORIES = ['music', 'Música', 'sports', 'cultural', 'teatro', 'tech', 'fiesta', 'Gastronomía', '', None]
+IMAGES = [
+    '', None,
+    'https://cdn.evento.com/media/events/banner-{n}.jpg',
+    'https://images.unsplash.com/photo-{n}?w=800&h=600',
+    'https://images.unsplash.com/photo-{n}?w=100&h=100',
+    'https://static.tickets.com/img/placeholder.png',
+    'https://cdn.evento.com/logos/logo-{n}.png',
+    'https://cdn.evento.com/media/{n}',
+]
+
+
+def build_batch(size: int, seed: int) -> list:
+    rng = random.Random(seed)
+    events = []
+    for i in range(size):
+        title = rng.choice(TITLES) + rng.choice(SUFFIXES)
+        image = rng.choice(IMAGES)
+        events.append({
+            'id': f'ev-{i}',
+            'title': title,
+            'category': rng.choice(CATEGORIES),
+            'venue_name': rng.choice(VENUES),
+            'country': 'AR',
+            'description': f"{title} en {rng.choice(VENUES) or 'la ciudad'}. Entradas limitadas #{rng.randint(0, size // 4)}",
+            'image_url': image.format(n=rng.randint(0, 500)) if image else image,
+        })
+    return events
+
+
+class LegacyGlobalImageService(GlobalImageService):
+    """
+    Copia fiel de las reglas originales (referencia): dict sin límite y listas/mapeos
+    reconstruidos en cada llamada. Comparte _generate_contextual_image con la versión
+    actual (allí solo cambió dónde vive la tabla de fotos).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.cache = {}
+
+    def is_good_image(self, image_url):
+        if not image_url or image_url.strip() == '':
+            return False
+        bad_patterns = [
+            'placeholder', 'default', 'avatar', 'profile',
+            'logo', 'icon', 'thumb', 'small', '50x50', '100x100',
+            'no-image', 'missing', 'blank', 'empty'
+        ]
+        url_lower = image_url.lower()
+        for pattern in bad_patterns:
+            if pattern in url_lower:
+                return False
+        valid_extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif']
+        has_valid_ext = any(ext in url_lower for ext in valid_extensions)
+        if 'w=' in url_lower or 'width=' in url_lower:
+            width_match = re.search(r'w[idth]*=(\d+)', url_lower)
+            if width_match and int(width_match.group(1)) < 200:
+                return False
+        return has_valid_ext or 'unsplash' in url_lower or 'pexels' in url_lower
+
+    def normalize_category(self, category):
+        if not category:
+            return 'default'
+        category_lower = category.lower()
+        category_mapping = {
+            'música': 'music', 'musica': 'music', 'concierto': 'music',
+            'deportes': 'sports', 'deporte': 'sports', 'futbol': 'sports',
+            'cultura': 'cultural', 'cultural': 'cultural', 'arte': 'cultural',
+            'tecnología': 'tech', 'tecnologia': 'tech', 'tech': 'tech',
+            'gastronomía': 'food', 'gastronomia': 'food', 'comida': 'food',
+            'teatro': 'theater', 'obra': 'theater', 'espectáculo': 'theater',
+            'fiesta': 'party', 'party': 'party', 'celebración': 'party',
+            'negocio': 'business', 'empresarial': 'business', 'conferencia': 'business',
+            'educación': 'education', 'educacion': 'education', 'curso': 'education'
+        }
+        return category_mapping.get(category_lower, category_lower if category_lower in self.category_keywords else 'default')
+
+    def _analyze_event_content(self, content, category=None):
+        theme_indicators = {
+            "wine": ["vino", "wine", "bodega", "winery", "malbec", "degustación", "vineyard", "maridaje", "cata"],
+            "concert": ["concierto", "concert", "música", "music", "band", "festival", "rock", "jazz", "pop", "live"],
+            "food": ["gastronom", "comida", "food", "restaurant", "cocina", "chef", "degustación", "culinar"],
+            "sports": ["deporte", "sport", "fútbol", "football", "tennis", "basketball", "stadium", "match"],
+            "cultural": ["cultural", "arte", "art", "museo", "museum", "exposición", "gallery", "teatro"],
+            "business": ["business", "empresa", "conference", "networking", "workshop", "seminario", "corporate"],
+            "outdoor": ["outdoor", "aire libre", "parque", "park", "hiking", "camping", "nature", "aventura"],
+            "party": ["fiesta", "party", "celebración", "celebration", "baile", "dance", "nightlife"],
+            "tech": ["tech", "technology", "startup", "digital", "innovation", "hackathon", "coding", "software"],
+            "theater": ["teatro", "theater", "obra", "drama", "performance", "espectáculo", "musical"]
+        }
+        theme_scores = {}
+        for theme, keywords in theme_indicators.items():
+            score = sum(1 for keyword in keywords if keyword in content)
+            if score > 0:
+                theme_scores[theme] = score
+        if theme_scores:
+            return max(theme_scores, key=theme_scores.get)
+        return self.normalize_category(category) if category else 'default'
+
+    def get_event_image(self, title, category=None, venue=None, country=None, description=None):
+        try:
+            cache_key = hashlib.md5(f"{title}_{category}_{venue}_{description}".encode()).hexdigest()
+            if cache_key in self.cache:
+                return self.cache[cache_key]
+            full_content = f"{title} {description or ''} {venue or ''}".lower()
+            specific_theme = self._analyze_event_content(full_content, category)
+            contextual_image = self._generate_contextual_image(title, specific_theme, full_content)
+            self.cache[cache_key] = contextual_image
+            return contextual_image
+        except Exception:
+            return self.default_images.get('default')
+
+    async def improve_event_images(self, events):
+        improved_events = []
+        for event in events:
+            try:
+                current_image = event.get('image_url', '')
+                if not self.is_good_image(current_image):
+                    event['image_url'] = self.get_event_image(
+                        title=event.get('title', ''),
+                        category=event.get('category', ''),
+                        venue=event.get('venue_name', ''),
+                        country=event.get('country', ''),
+                        description=event.get('description', '')
+                    )
+                    event['image_improved'] = True
+                else:
+                    event['image_improved'] = False
+                improved_events.append(event)
+            except Exception:
+                improved_events.append(event)
+        return improved_events
+
+
+def snapshot(events: list) -> list:
+    return [(e['id'], e['image_url'], e['image_improved']) for e in events]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark GlobalImageService: original vs LRU + reglas precompiladas')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--max-entries', type=int, default=None,
+                        help='Límite de entradas de la LRU (por defecto GLOBAL_IMAGE_CACHE_MAX_ENTRIES)')
+    args = parser.parse_args()
+
+    print("=" * 84)
+    print(f"{'n':>7} | {'legacy':>10} | {'actual':>10} | {'speedup':>8} | {'mejoradas':>9} | "
+          f"{'legacy dict':>11} | {'LRU':>6} | idéntico")
+    print("-" * 84)
+
+    all_identical = True
+    service = None
+    for size in args.sizes:
+        batch = build_batch(size, seed=size)
+
+        legacy = LegacyGlobalImageService()
+        legacy_events = copy.deepcopy(batch)
+        start = time.perf_counter()
+        asyncio.run(legacy.improve_event_images(legacy_events))
+        legacy_time = time.perf_counter() - start
+
+        service = GlobalImageService(**({'max_entries': args.max_entries} if args.max_entries else {}))
+        events = copy.deepcopy(batch)
+        start = time.perf_counter()
+        asyncio.run(service.improve_event_images(events))
+        current_time = time.perf_counter() - start
+
+        identical = snapshot(legacy_events) == snapshot(events)
+        all_identical &= identical
+        improved = sum(1 for e in events if e['image_improved'])
+        speedup = f"{legacy_time / current_time:7.1f}x" if current_time else '      -'
+        print(f"{size:>7} | {legacy_time * 1000:>8.1f}ms | {current_time * 1000:>8.1f}ms | {speedup} | "
+              f"{improved:>9} | {len(legacy.cache):>11} | {len(service.cache):>6} | {'✅' if identical else '❌'}")
+
+    print("=" * 84)
+    if service is not None:
+        print(f"Stats LRU de la última corrida: {service.get_stats()}")
+    return 0 if all_identical else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
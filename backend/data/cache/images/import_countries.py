@@ -15,7 +15,7 @@ if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
 
 # Agregar backend al path
-backend_path = Path(__file__).parent.parent.parent
+backend_path = Path(__file__).resolve().parents[3]  # backend/data/cache/images -> backend
 sys.path.insert(0, str(backend_path))
 
 # Cargar variables de entorno
@@ -26,6 +26,9 @@ if env_path.exists():
 
 import pymysql
 
+from services.location_index import index_event
+from services.event_bulk_loader import natural_key_fields
+
 # Coordenadas base por país/ciudad (centros aproximados)
 CITY_COORDS = {
     # Argentina
@@ -286,21 +289,25 @@ def insert_event(cursor, evento_data: Dict) -> bool:
             # Ya existe
             return False
 
-        sql = '''
+        # Clave natural (si la columna ya fue migrada)
+        extra = natural_key_fields(cursor, evento_data)
+
+        sql = f'''
             INSERT INTO events (
-                id, title, description, start_datetime, end_datetime,
+                id, {''.join(column + ', ' for column in extra)}title, description, start_datetime, end_datetime,
                 venue_name, venue_address, latitude, longitude,
                 category, subcategory, price, is_free,
                 external_id, source, image_url, event_url,
                 city, country, created_at, updated_at, scraped_at
             ) VALUES (
-                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
+                %s, {'%s, ' * len(extra)}%s, %s, %s, %s, %s, %s, %s, %s, %s,
                 %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
             )
         '''
 
         cursor.execute(sql, (
             evento_data['id'],
+            *extra.values(),
             evento_data['title'],
             evento_data['description'],
             evento_data['start_datetime'],
@@ -323,6 +330,9 @@ def insert_event(cursor, evento_data: Dict) -> bool:
             evento_data['updated_at'],
             evento_data['scraped_at']
         ))
+
+        # Mantener índice de ubicaciones (event_location_keys)
+        index_event(cursor, evento_data['id'], evento_data)
         return True
     except pymysql.err.IntegrityError:
         return False
@@ -13,10 +13,15 @@ Uso:
     python fase3_import.py                    # Importa todos los JSONs nuevos
     python fase3_import.py --reset            # Reinicia log y reprocesa todo
     python fase3_import.py --dry-run          # Preview sin importar
+    python fase3_import.py --row-by-row       # Modo anterior: 2 SELECT + 1 INSERT por evento
+    python fase3_import.py --batch-size 1000  # Filas por INSERT multi-row (default 500)
+    python fase3_import.py --no-insights      # Sin precalcular insights de IA al terminar
 """
 
+import argparse
 import json
 import pymysql
+from pymysql.constants import CLIENT
 import sys
 import os
 from pathlib import Path
@@ -38,6 +43,16 @@ ENV_FILE = BACKEND_DIR / '.env'
 if ENV_FILE.exists():
     load_dotenv(ENV_FILE)
 
+# Índice normalizado de ubicaciones (services/location_index.py)
+sys.path.insert(0, str(BACKEND_DIR))
+from services.location_index import index_event, location_index_exists
+from services.event_bulk_loader import (
+    DEFAULT_BATCH_SIZE, EventBulkLoader, natural_key_exists, natural_key_fields
+)
+
+# Índice de duplicados en memoria (import_dedup.py, mismo directorio)
+from import_dedup import ImportDedupIndex
+
 # Configuración MySQL desde .env
 DB_CONFIG = {
     'host': os.getenv('MYSQL_HOST', 'localhost'),
@@ -46,7 +61,9 @@ DB_CONFIG = {
     'password': os.getenv('MYSQL_PASSWORD', ''),
     'database': os.getenv('MYSQL_DATABASE', 'events'),
     'charset': 'utf8mb4',
-    'cursorclass': pymysql.cursors.DictCursor
+    'cursorclass': pymysql.cursors.DictCursor,
+    # Mismo rowcount en toda conexión que usa EventBulkLoader
+    'client_flag': CLIENT.FOUND_ROWS
 }
 
 # Archivo de log para tracking
@@ -55,6 +72,16 @@ LOG_FILE = SCRIPT_DIR / '.imported_files.log'
 # Directorio de JSONs parseados
 PARSED_DIR = SCRIPT_DIR.parent.parent / 'scrapper_results' / 'parsed'
 
+# Columnas de events que escribe este importador (id/natural_key los genera el loader)
+LOAD_COLUMNS = (
+    'title', 'description', 'start_datetime', 'end_datetime',
+    'venue_name', 'venue_address', 'city', 'neighborhood', 'country',
+    'latitude', 'longitude',
+    'category', 'subcategory',
+    'price', 'is_free',
+    'image_url', 'event_url', 'source',
+)
+
 
 # ========== FUNCIONES AUXILIARES ==========
 
@@ -279,9 +306,12 @@ def insert_event(cursor, evento_data: Dict) -> tuple:
         import uuid
         event_id = str(uuid.uuid4())
 
-        insert_sql = '''
+        # Clave natural (si la columna ya fue migrada): el UNIQUE rechaza duplicados
+        extra = natural_key_fields(cursor, evento_data)
+
+        insert_sql = f'''
             INSERT INTO events (
-                id,
+                id, {''.join(column + ', ' for column in extra)}
                 title, description, start_datetime, end_datetime,
                 venue_name, venue_address, city, neighborhood, country,
                 latitude, longitude,
@@ -290,7 +320,7 @@ def insert_event(cursor, evento_data: Dict) -> tuple:
                 image_url, event_url, source,
                 created_at, updated_at
             ) VALUES (
-                %s,
+                %s, {'%s, ' * len(extra)}
                 %s, %s, %s, %s,
                 %s, %s, %s, %s, %s,
                 %s, %s,
@@ -303,6 +333,7 @@ def insert_event(cursor, evento_data: Dict) -> tuple:
 
         cursor.execute(insert_sql, (
             event_id,
+            *extra.values(),
             evento_data['title'],
             evento_data['description'],
             evento_data['start_datetime'],
@@ -323,13 +354,69 @@ def insert_event(cursor, evento_data: Dict) -> tuple:
             evento_data['source_api']
         ))
 
+        # Mantener índice de ubicaciones (event_location_keys)
+        index_event(cursor, event_id, evento_data)
+
         return (True, 'inserted')
 
+    except pymysql.err.IntegrityError:
+        # La clave natural ya existe (mismo título/ciudad/fecha con otra capitalización)
+        return (False, 'duplicate_exact')
     except Exception as e:
         error_msg = str(e)[:80]
         return (False, f'error:{error_msg}')
 
 
+def to_load_row(evento_data: Dict) -> Dict:
+    """Adapta un evento de process_evento() a las columnas de LOAD_COLUMNS"""
+    return {
+        **evento_data,
+        'price': str(evento_data['price']),
+        'source': evento_data['source_api']
+    }
+
+
+def import_events_indexed(cursor, eventos: List[Dict], dedup_index: ImportDedupIndex,
+                          loader: EventBulkLoader) -> dict:
+    """
+    Deduplica contra el índice en memoria y escribe los sobrevivientes en lote
+
+    - Precarga (una vez por corrida) los buckets (ciudad, fecha) de estos eventos
+    - Cada candidato se compara con la BD y con los aceptados del mismo archivo
+    - Los sobrevivientes van al bulk loader (INSERT multi-row + upsert por clave natural)
+    """
+    dedup_index.preload(cursor, [(e['city'], e['start_datetime']) for e in eventos])
+
+    survivors = []
+    duplicate_exact = 0
+    duplicate_fuzzy = 0
+
+    for evento_data in eventos:
+        reason = dedup_index.check(evento_data['title'], evento_data['city'], evento_data['start_datetime'])
+        if reason == 'duplicate_exact':
+            duplicate_exact += 1
+        elif reason:
+            duplicate_fuzzy += 1
+        else:
+            dedup_index.add(evento_data['title'], evento_data['city'], evento_data['start_datetime'])
+            survivors.append(evento_data)
+
+    inserted_before = loader.stats['inserted']
+    loader.load(to_load_row(e) for e in survivors)
+    loader.flush()
+    insertados = loader.stats['inserted'] - inserted_before
+
+    # Conflictos de clave natural que el índice no vio (ej: misma clave, distinto espaciado)
+    duplicate_exact += len(survivors) - insertados
+
+    return {
+        'insertados': insertados,
+        'duplicate_exact': duplicate_exact,
+        'duplicate_fuzzy': duplicate_fuzzy,
+        'errores': 0
+    }
+
+
 def find_parsed_json_files() -> List[Path]:
     """Encuentra todos los JSONs parseados en scrapper_results/parsed/"""
     if not PARSED_DIR.exists():
@@ -349,8 +436,15 @@ def find_parsed_json_files() -> List[Path]:
     return valid_jsons
 
 
-def process_json_file(filepath: Path, cursor, dry_run: bool = False) -> dict:
-    """Procesa un archivo JSON parseado"""
+def process_json_file(filepath: Path, cursor, dry_run: bool = False,
+                      dedup_index: Optional[ImportDedupIndex] = None,
+                      loader: Optional[EventBulkLoader] = None) -> dict:
+    """
+    Procesa un archivo JSON parseado
+
+    Con dedup_index + loader usa el índice en memoria + carga en lote;
+    sin ellos, el modo anterior de insert_event() fila por fila.
+    """
     relative_path = filepath.relative_to(PARSED_DIR)
     print(f"\n📄 {relative_path}")
 
@@ -388,6 +482,15 @@ def process_json_file(filepath: Path, cursor, dry_run: bool = False) -> dict:
             'errores': 0
         }
 
+    if dedup_index is not None and loader is not None:
+        eventos_data = [process_evento(evento, filepath) for evento in events]
+        stats = import_events_indexed(cursor, [e for e in eventos_data if e], dedup_index, loader)
+        stats['errores'] += sum(1 for e in eventos_data if not e)
+
+        total_duplicados = stats['duplicate_exact'] + stats['duplicate_fuzzy']
+        print(f"  ✅ {stats['insertados']} nuevos | ⏭️  {total_duplicados} duplicados | ❌ {stats['errores']} errores")
+        return stats
+
     # Contadores
     insertados = 0
     duplicate_exact = 0
@@ -427,11 +530,29 @@ def process_json_file(filepath: Path, cursor, dry_run: bool = False) -> dict:
     }
 
 
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Flags de la línea de comandos (ver docstring del módulo)"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--reset', action='store_true', help='Reiniciar log y reprocesar todo')
+    parser.add_argument('--dry-run', action='store_true', help='Preview sin importar')
+    parser.add_argument('--row-by-row', action='store_true', help='Modo anterior: un INSERT por evento')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f'Filas por INSERT multi-row (default {DEFAULT_BATCH_SIZE})')
+    parser.add_argument('--no-insights', action='store_true', help='Sin precalcular insights de IA')
+    args = parser.parse_args(argv)
+    if args.batch_size < 1:
+        parser.error('--batch-size debe ser un entero positivo')
+    return args
+
+
 def main():
     """Main function"""
     # Parsear argumentos
-    reset_log = '--reset' in sys.argv
-    dry_run = '--dry-run' in sys.argv
+    args = parse_args()
+    reset_log = args.reset
+    dry_run = args.dry_run
+    row_by_row = args.row_by_row
+    batch_size = args.batch_size
 
     print("=" * 80)
     print("🚀 FASE 3: IMPORTACIÓN A MYSQL")
@@ -479,6 +600,13 @@ def main():
     try:
         connection = get_db_connection()
         cursor = connection.cursor()
+        if not location_index_exists(cursor):
+            print("⚠️  Tabla event_location_keys sin migrar: no se indexan ubicaciones "
+                  "(python -m services.location_index --migrate --backfill)")
+        if not row_by_row and not natural_key_exists(cursor):
+            print("⚠️  Columna events.natural_key sin migrar: se importa fila por fila "
+                  "(python -m services.event_bulk_loader --migrate --backfill)")
+            row_by_row = True
         print("\n✅ Conectado a MySQL")
     except Exception as e:
         print(f"\n❌ Error conectando a MySQL: {e}")
@@ -492,9 +620,14 @@ def main():
     total_errores = 0
     archivos_procesados = 0
 
+    # Índice de duplicados compartido por toda la corrida (buckets se cargan una vez)
+    dedup_index = None if row_by_row else ImportDedupIndex()
+    loader = None if row_by_row else EventBulkLoader(cursor, LOAD_COLUMNS, batch_size=batch_size)
+
     for json_file in new_files:
         try:
-            stats = process_json_file(json_file, cursor, dry_run=False)
+            stats = process_json_file(json_file, cursor, dry_run=False,
+                                      dedup_index=dedup_index, loader=loader)
             total_insertados += stats['insertados']
             total_duplicate_exact += stats['duplicate_exact']
             total_duplicate_fuzzy += stats['duplicate_fuzzy']
@@ -510,6 +643,9 @@ def main():
         except Exception as e:
             print(f"  ❌ Error procesando: {e}")
             connection.rollback()
+            # Los aceptados del archivo fallido quedaron en el índice: reconstruir
+            if dedup_index is not None:
+                dedup_index = ImportDedupIndex()
 
     # Cerrar conexión
     cursor.close()
@@ -527,12 +663,23 @@ def main():
     print(f"   • Duplicados fuzzy (≥80% similares): {total_duplicate_fuzzy}")
     print(f"❌ Errores: {total_errores}")
 
+    if dedup_index is not None:
+        print(f"🗂️  Buckets (ciudad, fecha) precargados: {dedup_index.stats['buckets_loaded']} "
+              f"en {dedup_index.stats['preload_queries']} queries")
+        print(loader.report())
+
     if total_insertados + total_errores > 0:
         tasa_exito = (total_insertados / (total_insertados + total_errores)) * 100
         print(f"\n📈 Tasa de éxito: {tasa_exito:.1f}%")
 
     print("=" * 80 + "\n")
 
+    # 💡 Insights de IA de los eventos próximos (solo los nuevos o cambiados)
+    # (import acá: carga el stack de IA, innecesario con --no-insights)
+    if not args.no_insights:
+        from services.event_insights import precompute_after_import
+        precompute_after_import(total_insertados)
+
 
 if __name__ == "__main__":
     main()
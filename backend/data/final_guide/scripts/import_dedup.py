@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+UTILIDAD: Índice de duplicados en memoria para los importadores
+
+Reemplaza los 2 SELECT por evento (título exacto + todos los eventos de la misma
+ciudad/fecha) de fase4_import.py y auto_import.py:
+- Carga UNA sola vez por corrida los buckets (ciudad, fecha) que tocan los eventos
+  a importar (una query por lote de buckets, no por evento)
+- Verifica cada candidato contra el índice Y contra los ya aceptados del mismo lote
+- Misma regla que antes: exacto = mismo título; fuzzy = >=80% de las palabras
+  del título nuevo presentes en un título existente
+
+Usado por: fase4_import.py, auto_import.py
+"""
+
+import math
+import sys
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Configurar UTF-8 para Windows
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+FUZZY_THRESHOLD = 0.8
+
+# Buckets (ciudad, fecha) por query de precarga
+PRELOAD_CHUNK_SIZE = 200
+
+BucketKey = Tuple[str, str]
+
+
+def bucket_key(city: str, fecha) -> BucketKey:
+    """
+    Clave (ciudad, fecha) equivalente a 'city = %s AND DATE(start_datetime) = DATE(%s)'
+    (MySQL compara city sin distinguir mayúsculas)
+    """
+    return (str(city or '').strip().casefold(), str(fecha or '')[:10])
+
+
+class _Bucket:
+    """Títulos de un (ciudad, fecha) con índice invertido palabra -> posiciones"""
+
+    __slots__ = ('titles', 'exact', 'postings')
+
+    def __init__(self):
+        self.titles: List[str] = []
+        self.exact: Set[str] = set()
+        self.postings: Dict[str, List[int]] = {}
+
+    def add(self, title: str):
+        position = len(self.titles)
+        self.titles.append(title)
+        self.exact.add(title.strip().casefold())
+        for word in set(title.lower().split()):
+            self.postings.setdefault(word, []).append(position)
+
+    def find_similar(self, new_words: Set[str], threshold: float) -> Optional[str]:
+        """
+        Primer título (en orden de carga) que contiene >= threshold de las palabras nuevas
+
+        Cuenta coincidencias por posting list: solo se tocan títulos que
+        comparten al menos una palabra, nunca el bucket entero.
+        """
+        if not new_words:
+            return None
+
+        needed = math.ceil(threshold * len(new_words) - 1e-9)
+        overlap: Dict[int, int] = {}
+        for word in new_words:
+            for position in self.postings.get(word, ()):
+                overlap[position] = overlap.get(position, 0) + 1
+
+        matches = [position for position, count in overlap.items() if count >= needed]
+        return self.titles[min(matches)] if matches else None
+
+
+class ImportDedupIndex:
+    """
+    🗂️ ÍNDICE DE DUPLICADOS PARA IMPORTACIÓN
+
+    Uso:
+        index = ImportDedupIndex()
+        index.preload(cursor, [(city, fecha), ...])   # una vez por archivo/corrida
+        reason = index.check(title, city, fecha)      # None si es nuevo
+        if reason is None:
+            index.add(title, city, fecha)              # dedup dentro del mismo lote
+    """
+
+    def __init__(self, threshold: float = FUZZY_THRESHOLD):
+        self.threshold = threshold
+        self._buckets: Dict[BucketKey, _Bucket] = {}
+        self.stats = {
+            'buckets_loaded': 0,
+            'rows_loaded': 0,
+            'preload_queries': 0,
+        }
+
+    def preload(self, cursor, keys: Iterable[Tuple[str, str]]) -> int:
+        """
+        Carga de la BD los buckets (ciudad, fecha) que todavía no están en memoria
+
+        Una query por lote de buckets, con una condición por fecha: rango de ese
+        día sobre start_datetime (usa el índice, a diferencia de
+        DATE(start_datetime) = ...) AND city IN (ciudades pedidas para ese día).
+        Solo se traen los buckets pedidos, no todo el rango entre fechas.
+
+        Returns:
+            Cantidad de buckets nuevos cargados
+        """
+        pending: Dict[BucketKey, Tuple[str, str]] = {}
+        for city, fecha in keys:
+            key = bucket_key(city, fecha)
+            if key not in self._buckets and key not in pending and key[1]:
+                pending[key] = (str(city).strip(), key[1])
+
+        pending_items = list(pending.items())
+        for start in range(0, len(pending_items), PRELOAD_CHUNK_SIZE):
+            chunk = dict(pending_items[start:start + PRELOAD_CHUNK_SIZE])
+            cities_by_date: Dict[str, Set[str]] = {}
+            for city, fecha in chunk.values():
+                cities_by_date.setdefault(fecha, set()).add(city)
+
+            conditions, params = [], []
+            for fecha, cities in sorted(cities_by_date.items()):
+                placeholders = ', '.join(['%s'] * len(cities))
+                conditions.append(
+                    f"(start_datetime >= %s AND start_datetime < DATE_ADD(%s, INTERVAL 1 DAY) "
+                    f"AND city IN ({placeholders}))"
+                )
+                params.extend([fecha, fecha, *sorted(cities)])
+
+            cursor.execute(f'''
+                SELECT title, city, DATE(start_datetime) AS fecha FROM events
+                WHERE {' OR '.join(conditions)}
+            ''', params)
+            self.stats['preload_queries'] += 1
+
+            for key in chunk:
+                self._buckets[key] = _Bucket()
+
+            for row in cursor.fetchall():
+                title, city, fecha = (row['title'], row['city'], row['fecha']) if isinstance(row, dict) else row[:3]
+                key = bucket_key(city, fecha.isoformat() if hasattr(fecha, 'isoformat') else fecha)
+                bucket = self._buckets.get(key)
+                if bucket is not None and key in chunk and title:
+                    bucket.add(title)
+                    self.stats['rows_loaded'] += 1
+
+        self.stats['buckets_loaded'] += len(pending)
+        return len(pending)
+
+    def check(self, title: str, city: str, fecha) -> Optional[str]:
+        """
+        Verifica un candidato contra la BD precargada y el lote actual
+
+        Returns:
+            None si no es duplicado, 'duplicate_exact' o 'duplicate_fuzzy:<título existente>'
+        """
+        bucket = self._buckets.get(bucket_key(city, fecha))
+        if bucket is None:
+            return None
+
+        if title.strip().casefold() in bucket.exact:
+            return 'duplicate_exact'
+
+        similar = bucket.find_similar(set(title.lower().split()), self.threshold)
+        if similar is not None:
+            return f'duplicate_fuzzy:{similar}'
+
+        return None
+
+    def add(self, title: str, city: str, fecha):
+        """Registra un evento aceptado para que los siguientes del lote lo vean"""
+        self._buckets.setdefault(bucket_key(city, fecha), _Bucket()).add(title)
@@ -8,10 +8,15 @@ Uso:
     python auto_import.py                    # Procesa TODO scrapper_results/
     python auto_import.py --reset            # Reinicia log y reprocesa todo
     python auto_import.py --dry-run          # Muestra qué se procesaría sin importar
+    python auto_import.py --row-by-row       # Modo anterior: 2 SELECT + 1 INSERT por evento
+    python auto_import.py --batch-size 1000  # Filas por INSERT multi-row (default 500)
+    python auto_import.py --no-insights      # Sin precalcular insights de IA al terminar
 """
 
+import argparse
 import json
 import pymysql
+from pymysql.constants import CLIENT
 import sys
 import os
 from pathlib import Path
@@ -35,9 +40,17 @@ sys.path.insert(0, str(FINAL_GUIDE_SCRIPTS))
 # Importar utilidades compartidas
 from event_utils import categorize_event as shared_categorize_event
 from region_utils import get_pais_from_ciudad, get_provincia_from_ciudad
+from import_dedup import ImportDedupIndex
 BACKEND_DIR = SCRIPT_DIR.parent.parent
 ENV_FILE = BACKEND_DIR / '.env'
 
+# Índice normalizado de ubicaciones (services/location_index.py)
+sys.path.insert(0, str(BACKEND_DIR))
+from services.location_index import index_event, location_index_exists
+from services.event_bulk_loader import (
+    DEFAULT_BATCH_SIZE, EventBulkLoader, natural_key_exists, natural_key_fields
+)
+
 if ENV_FILE.exists():
     load_dotenv(ENV_FILE)
 
@@ -49,12 +62,24 @@ DB_CONFIG = {
     'password': os.getenv('MYSQL_PASSWORD', ''),
     'database': os.getenv('MYSQL_DATABASE', 'events'),
     'charset': 'utf8mb4',
-    'cursorclass': pymysql.cursors.DictCursor
+    'cursorclass': pymysql.cursors.DictCursor,
+    # Mismo rowcount en toda conexión que usa EventBulkLoader
+    'client_flag': CLIENT.FOUND_ROWS
 }
 
 # Archivo de log para tracking
 LOG_FILE = SCRIPT_DIR / '.imported_files.log'
 
+# Columnas de events que escribe este importador (id/natural_key los genera el loader)
+LOAD_COLUMNS = (
+    'title', 'description', 'start_datetime', 'end_datetime',
+    'venue_name', 'venue_address', 'city', 'neighborhood', 'country', 'province',
+    'latitude', 'longitude',
+    'category', 'subcategory',
+    'price', 'is_free',
+    'image_url', 'event_url', 'source',
+)
+
 
 def get_db_connection():
     """Crea conexión a MySQL"""
@@ -342,10 +367,13 @@ def insert_event(cursor, evento_data: Dict) -> tuple:
         import uuid
         event_id = str(uuid.uuid4())
 
+        # Clave natural (si la columna ya fue migrada): el UNIQUE rechaza duplicados
+        extra = natural_key_fields(cursor, evento_data)
+
         # Insertar nuevo evento
-        insert_sql = '''
+        insert_sql = f'''
             INSERT INTO events (
-                id,
+                id, {''.join(column + ', ' for column in extra)}
                 title, description, start_datetime, end_datetime,
                 venue_name, venue_address, city, neighborhood, country, province,
                 latitude, longitude,
@@ -354,7 +382,7 @@ def insert_event(cursor, evento_data: Dict) -> tuple:
                 image_url, event_url, source,
                 created_at, updated_at
             ) VALUES (
-                %s,
+                %s, {'%s, ' * len(extra)}
                 %s, %s, %s, %s,
                 %s, %s, %s, %s, %s, %s,
                 %s, %s,
@@ -367,6 +395,7 @@ def insert_event(cursor, evento_data: Dict) -> tuple:
 
         cursor.execute(insert_sql, (
             event_id,
+            *extra.values(),
             evento_data['title'],
             evento_data['description'],
             evento_data['start_datetime'],
@@ -388,13 +417,28 @@ def insert_event(cursor, evento_data: Dict) -> tuple:
             'gemini_scraper'
         ))
 
+        # Mantener índice de ubicaciones (event_location_keys)
+        index_event(cursor, event_id, evento_data)
+
         return (True, 'inserted')
 
+    except pymysql.err.IntegrityError:
+        # La clave natural ya existe (mismo título/ciudad/fecha con otra capitalización)
+        return (False, 'duplicate_exact')
     except Exception as e:
         error_msg = str(e)[:80]
         return (False, f'error:{error_msg}')
 
 
+def to_load_row(evento_data: Dict) -> Dict:
+    """Adapta un evento de process_evento() a las columnas de LOAD_COLUMNS"""
+    return {
+        **evento_data,
+        'price': str(evento_data['price']),
+        'source': 'gemini_scraper'
+    }
+
+
 def find_all_json_files(base_dir: Path) -> List[Path]:
     """Encuentra todos los JSONs recursivamente en scrapper_results"""
     scrapper_results = base_dir / 'scrapper_results'
@@ -416,8 +460,16 @@ def find_all_json_files(base_dir: Path) -> List[Path]:
     return event_jsons
 
 
-def process_json_file(filepath: Path, cursor, dry_run: bool = False) -> dict:
-    """Procesa un archivo JSON con logging detallado"""
+def process_json_file(filepath: Path, cursor, dry_run: bool = False,
+                      dedup_index: Optional[ImportDedupIndex] = None,
+                      loader: Optional[EventBulkLoader] = None) -> dict:
+    """
+    Procesa un archivo JSON con logging detallado
+
+    Con dedup_index + loader deduplica contra el índice en memoria (BD precargada +
+    este archivo) y escribe los sobrevivientes con el bulk loader; sin ellos,
+    insert_event() fila por fila.
+    """
     relative_path = filepath.relative_to(filepath.parents[5])  # Relativo a proyecto
     print(f"\n📄 {relative_path}")
 
@@ -478,16 +530,35 @@ def process_json_file(filepath: Path, cursor, dry_run: bool = False) -> dict:
     errores = 0
     detalles = []  # Lista de (titulo, reason) para log detallado
 
-    for i, evento in enumerate(events, 1):
-        evento_data = process_evento(evento, filepath, i)
+    eventos_data = [process_evento(evento, filepath, i) for i, evento in enumerate(events, 1)]
+    survivors = []
+
+    # El modo en lote necesita índice + loader; si falta alguno, fila por fila
+    if loader is None:
+        dedup_index = None
+    if dedup_index is not None:
+        # Buckets (ciudad, fecha) de este archivo: solo se consultan los que faltan
+        dedup_index.preload(cursor, [(e['city'], e['start_datetime']) for e in eventos_data if e])
+
+    for evento, evento_data in zip(events, eventos_data):
         if not evento_data:
             errores += 1
             titulo_truncado = str(evento.get('nombre') or evento.get('title', 'Unknown'))[:50]
             detalles.append((titulo_truncado, 'error:parsing_failed'))
             continue
 
-        # Insertar y capturar resultado
-        success, reason = insert_event(cursor, evento_data)
+        if dedup_index is not None:
+            # Dedup en memoria; el INSERT se hace en lote al final del archivo
+            reason = dedup_index.check(evento_data['title'], evento_data['city'], evento_data['start_datetime'])
+            if reason and reason.startswith('duplicate_fuzzy'):
+                reason = 'duplicate_partial' + reason[len('duplicate_fuzzy'):]
+            success = reason is None
+            if success:
+                dedup_index.add(evento_data['title'], evento_data['city'], evento_data['start_datetime'])
+                survivors.append(evento_data)
+        else:
+            # Insertar y capturar resultado
+            success, reason = insert_event(cursor, evento_data)
 
         titulo_truncado = evento_data['title'][:50]
 
@@ -510,6 +581,15 @@ def process_json_file(filepath: Path, cursor, dry_run: bool = False) -> dict:
             errores += 1
             detalles.append((titulo_truncado, f'unknown:{reason}'))
 
+    if survivors:
+        inserted_before = loader.stats['inserted']
+        loader.load(to_load_row(e) for e in survivors)
+        loader.flush()
+        # Conflictos de clave natural que el índice no vio: cuentan como exactos
+        conflicts = len(survivors) - (loader.stats['inserted'] - inserted_before)
+        insertados -= conflicts
+        duplicate_exact += conflicts
+
     # Mostrar resumen del batch
     total_duplicados = duplicate_exact + duplicate_partial
     print(f"  ✅ {insertados} nuevos | ⏭️  {total_duplicados} duplicados ({duplicate_exact} exactos, {duplicate_partial} parciales) | ❌ {errores} errores")
@@ -534,11 +614,29 @@ def process_json_file(filepath: Path, cursor, dry_run: bool = False) -> dict:
     }
 
 
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Flags de la línea de comandos (ver docstring del módulo)"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--reset', action='store_true', help='Reiniciar log y reprocesar todo')
+    parser.add_argument('--dry-run', action='store_true', help='Preview sin importar')
+    parser.add_argument('--row-by-row', action='store_true', help='Modo anterior: un INSERT por evento')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f'Filas por INSERT multi-row (default {DEFAULT_BATCH_SIZE})')
+    parser.add_argument('--no-insights', action='store_true', help='Sin precalcular insights de IA')
+    args = parser.parse_args(argv)
+    if args.batch_size < 1:
+        parser.error('--batch-size debe ser un entero positivo')
+    return args
+
+
 def main():
     """Main function"""
     # Parsear argumentos
-    reset_log = '--reset' in sys.argv
-    dry_run = '--dry-run' in sys.argv
+    args = parse_args()
+    reset_log = args.reset
+    dry_run = args.dry_run
+    row_by_row = args.row_by_row
+    batch_size = args.batch_size
 
     base_dir = SCRIPT_DIR.parent
 
@@ -588,6 +686,13 @@ def main():
     try:
         connection = get_db_connection()
         cursor = connection.cursor()
+        if not location_index_exists(cursor):
+            print("⚠️  Tabla event_location_keys sin migrar: no se indexan ubicaciones "
+                  "(python -m services.location_index --migrate --backfill)")
+        if not row_by_row and not natural_key_exists(cursor):
+            print("⚠️  Columna events.natural_key sin migrar: se importa fila por fila "
+                  "(python -m services.event_bulk_loader --migrate --backfill)")
+            row_by_row = True
         print("\n✅ Conectado a MySQL")
     except Exception as e:
         print(f"\n❌ Error conectando a MySQL: {e}")
@@ -600,9 +705,14 @@ def main():
     total_errores = 0
     archivos_procesados = 0
 
+    # Índice de duplicados compartido por toda la corrida (buckets se cargan una vez)
+    dedup_index = None if row_by_row else ImportDedupIndex()
+    loader = None if row_by_row else EventBulkLoader(cursor, LOAD_COLUMNS, batch_size=batch_size)
+
     for json_file in new_files:
         try:
-            stats = process_json_file(json_file, cursor, dry_run=False)
+            stats = process_json_file(json_file, cursor, dry_run=False,
+                                      dedup_index=dedup_index, loader=loader)
             total_insertados += stats['insertados']
             total_duplicate_exact += stats['duplicate_exact']
             total_duplicate_partial += stats['duplicate_partial']
@@ -618,6 +728,9 @@ def main():
         except Exception as e:
             print(f"  ❌ Error procesando: {e}")
             connection.rollback()
+            # Los aceptados del archivo fallido quedaron en el índice: reconstruir
+            if dedup_index is not None:
+                dedup_index = ImportDedupIndex()
 
     # Cerrar conexión
     cursor.close()
@@ -635,12 +748,23 @@ def main():
     print(f"   • Duplicados parciales (títulos similares ~80%): {total_duplicate_partial}")
     print(f"❌ Errores: {total_errores}")
 
+    if dedup_index is not None:
+        print(f"🗂️  Buckets (ciudad, fecha) precargados: {dedup_index.stats['buckets_loaded']} "
+              f"en {dedup_index.stats['preload_queries']} queries")
+        print(loader.report())
+
     if total_insertados + total_errores > 0:
         tasa_exito = (total_insertados / (total_insertados + total_errores)) * 100
         print(f"\n📈 Tasa de éxito: {tasa_exito:.1f}%")
 
     print("=" * 80 + "\n")
 
+    # 💡 Insights de IA de los eventos próximos (solo los nuevos o cambiados)
+    # (import acá: carga el stack de IA, innecesario con --no-insights)
+    if not args.no_insights:
+        from services.event_insights import precompute_after_import
+        precompute_after_import(total_insertados)
+
 
 if __name__ == "__main__":
     main()
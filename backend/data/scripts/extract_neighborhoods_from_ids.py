@@ -27,6 +27,10 @@ ENV_FILE = BACKEND_DIR / '.env'
 if ENV_FILE.exists():
     load_dotenv(ENV_FILE)
 
+# Índice normalizado de ubicaciones (services/location_index.py)
+sys.path.insert(0, str(BACKEND_DIR))
+from services.location_index import index_event, location_index_exists
+
 # Configuración de MySQL desde .env
 DB_CONFIG = {
     'host': os.getenv('MYSQL_HOST', 'localhost'),
@@ -139,6 +143,9 @@ def main():
     try:
         connection = get_db_connection()
         cursor = connection.cursor()
+        if not location_index_exists(cursor):
+            print("⚠️  Tabla event_location_keys sin migrar: no se indexan ubicaciones "
+                  "(python -m services.location_index --migrate --backfill)")
         print("\n✅ Conectado a MySQL")
     except Exception as e:
         print(f"\n❌ Error conectando a MySQL: {e}")
@@ -148,7 +155,7 @@ def main():
     print("\n📊 Buscando eventos de Buenos Aires sin neighborhood...")
 
     query = '''
-        SELECT id, external_id, source, neighborhood
+        SELECT id, external_id, source, neighborhood, city, country, province
         FROM events
         WHERE city = %s
         AND (neighborhood IS NULL OR neighborhood = '')
@@ -197,6 +204,7 @@ def main():
                 '''
 
                 cursor.execute(update_sql, (barrio, event_id))
+                index_event(cursor, event_id, {**evento, 'neighborhood': barrio})
                 actualizados += 1
 
                 if actualizados <= 10:
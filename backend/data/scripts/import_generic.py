@@ -17,10 +17,15 @@ Uso:
     python import_generic.py latinamerica/sudamerica
     python import_generic.py scrapper_results/europa/europa-meridional/espana
     python import_generic.py scrapper_results/latinamerica/sudamerica/argentina/2025-11
+    python import_generic.py europa --batch-size 1000   # Filas por INSERT multi-row (default 500)
+    python import_generic.py europa --row-by-row        # Modo anterior: SELECT + INSERT por evento
+    python import_generic.py europa --no-insights       # Sin precalcular insights de IA al terminar
 """
 
+import argparse
 import json
 import pymysql
+from pymysql.constants import CLIENT
 import sys
 import os
 from pathlib import Path
@@ -47,6 +52,13 @@ from region_utils import get_pais_from_ciudad, get_provincia_from_ciudad
 BACKEND_DIR = SCRIPT_DIR.parent.parent
 ENV_FILE = BACKEND_DIR / '.env'
 
+# Índice normalizado de ubicaciones (services/location_index.py)
+sys.path.insert(0, str(BACKEND_DIR))
+from services.location_index import index_event, location_index_exists
+from services.event_bulk_loader import (
+    DEFAULT_BATCH_SIZE, EventBulkLoader, natural_key_exists, natural_key_fields
+)
+
 if ENV_FILE.exists():
     load_dotenv(ENV_FILE)
 
@@ -58,9 +70,21 @@ DB_CONFIG = {
     'password': os.getenv('MYSQL_PASSWORD', ''),
     'database': os.getenv('MYSQL_DATABASE', 'events'),
     'charset': 'utf8mb4',
-    'cursorclass': pymysql.cursors.DictCursor
+    'cursorclass': pymysql.cursors.DictCursor,
+    # Mismo rowcount en toda conexión que usa EventBulkLoader
+    'client_flag': CLIENT.FOUND_ROWS
 }
 
+# Columnas de events que escribe este importador (id/natural_key los genera el loader)
+LOAD_COLUMNS = (
+    'title', 'description', 'start_datetime', 'end_datetime',
+    'venue_name', 'venue_address', 'city', 'country',
+    'latitude', 'longitude',
+    'category', 'subcategory',
+    'price', 'is_free',
+    'image_url', 'event_url', 'source',
+)
+
 def get_db_connection():
     """Crea conexión a MySQL"""
     return pymysql.connect(**DB_CONFIG)
@@ -316,10 +340,13 @@ def insert_event(cursor, evento_data: Dict) -> bool:
         import uuid
         event_id = str(uuid.uuid4())
 
+        # Clave natural (si la columna ya fue migrada): el UNIQUE rechaza duplicados
+        extra = natural_key_fields(cursor, evento_data)
+
         # Insertar nuevo evento
-        insert_sql = '''
+        insert_sql = f'''
             INSERT INTO events (
-                id,
+                id, {''.join(column + ', ' for column in extra)}
                 title, description, start_datetime, end_datetime,
                 venue_name, venue_address, city, country,
                 latitude, longitude,
@@ -328,7 +355,7 @@ def insert_event(cursor, evento_data: Dict) -> bool:
                 image_url, event_url, source,
                 created_at, updated_at
             ) VALUES (
-                %s,
+                %s, {'%s, ' * len(extra)}
                 %s, %s, %s, %s,
                 %s, %s, %s, %s,
                 %s, %s,
@@ -341,6 +368,7 @@ def insert_event(cursor, evento_data: Dict) -> bool:
 
         cursor.execute(insert_sql, (
             event_id,
+            *extra.values(),
             evento_data['title'],
             evento_data['description'],
             evento_data['start_datetime'],
@@ -360,13 +388,28 @@ def insert_event(cursor, evento_data: Dict) -> bool:
             'gemini_scraper'
         ))
 
+        # Mantener índice de ubicaciones (event_location_keys)
+        index_event(cursor, event_id, evento_data)
+
         return True
 
+    except pymysql.err.IntegrityError:
+        # La clave natural ya existe (mismo título/ciudad/fecha con otra capitalización)
+        return False
     except Exception as e:
         print(f"  ❌ Error insertando: {str(e)[:100]}")
         return False
 
 
+def to_load_row(evento_data: Dict) -> Dict:
+    """Adapta un evento de process_evento() a las columnas de LOAD_COLUMNS"""
+    return {
+        **evento_data,
+        'price': str(evento_data['price']),
+        'source': 'gemini_scraper'
+    }
+
+
 def find_json_files(directory: Path) -> List[Path]:
     """Encuentra todos los JSONs recursivamente (cualquier mes/patrón)"""
     # Buscar archivos con patrones comunes: _dia_gemini, noviembre, o cualquier .json
@@ -381,8 +424,13 @@ def find_json_files(directory: Path) -> List[Path]:
     return event_jsons
 
 
-def process_json_file(filepath: Path, cursor) -> dict:
-    """Procesa un archivo JSON"""
+def process_json_file(filepath: Path, cursor, loader: Optional[EventBulkLoader] = None) -> dict:
+    """
+    Procesa un archivo JSON
+
+    Con loader los eventos se escriben en lote y los duplicados (mismo título,
+    ciudad y fecha) son conflictos de clave natural; sin él, insert_event() por fila.
+    """
     print(f"\n📄 Procesando: {filepath.relative_to(filepath.parents[3])}")
 
     try:
@@ -411,6 +459,20 @@ def process_json_file(filepath: Path, cursor) -> dict:
         print("  ⚠️  No se encontraron eventos en el archivo")
         return {'insertados': 0, 'duplicados': 0, 'errores': 0}
 
+    if loader is not None:
+        eventos_data = [process_evento(evento, i, filepath) for i, evento in enumerate(events)]
+        errores = sum(1 for e in eventos_data if not e)
+
+        inserted_before = loader.stats['inserted']
+        rows_before = loader.stats['rows']
+        loader.load(to_load_row(e) for e in eventos_data if e)
+        loader.flush()
+        insertados = loader.stats['inserted'] - inserted_before
+        duplicados = (loader.stats['rows'] - rows_before) - insertados
+
+        print(f"  ✅ {insertados} insertados, {duplicados} duplicados, {errores} errores")
+        return {'insertados': insertados, 'duplicados': duplicados, 'errores': errores}
+
     insertados = 0
     duplicados = 0
     errores = 0
@@ -431,17 +493,29 @@ def process_json_file(filepath: Path, cursor) -> dict:
     return {'insertados': insertados, 'duplicados': duplicados, 'errores': errores}
 
 
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Flags de la línea de comandos (ver docstring del módulo)"""
+    parser = argparse.ArgumentParser(
+        description='Importador genérico de eventos a MySQL',
+        epilog='Ejemplos: europa | latinamerica | scrapper_results/europa/europa-meridional'
+    )
+    parser.add_argument('region', help='Región o ruta dentro de scrapper_results')
+    parser.add_argument('--row-by-row', action='store_true', help='Modo anterior: SELECT + INSERT por evento')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f'Filas por INSERT multi-row (default {DEFAULT_BATCH_SIZE})')
+    parser.add_argument('--no-insights', action='store_true', help='Sin precalcular insights de IA')
+    args = parser.parse_args(argv)
+    if args.batch_size < 1:
+        parser.error('--batch-size debe ser un entero positivo')
+    return args
+
+
 def main():
     """Main function"""
-    if len(sys.argv) < 2:
-        print("❌ Uso: python import_generic.py <region|path>")
-        print("\nEjemplos:")
-        print("  python import_generic.py europa")
-        print("  python import_generic.py latinamerica")
-        print("  python import_generic.py scrapper_results/europa/europa-meridional")
-        sys.exit(1)
-
-    region = sys.argv[1]
+    args = parse_args()
+    region = args.region
+    row_by_row = args.row_by_row
+    batch_size = args.batch_size
     base_dir = Path(__file__).parent.parent
     scrapper_results = base_dir / 'scrapper_results'
 
@@ -475,6 +549,13 @@ def main():
     try:
         connection = get_db_connection()
         cursor = connection.cursor()
+        if not location_index_exists(cursor):
+            print("⚠️  Tabla event_location_keys sin migrar: no se indexan ubicaciones "
+                  "(python -m services.location_index --migrate --backfill)")
+        if not row_by_row and not natural_key_exists(cursor):
+            print("⚠️  Columna events.natural_key sin migrar: se importa fila por fila "
+                  "(python -m services.event_bulk_loader --migrate --backfill)")
+            row_by_row = True
         print("✅ Conectado a MySQL")
     except Exception as e:
         print(f"❌ Error conectando a MySQL: {e}")
@@ -485,9 +566,11 @@ def main():
     total_duplicados = 0
     total_errores = 0
 
+    loader = None if row_by_row else EventBulkLoader(cursor, LOAD_COLUMNS, batch_size=batch_size)
+
     for json_file in json_files:
         try:
-            stats = process_json_file(json_file, cursor)
+            stats = process_json_file(json_file, cursor, loader=loader)
             total_insertados += stats['insertados']
             total_duplicados += stats['duplicados']
             total_errores += stats['errores']
@@ -512,9 +595,17 @@ def main():
     print(f"✅ Eventos insertados: {total_insertados}")
     print(f"⏭️  Eventos duplicados: {total_duplicados}")
     print(f"❌ Errores: {total_errores}")
+    if loader is not None:
+        print(loader.report())
     print(f"\n📈 Tasa de éxito: {(total_insertados/(total_insertados + total_errores)*100 if total_insertados + total_errores > 0 else 0):.1f}%")
     print("=" * 70 + "\n")
 
+    # 💡 Insights de IA de los eventos próximos (solo los nuevos o cambiados)
+    # (import acá: carga el stack de IA, innecesario con --no-insights)
+    if not args.no_insights:
+        from services.event_insights import precompute_after_import
+        precompute_after_import(total_insertados)
+
 
 if __name__ == "__main__":
     main()
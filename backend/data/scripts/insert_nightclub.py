@@ -24,6 +24,9 @@ from dotenv import load_dotenv
 from sqlalchemy import create_engine, text
 import uuid
 
+from services.location_index import index_event
+from services.event_bulk_loader import natural_key_fields
+
 load_dotenv()
 
 def parse_venue_city(lugar):
@@ -111,18 +114,26 @@ def main():
                 duplicates += 1
                 continue
 
+            # Cursor DB-API de la misma transacción (clave natural + índice de ubicaciones)
+            cursor = conn.connection.cursor()
+            extra = natural_key_fields(cursor, evento)
+
             # Insertar
-            conn.execute(text("""
+            conn.execute(text(f"""
                 INSERT INTO events (
-                    id, title, description, start_datetime, end_datetime,
+                    id, {''.join(column + ', ' for column in extra)}title, description, start_datetime, end_datetime,
                     venue_name, city, country, category, subcategory,
                     source, is_free, price, image_url, event_url, scraped_at
                 ) VALUES (
-                    :id, :title, :description, :start_datetime, :end_datetime,
+                    :id, {''.join(':' + column + ', ' for column in extra)}:title, :description, :start_datetime, :end_datetime,
                     :venue_name, :city, :country, :category, :subcategory,
                     :source, :is_free, :price, :image_url, :event_url, :scraped_at
                 )
-            """), evento)
+            """), {**evento, **extra})
+
+            # Mantener índice de ubicaciones (event_location_keys) en la misma transacción
+            index_event(cursor, evento['id'], evento)
+            cursor.close()
 
             conn.commit()
             inserted += 1
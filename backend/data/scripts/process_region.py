@@ -26,6 +26,7 @@ from datetime import datetime
 import pymysql
 from typing import List, Dict, Any
 import unicodedata
+import uuid
 
 # Fix Windows encoding issues
 if sys.platform == 'win32':
@@ -40,6 +41,8 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 try:
     from services.gemini_factory import gemini_factory
     from services.google_images_service import search_google_image
+    from services.location_index import index_event
+    from services.event_bulk_loader import natural_key_fields
 except ImportError as e:
     print(f"Error: No se pudieron importar los servicios: {e}")
     print("Asegurate de estar en el directorio correcto.")
@@ -144,18 +147,24 @@ class RegionProcessor:
                 connection.close()
                 return False
 
+            # Clave natural (si la columna ya fue migrada)
+            extra = natural_key_fields(cursor, event)
+
             # Insertar nuevo evento
-            insert_query = """
+            insert_query = f"""
                 INSERT INTO events (
-                    id, title, description, start_datetime, end_datetime,
+                    id, {''.join(column + ', ' for column in extra)}title, description, start_datetime, end_datetime,
                     venue_name, venue_address, city, category, subcategory,
                     price, is_free, image_url, source, created_at, updated_at
                 ) VALUES (
-                    UUID(), %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW()
+                    %s, {'%s, ' * len(extra)}%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW()
                 )
             """
 
+            event_id = str(uuid.uuid4())
             cursor.execute(insert_query, (
+                event_id,
+                *extra.values(),
                 event.get('title', 'Sin título'),
                 event.get('description', ''),
                 event.get('start_datetime'),
@@ -171,6 +180,9 @@ class RegionProcessor:
                 event.get('source', 'gemini_scraper')
             ))
 
+            # Mantener índice de ubicaciones (event_location_keys)
+            index_event(cursor, event_id, event)
+
             connection.commit()
             cursor.close()
             connection.close()
@@ -178,6 +190,10 @@ class RegionProcessor:
             self.stats['events_inserted'] += 1
             return True
 
+        except pymysql.err.IntegrityError:
+            # La clave natural ya existe (mismo título/ciudad/fecha)
+            self.stats['events_duplicated'] += 1
+            return False
         except Exception as e:
             error_msg = f"Error insertando '{event.get('title', 'unknown')}': {e}"
             print(f"    {error_msg}")
@@ -24,6 +24,10 @@ ENV_FILE = BACKEND_DIR / '.env'
 if ENV_FILE.exists():
     load_dotenv(ENV_FILE)
 
+# Índice normalizado de ubicaciones (services/location_index.py)
+sys.path.insert(0, str(BACKEND_DIR))
+from services.location_index import index_event, location_index_exists
+
 # Configuración de MySQL desde .env
 DB_CONFIG = {
     'host': os.getenv('MYSQL_HOST', 'localhost'),
@@ -58,6 +62,9 @@ def main():
     try:
         connection = get_db_connection()
         cursor = connection.cursor()
+        if not location_index_exists(cursor):
+            print("⚠️  Tabla event_location_keys sin migrar: no se indexan ubicaciones "
+                  "(python -m services.location_index --migrate --backfill)")
         print("\n✅ Conectado a MySQL")
     except Exception as e:
         print(f"\n❌ Error conectando a MySQL: {e}")
@@ -68,7 +75,7 @@ def main():
 
     placeholders = ', '.join(['%s'] * len(BARRIOS_BSAS))
     query = f'''
-        SELECT id, title, city, neighborhood
+        SELECT id, title, city, neighborhood, country, province
         FROM events
         WHERE city IN ({placeholders})
         AND (neighborhood IS NULL OR neighborhood = '')
@@ -101,6 +108,7 @@ def main():
             '''
 
             cursor.execute(update_sql, (barrio, evento['id']))
+            index_event(cursor, evento['id'], {**evento, 'city': 'Buenos Aires', 'neighborhood': barrio})
             actualizados += 1
 
             if actualizados % 50 == 0:
@@ -23,7 +23,6 @@ import json
 from datetime import datetime
 import logging
 import sys
-import aiohttp
 import time
 
 # Add backend to path
@@ -298,6 +297,33 @@ async def lifespan(app: FastAPI):
         if pool:
             await pool.close()
             logger.info("Database pool closed")
+        try:
+            from services.async_db import async_db
+            await async_db.dispose()
+        except Exception as e:
+            logger.warning(f"⚠️ Error cerrando async DB pool: {e}")
+        try:
+            from services.image_jobs import image_jobs
+            await image_jobs.shutdown()
+        except Exception as e:
+            logger.warning(f"⚠️ Error interrumpiendo jobs de imágenes: {e}")
+        try:
+            from services.image_resolver import image_resolver
+            await image_resolver.aclose()
+        except Exception as e:
+            logger.warning(f"⚠️ Error cerrando cliente HTTP de imágenes: {e}")
+        try:
+            from services.cloudinary_migration import cloudinary_migration
+            from services.cloudinary_service import aclose_client
+            await cloudinary_migration.shutdown()
+            await aclose_client()
+        except Exception as e:
+            logger.warning(f"⚠️ Error cerrando migración a Cloudinary: {e}")
+        try:
+            from services.image_proxy import image_proxy
+            await image_proxy.aclose()
+        except Exception as e:
+            logger.warning(f"⚠️ Error cerrando cliente HTTP del proxy de imágenes: {e}")
 
 app = FastAPI(
     title="Eventos Visualizer API",
@@ -416,6 +442,124 @@ async def manual_facebook_cache_update():
 async def health_check():
     return {"status": "healthy", "message": "OK"}
 
+@app.get("/api/gazetteer/stats")
+async def gazetteer_stats():
+    """
+    🗺️ Gazetteer local de /api/events/stream: hits sin red, misses que fueron a la IA
+    y respuestas aprendidas
+    """
+    from services.gazetteer import gazetteer
+    return {
+        "success": True,
+        **gazetteer.get_stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/enrichment/store/stats")
+async def enrichment_store_stats():
+    """
+    🗄️ Enrichment store compartido (ubicaciones, ciudades padre, patrones de URL):
+    entradas vigentes y negativas por namespace + hits/misses de este proceso
+    """
+    from services.enrichment_store import enrichment_store
+    return {
+        "success": True,
+        **(await asyncio.to_thread(enrichment_store.get_stats)),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/event-insights/stats")
+async def event_insights_stats():
+    """
+    💡 Insights de IA precalculados por evento (hover, contexto, conversación):
+    hits/viejos/faltantes del store y generaciones on-demand de este proceso
+    """
+    from services.event_insights import event_insights
+    return {
+        "success": True,
+        **event_insights.get_stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/image-proxy/stats")
+async def image_proxy_stats():
+    """
+    🖼️ Proxy de miniaturas /img/{event_id}: hit rate, descargas de originales,
+    miniaturas generadas y ocupación de la caché en disco
+    """
+    from services.image_proxy import image_proxy
+    return {
+        "success": True,
+        **(await asyncio.to_thread(image_proxy.get_stats)),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@app.get("/api/global-images/stats")
+async def global_images_stats():
+    """
+    🎨 Caché LRU de imágenes contextuales (GlobalImageService): hit rate,
+    evicciones, ocupación en entradas/bytes y eventos procesados por lote
+    """
+    from services.global_image_service import global_image_service
+    return {
+        "success": True,
+        **global_image_service.get_stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/image-resolver/stats")
+async def image_resolver_stats():
+    """
+    🖼️ Resolución de imágenes (google_images_service): hit rate de la caché por
+    evento y por query, imágenes encontradas por etapa y latencia p50/p95 por etapa
+    """
+    from services.image_resolver import image_resolver
+    return {
+        "success": True,
+        **image_resolver.get_stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/intent-parser/stats")
+async def intent_parser_stats():
+    """
+    🧭 Parser determinístico de intenciones: parseos, tasa de fast path (sin IA)
+    y latencia media en microsegundos
+    """
+    from services.intent_parser import intent_parser
+    return {
+        "success": True,
+        **intent_parser.get_stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/coalescing/stats")
+async def coalescing_stats():
+    """
+    🔗 Contadores de single-flight por scope (db, ai, scraper_fanout)
+    coalesced = llamadas ahorradas porque esperaron un cálculo idéntico en curso
+    """
+    from services.request_coalescer import get_coalescing_stats
+    return {
+        "success": True,
+        **get_coalescing_stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/db/pool/status")
+async def db_pool_status():
+    """
+    📊 Métricas de saturación del pool async de MySQL
+    Útil para dimensionar workers (checked_out, esperas, timeouts)
+    """
+    from services.async_db import async_db
+    return {
+        "success": True,
+        "pool": async_db.get_pool_stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
 
 @app.get("/api/youtube/search")
 async def search_youtube_video(q: str):
@@ -656,7 +800,8 @@ def deduplicate_events_by_title(events: list) -> list:
     MARCA eventos duplicados basándose en similitud de títulos (>80%)
 
     NUEVA ESTRATEGIA (NO ELIMINA, SOLO MARCA):
-    - Compara cada evento con los ya procesados
+    - Compara cada evento con los ya procesados que comparten palabras clave
+      (índice invertido en services/dedup_engine - costo casi lineal)
     - Si encuentra un título >80% similar, marca el peor como duplicado
     - Agrega campos: is_duplicate=True, duplicate_of=[id del principal]
     - RETORNA TODOS LOS EVENTOS (principales + duplicados marcados)
@@ -667,115 +812,8 @@ def deduplicate_events_by_title(events: list) -> list:
     Returns:
         Lista completa con duplicados marcados
     """
-    if not events:
-        return events
-
-    # Source priority (mayor = mejor)
-    SOURCE_PRIORITY = {
-        'database': 10,
-        'gemini': 9,
-        'felo': 8,
-        'gemini_scraper': 7,
-        'felo_scraper': 6,
-        'nightclub': 5,
-    }
-
-    def get_source_priority(source: str) -> int:
-        """Retorna prioridad del source (mayor = mejor)"""
-        return SOURCE_PRIORITY.get(source, 1)  # Default: 1 (bajo)
-
-    def calculate_title_similarity(title1: str, title2: str) -> float:
-        """Calcula similitud entre 2 títulos (0.0 - 1.0)"""
-        if not title1 or not title2:
-            return 0.0
-
-        # Normalizar: lowercase y quitar caracteres especiales
-        t1 = title1.lower().replace('-', ' ').replace('(', '').replace(')', '')
-        t2 = title2.lower().replace('-', ' ').replace('(', '').replace(')', '')
-
-        # Extraer palabras
-        words1 = set(t1.split())
-        words2 = set(t2.split())
-
-        if not words1 or not words2:
-            return 0.0
-
-        # Palabras comunes
-        common = words1 & words2
-
-        # Similitud = palabras comunes / total palabras únicas
-        total_unique = words1 | words2
-        similarity = len(common) / len(total_unique) if total_unique else 0.0
-
-        return similarity
-
-    def is_better_event(event1: dict, event2: dict) -> bool:
-        """Retorna True si event1 es mejor que event2"""
-        # Criterio 1: Prioridad por source
-        priority1 = get_source_priority(event1.get('source', ''))
-        priority2 = get_source_priority(event2.get('source', ''))
-
-        if priority1 != priority2:
-            return priority1 > priority2
-
-        # Criterio 2: Tiene imagen
-        has_image1 = bool(event1.get('image_url'))
-        has_image2 = bool(event2.get('image_url'))
-
-        if has_image1 != has_image2:
-            return has_image1
-
-        # Criterio 3: Título más largo (más descriptivo)
-        return len(event1.get('title', '')) > len(event2.get('title', ''))
-
-    # NUEVA LÓGICA: Marcar duplicados (NO eliminar)
-    all_events = []
-    duplicate_count = 0
-
-    for event in events:
-        title = event.get('title', '')
-        found_similar = False
-
-        # Inicializar campos de duplicado
-        event['is_duplicate'] = False
-        event['duplicate_of'] = None
-
-        # Comparar con eventos ya procesados
-        for existing in all_events:
-            # Saltar eventos ya marcados como duplicados
-            if existing.get('is_duplicate'):
-                continue
-
-            existing_title = existing.get('title', '')
-            similarity = calculate_title_similarity(title, existing_title)
-
-            # Si es muy similar (>80%), marcar como duplicado
-            if similarity >= 0.80:
-                found_similar = True
-
-                # Determinar cuál es mejor
-                if is_better_event(event, existing):
-                    # El nuevo es mejor → marcar el existente como duplicado
-                    existing['is_duplicate'] = True
-                    existing['duplicate_of'] = event.get('id')
-                    logger.debug(f"🔄 '{existing_title[:40]}...' marcado como duplicado de '{title[:40]}...' (similarity: {similarity:.0%})")
-                    duplicate_count += 1
-                else:
-                    # El existente es mejor → marcar el nuevo como duplicado
-                    event['is_duplicate'] = True
-                    event['duplicate_of'] = existing.get('id')
-                    logger.debug(f"⏭️ '{title[:40]}...' marcado como duplicado de '{existing_title[:40]}...' (similarity: {similarity:.0%})")
-                    duplicate_count += 1
-
-                break
-
-        # Agregar TODOS los eventos (duplicados y no duplicados)
-        all_events.append(event)
-
-    if duplicate_count > 0:
-        logger.info(f"🏷️ Total duplicados marcados: {duplicate_count} de {len(all_events)} eventos")
-
-    return all_events
+    from services.dedup_engine import dedup_engine
+    return dedup_engine.mark_duplicates(events)
 
 # ============================================================================
 # 🚀 PARALLEL REST ENDPOINTS - Individual sources for maximum performance
@@ -1026,56 +1064,65 @@ async def get_ticketmaster_events(location: str = Query(..., description="Locati
 # 🎯 PARALLEL ORCHESTRATOR - Calls all sources simultaneously  
 # ============================================================================
 
-@app.get("/api/parallel/search")
-async def parallel_search(location: str = Query(..., description="Location required")):
+# Fuentes del parallel search: se llaman las corutinas de los endpoints directamente
+# (sin loopback HTTP al propio servidor)
+PARALLEL_SOURCES = [
+    ("eventbrite", get_eventbrite_events),
+    ("argentina_venues", get_argentina_venues_events),
+    ("facebook", get_facebook_events),
+    ("instagram", get_instagram_events),
+    ("meetup", get_meetup_events),
+    ("ticketmaster", get_ticketmaster_events),
+]
+
+# Deadline compartido por todas las fuentes (segundos)
+PARALLEL_SEARCH_DEADLINE = float(os.getenv("PARALLEL_SEARCH_DEADLINE", 30))
+
+async def run_parallel_sources(location: str, deadline: float = PARALLEL_SEARCH_DEADLINE):
     """
-    🚀 PARALLEL SEARCH - All sources run simultaneously
-    
-    This is MUCH faster than WebSocket because:
-    - All APIs run in parallel (not sequential)  
-    - Results return as soon as each source completes
-    - No single point of failure
-    - Better resource utilization
+    🔀 Ejecuta todas las fuentes en el mismo proceso y hace yield de cada
+    resultado apenas termina. Las que no terminan dentro del deadline
+    compartido se cancelan y se reportan como error.
     """
-    start_time = time.time()
-    
-    # Define all source endpoints  
-    base_url = BACKEND_URL
-    sources = [
-        f"{base_url}/api/sources/eventbrite?location={location}",
-        f"{base_url}/api/sources/argentina-venues?location={location}",
-        f"{base_url}/api/sources/facebook?location={location}",
-        f"{base_url}/api/sources/instagram?location={location}",
-        f"{base_url}/api/sources/meetup?location={location}",
-        f"{base_url}/api/sources/ticketmaster?location={location}"
-    ]
-    
-    all_events = []
-    source_results = []
-    
-    async with aiohttp.ClientSession() as session:
-        # Create all tasks simultaneously
-        tasks = []
-        for url in sources:
-            task = asyncio.create_task(fetch_source_parallel(session, url))
-            tasks.append(task)
-        
-        # Wait for all to complete (or timeout)
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Process results
-        for result in results:
-            if isinstance(result, dict) and not isinstance(result, Exception):
-                source_results.append(result)
-                if result.get("events"):
-                    all_events.extend(result["events"])
-    
-    end_time = time.time()
-    total_duration = round((end_time - start_time) * 1000)
+    tasks = {
+        asyncio.create_task(source_fn(location=location)): source_name
+        for source_name, source_fn in PARALLEL_SOURCES
+    }
+    pending = set(tasks)
+    loop = asyncio.get_running_loop()
+    deadline_at = loop.time() + deadline
+
+    try:
+        while pending:
+            remaining = deadline_at - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                try:
+                    result = task.result()
+                except Exception as e:
+                    result = {"source": tasks[task], "status": "error", "error": str(e), "events": [], "count": 0}
+                yield result
+    finally:
+        for task in pending:
+            task.cancel()
+
+    for task in pending:
+        yield {
+            "source": tasks[task],
+            "status": "error",
+            "error": f"Timeout después de {deadline:.0f}s",
+            "events": [],
+            "count": 0
+        }
+
+def build_parallel_performance(source_results: List[Dict[str, Any]], total_events: int, start_time: float) -> Dict[str, Any]:
+    """📊 Estadísticas de performance del parallel search"""
+    total_duration = round((time.time() - start_time) * 1000)
     
-    # Calculate performance stats
     performance_stats = {
-        "total_events": len(all_events),
+        "total_events": total_events,
         "total_duration_ms": total_duration,
         "sources_completed": len([r for r in source_results if r.get("status") == "success"]),
         "sources_failed": len([r for r in source_results if r.get("status") == "error"]),
@@ -1101,34 +1148,72 @@ async def parallel_search(location: str = Query(..., description="Location requi
             "events": slowest.get("count")
         }
     
+    return performance_stats
+
+@app.get("/api/parallel/search")
+async def parallel_search(
+    location: str = Query(..., description="Location required"),
+    stream: bool = Query(False, description="SSE: enviar cada fuente apenas termina")
+):
+    """
+    🚀 PARALLEL SEARCH - All sources run simultaneously
+    
+    This is MUCH faster than WebSocket because:
+    - All APIs run in parallel (not sequential)  
+    - Results return as soon as each source completes
+    - No single point of failure
+    - Better resource utilization
+
+    Las fuentes corren en el mismo proceso con un deadline compartido.
+    Con stream=true la respuesta es SSE: un evento 'source' por fuente y un
+    'complete' final con la misma forma que la respuesta JSON.
+    """
+    start_time = time.time()
+    source_order = {name: index for index, (name, _) in enumerate(PARALLEL_SOURCES)}
+
+    if stream:
+        from fastapi.responses import StreamingResponse
+
+        async def event_generator():
+            all_events = []
+            source_results = []
+            async for result in run_parallel_sources(location):
+                source_results.append(result)
+                all_events.extend(result.get("events") or [])
+                yield f"data: {json.dumps({'type': 'source', **result}, default=str)}\n\n"
+
+            source_results.sort(key=lambda r: source_order.get(r.get("source"), len(source_order)))
+            final = {
+                "type": "complete",
+                "status": "success",
+                "location": location,
+                "events": all_events,
+                "performance": build_parallel_performance(source_results, len(all_events), start_time)
+            }
+            yield f"data: {json.dumps(final, default=str)}\n\n"
+
+        return StreamingResponse(
+            event_generator(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    source_results = [result async for result in run_parallel_sources(location)]
+    # Mismo orden que antes (orden de declaración de las fuentes)
+    source_results.sort(key=lambda r: source_order.get(r.get("source"), len(source_order)))
+
+    all_events = []
+    for result in source_results:
+        if result.get("events"):
+            all_events.extend(result["events"])
+    
     return {
         "status": "success",
         "location": location,
         "events": all_events,
-        "performance": performance_stats
+        "performance": build_parallel_performance(source_results, len(all_events), start_time)
     }
 
-async def fetch_source_parallel(session, url):
-    """Helper function to fetch from individual source"""
-    try:
-        async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as response:
-            if response.status == 200:
-                return await response.json()
-            else:
-                return {
-                    "status": "error",
-                    "error": f"HTTP {response.status}",
-                    "events": [],
-                    "count": 0
-                }
-    except Exception as e:
-        return {
-            "status": "error", 
-            "error": str(e),
-            "events": [],
-            "count": 0
-        }
-
 # Simple test endpoint
 @app.get("/test")
 async def test_endpoint():
@@ -1176,11 +1261,16 @@ async def get_events_internal(
     try:
         # 🚀 USE EVENT ORCHESTRATOR (reemplaza multi_source)
         from services.EventOrchestrator import EventOrchestrator
+        from services.request_coalescer import fanout_flight, search_key
         orchestrator = EventOrchestrator()
-        result = await orchestrator.get_events_comprehensive(location=location, category=category, limit=limit)
+        # 🔗 Un solo fan-out de scrapers por búsqueda idéntica en curso
+        result = await fanout_flight.do(
+            search_key(location, category, limit),
+            lambda: orchestrator.get_events_comprehensive(location=location, category=category, limit=limit)
+        )
         
-        # Extraer eventos del resultado del orchestrator
-        events = result.get("events", [])
+        # Extraer eventos del resultado del orchestrator (copia: improve_events_images los modifica)
+        events = [dict(e) for e in result.get("events", [])]
         
         # 🖼️ MEJORAR IMÁGENES DE EVENTOS
         improved_count = 0
@@ -1257,6 +1347,7 @@ async def stream_events(
 
             # 🗄️ BUSCAR EN MYSQL EN VEZ DE GEMINI
             from services.events_db_service import search_events_by_location
+            from services.request_coalescer import ai_flight, db_flight, search_key
 
             start_time = time.time()
             logger.info(f"🔍 Consultando MySQL para ubicación: {location}")
@@ -1269,16 +1360,22 @@ async def stream_events(
                 if parent_city:
                     logger.info(f"🏙️ parent_city recibido del frontend: {parent_city}")
 
-                result = await search_events_by_location(
-                    location=location,
-                    category=category,
-                    limit=limit,
-                    days_ahead=180,
-                    include_parent_city=False,  # Sin IA
-                    parent_city=parent_city  # ✨ Pasado desde metadata del frontend
+                # 🔗 Requests idénticos concurrentes comparten UNA sola query
+                result = await db_flight.do(
+                    search_key(location, category, limit, parent_city),
+                    lambda: search_events_by_location(
+                        location=location,
+                        category=category,
+                        limit=limit,
+                        days_ahead=180,
+                        include_parent_city=False,  # Sin IA
+                        parent_city=parent_city  # ✨ Pasado desde metadata del frontend
+                    )
                 )
                 # Extraer eventos del resultado (es un dict con 'events', 'parent_city_detected', etc.)
                 events = result.get('events', []) if isinstance(result, dict) else result
+                # Copia por request: la dedup marca campos sobre los dicts compartidos
+                events = [dict(e) for e in events]
                 parent_city_detected = result.get('parent_city_detected') if isinstance(result, dict) else None
                 original_location = result.get('original_location') if isinstance(result, dict) else location
                 expanded_search = result.get('expanded_search', False) if isinstance(result, dict) else False
@@ -1329,26 +1426,43 @@ async def stream_events(
                 yield f"data: {json.dumps({'type': 'no_events', 'scraper': 'mysql_database', 'count': 0, 'message': f'No hay eventos disponibles para {location}', 'original_location': location})}\n\n"
                 logger.info(f"❌ No hay eventos en {location}")
 
-            # 🌍 OBTENER CIUDADES CERCANAS VIA IA - 100% IA, SIN CÓDIGO
-            logger.info(f"🌍 Obteniendo ciudades cercanas para {location} via IA...")
-            from services.nearby_cities_service import nearby_cities_service
-            enrichment = await nearby_cities_service.get_location_enrichment(location)
+            # 🗺️ CIUDAD METROPOLITANA, PROVINCIA Y CIUDADES CERCANAS DESDE EL GAZETTEER LOCAL
+            # Ubicaciones conocidas se resuelven sin red; la IA solo para misses reales
+            from services.gazetteer import clean_city_name, gazetteer
 
-            ai_nearby_cities = enrichment.get('nearby_cities', [])
-            province = enrichment.get('province', '')
+            place = gazetteer.resolve(location) or {}
+            main_city = place.get('main_city')
+            ai_nearby_cities = place.get('nearby_cities', [])
+            province = place.get('province', '')
 
-            # 📢 LOG: Mostrar ciudades de la IA
-            logger.info(f"🤖 Ciudades cercanas de la IA: {ai_nearby_cities}")
-            logger.info(f"📍 Provincia detectada: {province}")
+            if not ai_nearby_cities:
+                # Miss de ciudades cercanas: enriquecimiento de IndustrialFactory (cacheado)
+                logger.info(f"🌍 Gazetteer sin ciudades cercanas para {location}, consultando IA...")
+                try:
+                    from services.industrial_factory import IndustrialFactory
+                    enrichment = await ai_flight.do(
+                        ('enrichment', search_key(location)[0]),
+                        lambda: IndustrialFactory()._enrich_location_once(location)
+                    )
+                    ai_nearby_cities = ai_nearby_cities or enrichment.get('nearby_cities', [])
+                    province = province or enrichment.get('state', '')
+                    await gazetteer.learn(
+                        location, province=province, nearby_cities=ai_nearby_cities,
+                        country=enrichment.get('country')
+                    )
+                except Exception as e:
+                    logger.warning(f"⚠️ No se pudo enriquecer {location}: {e}")
 
-            # 🎯 USAR IA PARA DETECTAR CIUDAD METROPOLITANA PRINCIPAL
-            # La IA sabe que desde Merlo la ciudad principal es Buenos Aires (CABA), no Mar del Plata
-            from services.ai_service import GeminiAIService
+            logger.info(f"🗺️ Ciudades cercanas: {ai_nearby_cities} | Provincia: {province}")
 
-            main_city = None
-            try:
-                ai_service = GeminiAIService()
-                metro_prompt = f"""Para la ubicación "{location}", identifica la CIUDAD METROPOLITANA PRINCIPAL más cercana donde probablemente haya eventos culturales, conciertos y espectáculos.
+            if not main_city:
+                # 🎯 Miss de ciudad metropolitana: preguntar a la IA y guardar la respuesta
+                # La IA sabe que desde Merlo la ciudad principal es Buenos Aires (CABA), no Mar del Plata
+                from services.ai_service import GeminiAIService
+
+                try:
+                    ai_service = GeminiAIService()
+                    metro_prompt = f"""Para la ubicación "{location}", identifica la CIUDAD METROPOLITANA PRINCIPAL más cercana donde probablemente haya eventos culturales, conciertos y espectáculos.
 
 REGLAS:
 - Debe ser una CIUDAD grande, no un barrio o localidad pequeña
@@ -1365,13 +1479,26 @@ Ejemplos:
 
 Responde SOLO el nombre de la ciudad, sin explicaciones:"""
 
-                metro_response = await ai_service._call_gemini_api(metro_prompt)
-                main_city = metro_response.strip().replace('"', '').replace("'", "")
-                logger.info(f"🏙️ Ciudad metropolitana detectada por IA: {main_city}")
-            except Exception as e:
-                logger.warning(f"⚠️ No se pudo detectar ciudad metropolitana: {e}")
-                # Fallback: usar primera ciudad cercana si existe
-                main_city = ai_nearby_cities[0] if ai_nearby_cities else None
+                    metro_response = await ai_flight.do(
+                        ('metro_city', search_key(location)[0]),
+                        lambda: ai_service._call_gemini_api(
+                            metro_prompt, cache_template='metro_city', cache_params={'location': location}
+                        )
+                    )
+                    # Solo se aprende un nombre de ciudad válido (una línea, corto, sin explicaciones)
+                    main_city = clean_city_name(metro_response)
+                    if main_city:
+                        await gazetteer.learn(location, main_city=main_city)
+                        logger.info(f"🏙️ Ciudad metropolitana detectada por IA: {main_city}")
+                    else:
+                        logger.warning(f"⚠️ Respuesta de IA inválida como ciudad metropolitana: {metro_response!r:.120}")
+                        main_city = ai_nearby_cities[0] if ai_nearby_cities else None
+                except Exception as e:
+                    logger.warning(f"⚠️ No se pudo detectar ciudad metropolitana: {e}")
+                    # Fallback: usar primera ciudad cercana si existe
+                    main_city = ai_nearby_cities[0] if ai_nearby_cities else None
+            else:
+                logger.info(f"🏙️ Ciudad metropolitana (gazetteer): {main_city}")
 
             # 📤 Preparar lista de ciudades para el frontend
             # Incluir ciudad metropolitana al principio si no está en la lista
@@ -1387,7 +1514,6 @@ Responde SOLO el nombre de la ciudad, sin explicaciones:"""
 
             logger.info(f"🎯 Ciudades finales para botones: {final_cities}")
 
-            # Enviar resultado con IA pura
             yield f"data: {json.dumps({'type': 'enrichment', 'nearby_cities': final_cities, 'ai_nearby_cities': ai_nearby_cities, 'main_city': main_city, 'province': province, 'location': location})}\n\n"
 
             # ✅ Enviar evento de completado INMEDIATAMENTE (eventos ya enviados)
@@ -1426,42 +1552,15 @@ async def get_location_enrichment(
     """
     try:
         from services.gemini_factory import gemini_factory
-        import json
-        import os
 
         factory = gemini_factory  # Singleton - no need to instantiate
 
         # Si force_refresh, limpiar caché de esta ubicación específica
         if force_refresh:
-            # 1. Limpiar caché en memoria del factory
-            keys_to_remove_memory = [key for key in factory._location_cache.keys() if location.lower() in key.lower()]
-            for key in keys_to_remove_memory:
-                del factory._location_cache[key]
-                logger.info(f"🗑️ Memory cache cleared: {key}")
-
-            # 2. Limpiar caché en archivo JSON
-            cache_path = os.path.join(os.path.dirname(__file__), 'data', 'location_enrichments_cache.json')
-            try:
-                if os.path.exists(cache_path):
-                    with open(cache_path, 'r', encoding='utf-8') as f:
-                        cache_data = json.load(f)
-
-                    # Eliminar todas las entradas que contengan esta ubicación
-                    enrichments = cache_data.get('enrichments', {})
-                    keys_to_remove = [key for key in enrichments.keys() if location.lower() in key.lower()]
-
-                    for key in keys_to_remove:
-                        del enrichments[key]
-                        logger.info(f"🗑️ Cache entry removed: {key}")
-
-                    cache_data['metadata']['total_enrichments'] = len(enrichments)
+            from services.enrichment_store import LOCATION, enrichment_store
 
-                    with open(cache_path, 'w', encoding='utf-8') as f:
-                        json.dump(cache_data, f, indent=2, ensure_ascii=False)
-
-                    logger.info(f"✅ Cache cleared for: {location}")
-            except Exception as cache_err:
-                logger.warning(f"⚠️ Error clearing cache: {cache_err}")
+            removed = await asyncio.to_thread(enrichment_store.delete_matching, LOCATION, location)
+            logger.info(f"✅ Cache cleared for: {location} ({removed} entradas)")
 
         # Enriquecer ubicación
         enriched = await factory._enrich_location_once(location)
@@ -1769,7 +1868,7 @@ async def get_related_events_endpoint(
     """
     from services.events_db_service import get_related_events
 
-    result = get_related_events(
+    result = await get_related_events(
         category=category,
         city=city,
         exclude_id=exclude,
@@ -2115,16 +2214,21 @@ async def get_events(
 
             # 🗄️ BUSCAR EN MYSQL
             from services.events_db_service import search_events_by_location
+            from services.request_coalescer import db_flight, search_key
 
             start_time = time.time()
             logger.info(f"🔍 [/api/events] Consultando MySQL para ubicación: {location}")
 
             # Consultar base de datos (180 días = 6 meses hacia adelante)
-            search_result = await search_events_by_location(
-                location=location,
-                category=category,
-                limit=limit,
-                days_ahead=180
+            # 🔗 Clave propia: esta variante sí detecta parent_city (include_parent_city por defecto)
+            search_result = await db_flight.do(
+                ('with_parent_detection', *search_key(location, category, limit)),
+                lambda: search_events_by_location(
+                    location=location,
+                    category=category,
+                    limit=limit,
+                    days_ahead=180
+                )
             )
 
             # Extraer eventos y metadata de parent_city
@@ -3330,8 +3434,17 @@ async def update_event_image(event_id: str, request: Request):
 
         # 🆕 Si hay force_url, usarla directamente sin buscar
         if force_url:
+            from services.image_proxy import is_http_url
+
+            if not is_http_url(force_url):
+                raise HTTPException(status_code=400, detail="force_url must be an http(s) URL")
             logger.info(f"🖼️ Usando imagen forzada para: {title or event_id}")
             image_url = force_url
+            if title:
+                # La resolución cacheada ya no es la imagen del evento
+                from services.image_resolver import image_resolver
+
+                await asyncio.to_thread(image_resolver.invalidate, title, venue_name, city)
         else:
             logger.info(f"🖼️ Buscando imagen para: {title} (venue: {venue_name}, city: {city})")
 
@@ -3343,7 +3456,8 @@ async def update_event_image(event_id: str, request: Request):
             # 5. Solo ciudad
             from services.google_images_service import search_google_image
 
-            image_url = await search_google_image(title, venue=venue_name, city=city)
+            # Pedido explícito de imagen nueva: no reusar la resolución cacheada (60 días)
+            image_url = await search_google_image(title, venue=venue_name, city=city, refresh=True)
 
         if not image_url or 'gstatic' in image_url:
             logger.warning(f"⚠️ No se encontró imagen válida para: {title}")
@@ -3424,6 +3538,9 @@ async def update_event_image(event_id: str, request: Request):
 
             if rows_affected > 0:
                 logger.info(f"✅ Imagen guardada en MySQL para evento: {event_id} ({rows_affected} filas)")
+                from services.image_proxy import image_proxy
+
+                image_proxy.forget_event(event_id)
                 return {
                     "success": True,
                     "image_url": image_url,
@@ -3524,208 +3641,143 @@ async def force_event_image(request: Request):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/img/{event_id}")
+async def event_image(event_id: str, request: Request, size: str = "md", v: Optional[str] = None):
+    """
+    🖼️ Miniatura local de la imagen de un evento (services/image_proxy.py)
+
+    size: sm (320px) | md (640px) | lg (1280px). WebP si el browser lo acepta, si no JPEG.
+    v: versión del image_url (la pone thumbnail_url); solo la URL con la versión
+    vigente se cachea largo, el resto se sirve no-cache + ETag.
+    Si el original no se puede descargar se redirige a él (el browser lo intenta directo),
+    salvo que no sea http(s) o apunte a una red interna: ahí 404.
+    """
+    from fastapi.responses import RedirectResponse, Response
+    from services.image_proxy import (
+        MAX_AGE, ProxyError, image_proxy, image_version, is_http_url, negotiate_format, redirect_allowed
+    )
+
+    image_url = await image_proxy.event_image_url(event_id, version=v)
+    if not is_http_url(image_url):
+        raise HTTPException(status_code=404, detail="Event has no image")
+
+    try:
+        digest, content_type = await image_proxy.get(image_url, size, negotiate_format(request.headers.get("accept")))
+    except ProxyError as e:
+        if not redirect_allowed(image_url, e):
+            logger.warning(f"🖼️ Imagen de {event_id} rechazada por el proxy ({e})")
+            raise HTTPException(status_code=404, detail="Image not available")
+        logger.debug(f"🖼️ Proxy sin miniatura para {event_id} ({e}), redirigiendo al original")
+        return RedirectResponse(image_url, status_code=307)
+
+    etag = f'"{digest}"'
+    versioned = v is not None and v == image_version(image_url)
+    cache_control = f"public, max-age={MAX_AGE}, immutable" if versioned else "no-cache"
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    data = await asyncio.to_thread(image_proxy.read_blob, digest)
+    if data is None:
+        # Desalojado entre el lookup y la lectura (el original ya pasó la validación)
+        return RedirectResponse(image_url, status_code=307)
+    return Response(content=data, media_type=content_type, headers=headers)
+
+
 @app.post("/api/events/bulk-update-images-stream")
 async def bulk_update_images_stream(request: Request):
     """
     🚀 ACTUALIZACIÓN MASIVA DE IMÁGENES CON STREAMING
 
-    Procesa eventos y envía actualizaciones en tiempo real vía SSE.
+    Crea un job persistente (services/image_jobs.py) y envía su progreso vía SSE.
     El frontend puede actualizar las tarjetas a medida que se procesan.
+
+    Body:
+        events: Eventos a procesar (o source='db' para tomar de la DB los que no tienen imagen)
+        city / only_missing: Filtros de source='db'
+        job_id: Reanudar un job interrumpido en vez de crear uno nuevo
+        force: No omitir eventos ya resueltos en corridas anteriores
+        workers: Tamaño del pool (default IMAGE_JOB_WORKERS, tope IMAGE_JOB_MAX_WORKERS)
+
+    El job sigue corriendo si el cliente se desconecta:
+    GET /api/image-jobs/{job_id}/stream?after=N vuelve a engancharse.
     """
     try:
+        from fastapi.responses import StreamingResponse
+        from services.image_jobs import MAX_WORKERS, WORKERS, image_jobs, render_sse
+
         body = await request.json()
         events = body.get('events', [])
+        source = body.get('source', 'payload')
 
-        if not events:
+        if not events and source != 'db' and not body.get('job_id'):
             async def error_generator():
-                yield {
+                yield render_sse({
                     "event": "error",
                     "data": json.dumps({"message": "No events provided"})
-                }
-            return EventSourceResponse(error_generator())
-
-        logger.info(f"🚀 Iniciando actualización masiva con streaming para {len(events)} eventos")
-
-        async def image_update_generator():
-            import asyncio
-            from asyncio import Queue
+                })
+            return StreamingResponse(error_generator(), media_type="text/event-stream")
 
-            # Cola para comunicar resultados entre tasks
-            result_queue = Queue()
+        try:
+            job = await image_jobs.start(
+                events=events,
+                source=source,
+                city=body.get('city'),
+                only_missing=body.get('only_missing', True),
+                force=bool(body.get('force', False)),
+                workers=max(1, min(int(body.get('workers') or WORKERS), MAX_WORKERS)),
+                job_id=body.get('job_id')
+            )
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"Job {body.get('job_id')} not found")
 
-            # Enviar evento de inicio
-            yield {
-                "event": "update_start",
-                "data": json.dumps({
-                    "total": min(len(events), 50),
-                    "message": "Iniciando actualización de imágenes en paralelo..."
-                })
-            }
+        logger.info(f"🚀 Actualización masiva con streaming: job {job['job_id']} ({job['total']} eventos)")
+        return StreamingResponse(
+            image_jobs.stream(job['job_id'], int(body.get('after') or 0)),
+            media_type="text/event-stream"
+        )
 
-            # Función que procesa un evento y pone resultado en la cola
-            async def update_single_event(event, idx):
-                try:
-                    title = event.get('title', '')
-                    venue_name = event.get('venue_name', '')
-                    city = event.get('city', '')
-                    description = event.get('description', '')
-                    current_image = event.get('image_url', '')
-                    event_id = event.get('id', '')
-
-                    # SIEMPRE buscar la mejor imagen disponible (no omitir)
-                    logger.debug(f"🔍 Buscando mejor imagen para: {title}")
-
-                    # Buscar nueva imagen con 3 etapas: título → keywords → venue
-                    from services.google_images_service import search_google_image
-                    image_url = await search_google_image(title, venue=venue_name, city=city, description=description)
-
-                    if not image_url or 'gstatic' in image_url:
-                        logger.debug(f"⚠️ No se encontró imagen para: {title}")
-                        await result_queue.put({"failed": True})
-                        return
-
-                    # Detectar placeholders genéricos
-                    placeholder_patterns = [
-                        'unsplash', 'placeholder', 'lorem', 'picsum', 'via.placeholder',
-                        'placehold', 'dummyimage', 'fakeimg', 'lorempixel'
-                    ]
-
-                    current_is_placeholder = any(p in (current_image or '').lower() for p in placeholder_patterns)
-                    new_is_placeholder = any(p in image_url.lower() for p in placeholder_patterns)
-
-                    # Si ambas son placeholders → omitir (no hay mejora)
-                    if current_is_placeholder and new_is_placeholder:
-                        logger.debug(f"⏭️ Ambas son placeholders para '{title}' - omitiendo")
-                        await result_queue.put({"skipped": True})
-                        return
-
-                    # Si la nueva también es placeholder pero actual no → omitir (empeoraría)
-                    if new_is_placeholder and not current_is_placeholder:
-                        logger.debug(f"⏭️ Nueva imagen es placeholder para '{title}' - omitiendo")
-                        await result_queue.put({"skipped": True})
-                        return
-
-                    # Si URLs son iguales y no son placeholders → omitir
-                    if current_image == image_url:
-                        logger.debug(f"⏭️ Misma imagen para '{title}' - omitiendo")
-                        await result_queue.put({"skipped": True})
-                        return
-
-                    # ACTUALIZAR: placeholder → real, o real → real diferente
-                    if current_is_placeholder and not new_is_placeholder:
-                        logger.info(f"✨ Reemplazando placeholder con imagen real: {title}")
-                    else:
-                        logger.info(f"🔄 Actualizando imagen: {title}")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Error en bulk update stream: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-                    # Actualizar en MySQL
-                    import unicodedata
-                    title_normalized = ''.join(
-                        c for c in unicodedata.normalize('NFD', title)
-                        if unicodedata.category(c) != 'Mn'
-                    )
 
-                    connection = pymysql.connect(
-                        host=os.getenv('MYSQL_HOST', 'localhost'),
-                        port=int(os.getenv('MYSQL_PORT', 3306)),
-                        user=os.getenv('MYSQL_USER', 'root'),
-                        password=os.getenv('MYSQL_PASSWORD', ''),
-                        database=os.getenv('MYSQL_DATABASE', 'events'),
-                        charset='utf8mb4',
-                        cursorclass=pymysql.cursors.DictCursor
-                    )
+@app.get("/api/image-jobs")
+async def list_image_jobs(limit: int = 20):
+    """🖼️ Últimos jobs de actualización masiva de imágenes con sus contadores"""
+    from services.image_jobs import image_jobs
+    jobs = await asyncio.to_thread(image_jobs.store.list_jobs, limit)
+    for job in jobs:
+        job['active'] = image_jobs.is_running(job['job_id'])
+    return {"success": True, "jobs": jobs}
 
-                    cursor = connection.cursor()
-
-                    update_query = '''
-                        UPDATE events
-                        SET image_url = %s
-                        WHERE LOWER(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(
-                            title, 'á', 'a'), 'é', 'e'), 'í', 'i'), 'ó', 'o'), 'ú', 'u'),
-                            'Á', 'A'), 'É', 'E'), 'Í', 'I'), 'Ó', 'O'), 'Ú', 'U'))
-                        LIKE LOWER(%s)
-                    '''
-
-                    search_pattern = f'%{title_normalized}%'
-                    cursor.execute(update_query, (image_url, search_pattern))
-                    connection.commit()
-                    rows_affected = cursor.rowcount
-
-                    cursor.close()
-                    connection.close()
-
-                    if rows_affected > 0:
-                        logger.info(f"✅ Imagen mejorada: {title}")
-                        await result_queue.put({
-                            "success": True,
-                            "id": event_id,
-                            "title": title,
-                            "image_url": image_url
-                        })
-                    else:
-                        await result_queue.put({"failed": True})
 
-                except Exception as e:
-                    logger.error(f"❌ Error procesando '{event.get('title', 'unknown')}': {e}")
-                    await result_queue.put({"failed": True})
-
-            # Lanzar todas las tareas en paralelo con semaphore
-            semaphore = asyncio.Semaphore(5)  # Máximo 5 en paralelo
-
-            async def bounded_update(event, idx):
-                async with semaphore:
-                    await update_single_event(event, idx)
-
-            # Crear todas las tareas (SOLO 1 PARA PRUEBA)
-            tasks = [asyncio.create_task(bounded_update(event, idx))
-                     for idx, event in enumerate(events[:1])]  # Solo primer evento
-
-            # Procesar resultados a medida que llegan
-            successful = 0
-            skipped = 0
-            failed = 0
-            total_events = len(tasks)
-            processed = 0
-
-            while processed < total_events:
-                result = await result_queue.get()
-                processed += 1
-
-                if result.get('success'):
-                    successful += 1
-                    # Enviar update al frontend
-                    yield {
-                        "event": "image_updated",
-                        "data": json.dumps({
-                            "id": result['id'],
-                            "title": result['title'],
-                            "image_url": result['image_url'],
-                            "progress": int(processed / total_events * 100)
-                        })
-                    }
-                elif result.get('skipped'):
-                    skipped += 1
-                else:
-                    failed += 1
-
-            # Esperar que todas las tareas terminen
-            await asyncio.gather(*tasks, return_exceptions=True)
-
-            # Enviar evento de finalización
-            yield {
-                "event": "update_complete",
-                "data": json.dumps({
-                    "successful": successful,
-                    "skipped": skipped,
-                    "failed": failed,
-                    "total": total_events
-                })
-            }
+@app.get("/api/image-jobs/{job_id}")
+async def get_image_job(job_id: str):
+    """🖼️ Estado de un job de imágenes"""
+    from services.image_jobs import image_jobs
+    job = await asyncio.to_thread(image_jobs.store.get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return {"success": True, "job": {**job, "active": image_jobs.is_running(job_id)}}
 
-        return EventSourceResponse(image_update_generator())
 
-    except Exception as e:
-        logger.error(f"❌ Error en bulk update stream: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+@app.get("/api/image-jobs/{job_id}/stream")
+async def stream_image_job(job_id: str, request: Request, after: int = 0):
+    """
+    🔁 Reengancha el SSE de un job desde el resultado `after` (o el header
+    Last-Event-ID que manda EventSource al reconectarse)
+    """
+    from fastapi.responses import StreamingResponse
+    from services.image_jobs import image_jobs
+    if await asyncio.to_thread(image_jobs.store.get_job, job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    last_event_id = request.headers.get('last-event-id', '')
+    if last_event_id.isdigit():
+        after = max(after, int(last_event_id))
+    return StreamingResponse(image_jobs.stream(job_id, after), media_type="text/event-stream")
 
 
 # Test endpoint para probar búsqueda de imágenes con palabra hardcodeada
@@ -4445,8 +4497,10 @@ async def analyze_intent(
             "query": query,
             "categories": [result['intent']['category']] if result['intent']['category'] != 'Todos' else [],
             "location": result['intent']['location'],
-            "time_preference": None,  # Se puede agregar después
-            "price_preference": None,
+            "time_preference": result['intent'].get('date_preference'),
+            "date_range": result['intent'].get('date_range'),
+            "price_preference": result['intent'].get('price_preference'),
+            "resolved_by": result['intent'].get('resolved_by'),
             
             # Información adicional de Gemini - ESTRUCTURA CORREGIDA
             "confidence": result['intent']['confidence'],
@@ -4550,6 +4604,8 @@ Describe la experiencia, ambiente, y qué hace especial a este evento. Sé espec
 
 
 
+        from services.gemini_priority_queue import Priority
+
         manager = AIServiceManager()
 
 
@@ -4562,7 +4618,9 @@ Describe la experiencia, ambiente, y qué hace especial a este evento. Sé espec
 
             temperature=0.7,
 
-            use_fallback=True
+            use_fallback=True,
+
+            priority=Priority.CRITICAL  # Análisis Inteligente primero en el scheduler
 
         )
 
@@ -4651,18 +4709,22 @@ async def get_ai_provider_status():
     """
     📊 ESTADO DE PROVIDERS DE IA
 
-    Retorna el estado de todos los providers de IA disponibles
-    y cuál está configurado como preferido
+    Retorna el estado de todos los providers de IA disponibles,
+    cuál está configurado como preferido y su salud en vivo
+    (EWMA de latencia/errores, circuit breaker) usada para el ruteo
 
     Returns:
         {
             "preferred": "grok",
+            "routing": "health",
+            "ranking": ["gemini", "grok"],
             "providers": {
-                "grok": {"configured": true, "name": "GrokProvider"},
-                "groq": {"configured": false, "name": "GroqProvider"},
-                "gemini": {"configured": true, "name": "GeminiProvider"},
+                "grok": {"configured": true, "name": "GrokProvider", "health": {"score": 4.1, "circuit": "closed", ...}},
+                "groq": {"configured": false, "name": "GroqProvider", ...},
+                "gemini": {"configured": true, "name": "GeminiProvider", ...},
                 ...
-            }
+            },
+            "hedging": {...}
         }
     """
     try:
@@ -4734,6 +4796,34 @@ async def set_ai_provider(data: Dict[str, Any]):
         }
 
 
+@app.get("/api/ai/scheduler/stats")
+async def get_ai_scheduler_stats():
+    """
+    🚦 Scheduler de IA por prioridad: profundidad de cola, esperas, cancelados
+    """
+    from services.gemini_priority_queue import get_priority_queue
+    return get_priority_queue().get_metrics()
+
+
+@app.get("/api/ai/cache/stats")
+async def get_ai_prompt_cache_stats():
+    """
+    🧠 Caché de prompts de IA: hit rate y latencia ahorrada por template
+    """
+    from services.ai_prompt_cache import prompt_cache
+    return prompt_cache.get_stats()
+
+
+@app.post("/api/ai/cache/clear")
+async def clear_ai_prompt_cache(template: Optional[str] = None):
+    """
+    🧹 Vaciar la caché de prompts (de un template o completa)
+    """
+    from services.ai_prompt_cache import prompt_cache
+    removed = await asyncio.to_thread(prompt_cache.clear, template)
+    return {"status": "cleared", "template": template or "all", "removed": removed}
+
+
 @app.post("/api/ai/generate-event-context")
 async def generate_event_context_endpoint(data: Dict[str, Any]):
     """
@@ -4759,13 +4849,14 @@ async def generate_event_context_endpoint(data: Dict[str, Any]):
         }
     """
     try:
-        from services.ai_manager import generate_event_context
+        from services.event_insights import CONTEXT, event_insights
 
         event_data = data.get("event_data", data)  # Soportar ambos formatos
 
-        logger.info(f"🎨 Generando contexto para: {event_data.get('title', 'Unknown')}")
+        logger.info(f"🎨 Contexto para: {event_data.get('title', 'Unknown')}")
 
-        context = await generate_event_context(event_data)
+        # 💡 Precalculado por el job post-importación; on-demand si el evento cambió
+        context = await event_insights.get_or_generate(CONTEXT, event_data)
 
         if context:
             return {
@@ -5370,6 +5461,57 @@ async def get_cleanup_status():
             "error": str(e)
         }
 
+# 📚 SCRAPER REGISTRY ENDPOINTS
+@app.get("/api/admin/scrapers/registry")
+async def get_scraper_registry_status():
+    """
+    📚 Estado del registry de scrapers (generación, scrapers cargados, reloads)
+    """
+    from services.scraper_registry import scraper_registry
+    return scraper_registry.get_status()
+
+@app.post("/api/admin/scrapers/reload")
+async def reload_scraper_registry():
+    """
+    🔄 Hot-reload del registry: re-importa módulos de scrapers y re-lee enabled/disabled
+    Los requests en curso terminan con las instancias que ya tomaron
+    """
+    try:
+        from services.scraper_registry import scraper_registry
+        status = await asyncio.to_thread(scraper_registry.reload, 'admin')
+        return {"status": "reloaded", **status}
+    except Exception as e:
+        logger.error(f"❌ Error recargando scraper registry: {e}")
+        return {
+            "status": "error",
+            "error": str(e)
+        }
+
+@app.get("/api/admin/scrapers/cache")
+async def get_scraper_cache_stats():
+    """
+    🗃️ Caché de resultados de scrapers: hits/misses/stale por scraper
+    """
+    from services.scraper_cache import scraper_result_cache
+    return scraper_result_cache.get_stats()
+
+@app.get("/api/admin/scrapers/latency")
+async def get_scraper_latency_stats():
+    """
+    ⏱️ Percentiles (p50/p90/p95/p99), histograma y deadline/modo actual por scraper
+    """
+    from services.scraper_latency import scraper_latency
+    return scraper_latency.get_snapshot()
+
+@app.post("/api/admin/scrapers/cache/clear")
+async def clear_scraper_cache(scraper: Optional[str] = None):
+    """
+    🧹 Vaciar la caché de resultados (de un scraper o completa)
+    """
+    from services.scraper_cache import scraper_result_cache
+    removed = await asyncio.to_thread(scraper_result_cache.clear, scraper)
+    return {"status": "cleared", "scraper": scraper or "all", "removed": removed}
+
 # 🧪 ADMIN TESTING ENDPOINTS - Individual Source Testing
 @app.post("/api/test/facebook")
 async def test_facebook_source(request: Request):
@@ -5620,13 +5762,9 @@ async def stream_scrapers_with_progress(websocket: WebSocket, location: str, cat
             "timestamp": datetime.now().isoformat()
         })
         
-        # Usar IndustrialFactory con streaming personalizado
-        from services.gemini_factory import gemini_factory
-        factory = gemini_factory  # Singleton - no need to instantiate
-        
-        # Auto-descubrir scrapers
-        scrapers_map = factory.discovery_engine.discover_all_scrapers()
-        global_scrapers = scrapers_map.get('global', {})
+        # Scrapers ya instanciados del registry del proceso (sin re-discovery)
+        from services.scraper_registry import scraper_registry
+        global_scrapers = scraper_registry.borrow_global()
         
         await websocket.send_json({
             "type": "scrapers_discovered",
@@ -5773,13 +5911,9 @@ async def stream_events_optimized(websocket: WebSocket, location: str):
             "progress": 0
         })
         
-        # Usar IndustrialFactory para obtener scrapers optimizados
-        from services.gemini_factory import gemini_factory
-        factory = gemini_factory  # Singleton - no need to instantiate
-        
-        # Auto-discovery con flags - solo scrapers habilitados
-        scrapers_map = factory.discovery_engine.discover_all_scrapers()
-        global_scrapers = scrapers_map.get('global', {})
+        # Scrapers habilitados del registry del proceso (sin re-discovery)
+        from services.scraper_registry import scraper_registry
+        global_scrapers = scraper_registry.borrow_global()
         
         await websocket.send_json({
             "type": "scrapers_discovered",
@@ -5900,8 +6034,15 @@ from services.cloudinary_service import (
 
 @app.get("/api/admin/cloudinary/status")
 async def cloudinary_status():
-    """Check Cloudinary configuration status"""
-    return await test_cloudinary_connection()
+    """
+    Check Cloudinary configuration status + migración masiva: throughput
+    (img/s, ms por upload), motivos de falla y checkpoints por filtro
+    """
+    from services.cloudinary_migration import cloudinary_migration
+    return {
+        **await test_cloudinary_connection(),
+        "migration": cloudinary_migration.get_stats()
+    }
 
 
 @app.post("/api/admin/cloudinary/migrate-image")
@@ -5930,106 +6071,64 @@ async def migrate_single_image(image_url: str, event_id: Optional[str] = None):
 
 
 @app.post("/api/admin/cloudinary/migrate-all")
-async def migrate_all_images(limit: int = 50, city: Optional[str] = None):
+async def migrate_all_images(
+    limit: int = 50,
+    city: Optional[str] = None,
+    background: bool = False,
+    restart: bool = False,
+    concurrency: Optional[int] = None
+):
     """
-    Migrate all event images to Cloudinary
+    Migrate all event images to Cloudinary (services/cloudinary_migration.py)
 
     Args:
-        limit: Maximum number of images to migrate (default 50)
+        limit: Maximum number of images to migrate in this run (0 = whole catalogue)
         city: Optional city filter
+        background: Return immediately and follow progress on /api/admin/cloudinary/status
+        restart: Ignore the checkpoint and start from the first event
+        concurrency: Parallel uploads (default CLOUDINARY_UPLOAD_CONCURRENCY)
     """
-    import pymysql
-
-    try:
-        # Connect to MySQL (same as other endpoints)
-        connection = pymysql.connect(
-            host=os.getenv('MYSQL_HOST', 'localhost'),
-            port=int(os.getenv('MYSQL_PORT', 3306)),
-            user=os.getenv('MYSQL_USER', 'root'),
-            password=os.getenv('MYSQL_PASSWORD', ''),
-            database=os.getenv('MYSQL_DATABASE', 'events'),
-            charset='utf8mb4',
-            cursorclass=pymysql.cursors.DictCursor
-        )
-
-        cursor = connection.cursor()
-
-        # Get events with non-cloudinary images
-        if city:
-            cursor.execute("""
-                SELECT id, title, image_url, city, category
-                FROM events
-                WHERE image_url IS NOT NULL
-                AND image_url != ''
-                AND image_url NOT LIKE '%%cloudinary.com%%'
-                AND image_url NOT LIKE '%%example.com%%'
-                AND city LIKE %s
-                LIMIT %s
-            """, (f"%{city}%", limit))
-        else:
-            cursor.execute("""
-                SELECT id, title, image_url, city, category
-                FROM events
-                WHERE image_url IS NOT NULL
-                AND image_url != ''
-                AND image_url NOT LIKE '%%cloudinary.com%%'
-                AND image_url NOT LIKE '%%example.com%%'
-                LIMIT %s
-            """, (limit,))
-
-        events = cursor.fetchall()
-
-        stats = {
-            "total": len(events),
-            "migrated": 0,
-            "failed": 0,
-            "updated_events": []
-        }
-
-        for event in events:
-            event_id = str(event["id"])
-            original_url = event["image_url"]
-
-            # Upload to Cloudinary
-            new_url = await upload_image_from_url(
-                original_url,
-                folder="eventos",
-                public_id=f"event_{event_id[:8]}"
-            )
-
-            if new_url:
-                # Update database
-                cursor.execute(
-                    "UPDATE events SET image_url = %s WHERE id = %s",
-                    (new_url, event["id"])
-                )
-                connection.commit()
-
-                stats["migrated"] += 1
-                stats["updated_events"].append({
-                    "id": event_id,
-                    "title": event["title"],
-                    "old_url": original_url,
-                    "new_url": new_url
-                })
-            else:
-                stats["failed"] += 1
-
-        cursor.close()
-        connection.close()
+    from services.cloudinary_migration import cloudinary_migration
+    from services.cloudinary_service import UPLOAD_CONCURRENCY
+
+    options = {
+        "limit": limit or None,
+        "city": city,
+        "restart": restart,
+        "concurrency": concurrency or UPLOAD_CONCURRENCY
+    }
 
+    if background:
         return {
             "success": True,
-            "stats": stats
+            "background": True,
+            "migration": cloudinary_migration.start(**options)
         }
 
-    except pymysql.Error as e:
-        logger.error(f"MySQL connection error: {e}")
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    try:
+        stats = await cloudinary_migration.run(**options)
     except Exception as e:
         logger.error(f"Migration error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    if stats["current"].get("status") == "failed":
+        raise HTTPException(status_code=500, detail=f"Database error: {stats['current'].get('error')}")
+
+    current = stats["current"]
+    return {
+        "success": True,
+        "already_running": stats.get("already_running", False),
+        "stats": {
+            "total": current.get("processed", 0),
+            "migrated": current.get("migrated", 0),
+            "failed": current.get("failed", 0),
+            "failure_reasons": current.get("failure_reasons", {}),
+            "images_per_second": current.get("images_per_second", 0.0),
+            "last_id": current.get("last_id"),
+            "updated_events": stats["recent"]
+        }
+    }
+
 
 @app.get("/api/admin/cloudinary/pending")
 async def get_pending_images(limit: int = 100, city: Optional[str] = None):
@@ -4,10 +4,15 @@ Sistema con fallback automático y cambio dinámico de providers
 """
 
 import os
+import time
+import asyncio
 import logging
-from typing import Optional, Dict, Any, List
+from typing import AsyncIterator, Optional, Dict, Any, List, Tuple
 from .ai_providers import (
+    FAILURE_ERROR,
+    FAILURE_JSON,
     AIProvider,
+    AIStreamError,
     ProviderType,
     GrokProvider,
     GroqProvider,
@@ -15,9 +20,43 @@ from .ai_providers import (
     PerplexityProvider,
     OpenRouterProvider
 )
+from .ai_prompt_cache import is_cacheable, make_prompt_key, prompt_cache
 
 logger = logging.getLogger(__name__)
 
+# 🏁 Modo hedged (opt-in): si el provider en curso no responde dentro de su p90,
+# se lanza el siguiente en paralelo y gana la primera respuesta válida
+HEDGED_MODE = os.getenv('AI_HEDGED_MODE', 'false').lower() in ('1', 'true', 'yes')
+HEDGE_DEFAULT_DELAY = float(os.getenv('AI_HEDGE_DEFAULT_DELAY', 2.5))
+HEDGE_MIN_DELAY = float(os.getenv('AI_HEDGE_MIN_DELAY', 0.5))
+HEDGE_MIN_SAMPLES = int(os.getenv('AI_HEDGE_MIN_SAMPLES', 5))
+HEDGE_MAX_PARALLEL = int(os.getenv('AI_HEDGE_MAX_PARALLEL', 2))
+# Presupuesto total de una llamada hedged (segundos)
+HEDGE_LATENCY_BUDGET = float(os.getenv('AI_HEDGE_LATENCY_BUDGET', 20))
+
+# 🩺 Ruteo: 'health' (provider más sano primero) o 'static' (preferido + fallback_order)
+ROUTING_MODE = os.getenv('AI_ROUTING_MODE', 'health').lower()
+
+
+def rank_providers(
+    providers: Dict[ProviderType, AIProvider],
+    static_order: List[ProviderType]
+) -> List[ProviderType]:
+    """
+    Ordena candidatos por salud (ProviderHealth.score, menor = mejor)
+
+    - Solo providers configurados
+    - Los que tienen el circuit breaker abierto se saltean; si TODOS lo tienen
+      abierto se devuelven igual, primero el que antes termina su cooldown
+    - Empates (ej. sin muestras) respetan static_order: sin historial el
+      ruteo es idéntico al orden preferido + fallback
+    """
+    configured = [p for p in static_order if providers[p].is_configured()]
+    available = [p for p in configured if providers[p].health.is_available()]
+    if not available:
+        return sorted(configured, key=lambda p: providers[p].health.open_until)
+    return sorted(available, key=lambda p: providers[p].health.score())
+
 
 class AIServiceManager:
     """
@@ -28,6 +67,8 @@ class AIServiceManager:
     - Cambio dinámico de provider preferido
     - Singleton pattern para eficiencia
     - Cache de providers configurados
+    - Ruteo por salud (EWMA de latencia/errores + circuit breaker); el
+      preferido y fallback_order quedan como desempate
     """
 
     _instance = None
@@ -69,6 +110,26 @@ class AIServiceManager:
                 ProviderType.PERPLEXITY
             ]
 
+            # 📊 Métricas del modo hedged
+            self.hedge_stats = {
+                'calls': 0,
+                'hedges_fired': 0,
+                'hedge_wins': 0,
+                'primary_wins': 0,
+                'budget_exceeded': 0,
+                'all_failed': 0,
+                'wins_by_provider': {},
+            }
+
+            # 🌊 Métricas de generate_stream
+            self.stream_stats = {
+                'calls': 0,
+                'cache_hits': 0,
+                'fallbacks': 0,
+                'interrupted': 0,
+                'all_failed': 0,
+            }
+
             AIServiceManager._initialized = True
             self._log_configured_providers()
 
@@ -88,7 +149,13 @@ class AIServiceManager:
         self,
         prompt: str,
         temperature: float = 0.3,
-        use_fallback: bool = True
+        use_fallback: bool = True,
+        cache: bool = True,
+        cache_template: Optional[str] = None,
+        cache_params: Optional[Dict[str, Any]] = None,
+        hedge: Optional[bool] = None,
+        latency_budget: Optional[float] = None,
+        priority: Optional[int] = None
     ) -> Optional[str]:
         """
         Genera respuesta usando el provider preferido con fallback automático
@@ -97,54 +164,312 @@ class AIServiceManager:
             prompt: Texto del prompt
             temperature: Nivel de creatividad (0.0-1.0)
             use_fallback: Si debe intentar otros providers si el preferido falla
+            cache: False = no leer ni guardar en la caché de prompts
+            cache_template: Id del template del prompt (ej. 'metro_city'); sin él
+                la respuesta NO se cachea (RAW_TEMPLATE = clave por texto del prompt)
+            cache_params: Parámetros que definen la respuesta (ej. {'location': ...})
+            hedge: Modo hedged (None = AI_HEDGED_MODE)
+            latency_budget: Segundos máximos de la llamada hedged (None = AI_HEDGE_LATENCY_BUDGET)
+            priority: Priority del scheduler (gemini_priority_queue); None = sin cola.
+                Los hits de caché nunca esperan en la cola
 
         Returns:
             Respuesta del modelo o None si todos fallan
         """
-        # Intentar con provider preferido primero
-        preferred = self.providers[self.preferred_provider]
+        response, _ = await self._generate_with_source(
+            prompt, temperature, use_fallback, cache, cache_template, cache_params, hedge, latency_budget, priority
+        )
+        return response
 
-        if preferred.is_configured():
-            logger.info(f"🎯 Usando provider preferido: {self.preferred_provider.value}")
-            response = await preferred.generate(prompt, temperature)
+    async def _generate_with_source(
+        self,
+        prompt: str,
+        temperature: float,
+        use_fallback: bool,
+        cache: bool,
+        cache_template: Optional[str],
+        cache_params: Optional[Dict[str, Any]],
+        hedge: Optional[bool],
+        latency_budget: Optional[float],
+        priority: Optional[int] = None
+    ) -> Tuple[Optional[str], Optional[ProviderType]]:
+        """generate() + provider que respondió (None si vino de la caché)"""
+        template_id, key = make_prompt_key(cache_template, cache_params, temperature, prompt)
+        hedged = HEDGED_MODE if hedge is None else hedge
+
+        async def run_uncached():
+            if priority is None:
+                return await self._generate_uncached(prompt, temperature, use_fallback, hedged, latency_budget)
+            # Slot del scheduler con prioridad; cancelar este await cancela el request
+            from .gemini_priority_queue import get_priority_queue
+            return await get_priority_queue().submit_call(
+                lambda: self._generate_uncached(prompt, temperature, use_fallback, hedged, latency_budget),
+                priority
+            )
+
+        if not is_cacheable(cache, cache_template):
+            prompt_cache.count_bypass(template_id)
+            return await run_uncached()
+
+        cached = await prompt_cache.get(template_id, key)
+        if cached is not None:
+            logger.info(f"🧠 Prompt cache HIT ({template_id})")
+            return cached, None
+
+        started = time.perf_counter()
+        response, source = await run_uncached()
+        if response:
+            await prompt_cache.put(template_id, key, response, (time.perf_counter() - started) * 1000)
+        return response, source
+
+    async def _generate_uncached(
+        self,
+        prompt: str,
+        temperature: float,
+        use_fallback: bool,
+        hedged: bool = False,
+        latency_budget: Optional[float] = None
+    ) -> Tuple[Optional[str], Optional[ProviderType]]:
+        """Candidatos en orden de salud, uno tras otro (sin caché)"""
+        if hedged:
+            return await self._generate_hedged(
+                prompt, temperature, use_fallback,
+                latency_budget if latency_budget is not None else HEDGE_LATENCY_BUDGET
+            )
+
+        candidates = self._candidate_order(use_fallback)
+
+        for position, provider_type in enumerate(candidates):
+            if position == 0:
+                logger.info(f"🎯 Usando provider: {provider_type.value} (score {self.providers[provider_type].health.score():.2f})")
+            else:
+                logger.info(f"🔄 Intentando fallback con: {provider_type.value}")
+
+            response = await self._call_provider(provider_type, prompt, temperature)
 
             if response:
-                return response
-            else:
-                logger.warning(f"⚠️ Provider preferido {self.preferred_provider.value} falló")
+                if position > 0:
+                    logger.info(f"✅ Fallback exitoso con {provider_type.value}")
+                return response, provider_type
+
+            logger.warning(f"⚠️ Provider {provider_type.value} falló")
+
+        logger.error("❌ Todos los providers fallaron")
+        return None, None
+
+    async def _call_provider(self, provider_type: ProviderType, prompt: str, temperature: float) -> Optional[str]:
+        """Llama a un provider y actualiza su latencia y su salud (las cancelaciones no cuentan)"""
+        provider = self.providers[provider_type]
+        if not provider.health.try_acquire():
+            # Half-open con la prueba ya en curso: se saltea sin contar como fallo
+            logger.info(f"⏭️ {provider_type.value}: prueba del circuit breaker en curso, se saltea")
+            return None
+        provider.last_failure = None
+        started = time.perf_counter()
+        try:
+            response = await provider.generate(prompt, temperature)
+        except asyncio.CancelledError:
+            provider.health.release_probe()
+            raise
+        elapsed = time.perf_counter() - started
+
+        if response:
+            provider.record_latency(elapsed)
+            provider.health.record_success(elapsed)
+        else:
+            # last_failure lo setea el provider al capturar una excepción;
+            # sin excepción (HTTP != 200, respuesta vacía) cuenta como error
+            provider.health.record_failure(provider.last_failure or FAILURE_ERROR, elapsed)
+        return response
+
+    async def generate_stream(
+        self,
+        prompt: str,
+        temperature: float = 0.3,
+        use_fallback: bool = True,
+        cache: bool = True,
+        cache_template: Optional[str] = None,
+        cache_params: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Como generate() pero entrega la respuesta en fragmentos a medida que llega
+
+        - Hit de caché de prompts: un único fragmento con la respuesta guardada
+        - Fallback al siguiente provider solo si el anterior falló ANTES del primer
+          fragmento; un corte a mitad de stream se propaga (AIStreamError) porque
+          el cliente ya recibió parte del texto
+        - No pasa por el scheduler de prioridades: un stream ocuparía el slot
+          mientras el cliente lee, bloqueando a los requests de la cola
 
-        # Si falló y fallback está habilitado, intentar otros
+        Raises:
+            AIStreamError: ningún provider pudo empezar, o el stream se cortó
+        """
+        self.stream_stats['calls'] += 1
+        template_id, key = make_prompt_key(cache_template, cache_params, temperature, prompt)
+        use_cache = is_cacheable(cache, cache_template)
+
+        if use_cache:
+            cached = await prompt_cache.get(template_id, key)
+            if cached is not None:
+                logger.info(f"🧠 Prompt cache HIT en stream ({template_id})")
+                self.stream_stats['cache_hits'] += 1
+                yield cached
+                return
+        else:
+            prompt_cache.count_bypass(template_id)
+
+        for position, provider_type in enumerate(self._candidate_order(use_fallback)):
+            provider = self.providers[provider_type]
+            if not provider.health.try_acquire():
+                logger.info(f"⏭️ Stream: prueba del circuit breaker de {provider_type.value} en curso, se saltea")
+                continue
+            provider.last_failure = None
+            if position > 0:
+                self.stream_stats['fallbacks'] += 1
+                logger.info(f"🔄 Stream: intentando fallback con {provider_type.value}")
+
+            parts: List[str] = []
+            started = time.perf_counter()
+            try:
+                async for chunk in provider.generate_stream(prompt, temperature):
+                    parts.append(chunk)
+                    yield chunk
+            except (asyncio.CancelledError, GeneratorExit):
+                # Cliente desconectado: no es un fallo del provider
+                provider.health.release_probe()
+                raise
+            except Exception as e:
+                provider.health.record_failure(provider.last_failure or FAILURE_ERROR, time.perf_counter() - started)
+                if parts:
+                    self.stream_stats['interrupted'] += 1
+                    logger.error(f"❌ Stream de {provider_type.value} cortado tras {len(parts)} fragmentos: {e}")
+                    raise AIStreamError(f"Stream de {provider_type.value} interrumpido") from e
+                logger.warning(f"⚠️ Stream con {provider_type.value} no arrancó: {e}")
+                continue
+
+            elapsed = time.perf_counter() - started
+            provider.record_latency(elapsed)
+            provider.health.record_success(elapsed)
+            if use_cache:
+                await prompt_cache.put(template_id, key, ''.join(parts).strip(), elapsed * 1000)
+            return
+
+        self.stream_stats['all_failed'] += 1
+        logger.error("❌ Ningún provider pudo iniciar el stream")
+        raise AIStreamError("Todos los providers fallaron")
+
+    def _candidate_order(self, use_fallback: bool) -> List[ProviderType]:
+        """Preferido + fallback_order, reordenados por salud si AI_ROUTING_MODE=health"""
+        order = [self.preferred_provider]
         if use_fallback:
-            logger.info("🔄 Iniciando fallback automático...")
+            order += [p for p in self.fallback_order if p != self.preferred_provider]
+        if ROUTING_MODE == 'health':
+            return rank_providers(self.providers, order)
+        return [p for p in order if self.providers[p].is_configured()]
+
+    def _hedge_delay(self, provider_type: ProviderType) -> float:
+        """Espera antes de lanzar el hedge: p90 del provider (o default sin muestras)"""
+        provider = self.providers[provider_type]
+        if len(provider.latencies) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        return max(HEDGE_MIN_DELAY, provider.latency_percentile(90))
+
+    async def _generate_hedged(
+        self,
+        prompt: str,
+        temperature: float,
+        use_fallback: bool,
+        latency_budget: float
+    ) -> Tuple[Optional[str], Optional[ProviderType]]:
+        """
+        🏁 MODO HEDGED
+
+        - Arranca el primer candidato (mismo orden que el modo secuencial)
+        - Si no responde dentro de su p90, lanza el siguiente en paralelo
+          (hasta AI_HEDGE_MAX_PARALLEL a la vez)
+        - Si un provider falla, el siguiente arranca de inmediato (fallback)
+        - Gana la primera respuesta válida; el resto se cancela
+        - Pasado latency_budget se cancela todo y se devuelve None
+        """
+        candidates = self._candidate_order(use_fallback)
+        if not candidates:
+            logger.error("❌ Ningún provider configurado")
+            return None, None
 
-            for provider_type in self.fallback_order:
-                # Saltar el que ya intentamos
-                if provider_type == self.preferred_provider:
-                    continue
+        self.hedge_stats['calls'] += 1
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + latency_budget
+        running: Dict[asyncio.Task, ProviderType] = {}
+
+        def launch() -> float:
+            provider_type = candidates.pop(0)
+            task = asyncio.create_task(self._call_provider(provider_type, prompt, temperature))
+            running[task] = provider_type
+            return loop.time() + self._hedge_delay(provider_type)
 
-                provider = self.providers[provider_type]
+        primary = candidates[0]
+        next_hedge_at = launch()
 
-                if not provider.is_configured():
-                    logger.debug(f"⏭️ Saltando {provider_type.value} (no configurado)")
+        try:
+            while running:
+                now = loop.time()
+                if now >= deadline:
+                    self.hedge_stats['budget_exceeded'] += 1
+                    logger.error(f"⏰ Presupuesto de {latency_budget:.1f}s agotado en modo hedged")
+                    return None, None
+
+                can_hedge = bool(candidates) and len(running) < HEDGE_MAX_PARALLEL
+                timeout = deadline - now
+                if can_hedge:
+                    timeout = min(timeout, max(0.0, next_hedge_at - now))
+
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    if can_hedge and loop.time() >= next_hedge_at:
+                        self.hedge_stats['hedges_fired'] += 1
+                        logger.info(f"🏁 Hedge: lanzando {candidates[0].value} en paralelo")
+                        next_hedge_at = launch()
                     continue
 
-                logger.info(f"🔄 Intentando fallback con: {provider_type.value}")
-                response = await provider.generate(prompt, temperature)
+                for task in done:
+                    provider_type = running.pop(task)
+                    try:
+                        response = task.result()
+                    except Exception as e:
+                        logger.warning(f"⚠️ {provider_type.value} falló en modo hedged: {e}")
+                        response = None
 
-                if response:
-                    logger.info(f"✅ Fallback exitoso con {provider_type.value}")
-                    return response
-                else:
-                    logger.warning(f"⚠️ Fallback con {provider_type.value} falló")
+                    if response:
+                        wins = self.hedge_stats['wins_by_provider']
+                        wins[provider_type.value] = wins.get(provider_type.value, 0) + 1
+                        self.hedge_stats['primary_wins' if provider_type == primary else 'hedge_wins'] += 1
+                        logger.info(f"✅ Respuesta hedged de {provider_type.value}")
+                        return response, provider_type
 
-        logger.error("❌ Todos los providers fallaron")
-        return None
+                    logger.warning(f"⚠️ {provider_type.value} sin respuesta válida")
+
+                # Fallback inmediato por los que fallaron
+                while candidates and len(running) < HEDGE_MAX_PARALLEL:
+                    next_hedge_at = launch()
+
+            self.hedge_stats['all_failed'] += 1
+            logger.error("❌ Todos los providers fallaron (modo hedged)")
+            return None, None
+
+        finally:
+            for task in running:
+                task.cancel()
 
     async def generate_json(
         self,
         prompt: str,
         temperature: float = 0.3,
-        use_fallback: bool = True
+        use_fallback: bool = True,
+        cache: bool = True,
+        cache_template: Optional[str] = None,
+        cache_params: Optional[Dict[str, Any]] = None,
+        priority: Optional[int] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Genera respuesta en formato JSON
@@ -153,11 +478,14 @@ class AIServiceManager:
             prompt: Texto del prompt (debe pedir JSON en respuesta)
             temperature: Nivel de creatividad
             use_fallback: Si debe usar fallback
+            cache, cache_template, cache_params, priority: ver generate()
 
         Returns:
             Diccionario parseado o None si falla
         """
-        response = await self.generate(prompt, temperature, use_fallback)
+        response, source = await self._generate_with_source(
+            prompt, temperature, use_fallback, cache, cache_template, cache_params, None, None, priority
+        )
 
         if not response:
             return None
@@ -177,6 +505,12 @@ class AIServiceManager:
         except json.JSONDecodeError as e:
             logger.error(f"❌ Error parseando JSON: {e}")
             logger.error(f"Respuesta raw: {response[:200]}")
+            # Cuenta contra la salud del provider que la generó
+            if source is not None:
+                self.providers[source].health.record_failure(FAILURE_JSON)
+            # No dejar en caché una respuesta que no parsea
+            if is_cacheable(cache, cache_template):
+                await prompt_cache.invalidate(cache_template, cache_params, temperature, prompt)
             return None
 
     def set_preferred_provider(self, provider_type: str) -> bool:
@@ -213,13 +547,26 @@ class AIServiceManager:
         """
         status = {
             "preferred": self.preferred_provider.value,
-            "providers": {}
+            "routing": ROUTING_MODE,
+            "ranking": [p.value for p in self._candidate_order(use_fallback=True)],
+            "providers": {},
+            "hedging": {
+                "enabled_by_default": HEDGED_MODE,
+                "latency_budget_s": HEDGE_LATENCY_BUDGET,
+                **self.hedge_stats
+            },
+            "streaming": dict(self.stream_stats)
         }
 
         for ptype, provider in self.providers.items():
+            p90 = provider.latency_percentile(90)
             status["providers"][ptype.value] = {
                 "configured": provider.is_configured(),
-                "name": provider.name
+                "name": provider.name,
+                "latency_p90_s": round(p90, 3) if p90 is not None else None,
+                "hedge_delay_s": round(self._hedge_delay(ptype), 3),
+                "health": provider.health.snapshot(),
+                "streaming": provider.stream_snapshot()
             }
 
         return status
@@ -254,7 +601,10 @@ Reglas:
 - SOLO el JSON, sin explicaciones"""
 
     try:
-        data = await manager.generate_json(prompt, temperature=0.1)
+        data = await manager.generate_json(
+            prompt, temperature=0.1,
+            cache_template='location_info', cache_params={'location': location}
+        )
 
         if data and all(key in data for key in ['city', 'province', 'country', 'confidence']):
             logger.info(f"✅ Ubicación detectada: {data['city']}, {data['country']}")
@@ -315,7 +665,10 @@ Responde SOLO en formato JSON válido, sin markdown ni explicaciones adicionales
 """
 
     try:
-        data = await manager.generate_json(prompt, temperature=0.3)
+        data = await manager.generate_json(
+            prompt, temperature=0.3,
+            cache_template='nearby_cities_list', cache_params={'location': location, 'limit': limit}
+        )
 
         if data and "cities" in data:
             cities = data["cities"][:limit]
@@ -328,12 +681,16 @@ Responde SOLO en formato JSON válido, sin markdown ni explicaciones adicionales
     return []
 
 
-async def generate_event_context(event_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+async def generate_event_context(
+    event_data: Dict[str, Any],
+    priority: Optional[int] = None
+) -> Optional[Dict[str, Any]]:
     """
     🎨 Genera contexto adicional para un evento usando IA
 
     Args:
         event_data: Datos del evento (title, category, venue_name, city, start_datetime)
+        priority: Priority del scheduler de IA (None = sin cola)
 
     Returns:
         Dict con curiosidades, que_llevar, ambiente_esperado, tip_local
@@ -359,7 +716,15 @@ IMPORTANTE: Responde SOLO el JSON, sin markdown ni explicaciones.
 """
 
     try:
-        data = await manager.generate_json(prompt, temperature=0.7)
+        data = await manager.generate_json(
+            prompt, temperature=0.7,
+            priority=priority,
+            cache_template='event_context',
+            cache_params={
+                key: event_data.get(key)
+                for key in ('title', 'category', 'venue_name', 'city', 'start_datetime')
+            }
+        )
         return data
 
     except Exception as e:
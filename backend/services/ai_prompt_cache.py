@@ -0,0 +1,295 @@
+"""
+🧠 AI PROMPT CACHE - Caché de respuestas de IA por (template, parámetros, temperatura)
+Los prompts de ubicación (ciudad metropolitana, ciudades cercanas, ciudad padre...)
+son casi idénticos para la misma ubicación: la clave NO es el texto del prompt sino
+el id del template + sus parámetros normalizados ('Córdoba ' == 'cordoba').
+
+- Tier en memoria acotado (LRU)
+- Tier local en SQLite (WAL) que sobrevive reinicios, con TTL por template
+- Opt-in: solo se cachean las llamadas con cache_template explícito
+  (generate(..., cache=False) sigue desactivándola aun con template)
+- Hit rate y latencia ahorrada por template
+
+Los prompts sin template NO se cachean: respuestas creativas (temperature alta,
+conversaciones) no deben congelarse, ni guardarse prompts con HTML de scrapers.
+Quien quiera cachear por texto del prompt pasa cache_template=RAW_TEMPLATE.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv('AI_PROMPT_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+MAX_ENTRIES = int(os.getenv('AI_PROMPT_CACHE_MAX_ENTRIES', 1000))
+DB_PATH = os.getenv(
+    'AI_PROMPT_CACHE_DB',
+    os.path.join(os.path.dirname(__file__), '..', 'data', 'cache', 'ai_prompt_cache.sqlite3')
+)
+
+RAW_TEMPLATE = 'raw'
+DEFAULT_TTL = int(os.getenv('AI_PROMPT_CACHE_DEFAULT_TTL', 86400))
+
+# TTL (segundos) por template: la geografía no cambia, los textos creativos sí
+TEMPLATE_TTLS: Dict[str, int] = {
+    'metro_city': 30 * 86400,
+    'nearby_cities': 30 * 86400,
+    'nearby_cities_list': 30 * 86400,
+    'parent_city': 90 * 86400,
+    'major_nearby_cities': 30 * 86400,
+    'location_info': 30 * 86400,
+    'event_context': 7 * 86400,
+    RAW_TEMPLATE: DEFAULT_TTL,
+}
+
+
+def _parse_ttl_overrides(raw: str) -> Dict[str, int]:
+    """AI_PROMPT_CACHE_TTLS='metro_city=3600,raw=600'"""
+    overrides = {}
+    for item in raw.split(','):
+        name, _, value = item.partition('=')
+        if name.strip() and value.strip().isdigit():
+            overrides[name.strip()] = int(value)
+    return overrides
+
+
+TEMPLATE_TTLS.update(_parse_ttl_overrides(os.getenv('AI_PROMPT_CACHE_TTLS', '')))
+
+
+def normalize_param(value: Any) -> Any:
+    """Strings sin acentos, en minúscula y con espacios colapsados; el resto tal cual"""
+    if isinstance(value, str):
+        nfd = unicodedata.normalize('NFD', value.casefold())
+        return ' '.join(''.join(c for c in nfd if unicodedata.category(c) != 'Mn').split())
+    if isinstance(value, dict):
+        return {str(k): normalize_param(v) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [normalize_param(v) for v in value]
+    return value
+
+
+def is_cacheable(cache: bool, template: Optional[str]) -> bool:
+    """Se lee/escribe la caché solo con template explícito (y cache=True)"""
+    return ENABLED and cache and bool(template)
+
+
+def make_prompt_key(
+    template: Optional[str],
+    params: Optional[Dict[str, Any]],
+    temperature: float,
+    prompt: Optional[str] = None
+) -> Tuple[str, str]:
+    """
+    Returns:
+        (template_id, sha256) — sin template se usa el prompt normalizado
+    """
+    template_id = template or RAW_TEMPLATE
+    payload = params if template_id != RAW_TEMPLATE else {'prompt': ' '.join((prompt or '').split())}
+    raw = json.dumps([template_id, normalize_param(payload or {}), round(float(temperature), 3)],
+                     ensure_ascii=False, sort_keys=True, default=str)
+    return template_id, hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class PromptCache:
+    """
+    🧠 CACHÉ DE PROMPTS (memoria + SQLite)
+
+    Uso (dentro de AIServiceManager.generate):
+        template_id, key = make_prompt_key('metro_city', {'location': loc}, 0.1)
+        cached = await prompt_cache.get(template_id, key)
+        ...
+        await prompt_cache.put(template_id, key, response, latency_ms)
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, db_path: Optional[str] = DB_PATH):
+        self.max_entries = max_entries
+        self.db_path = os.path.normpath(db_path) if db_path else None
+
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    # ------------------------------------------------------------------ SQLite
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._conn is None and self.db_path:
+            try:
+                os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+                conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS prompt_cache (
+                        key TEXT PRIMARY KEY,
+                        template TEXT NOT NULL,
+                        response TEXT NOT NULL,
+                        latency_ms REAL NOT NULL DEFAULT 0,
+                        created_at REAL NOT NULL,
+                        expires_at REAL NOT NULL
+                    )
+                ''')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_prompt_cache_expires ON prompt_cache (expires_at)')
+                conn.commit()
+                self._conn = conn
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Prompt cache SQLite deshabilitado: {e}")
+                self.db_path = None
+        return self._conn
+
+    def _db_get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._db_lock:
+            conn = self._connect()
+            if conn is None:
+                return None
+            row = conn.execute(
+                'SELECT template, response, latency_ms, expires_at FROM prompt_cache WHERE key = ? AND expires_at > ?',
+                (key, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        return {'template': row[0], 'response': row[1], 'latency_ms': row[2], 'expires_at': row[3]}
+
+    def _db_put(self, key: str, template_id: str, entry: Dict[str, Any]):
+        with self._db_lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            conn.execute(
+                'INSERT OR REPLACE INTO prompt_cache (key, template, response, latency_ms, created_at, expires_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (key, template_id, entry['response'], entry['latency_ms'], time.time(), entry['expires_at'])
+            )
+            conn.commit()
+
+    def _db_delete(self, key: Optional[str] = None, template_id: Optional[str] = None) -> int:
+        with self._db_lock:
+            conn = self._connect()
+            if conn is None:
+                return 0
+            if key is not None:
+                cursor = conn.execute('DELETE FROM prompt_cache WHERE key = ?', (key,))
+            elif template_id is not None:
+                cursor = conn.execute('DELETE FROM prompt_cache WHERE template = ?', (template_id,))
+            else:
+                cursor = conn.execute('DELETE FROM prompt_cache')
+            conn.execute('DELETE FROM prompt_cache WHERE expires_at <= ?', (time.time(),))
+            conn.commit()
+            return cursor.rowcount
+
+    # ------------------------------------------------------------------ stats
+
+    def _count(self, template_id: str, counter: str, amount: float = 1):
+        stats = self._stats.setdefault(template_id, {
+            'hits': 0, 'sqlite_hits': 0, 'misses': 0, 'stores': 0, 'bypass': 0, 'saved_ms': 0.0,
+        })
+        stats[counter] += amount
+
+    def get_stats(self) -> Dict[str, Any]:
+        """📊 Hit rate y latencia ahorrada por template"""
+        templates = {}
+        for template_id, stats in self._stats.items():
+            lookups = stats['hits'] + stats['misses']
+            templates[template_id] = {
+                **stats,
+                'saved_ms': round(stats['saved_ms']),
+                'hit_rate': round(stats['hits'] / lookups, 3) if lookups else 0.0,
+                'ttl_s': TEMPLATE_TTLS.get(template_id, DEFAULT_TTL),
+            }
+        return {
+            'enabled': ENABLED,
+            'memory_entries': len(self._memory),
+            'max_entries': self.max_entries,
+            'sqlite_path': self.db_path,
+            'saved_ms_total': round(sum(s['saved_ms'] for s in self._stats.values())),
+            'templates': templates,
+        }
+
+    # ------------------------------------------------------------------ API
+
+    def count_bypass(self, template_id: str):
+        self._count(template_id, 'bypass')
+
+    def _remember(self, key: str, entry: Dict[str, Any]):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def get(self, template_id: str, key: str) -> Optional[str]:
+        """Respuesta cacheada vigente o None (cuenta hit/miss)"""
+        entry = self._memory.get(key)
+        if entry is not None and entry['expires_at'] <= time.time():
+            self._memory.pop(key, None)
+            entry = None
+
+        if entry is None and self.db_path:
+            entry = await asyncio.to_thread(self._db_get, key)
+            if entry is not None:
+                self._count(template_id, 'sqlite_hits')
+                self._remember(key, entry)
+        elif entry is not None:
+            self._memory.move_to_end(key)
+
+        if entry is None:
+            self._count(template_id, 'misses')
+            return None
+
+        self._count(template_id, 'hits')
+        self._count(template_id, 'saved_ms', entry['latency_ms'])
+        return entry['response']
+
+    async def put(self, template_id: str, key: str, response: str, latency_ms: float):
+        """Guarda una respuesta no vacía con el TTL del template"""
+        if not response:
+            return
+        ttl = TEMPLATE_TTLS.get(template_id, DEFAULT_TTL)
+        entry = {
+            'template': template_id,
+            'response': response,
+            'latency_ms': float(latency_ms),
+            'expires_at': time.time() + ttl,
+        }
+        self._remember(key, entry)
+        self._count(template_id, 'stores')
+        if self.db_path:
+            await asyncio.to_thread(self._db_put, key, template_id, entry)
+
+    async def invalidate(
+        self,
+        template: Optional[str],
+        params: Optional[Dict[str, Any]],
+        temperature: float,
+        prompt: Optional[str] = None
+    ):
+        """Borra una entrada (ej. respuesta que no parseó o que no se debe asumir)"""
+        _, key = make_prompt_key(template, params, temperature, prompt)
+        self._memory.pop(key, None)
+        if self.db_path:
+            await asyncio.to_thread(self._db_delete, key)
+
+    def clear(self, template_id: Optional[str] = None) -> int:
+        """Vacía la caché (de un template o completa) en memoria y SQLite"""
+        if template_id is None:
+            removed = len(self._memory)
+            self._memory.clear()
+        else:
+            keys = [k for k, e in self._memory.items() if e.get('template') == template_id]
+            for key in keys:
+                self._memory.pop(key, None)
+            removed = len(keys)
+        if self.db_path:
+            removed = max(removed, self._db_delete(template_id=template_id))
+        return removed
+
+
+# Instancia global compartida por todo el proceso
+prompt_cache = PromptCache(db_path=DB_PATH if ENABLED else None)
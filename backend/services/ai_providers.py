@@ -4,15 +4,58 @@ Soporta múltiples servicios de IA: Groq, Gemini, Perplexity, OpenRouter
 """
 
 import os
+import math
+import time
+import asyncio
 import logging
 import aiohttp
 import json
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any, List
+from collections import deque
+from typing import AsyncIterator, Deque, Optional, Dict, Any, List
 from enum import Enum
 
 logger = logging.getLogger(__name__)
 
+# Respuestas exitosas recientes por provider usadas para percentiles de latencia
+LATENCY_WINDOW = int(os.getenv('AI_PROVIDER_LATENCY_WINDOW', 50))
+
+# 🩺 Salud por provider (EWMA + circuit breaker)
+HEALTH_EWMA_ALPHA = float(os.getenv('AI_HEALTH_EWMA_ALPHA', 0.3))
+HEALTH_PRIOR_LATENCY = float(os.getenv('AI_HEALTH_PRIOR_LATENCY', 3.0))   # Latencia asumida sin muestras
+HEALTH_ERROR_PENALTY = float(os.getenv('AI_HEALTH_ERROR_PENALTY', 4.0))   # Peso de la tasa de error en el score
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('AI_CIRCUIT_FAILURE_THRESHOLD', 3))
+CIRCUIT_COOLDOWN = float(os.getenv('AI_CIRCUIT_COOLDOWN', 60))
+CIRCUIT_MAX_COOLDOWN = float(os.getenv('AI_CIRCUIT_MAX_COOLDOWN', 600))
+
+FAILURE_ERROR = 'error'
+FAILURE_TIMEOUT = 'timeout'
+FAILURE_JSON = 'json'
+
+# 🌊 Streaming: el timeout de la sesión (15s total) cortaría respuestas largas,
+# así que cada stream usa su propio límite total y uno entre chunks
+STREAM_READ_TIMEOUT = float(os.getenv('AI_STREAM_READ_TIMEOUT', 15))
+STREAM_TOTAL_TIMEOUT = float(os.getenv('AI_STREAM_TOTAL_TIMEOUT', 120))
+
+# Los providers no informan tokens en cada chunk: se estiman por caracteres
+CHARS_PER_TOKEN = 4
+
+
+class AIStreamError(Exception):
+    """Stream que no pudo empezar o se cortó (HTTP != 200, sin contenido)"""
+
+
+def _stream_timeout() -> aiohttp.ClientTimeout:
+    return aiohttp.ClientTimeout(total=STREAM_TOTAL_TIMEOUT, connect=5, sock_read=STREAM_READ_TIMEOUT)
+
+
+async def _iter_sse_data(response: aiohttp.ClientResponse) -> AsyncIterator[str]:
+    """Payload de cada línea 'data:' de una respuesta text/event-stream"""
+    async for raw_line in response.content:
+        line = raw_line.decode('utf-8', errors='replace').strip()
+        if line.startswith('data:'):
+            yield line[5:].strip()
+
 
 class ProviderType(str, Enum):
     """Tipos de providers disponibles"""
@@ -23,6 +66,127 @@ class ProviderType(str, Enum):
     OPENROUTER = "openrouter"  # OpenRouter
 
 
+class ProviderHealth:
+    """
+    🩺 SALUD DE UN PROVIDER
+
+    - EWMA de latencia (respuestas exitosas y timeouts) y de tasa de error
+    - Contadores de errores, timeouts y respuestas JSON que no parsean
+    - Circuit breaker: tras N fallos seguidos queda abierto durante un cooldown
+      (que se duplica en cada nuevo disparo); pasado el cooldown queda half-open
+      y try_acquire() deja pasar UNA sola prueba a la vez: si la prueba tiene
+      éxito se cierra, si falla se vuelve a abrir en el acto
+
+    score(): menor = más sano (latencia esperada penalizada por errores)
+    """
+
+    def __init__(self, name: str = ''):
+        self.name = name
+        self.latency_ewma: Optional[float] = None
+        self.error_ewma = 0.0
+        self.calls = 0
+        self.successes = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.json_failures = 0
+        self.consecutive_failures = 0
+        self.circuit_trips = 0
+        self.open_until = 0.0
+        self._cooldown = CIRCUIT_COOLDOWN
+        self._probing = False
+
+    def _ewma(self, current: Optional[float], value: float) -> float:
+        if current is None:
+            return value
+        return HEALTH_EWMA_ALPHA * value + (1 - HEALTH_EWMA_ALPHA) * current
+
+    def record_success(self, latency: float):
+        self.calls += 1
+        self.successes += 1
+        self.latency_ewma = self._ewma(self.latency_ewma, latency)
+        self.error_ewma = self._ewma(self.error_ewma, 0.0)
+        self.consecutive_failures = 0
+        # Circuito cerrado: el próximo disparo vuelve al cooldown base
+        self.open_until = 0.0
+        self._cooldown = CIRCUIT_COOLDOWN
+        self._probing = False
+
+    def record_failure(self, kind: str = FAILURE_ERROR, latency: Optional[float] = None):
+        """kind: 'error' | 'timeout' | 'json' (respuesta llegó pero no sirve)"""
+        if kind != FAILURE_JSON:
+            self.calls += 1
+        if kind == FAILURE_TIMEOUT:
+            self.timeouts += 1
+        elif kind == FAILURE_JSON:
+            self.json_failures += 1
+        else:
+            self.errors += 1
+
+        if latency is not None and kind == FAILURE_TIMEOUT:
+            self.latency_ewma = self._ewma(self.latency_ewma, latency)
+        self.error_ewma = self._ewma(self.error_ewma, 1.0)
+        self.consecutive_failures += 1
+
+        # Falló la prueba half-open: se reabre sin esperar otros N fallos
+        if self._probing or self.consecutive_failures >= CIRCUIT_FAILURE_THRESHOLD:
+            reason = 'prueba half-open fallida' if self._probing else f'{self.consecutive_failures} fallos seguidos'
+            self.open_until = time.monotonic() + self._cooldown
+            self.circuit_trips += 1
+            logger.warning(f"🔌 Circuit breaker de {self.name} abierto por {self._cooldown:.0f}s ({reason})")
+            self._cooldown = min(CIRCUIT_MAX_COOLDOWN, self._cooldown * 2)
+            self.consecutive_failures = 0
+            self._probing = False
+
+    def _half_open(self) -> bool:
+        return self.open_until > 0 and time.monotonic() >= self.open_until
+
+    def is_available(self) -> bool:
+        """Circuito cerrado, o half-open sin una prueba en curso (no reserva nada)"""
+        if self.open_until == 0.0:
+            return True
+        return self._half_open() and not self._probing
+
+    def try_acquire(self) -> bool:
+        """
+        Reserva una llamada justo antes de hacerla
+
+        En half-open solo la primera llamada pasa (la prueba); las demás reciben
+        False hasta que record_success/record_failure/release_probe la terminen.
+        Cerrado (o abierto pero elegido igual porque todos están abiertos): True.
+        """
+        if not self._half_open():
+            return True
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def release_probe(self):
+        """La prueba se canceló sin resultado: la próxima llamada vuelve a probar"""
+        self._probing = False
+
+    def score(self) -> float:
+        latency = self.latency_ewma if self.latency_ewma is not None else HEALTH_PRIOR_LATENCY
+        return latency * (1 + HEALTH_ERROR_PENALTY * self.error_ewma)
+
+    def snapshot(self) -> Dict[str, Any]:
+        remaining = self.open_until - time.monotonic()
+        return {
+            'score': round(self.score(), 3),
+            'latency_ewma_s': round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            'error_rate_ewma': round(self.error_ewma, 3),
+            'calls': self.calls,
+            'successes': self.successes,
+            'errors': self.errors,
+            'timeouts': self.timeouts,
+            'json_failures': self.json_failures,
+            'circuit': 'open' if remaining > 0 else ('half_open' if self.open_until > 0 else 'closed'),
+            'probe_in_flight': self._probing,
+            'circuit_open_for_s': round(remaining, 1) if remaining > 0 else 0,
+            'circuit_trips': self.circuit_trips,
+        }
+
+
 class AIProvider(ABC):
     """
     🧠 CLASE BASE ABSTRACTA PARA PROVIDERS DE IA
@@ -34,6 +198,31 @@ class AIProvider(ABC):
         self.api_key = api_key
         self.session: Optional[aiohttp.ClientSession] = None
         self.name = self.__class__.__name__
+        # ⏱️ Latencias (segundos) de las últimas respuestas exitosas
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        # 🩺 Salud para el ruteo del manager
+        self.health = ProviderHealth(self.name)
+        # Tipo del último fallo por excepción ('timeout' | 'error'); lo resetea el manager
+        self.last_failure: Optional[str] = None
+        # 🌊 Streaming: tiempo al primer token (s) y tokens/s estimados de los últimos streams
+        self.ttfts: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.token_rates: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.stream_stats = {'streams': 0, 'completed': 0, 'failed': 0}
+
+    def _note_failure(self, error: BaseException):
+        """Clasifica la excepción capturada en generate() para las métricas de salud"""
+        self.last_failure = FAILURE_TIMEOUT if isinstance(error, asyncio.TimeoutError) else FAILURE_ERROR
+
+    def record_latency(self, seconds: float):
+        """Registra la duración de una respuesta exitosa"""
+        self.latencies.append(seconds)
+
+    def latency_percentile(self, pct: float) -> Optional[float]:
+        """Percentil (rango más cercano) de las latencias recientes; None sin muestras"""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))]
 
     async def _get_session(self) -> aiohttp.ClientSession:
         """Obtiene o crea sesión HTTP reutilizable con timeout de 15s"""
@@ -48,6 +237,84 @@ class AIProvider(ABC):
             logger.debug(f"🔗 Nueva sesión HTTP para {self.name} (timeout: 15s)")
         return self.session
 
+    async def generate_stream(self, prompt: str, temperature: float = 0.3) -> AsyncIterator[str]:
+        """
+        Genera la respuesta como fragmentos de texto a medida que llegan
+
+        Registra tiempo al primer token y tokens/s. A diferencia de generate(),
+        los fallos se propagan (AIStreamError, timeouts) para que el manager
+        sepa si todavía puede probar otro provider.
+        """
+        started = time.perf_counter()
+        first_token_at: Optional[float] = None
+        chars = 0
+        self.stream_stats['streams'] += 1
+        try:
+            async for chunk in self._stream(prompt, temperature):
+                if not chunk:
+                    continue
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                    self.ttfts.append(first_token_at - started)
+                chars += len(chunk)
+                yield chunk
+            if first_token_at is None:
+                raise AIStreamError(f"{self.name} terminó el stream sin contenido")
+        except Exception as e:
+            self.stream_stats['failed'] += 1
+            if self.last_failure is None:
+                self._note_failure(e)
+            raise
+
+        self.stream_stats['completed'] += 1
+        generation = time.perf_counter() - first_token_at
+        if generation > 0:
+            self.token_rates.append(chars / CHARS_PER_TOKEN / generation)
+
+    async def _stream(self, prompt: str, temperature: float) -> AsyncIterator[str]:
+        """Sin streaming nativo: un solo fragmento con la respuesta de generate()"""
+        text = await self.generate(prompt, temperature)
+        if not text:
+            raise AIStreamError(f"{self.name} no respondió")
+        yield text
+
+    async def _stream_chat_completions(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        headers: Dict[str, str]
+    ) -> AsyncIterator[str]:
+        """Stream de una API compatible con OpenAI (choices[0].delta.content hasta [DONE])"""
+        session = await self._get_session()
+        async with session.post(url, json={**payload, "stream": True}, headers=headers,
+                                timeout=_stream_timeout()) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise AIStreamError(f"{self.name} HTTP {response.status} - {error_text[:300]}")
+            async for data in _iter_sse_data(response):
+                if data == '[DONE]':
+                    break
+                try:
+                    event = json.loads(data)
+                except json.JSONDecodeError:
+                    continue
+                choices = event.get('choices') or []
+                if choices:
+                    text = (choices[0].get('delta') or {}).get('content')
+                    if text:
+                        yield text
+
+    def stream_snapshot(self) -> Dict[str, Any]:
+        """📊 Métricas de streaming: TTFT y tokens/s (estimados) recientes"""
+        ttfts = sorted(self.ttfts)
+        rates = list(self.token_rates)
+        return {
+            **self.stream_stats,
+            'ttft_avg_s': round(sum(ttfts) / len(ttfts), 3) if ttfts else None,
+            'ttft_p90_s': round(ttfts[min(len(ttfts) - 1, math.ceil(0.9 * len(ttfts)) - 1)], 3) if ttfts else None,
+            'tokens_per_s_avg': round(sum(rates) / len(rates), 1) if rates else None,
+        }
+
     async def close(self):
         """Cierra la sesión HTTP"""
         if self.session and not self.session.closed:
@@ -134,11 +401,24 @@ class GrokProvider(AIProvider):
                     return None
 
         except Exception as e:
+            self._note_failure(e)
             import traceback
             logger.error(f"❌ Error en Grok provider: {str(e)}")
             logger.error(f"❌ Traceback: {traceback.format_exc()}")
             return None
 
+    async def _stream(self, prompt: str, temperature: float) -> AsyncIterator[str]:
+        if not self.api_key:
+            raise AIStreamError("GROK_API_KEY no configurada")
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature
+        }
+        headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
+        async for chunk in self._stream_chat_completions(self.base_url, payload, headers):
+            yield chunk
+
 
 class GroqProvider(AIProvider):
     """
@@ -197,9 +477,23 @@ class GroqProvider(AIProvider):
                     return None
 
         except Exception as e:
+            self._note_failure(e)
             logger.error(f"❌ Error en Groq provider: {e}")
             return None
 
+    async def _stream(self, prompt: str, temperature: float) -> AsyncIterator[str]:
+        if not self.api_key:
+            raise AIStreamError("GROQ_API_KEY no configurada")
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": 8192
+        }
+        headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
+        async for chunk in self._stream_chat_completions(self.base_url, payload, headers):
+            yield chunk
+
 
 class GeminiProvider(AIProvider):
     """
@@ -261,9 +555,37 @@ class GeminiProvider(AIProvider):
                     return None
 
         except Exception as e:
+            self._note_failure(e)
             logger.error(f"❌ Error en Gemini provider: {e}")
             return None
 
+    async def _stream(self, prompt: str, temperature: float) -> AsyncIterator[str]:
+        """streamGenerateContent con alt=sse: cada evento trae un GenerateContentResponse parcial"""
+        if not self.api_key:
+            raise AIStreamError("GEMINI_API_KEY no configurada")
+
+        session = await self._get_session()
+        url = (f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}"
+               f":streamGenerateContent?alt=sse&key={self.api_key}")
+        payload = {
+            "contents": [{"parts": [{"text": prompt}]}],
+            "generationConfig": {"temperature": temperature, "maxOutputTokens": 8192}
+        }
+
+        async with session.post(url, json=payload, timeout=_stream_timeout()) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise AIStreamError(f"Gemini HTTP {response.status} - {error_text[:300]}")
+            async for data in _iter_sse_data(response):
+                try:
+                    event = json.loads(data)
+                except json.JSONDecodeError:
+                    continue
+                for candidate in event.get('candidates') or []:
+                    for part in (candidate.get('content') or {}).get('parts') or []:
+                        if part.get('text'):
+                            yield part['text']
+
 
 class PerplexityProvider(AIProvider):
     """
@@ -321,9 +643,22 @@ class PerplexityProvider(AIProvider):
                     return None
 
         except Exception as e:
+            self._note_failure(e)
             logger.error(f"❌ Error en Perplexity provider: {e}")
             return None
 
+    async def _stream(self, prompt: str, temperature: float) -> AsyncIterator[str]:
+        if not self.api_key:
+            raise AIStreamError("PERPLEXITY_API_KEY no configurada")
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature
+        }
+        headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
+        async for chunk in self._stream_chat_completions(self.base_url, payload, headers):
+            yield chunk
+
 
 class OpenRouterProvider(AIProvider):
     """
@@ -390,6 +725,7 @@ class OpenRouterProvider(AIProvider):
                             continue
 
                 except Exception as model_error:
+                    self._note_failure(model_error)
                     logger.warning(f"⚠️ Error con modelo {model}: {model_error}")
                     continue
 
@@ -397,5 +733,39 @@ class OpenRouterProvider(AIProvider):
             return None
 
         except Exception as e:
+            self._note_failure(e)
             logger.error(f"❌ Error en OpenRouter provider: {e}")
             return None
+
+    async def _stream(self, prompt: str, temperature: float) -> AsyncIterator[str]:
+        """Mismo fallback entre modelos que generate(), pero solo antes del primer fragmento"""
+        if not self.api_key:
+            raise AIStreamError("OPENROUTER_API_KEY no configurada")
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "https://eventos-visualizer.com",
+            "X-Title": "Eventos Visualizer"
+        }
+
+        for model in self.models:
+            payload = {
+                "model": model,
+                "messages": [{"role": "user", "content": prompt}],
+                "temperature": temperature
+            }
+            started = False
+            try:
+                async for chunk in self._stream_chat_completions(self.base_url, payload, headers):
+                    started = True
+                    yield chunk
+            except Exception as model_error:
+                if started:
+                    raise
+                logger.warning(f"⚠️ Stream con modelo {model} falló: {model_error}")
+                continue
+            if started:
+                self.current_model = model
+                return
+
+        raise AIStreamError("Todos los modelos de OpenRouter fallaron")
@@ -411,7 +411,14 @@ MEETUP (FORMATO ESPECÍFICO):
         }
         return codes.get(country_lower, 'US')
     
-    async def _call_gemini_api(self, prompt: str) -> Optional[str]:
+    async def _call_gemini_api(
+        self,
+        prompt: str,
+        cache: bool = True,
+        cache_template: Optional[str] = None,
+        cache_params: Optional[Dict[str, Any]] = None,
+        priority: Optional[int] = None
+    ) -> Optional[str]:
         """
         🤖 LLAMADA A AI (MULTI-PROVIDER)
 
@@ -420,6 +427,8 @@ MEETUP (FORMATO ESPECÍFICO):
 
         Args:
             prompt: Prompt para la IA
+            cache, cache_template, cache_params: caché de prompts (ver AIServiceManager.generate)
+            priority: Priority del scheduler de IA (None = sin cola)
 
         Returns:
             Respuesta del modelo o None si falla
@@ -430,7 +439,11 @@ MEETUP (FORMATO ESPECÍFICO):
             response = await self.ai_manager.generate(
                 prompt=prompt,
                 temperature=0.1,
-                use_fallback=True  # Fallback automático si el preferido falla
+                use_fallback=True,  # Fallback automático si el preferido falla
+                cache=cache,
+                cache_template=cache_template,
+                cache_params=cache_params,
+                priority=priority
             )
 
             if response:
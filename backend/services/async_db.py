@@ -0,0 +1,249 @@
+"""
+⚡ ASYNC DB - Capa de acceso a datos NO bloqueante
+Pool de conexiones asíncrono compartido (SQLAlchemy asyncio) con timeouts por query
+y métricas de saturación del pool para dimensionar workers
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Driver síncrono -> driver asíncrono equivalente
+ASYNC_DRIVERS = {
+    'mysql': 'mysql+aiomysql',
+    'mysql+pymysql': 'mysql+aiomysql',
+    'mysql+mysqldb': 'mysql+aiomysql',
+    'postgresql': 'postgresql+asyncpg',
+    'postgresql+psycopg2': 'postgresql+asyncpg',
+    'postgres': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+
+def to_async_url(db_url: str) -> str:
+    """
+    Convierte una DATABASE_URL síncrona al driver asíncrono equivalente
+    mysql+pymysql://... -> mysql+aiomysql://...
+    """
+    url = make_url(db_url)
+    async_driver = ASYNC_DRIVERS.get(url.drivername, url.drivername)
+    return url.set(drivername=async_driver).render_as_string(hide_password=False)
+
+
+class AsyncDatabase:
+    """
+    ⚡ BASE DE DATOS ASÍNCRONA COMPARTIDA
+
+    Características:
+    - Un solo engine asíncrono por proceso (pool dimensionado por env)
+    - Timeout por query (DB_QUERY_TIMEOUT) para no colgar el event loop; una
+      query cortada (timeout o cancelación) invalida su conexión en vez de
+      devolverla al pool con el protocolo a medias
+    - Métricas de saturación: conexiones en uso, esperas, timeouts
+    """
+
+    def __init__(
+        self,
+        db_url: Optional[str] = None,
+        pool_size: Optional[int] = None,
+        max_overflow: Optional[int] = None,
+        pool_timeout: Optional[float] = None,
+        query_timeout: Optional[float] = None
+    ):
+        self.db_url = db_url or os.getenv('DATABASE_URL')
+        self.pool_size = pool_size or int(os.getenv('DB_POOL_SIZE', 10))
+        self.max_overflow = max_overflow if max_overflow is not None else int(os.getenv('DB_POOL_MAX_OVERFLOW', 10))
+        self.pool_timeout = pool_timeout or float(os.getenv('DB_POOL_TIMEOUT', 10))
+        self.query_timeout = query_timeout or float(os.getenv('DB_QUERY_TIMEOUT', 8))
+
+        self._engine: Optional[AsyncEngine] = None
+
+        # 📊 Métricas del pool
+        self._stats = {
+            'queries': 0,
+            'query_errors': 0,
+            'query_timeouts': 0,
+            'connections_invalidated': 0,
+            'acquire_count': 0,
+            'acquire_waits': 0,          # Adquisiciones que tuvieron que esperar (>5ms)
+            'acquire_wait_total': 0.0,
+            'acquire_wait_max': 0.0,
+            'query_time_total': 0.0,
+            'in_flight': 0,
+            'in_flight_peak': 0,
+        }
+
+    @property
+    def engine(self) -> AsyncEngine:
+        """Engine asíncrono creado de forma lazy (una sola vez por proceso)"""
+        if self._engine is None:
+            if not self.db_url:
+                raise RuntimeError("DATABASE_URL no configurada")
+
+            self._engine = create_async_engine(
+                to_async_url(self.db_url),
+                pool_size=self.pool_size,
+                max_overflow=self.max_overflow,
+                pool_timeout=self.pool_timeout,
+                pool_pre_ping=True,
+                pool_recycle=1800
+            )
+            logger.info(
+                f"⚡ Async DB pool creado (size={self.pool_size}, overflow={self.max_overflow}, "
+                f"query_timeout={self.query_timeout}s)"
+            )
+        return self._engine
+
+    @asynccontextmanager
+    async def connection(self):
+        """Toma una conexión del pool registrando el tiempo de espera"""
+        acquire_start = time.perf_counter()
+        async with self.engine.connect() as conn:
+            waited = time.perf_counter() - acquire_start
+            self._stats['acquire_count'] += 1
+            self._stats['acquire_wait_total'] += waited
+            self._stats['acquire_wait_max'] = max(self._stats['acquire_wait_max'], waited)
+            if waited > 0.005:
+                self._stats['acquire_waits'] += 1
+
+            self._stats['in_flight'] += 1
+            self._stats['in_flight_peak'] = max(self._stats['in_flight_peak'], self._stats['in_flight'])
+            try:
+                yield conn
+            finally:
+                self._stats['in_flight'] -= 1
+
+    async def fetch_all(
+        self,
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None
+    ) -> List[Any]:
+        """
+        Ejecuta un SELECT y devuelve todas las filas
+
+        Args:
+            query: SQL con parámetros nombrados (:param)
+            params: Parámetros de la query
+            timeout: Timeout en segundos (default: DB_QUERY_TIMEOUT)
+
+        Returns:
+            Lista de filas (Row, indexables por posición)
+
+        Raises:
+            asyncio.TimeoutError si la query supera el timeout
+        """
+        return await self._run(query, params, timeout, fetch=True)
+
+    async def execute(
+        self,
+        query: str,
+        params: Optional[Any] = None,
+        timeout: Optional[float] = None
+    ) -> int:
+        """
+        Ejecuta una sentencia de escritura dentro de una transacción
+
+        Returns:
+            Cantidad de filas afectadas
+        """
+        return await self._run(query, params, timeout, fetch=False)
+
+    async def _run(self, query: str, params, timeout: Optional[float], fetch: bool):
+        timeout = timeout or self.query_timeout
+        start = time.perf_counter()
+        self._stats['queries'] += 1
+
+        async def _do():
+            async with self.connection() as conn:
+                try:
+                    result = await conn.execute(text(query), params or {})
+                    if fetch:
+                        return result.fetchall()
+                    await conn.commit()
+                    return result.rowcount
+                except asyncio.CancelledError:
+                    # wait_for canceló la query en vuelo (o se canceló el request): el
+                    # driver quedó en un estado indefinido, la conexión se descarta
+                    self._stats['connections_invalidated'] += 1
+                    await conn.invalidate()
+                    raise
+
+        try:
+            return await asyncio.wait_for(_do(), timeout=timeout)
+        except asyncio.TimeoutError:
+            self._stats['query_timeouts'] += 1
+            logger.warning(f"⏱️ Query excedió timeout de {timeout}s")
+            raise
+        except Exception:
+            self._stats['query_errors'] += 1
+            raise
+        finally:
+            self._stats['query_time_total'] += time.perf_counter() - start
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """
+        📊 Métricas de saturación del pool
+
+        Returns:
+            Dict con tamaño del pool, conexiones en uso, esperas y timeouts
+        """
+        stats = dict(self._stats)
+        acquires = stats['acquire_count'] or 1
+        queries = stats['queries'] or 1
+
+        pool_info = {
+            'pool_size': self.pool_size,
+            'max_overflow': self.max_overflow,
+            'checked_out': 0,
+            'checked_in': 0,
+            'overflow': 0,
+        }
+        if self._engine is not None:
+            pool = self._engine.sync_engine.pool
+            pool_info.update({
+                'checked_out': pool.checkedout(),
+                'checked_in': pool.checkedin(),
+                'overflow': pool.overflow(),
+            })
+
+        capacity = self.pool_size + self.max_overflow
+        return {
+            **pool_info,
+            'capacity': capacity,
+            'saturation': round(pool_info['checked_out'] / capacity, 3) if capacity else 0.0,
+            'in_flight': stats['in_flight'],
+            'in_flight_peak': stats['in_flight_peak'],
+            'queries': stats['queries'],
+            'query_errors': stats['query_errors'],
+            'query_timeouts': stats['query_timeouts'],
+            'connections_invalidated': stats['connections_invalidated'],
+            'avg_query_ms': round(stats['query_time_total'] / queries * 1000, 2),
+            'acquire_waits': stats['acquire_waits'],
+            'avg_acquire_wait_ms': round(stats['acquire_wait_total'] / acquires * 1000, 2),
+            'max_acquire_wait_ms': round(stats['acquire_wait_max'] * 1000, 2),
+            'query_timeout_s': self.query_timeout,
+        }
+
+    async def dispose(self):
+        """Cierra todas las conexiones del pool"""
+        if self._engine is not None:
+            await self._engine.dispose()
+            self._engine = None
+            logger.info("⚡ Async DB pool cerrado")
+
+
+# Instancia global compartida por todo el proceso
+async_db = AsyncDatabase()
@@ -92,10 +92,20 @@ class AutoDiscoveryEngine:
             self.ai_service = None
             self.url_discovery_service = None
     
-    def discover_all_scrapers(self) -> Dict[str, Dict[str, Any]]:
+    def _import_module(self, module_name: str, reload_modules: bool = False):
+        """Importa un módulo de scraper; con reload_modules re-ejecuta el código desde disco"""
+        module = importlib.import_module(module_name)
+        if reload_modules:
+            module = importlib.reload(module)
+        return module
+
+    def discover_all_scrapers(self, reload_modules: bool = False) -> Dict[str, Dict[str, Any]]:
         """
         🌟 DESCUBRIMIENTO COMPLETO DE SCRAPERS
         
+        Args:
+            reload_modules: Recargar módulos ya importados (hot-reload del registry)
+        
         Returns:
             Diccionario organizado por categorías:
             {
@@ -112,18 +122,18 @@ class AutoDiscoveryEngine:
         }
         
         # 🌍 Descobrir scrapers globales
-        global_scrapers = self._discover_global_scrapers()
+        global_scrapers = self._discover_global_scrapers(reload_modules)
         scrapers_map['global'] = global_scrapers
         logger.info(f"🌍 Encontrados {len(global_scrapers)} scrapers globales")
         
         # 🏛️ Descobrir scrapers regionales
-        regional_scrapers = self._discover_regional_scrapers()
+        regional_scrapers = self._discover_regional_scrapers(reload_modules)
         scrapers_map['regional'] = regional_scrapers
         total_regional = sum(len(country_scrapers) for country_scrapers in regional_scrapers.values())
         logger.info(f"🏛️ Encontrados {total_regional} scrapers regionales en {len(regional_scrapers)} países")
         
         # 🏙️ Descobrir scrapers locales
-        local_scrapers = self._discover_local_scrapers()
+        local_scrapers = self._discover_local_scrapers(reload_modules)
         scrapers_map['local'] = local_scrapers
         logger.info(f"🏙️ Encontrados {len(local_scrapers)} scrapers locales")
         
@@ -151,7 +161,7 @@ class AutoDiscoveryEngine:
         
         return scrapers_map
     
-    def _discover_global_scrapers(self) -> Dict[str, Any]:
+    def _discover_global_scrapers(self, reload_modules: bool = False) -> Dict[str, Any]:
         """
         🌍 DESCUBRIR SCRAPERS GLOBALES
         
@@ -182,7 +192,7 @@ class AutoDiscoveryEngine:
                 module_name = f"services.global_scrapers.{filename[:-3]}"
                 
                 # Importar módulo dinámicamente
-                module = importlib.import_module(module_name)
+                module = self._import_module(module_name, reload_modules)
                 scraper_class = getattr(module, class_name)
                 
                 # Verificar que hereda de BaseGlobalScraper
@@ -199,7 +209,7 @@ class AutoDiscoveryEngine:
         
         return scrapers
     
-    def _discover_regional_scrapers(self) -> Dict[str, Dict[str, Any]]:
+    def _discover_regional_scrapers(self, reload_modules: bool = False) -> Dict[str, Dict[str, Any]]:
         """
         🏛️ DESCUBRIR SCRAPERS REGIONALES
         
@@ -222,7 +232,8 @@ class AutoDiscoveryEngine:
             if os.path.isdir(country_path):
                 country_scrapers = self._load_scrapers_from_directory(
                     country_path, 
-                    f"scrapers.regional.{country_folder}"
+                    f"scrapers.regional.{country_folder}",
+                    reload_modules
                 )
                 
                 if country_scrapers:
@@ -230,7 +241,7 @@ class AutoDiscoveryEngine:
         
         return regional_scrapers
     
-    def _discover_local_scrapers(self) -> Dict[str, Any]:
+    def _discover_local_scrapers(self, reload_modules: bool = False) -> Dict[str, Any]:
         """
         🏙️ DESCUBRIR SCRAPERS LOCALES
         
@@ -244,9 +255,14 @@ class AutoDiscoveryEngine:
             logger.info("📁 Carpeta /local/ no existe, saltando...")
             return {}
         
-        return self._load_scrapers_from_directory(local_path, "scrapers.local")
+        return self._load_scrapers_from_directory(local_path, "scrapers.local", reload_modules)
     
-    def _load_scrapers_from_directory(self, directory: str, module_prefix: str) -> Dict[str, Any]:
+    def _load_scrapers_from_directory(
+        self,
+        directory: str,
+        module_prefix: str,
+        reload_modules: bool = False
+    ) -> Dict[str, Any]:
         """
         📂 CARGADOR GENÉRICO DE SCRAPERS
         
@@ -265,7 +281,7 @@ class AutoDiscoveryEngine:
                 class_name = f"{scraper_name.title()}Scraper"
                 module_name = f"{module_prefix}.{filename[:-3]}"
                 
-                module = importlib.import_module(module_name)
+                module = self._import_module(module_name, reload_modules)
                 scraper_class = getattr(module, class_name)
                 
                 # Instanciar scraper
@@ -0,0 +1,358 @@
+"""
+☁️ CLOUDINARY MIGRATION - Migración masiva de imágenes de eventos a Cloudinary
+/api/admin/cloudinary/migrate-all traía hasta `limit` filas de una vez y subía y
+actualizaba de a un evento (un commit por evento); no había forma de recorrer todo
+el catálogo ni de seguir después de un reinicio.
+
+- Candidatos por keyset sobre id (páginas de PAGE_SIZE, la siguiente se lee
+  mientras se sube la actual): nunca todo el catálogo en memoria ni OFFSET
+- Uploads en paralelo acotado (CLOUDINARY_UPLOAD_CONCURRENCY) sobre el cliente
+  HTTP compartido de cloudinary_service
+- Un UPDATE ... CASE por página (un statement y un commit por lote); solo pisa la
+  imagen si sigue siendo la original (otro proceso pudo cambiarla mientras tanto)
+- Checkpoint por filtro (último id terminado + contadores) en
+  data/cache/cloudinary_migration.json: una corrida interrumpida sigue donde quedó.
+  Las fallas no se reintentan en la misma pasada; restart=True vuelve a empezar
+- Throughput y motivos de falla en /api/admin/cloudinary/status
+
+Uso (CLI):
+    python -m services.cloudinary_migration                 # todo el catálogo, reanudable
+    python -m services.cloudinary_migration --city Córdoba --limit 500
+    python -m services.cloudinary_migration --restart
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from services.cloudinary_service import UPLOAD_CONCURRENCY, upload_image
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FILE = os.getenv(
+    'CLOUDINARY_MIGRATION_CHECKPOINT',
+    os.path.join(os.path.dirname(__file__), '..', 'data', 'cache', 'cloudinary_migration.json')
+)
+
+# Candidatos por página = filas por UPDATE en lote
+PAGE_SIZE = int(os.getenv('CLOUDINARY_MIGRATION_PAGE_SIZE', 200))
+
+# Migraciones recientes que se devuelven en la respuesta / status
+RECENT_LIMIT = 50
+
+IDLE = 'idle'
+RUNNING = 'running'
+COMPLETED = 'completed'
+INTERRUPTED = 'interrupted'
+FAILED = 'failed'
+
+
+def _mysql_connect():
+    import pymysql
+
+    return pymysql.connect(
+        host=os.getenv('MYSQL_HOST', 'localhost'),
+        port=int(os.getenv('MYSQL_PORT', 3306)),
+        user=os.getenv('MYSQL_USER', 'root'),
+        password=os.getenv('MYSQL_PASSWORD', ''),
+        database=os.getenv('MYSQL_DATABASE', 'events'),
+        charset='utf8mb4',
+        cursorclass=pymysql.cursors.DictCursor
+    )
+
+
+def fetch_candidates(connection, after_id: str, city: Optional[str], limit: int) -> List[Dict[str, Any]]:
+    """Siguiente página de eventos con imagen fuera de Cloudinary (keyset sobre id)"""
+    sql = """
+        SELECT id, title, image_url
+        FROM events
+        WHERE id > %s
+        AND image_url IS NOT NULL
+        AND image_url != ''
+        AND image_url NOT LIKE '%%cloudinary.com%%'
+        AND image_url NOT LIKE '%%example.com%%'
+    """
+    params: List[Any] = [after_id]
+    if city:
+        sql += " AND city LIKE %s"
+        params.append(f"%{city}%")
+    sql += " ORDER BY id LIMIT %s"
+    params.append(limit)
+
+    cursor = connection.cursor()
+    cursor.execute(sql, params)
+    rows = cursor.fetchall()
+    cursor.close()
+    return rows
+
+
+def apply_batch(connection, migrated: List[Tuple[str, str, str]]) -> int:
+    """
+    Un UPDATE para todo el lote: (id, url original, url de Cloudinary)
+
+    El CASE solo cambia filas cuya imagen sigue siendo la original.
+    """
+    if not migrated:
+        return 0
+    cases = ' '.join(['WHEN id = %s AND image_url = %s THEN %s'] * len(migrated))
+    marks = ', '.join(['%s'] * len(migrated))
+    params: List[Any] = []
+    for event_id, original_url, new_url in migrated:
+        params.extend((event_id, original_url, new_url))
+    params.extend(event_id for event_id, _, _ in migrated)
+
+    cursor = connection.cursor()
+    cursor.execute(
+        f"UPDATE events SET image_url = CASE {cases} ELSE image_url END WHERE id IN ({marks})",
+        params
+    )
+    connection.commit()
+    rows = cursor.rowcount
+    cursor.close()
+    return rows
+
+
+class CheckpointStore:
+    """Checkpoints por filtro ('*' o ciudad) en un JSON chico, escrito de forma atómica"""
+
+    def __init__(self, path: str = CHECKPOINT_FILE):
+        self.path = os.path.normpath(path)
+
+    def load_all(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def load(self, scope: str) -> Dict[str, Any]:
+        return self.load_all().get(scope, {})
+
+    def save(self, scope: str, checkpoint: Dict[str, Any]):
+        data = self.load_all()
+        data[scope] = checkpoint
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class CloudinaryMigration:
+    """
+    ☁️ MOTOR DE MIGRACIÓN A CLOUDINARY
+
+    Uso:
+        stats = await cloudinary_migration.run(limit=500)          # espera el resultado
+        cloudinary_migration.start(city='Córdoba')                 # en background
+        cloudinary_migration.get_stats()
+    """
+
+    def __init__(self, checkpoints: Optional[CheckpointStore] = None):
+        self.checkpoints = checkpoints or CheckpointStore()
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self._run: Dict[str, Any] = {'status': IDLE}
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=RECENT_LIMIT)
+
+    @staticmethod
+    def _scope(city: Optional[str]) -> str:
+        return f"city:{city.strip().lower()}" if city else '*'
+
+    def is_running(self) -> bool:
+        return self._run.get('status') == RUNNING
+
+    def start(self, **kwargs) -> Dict[str, Any]:
+        """Lanza run() en background (una migración a la vez por proceso)"""
+        if not self.is_running():
+            self._task = asyncio.create_task(self.run(**kwargs))
+        return self.get_stats()
+
+    async def shutdown(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def run(
+        self,
+        limit: Optional[int] = None,
+        city: Optional[str] = None,
+        concurrency: int = UPLOAD_CONCURRENCY,
+        restart: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Migra desde el checkpoint del filtro hasta agotar candidatos o `limit` uploads
+
+        Returns:
+            Estadísticas de esta corrida (las acumuladas quedan en el checkpoint)
+        """
+        if self._lock.locked():
+            return {**self.get_stats(), 'already_running': True}
+
+        async with self._lock:
+            scope = self._scope(city)
+            checkpoint = {} if restart else self.checkpoints.load(scope)
+            totals = Counter(checkpoint.get('totals', {}))
+            reasons = Counter(checkpoint.get('failure_reasons', {}))
+            self._recent.clear()
+            self._run = {
+                'status': RUNNING,
+                'scope': scope,
+                'started_at': time.time(),
+                'last_id': checkpoint.get('last_id', ''),
+                'resumed': bool(checkpoint.get('last_id')),
+                'processed': 0,
+                'migrated': 0,
+                'failed': 0,
+                'db_updated': 0,
+                'pages': 0,
+                'upload_seconds': 0.0,
+                'failure_reasons': Counter(),
+            }
+            run = self._run
+            semaphore = asyncio.Semaphore(max(1, concurrency))
+            logger.info(f"☁️ Migración a Cloudinary ({scope}) desde id > '{run['last_id']}'")
+
+            async def migrate(event: Dict[str, Any]) -> Optional[Tuple[str, str, str]]:
+                event_id = str(event['id'])
+                async with semaphore:
+                    started = time.perf_counter()
+                    new_url, reason = await upload_image(
+                        event['image_url'], folder='eventos', public_id=f"event_{event_id}"
+                    )
+                    run['upload_seconds'] += time.perf_counter() - started
+                run['processed'] += 1
+                if new_url:
+                    run['migrated'] += 1
+                    self._recent.append({
+                        'id': event_id, 'title': event.get('title'),
+                        'old_url': event['image_url'], 'new_url': new_url,
+                    })
+                    return event_id, event['image_url'], new_url
+                run['failed'] += 1
+                run['failure_reasons'][reason] += 1
+                return None
+
+            connection = await asyncio.to_thread(_mysql_connect)
+
+            def next_page_size(remaining: Optional[int]) -> int:
+                return min(PAGE_SIZE, remaining) if remaining is not None else PAGE_SIZE
+
+            try:
+                remaining = limit if limit else None
+                page = await asyncio.to_thread(
+                    fetch_candidates, connection, run['last_id'], city, next_page_size(remaining)
+                )
+                while page:
+                    if remaining is not None:
+                        remaining -= len(page)
+                    # La página siguiente se lee mientras se suben las imágenes de esta
+                    prefetch = None
+                    if remaining is None or remaining > 0:
+                        prefetch = asyncio.create_task(asyncio.to_thread(
+                            fetch_candidates, connection, str(page[-1]['id']), city, next_page_size(remaining)
+                        ))
+                    try:
+                        results = await asyncio.gather(*(migrate(event) for event in page))
+                        next_page = await prefetch if prefetch else []
+                    except BaseException:
+                        if prefetch:
+                            await asyncio.gather(prefetch, return_exceptions=True)
+                        raise
+
+                    migrated = [result for result in results if result]
+                    run['db_updated'] += await asyncio.to_thread(apply_batch, connection, migrated)
+                    run['pages'] += 1
+                    run['last_id'] = str(page[-1]['id'])
+
+                    # Checkpoint después del commit: lo anterior a last_id ya quedó resuelto
+                    self.checkpoints.save(scope, {
+                        'last_id': run['last_id'],
+                        'updated_at': time.time(),
+                        'totals': dict(totals + Counter(processed=run['processed'], migrated=run['migrated'],
+                                                        failed=run['failed'])),
+                        'failure_reasons': dict(reasons + run['failure_reasons']),
+                    })
+
+                    if prefetch is None:
+                        break
+                    page = next_page
+                else:
+                    # Pasada completa: la próxima corrida vuelve a revisar desde el principio
+                    # (ej. fallas transitorias o eventos nuevos)
+                    checkpoint = self.checkpoints.load(scope)
+                    checkpoint.update(last_id='', completed_at=time.time())
+                    self.checkpoints.save(scope, checkpoint)
+                run['status'] = COMPLETED
+            except asyncio.CancelledError:
+                run['status'] = INTERRUPTED
+                raise
+            except Exception as e:
+                logger.error(f"❌ Migración a Cloudinary falló: {e}")
+                run['status'] = FAILED
+                run['error'] = str(e)
+            finally:
+                run['finished_at'] = time.time()
+                await asyncio.to_thread(connection.close)
+
+            stats = self.get_stats()
+            logger.info(f"✅ Migración a Cloudinary: {run['migrated']} migradas, {run['failed']} fallidas "
+                        f"({stats['current']['images_per_second']} img/s)")
+            return stats
+
+    def get_stats(self) -> Dict[str, Any]:
+        run = self._run
+        current: Dict[str, Any] = {k: v for k, v in run.items() if k != 'failure_reasons'}
+        if 'started_at' in run:
+            elapsed = (run.get('finished_at') or time.time()) - run['started_at']
+            uploads = run['processed']
+            current.update(
+                elapsed_seconds=round(elapsed, 1),
+                images_per_second=round(uploads / elapsed, 2) if elapsed > 0 else 0.0,
+                avg_upload_ms=round(run['upload_seconds'] / uploads * 1000, 1) if uploads else 0.0,
+                upload_seconds=round(run['upload_seconds'], 1),
+                failure_reasons=dict(run['failure_reasons']),
+            )
+        return {
+            'current': current,
+            'checkpoints': self.checkpoints.load_all(),
+            'recent': list(self._recent),
+        }
+
+
+# Instancia global compartida por todo el proceso
+cloudinary_migration = CloudinaryMigration()
+
+
+def main(argv: Optional[List[str]] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Migración reanudable de imágenes de eventos a Cloudinary')
+    parser.add_argument('--city', help='Solo eventos de esta ciudad')
+    parser.add_argument('--limit', type=int, help='Máximo de imágenes en esta corrida')
+    parser.add_argument('--concurrency', type=int, default=UPLOAD_CONCURRENCY)
+    parser.add_argument('--restart', action='store_true', help='Ignorar el checkpoint y empezar de cero')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    async def run():
+        from services.cloudinary_service import aclose_client
+
+        try:
+            return await cloudinary_migration.run(
+                limit=args.limit, city=args.city, concurrency=args.concurrency, restart=args.restart
+            )
+        finally:
+            await aclose_client()
+
+    stats = asyncio.run(run())
+    print(json.dumps({k: v for k, v in stats.items() if k != 'recent'}, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
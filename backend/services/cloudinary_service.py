@@ -2,11 +2,18 @@
 Cloudinary Image Service
 Sube imágenes de eventos a Cloudinary para evitar problemas de hotlinking
 """
-import os
-import httpx
+import asyncio
 import hashlib
-from typing import Optional
+import logging
+import os
+import time
+from contextlib import nullcontext
 from datetime import datetime
+from typing import Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
 
 # Cloudinary config desde variables de entorno
 CLOUDINARY_CLOUD_NAME = os.getenv("CLOUDINARY_CLOUD_NAME", "di39tigkf")
@@ -17,37 +24,62 @@ CLOUDINARY_UPLOAD_PRESET = os.getenv("CLOUDINARY_UPLOAD_PRESET", "eventos_unsign
 # URL base de Cloudinary
 CLOUDINARY_BASE_URL = f"https://api.cloudinary.com/v1_1/{CLOUDINARY_CLOUD_NAME}"
 
+UPLOAD_TIMEOUT = float(os.getenv("CLOUDINARY_UPLOAD_TIMEOUT", 30))
 
-async def upload_image_from_url(
+# Uploads simultáneos (migración masiva) y tamaño del pool de conexiones
+UPLOAD_CONCURRENCY = int(os.getenv("CLOUDINARY_UPLOAD_CONCURRENCY", 8))
+MAX_CONNECTIONS = max(UPLOAD_CONCURRENCY, 10)
+
+# Dominios que sabemos que no funcionan
+BLOCKED_DOMAINS = (
+    "example.com",
+    "placeholder.com",
+    "via.placeholder.com"
+)
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Cliente HTTP compartido para los uploads (keep-alive); se recrea si cambia el event loop"""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            timeout=UPLOAD_TIMEOUT,
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS)
+        )
+        _client_loop = loop
+    return _client
+
+
+async def aclose_client():
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+
+
+async def upload_image(
     image_url: str,
     folder: str = "eventos",
     public_id: Optional[str] = None
-) -> Optional[str]:
+) -> Tuple[Optional[str], Optional[str]]:
     """
-    Descarga una imagen desde URL y la sube a Cloudinary
-
-    Args:
-        image_url: URL de la imagen original
-        folder: Carpeta en Cloudinary (default: "eventos")
-        public_id: ID público opcional (si no se provee, se genera uno)
+    Sube una imagen a Cloudinary por URL (Cloudinary la descarga)
 
     Returns:
-        URL de Cloudinary o None si falla
+        (URL de Cloudinary, None) o (None, motivo de la falla): invalid_url,
+        blocked_domain, timeout, http_<status>, error
     """
     if not image_url or not image_url.startswith("http"):
-        return None
-
-    # Dominios que sabemos que no funcionan
-    blocked_domains = [
-        "example.com",
-        "placeholder.com",
-        "via.placeholder.com"
-    ]
+        return None, "invalid_url"
 
-    for domain in blocked_domains:
+    for domain in BLOCKED_DOMAINS:
         if domain in image_url:
-            print(f"⚠️ Skipping blocked domain: {domain}")
-            return None
+            logger.debug(f"⚠️ Skipping blocked domain: {domain}")
+            return None, "blocked_domain"
 
     try:
         # Generar public_id único si no se provee
@@ -62,7 +94,6 @@ async def upload_image_from_url(
 
         # Si tenemos API key y secret, usar upload firmado
         if CLOUDINARY_API_KEY and CLOUDINARY_API_SECRET:
-            import time
             timestamp = int(time.time())
 
             # Crear firma
@@ -87,24 +118,53 @@ async def upload_image_from_url(
                 "folder": folder
             }
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(upload_url, data=data)
+        response = await get_client().post(upload_url, data=data)
+
+        if response.status_code == 200:
+            cloudinary_url = response.json().get("secure_url")
+            logger.debug(f"✅ Uploaded to Cloudinary: {cloudinary_url}")
+            return cloudinary_url, None
 
-            if response.status_code == 200:
-                result = response.json()
-                cloudinary_url = result.get("secure_url")
-                print(f"✅ Uploaded to Cloudinary: {cloudinary_url}")
-                return cloudinary_url
-            else:
-                print(f"❌ Cloudinary upload failed: {response.status_code} - {response.text}")
-                return None
+        logger.debug(f"❌ Cloudinary upload failed: {response.status_code} - {response.text[:200]}")
+        return None, f"http_{response.status_code}"
 
+    except httpx.TimeoutException:
+        return None, "timeout"
     except Exception as e:
-        print(f"❌ Error uploading to Cloudinary: {e}")
-        return None
+        logger.warning(f"❌ Error uploading to Cloudinary: {e}")
+        return None, "error"
+
+
+async def upload_image_from_url(
+    image_url: str,
+    folder: str = "eventos",
+    public_id: Optional[str] = None
+) -> Optional[str]:
+    """
+    Descarga una imagen desde URL y la sube a Cloudinary
 
+    Args:
+        image_url: URL de la imagen original
+        folder: Carpeta en Cloudinary (default: "eventos")
+        public_id: ID público opcional (si no se provee, se genera uno)
 
-async def migrate_event_image(event_id: str, current_url: str, db_connection) -> Optional[str]:
+    Returns:
+        URL de Cloudinary o None si falla
+    """
+    cloudinary_url, reason = await upload_image(image_url, folder=folder, public_id=public_id)
+    if reason:
+        print(f"❌ Cloudinary upload failed ({reason}): {image_url[:80] if image_url else image_url}")
+    else:
+        print(f"✅ Uploaded to Cloudinary: {cloudinary_url}")
+    return cloudinary_url
+
+
+async def migrate_event_image(
+    event_id: str,
+    current_url: str,
+    db_connection,
+    db_lock: Optional[asyncio.Lock] = None
+) -> Optional[str]:
     """
     Migra una imagen de evento a Cloudinary y actualiza la BD
 
@@ -112,6 +172,7 @@ async def migrate_event_image(event_id: str, current_url: str, db_connection) ->
         event_id: ID del evento
         current_url: URL actual de la imagen
         db_connection: Conexión a la base de datos
+        db_lock: Serializa el UPDATE cuando varios uploads comparten la conexión
 
     Returns:
         Nueva URL de Cloudinary o None si falla
@@ -131,10 +192,11 @@ async def migrate_event_image(event_id: str, current_url: str, db_connection) ->
     if new_url and db_connection:
         # Actualizar en la base de datos
         try:
-            await db_connection.execute(
-                "UPDATE events SET image_url = :new_url WHERE id = :event_id",
-                {"new_url": new_url, "event_id": event_id}
-            )
+            async with db_lock or nullcontext():
+                await db_connection.execute(
+                    "UPDATE events SET image_url = :new_url WHERE id = :event_id",
+                    {"new_url": new_url, "event_id": event_id}
+                )
             print(f"✅ Updated DB for event {event_id}")
         except Exception as e:
             print(f"❌ DB update failed: {e}")
@@ -162,26 +224,34 @@ async def batch_migrate_images(events: list, db_connection, limit: int = 50) ->
         "already_cloudinary": 0
     }
 
-    for event in events[:limit]:
-        stats["total"] += 1
+    # Uploads en paralelo; los UPDATE de a uno (la conexión no admite queries concurrentes)
+    semaphore = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+    db_lock = asyncio.Lock()
+
+    async def migrate(event):
         event_id = event.get("id")
         current_url = event.get("image_url")
 
         if not current_url:
             stats["skipped"] += 1
-            continue
+            return
 
         if "cloudinary.com" in current_url:
             stats["already_cloudinary"] += 1
-            continue
+            return
 
-        new_url = await migrate_event_image(event_id, current_url, db_connection)
+        async with semaphore:
+            new_url = await migrate_event_image(event_id, current_url, db_connection, db_lock)
 
         if new_url:
             stats["migrated"] += 1
         else:
             stats["failed"] += 1
 
+    batch = events[:limit]
+    stats["total"] = len(batch)
+    await asyncio.gather(*(migrate(event) for event in batch))
+
     return stats
 
 
@@ -0,0 +1,205 @@
+"""
+🧹 DEDUP ENGINE - Detección de eventos casi-duplicados en O(n log n)
+Misma semántica que el antiguo main.deduplicate_events_by_title (MARCA, no elimina)
+pero los candidatos salen de un índice invertido con prefix-filtering en vez de
+comparar cada evento contra todos los anteriores.
+
+Por qué es exacto:
+    Jaccard(A, B) >= t  implica  |A ∩ B| >= ceil(t * |A|)
+    Si los tokens de cada título se ordenan por rareza global, dos títulos con
+    Jaccard >= t comparten al menos un token dentro de los primeros
+    |A| - ceil(t * |A|) + 1 tokens de cada uno. Solo esos tokens se indexan, así
+    que los tokens frecuentes ("de", "la", "festival") casi nunca generan candidatos.
+"""
+
+import logging
+import math
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Source priority (mayor = mejor)
+SOURCE_PRIORITY = {
+    'database': 10,
+    'gemini': 9,
+    'felo': 8,
+    'gemini_scraper': 7,
+    'felo_scraper': 6,
+    'nightclub': 5,
+}
+
+DEFAULT_SIMILARITY_THRESHOLD = 0.80
+
+
+def title_tokens(title: str) -> frozenset:
+    """Normaliza título (lowercase, sin guiones ni paréntesis) y devuelve su set de palabras"""
+    if not title:
+        return frozenset()
+    normalized = title.lower().replace('-', ' ').replace('(', '').replace(')', '')
+    return frozenset(normalized.split())
+
+
+def jaccard(words1: frozenset, words2: frozenset) -> float:
+    """Similitud = palabras comunes / total palabras únicas"""
+    if not words1 or not words2:
+        return 0.0
+    total_unique = words1 | words2
+    return len(words1 & words2) / len(total_unique) if total_unique else 0.0
+
+
+def get_source_priority(source: str) -> int:
+    """Retorna prioridad del source (mayor = mejor)"""
+    return SOURCE_PRIORITY.get(source, 1)  # Default: 1 (bajo)
+
+
+def is_better_event(event1: dict, event2: dict) -> bool:
+    """Retorna True si event1 es mejor que event2 (source > imagen > título más largo)"""
+    # Criterio 1: Prioridad por source
+    priority1 = get_source_priority(event1.get('source', ''))
+    priority2 = get_source_priority(event2.get('source', ''))
+
+    if priority1 != priority2:
+        return priority1 > priority2
+
+    # Criterio 2: Tiene imagen
+    has_image1 = bool(event1.get('image_url'))
+    has_image2 = bool(event2.get('image_url'))
+
+    if has_image1 != has_image2:
+        return has_image1
+
+    # Criterio 3: Título más largo (más descriptivo)
+    return len(event1.get('title', '')) > len(event2.get('title', ''))
+
+
+class DedupEngine:
+    """
+    🧹 MOTOR DE DEDUPLICACIÓN REUTILIZABLE
+
+    - Marca duplicados con is_duplicate / duplicate_of (no elimina)
+    - Candidatos por índice invertido sobre prefijos de tokens raros
+    - Resultado idéntico a la comparación O(n²) original (mismo orden de desempate)
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+        is_better: Callable[[dict, dict], bool] = is_better_event
+    ):
+        self.threshold = threshold
+        self.is_better = is_better
+        self.last_stats: Dict[str, int] = {}
+
+    def _prefix_length(self, size: int) -> int:
+        # Tolerancia para errores de punto flotante: un prefijo más largo nunca pierde candidatos
+        min_overlap = max(1, math.ceil(self.threshold * size - 1e-9))
+        return size - min_overlap + 1
+
+    def mark_duplicates(self, events: List[dict]) -> List[dict]:
+        """
+        MARCA eventos duplicados basándose en similitud de títulos (>= threshold)
+
+        - Recorre los eventos en orden; cada uno se compara con los principales
+          anteriores que comparten un token de prefijo, en orden de aparición
+        - El primer similar decide: el peor queda is_duplicate=True, duplicate_of=id del mejor
+        - RETORNA TODOS LOS EVENTOS (principales + duplicados marcados)
+
+        Args:
+            events: Lista de eventos (dicts) - se modifican in-place
+
+        Returns:
+            La misma lista con duplicados marcados
+        """
+        if not events:
+            return events
+
+        token_sets = [title_tokens(event.get('title', '')) for event in events]
+
+        # Orden global de tokens: más raro primero (empate alfabético para estabilidad)
+        frequency: Dict[str, int] = {}
+        for tokens in token_sets:
+            for token in tokens:
+                frequency[token] = frequency.get(token, 0) + 1
+        rank = {token: i for i, token in enumerate(sorted(frequency, key=lambda t: (frequency[t], t)))}
+
+        inverted_index: Dict[str, List[int]] = {}
+        duplicate_count = 0
+        comparisons = 0
+
+        for idx, event in enumerate(events):
+            tokens = token_sets[idx]
+            title = event.get('title', '')
+
+            # Inicializar campos de duplicado
+            event['is_duplicate'] = False
+            event['duplicate_of'] = None
+
+            if not tokens:
+                continue
+
+            ordered = sorted(tokens, key=rank.__getitem__)
+            prefix = ordered[:self._prefix_length(len(ordered))]
+
+            # Candidatos: principales anteriores que comparten algún token del prefijo
+            candidates = set()
+            for token in prefix:
+                postings = inverted_index.get(token)
+                if postings:
+                    candidates.update(postings)
+
+            size = len(tokens)
+            for cand_idx in sorted(candidates):
+                existing = events[cand_idx]
+                # Saltar eventos ya marcados como duplicados
+                if existing.get('is_duplicate'):
+                    continue
+
+                # Filtro por tamaño: Jaccard >= t exige t*|A| <= |B| <= |A|/t
+                cand_size = len(token_sets[cand_idx])
+                if cand_size < self.threshold * size - 1e-9 or size < self.threshold * cand_size - 1e-9:
+                    continue
+
+                comparisons += 1
+                similarity = jaccard(tokens, token_sets[cand_idx])
+                if similarity < self.threshold:
+                    continue
+
+                existing_title = existing.get('title', '')
+                if self.is_better(event, existing):
+                    # El nuevo es mejor → marcar el existente como duplicado
+                    existing['is_duplicate'] = True
+                    existing['duplicate_of'] = event.get('id')
+                    logger.debug(f"🔄 '{existing_title[:40]}...' marcado como duplicado de '{title[:40]}...' (similarity: {similarity:.0%})")
+                else:
+                    # El existente es mejor → marcar el nuevo como duplicado
+                    event['is_duplicate'] = True
+                    event['duplicate_of'] = existing.get('id')
+                    logger.debug(f"⏭️ '{title[:40]}...' marcado como duplicado de '{existing_title[:40]}...' (similarity: {similarity:.0%})")
+                duplicate_count += 1
+                break
+
+            # Solo los principales quedan como candidatos para eventos futuros
+            if not event['is_duplicate']:
+                for token in prefix:
+                    inverted_index.setdefault(token, []).append(idx)
+
+        self.last_stats = {
+            'events': len(events),
+            'duplicates': duplicate_count,
+            'comparisons': comparisons
+        }
+
+        if duplicate_count > 0:
+            logger.info(f"🏷️ Total duplicados marcados: {duplicate_count} de {len(events)} eventos")
+
+        return events
+
+
+# Instancia compartida con el umbral por defecto (80%)
+dedup_engine = DedupEngine()
+
+
+def deduplicate_events(events: List[dict], threshold: Optional[float] = None) -> List[dict]:
+    """Atajo: marca duplicados con el motor compartido (o uno con umbral propio)"""
+    engine = dedup_engine if threshold is None else DedupEngine(threshold=threshold)
+    return engine.mark_duplicates(events)
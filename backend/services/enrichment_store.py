@@ -0,0 +1,322 @@
+"""
+🗄️ ENRICHMENT STORE - Almacén compartido y durable de enriquecimientos
+Reemplaza los cachés que se reescribían completos en cada miss:
+- IndustrialFactory: data/location_enrichments_cache.json (indent=2, en cada miss y fallback)
+- GeminiFactory._parent_city_cache: dict de clase, se perdía al reiniciar
+- UrlDiscoveryService._save_cache: reescribía el JSON de patrones en cada hit
+
+SQLite en modo WAL (data/cache/enrichment_store.sqlite3):
+- Escrituras atómicas de una sola clave (un UPSERT = una transacción chica)
+- Seguro entre procesos: todos los workers de uvicorn leen y escriben el mismo
+  archivo (busy_timeout para esperar el lock de escritura)
+- Carga lazy: cada get() es una lectura puntual por clave primaria, nada se
+  carga entero al arrancar
+- TTL por namespace y entradas negativas (fallbacks / "sin respuesta") con TTL corto
+  para reintentar más tarde en vez de recordar el error para siempre
+
+Si SQLite no está disponible (disco de solo lectura) cae a un dict en memoria.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.getenv(
+    'ENRICHMENT_STORE_DB',
+    os.path.join(os.path.dirname(__file__), '..', 'data', 'cache', 'enrichment_store.sqlite3')
+)
+
+# Milisegundos que un writer espera el lock de otro proceso antes de fallar
+BUSY_TIMEOUT_MS = int(os.getenv('ENRICHMENT_STORE_BUSY_TIMEOUT_MS', 5000))
+
+# TTL (segundos) de entradas negativas: fallbacks y respuestas vacías
+NEGATIVE_TTL = int(os.getenv('ENRICHMENT_STORE_NEGATIVE_TTL', 3600))
+
+DEFAULT_TTL = 30 * 86400
+
+# Namespaces y su TTL positivo
+LOCATION = 'location'
+PARENT_CITY = 'parent_city'
+URL_PATTERN = 'url_pattern'
+EVENT_INSIGHT = 'event_insight'
+EVENT_CONTEXT = 'event_context'
+EVENT_CONVERSATION = 'event_conversation'
+IMAGE_RESOLUTION = 'image_resolution'
+IMAGE_QUERY = 'image_query'
+GAZETTEER_LEARNED = 'gazetteer_learned'
+_META = '_meta'
+
+NAMESPACE_TTLS: Dict[str, int] = {
+    LOCATION: 90 * 86400,
+    PARENT_CITY: 90 * 86400,
+    URL_PATTERN: 30 * 86400,     # Los patrones de URL se revisan una vez por mes
+    # Insights por evento (services/event_insights.py): el hash del contenido decide
+    # si siguen vigentes, el TTL solo limpia los de eventos que ya pasaron
+    EVENT_INSIGHT: 120 * 86400,
+    EVENT_CONTEXT: 120 * 86400,
+    EVENT_CONVERSATION: 120 * 86400,
+    # Imágenes resueltas (services/image_resolver.py): por evento y por query de Google
+    IMAGE_RESOLUTION: 60 * 86400,
+    IMAGE_QUERY: 30 * 86400,
+    # Respuestas de la IA para misses del gazetteer (services/gazetteer.py)
+    GAZETTEER_LEARNED: 90 * 86400,
+    _META: 100 * 365 * 86400,
+}
+
+
+class _Miss:
+    def __repr__(self):
+        return 'MISS'
+
+
+# Centinela de get(): None es un valor válido (ej. "es ciudad principal")
+MISS = _Miss()
+
+
+class EnrichmentStore:
+    """
+    🗄️ STORE CLAVE/VALOR POR NAMESPACE
+
+    Uso:
+        value = enrichment_store.get(PARENT_CITY, 'tigre')
+        if value is MISS:
+            ...
+            enrichment_store.put(PARENT_CITY, 'tigre', 'Buenos Aires')
+        enrichment_store.put(LOCATION, key, fallback, negative=True)
+    """
+
+    def __init__(self, db_path: Optional[str] = DB_PATH):
+        self.db_path = os.path.normpath(db_path) if db_path else None
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        # Solo si SQLite no está disponible
+        self._memory: Dict[Tuple[str, str], Tuple[Any, bool, float]] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    # ------------------------------------------------------------------ SQLite
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._conn is None and self.db_path:
+            try:
+                os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+                conn = sqlite3.connect(
+                    self.db_path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False, isolation_level=None
+                )
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('PRAGMA synchronous=NORMAL')
+                conn.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS enrichments (
+                        namespace TEXT NOT NULL,
+                        key TEXT NOT NULL,
+                        value TEXT NOT NULL,
+                        negative INTEGER NOT NULL DEFAULT 0,
+                        updated_at REAL NOT NULL,
+                        expires_at REAL NOT NULL,
+                        PRIMARY KEY (namespace, key)
+                    )
+                ''')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_enrichments_expires ON enrichments (expires_at)')
+                self._conn = conn
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Enrichment store SQLite deshabilitado, usando memoria: {e}")
+                self.db_path = None
+        return self._conn
+
+    def _count(self, namespace: str, counter: str, amount: int = 1):
+        stats = self._stats.setdefault(namespace, {
+            'hits': 0, 'negative_hits': 0, 'misses': 0, 'writes': 0, 'negative_writes': 0, 'deletes': 0,
+        })
+        stats[counter] += amount
+
+    # ------------------------------------------------------------------ API
+
+    def get(self, namespace: str, key: str) -> Any:
+        """Valor vigente (puede ser None) o MISS"""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                entry = self._memory.get((namespace, key))
+                row = (json.dumps(entry[0]), int(entry[1])) if entry and entry[2] > now else None
+            else:
+                row = conn.execute(
+                    'SELECT value, negative FROM enrichments WHERE namespace = ? AND key = ? AND expires_at > ?',
+                    (namespace, key, now)
+                ).fetchone()
+
+        if row is None:
+            self._count(namespace, 'misses')
+            return MISS
+        self._count(namespace, 'negative_hits' if row[1] else 'hits')
+        return json.loads(row[0])
+
+    def put(
+        self,
+        namespace: str,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        negative: bool = False
+    ):
+        """
+        Escribe UNA clave (upsert atómico)
+
+        Args:
+            negative: Fallback / sin respuesta: se guarda con NEGATIVE_TTL para reintentar después
+        """
+        if ttl is None:
+            ttl = NEGATIVE_TTL if negative else NAMESPACE_TTLS.get(namespace, DEFAULT_TTL)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                self._memory[(namespace, key)] = (value, negative, now + ttl)
+            else:
+                conn.execute(
+                    'INSERT INTO enrichments (namespace, key, value, negative, updated_at, expires_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?) '
+                    'ON CONFLICT(namespace, key) DO UPDATE SET value = excluded.value, '
+                    'negative = excluded.negative, updated_at = excluded.updated_at, expires_at = excluded.expires_at',
+                    (namespace, key, json.dumps(value, ensure_ascii=False), int(negative), now, now + ttl)
+                )
+        self._count(namespace, 'negative_writes' if negative else 'writes')
+
+    def delete(self, namespace: str, key: str) -> int:
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                removed = int(self._memory.pop((namespace, key), None) is not None)
+            else:
+                removed = conn.execute(
+                    'DELETE FROM enrichments WHERE namespace = ? AND key = ?', (namespace, key)
+                ).rowcount
+        self._count(namespace, 'deletes', removed)
+        return removed
+
+    def delete_matching(self, namespace: str, fragment: str) -> int:
+        """Borra las claves que contienen fragment (sin distinguir mayúsculas)"""
+        fragment = fragment.lower()
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                keys = [k for k in self._memory if k[0] == namespace and fragment in k[1].lower()]
+                for k in keys:
+                    del self._memory[k]
+                removed = len(keys)
+            else:
+                escaped = fragment.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+                removed = conn.execute(
+                    "DELETE FROM enrichments WHERE namespace = ? AND lower(key) LIKE ? ESCAPE '\\'",
+                    (namespace, f'%{escaped}%')
+                ).rowcount
+        self._count(namespace, 'deletes', removed)
+        return removed
+
+    def items(self, namespace: str, include_negative: bool = False) -> List[Tuple[str, Any]]:
+        """Entradas vigentes de un namespace (para índices que se construyen una vez)"""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                rows = [
+                    (k[1], json.dumps(v[0])) for k, v in self._memory.items()
+                    if k[0] == namespace and v[2] > now and (include_negative or not v[1])
+                ]
+            else:
+                rows = conn.execute(
+                    'SELECT key, value FROM enrichments WHERE namespace = ? AND expires_at > ?'
+                    + ('' if include_negative else ' AND negative = 0'),
+                    (namespace, now)
+                ).fetchall()
+        return [(key, json.loads(value)) for key, value in rows]
+
+    def import_legacy(self, namespace: str, entries: Dict[str, Any], source: str) -> int:
+        """
+        Migra un caché viejo una sola vez (marca en _meta); no pisa claves existentes
+
+        Returns:
+            Entradas importadas (0 si ya se había migrado)
+        """
+        marker = f'migrated:{source}'
+        if self.get(_META, marker) is not MISS:
+            return 0
+        ttl = NAMESPACE_TTLS.get(namespace, DEFAULT_TTL)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                for key, value in entries.items():
+                    self._memory.setdefault((namespace, key), (value, False, now + ttl))
+            else:
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    conn.executemany(
+                        'INSERT OR IGNORE INTO enrichments (namespace, key, value, negative, updated_at, expires_at) '
+                        'VALUES (?, ?, ?, 0, ?, ?)',
+                        [(namespace, key, json.dumps(value, ensure_ascii=False), now, now + ttl)
+                         for key, value in entries.items()]
+                    )
+                    conn.execute('COMMIT')
+                except sqlite3.Error:
+                    conn.execute('ROLLBACK')
+                    raise
+        self.put(_META, marker, {'entries': len(entries), 'at': now})
+        logger.info(f"🗄️ Migradas {len(entries)} entradas de {source} a '{namespace}'")
+        return len(entries)
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                expired = [k for k, v in self._memory.items() if v[2] <= now]
+                for k in expired:
+                    del self._memory[k]
+                return len(expired)
+            return conn.execute('DELETE FROM enrichments WHERE expires_at <= ?', (now,)).rowcount
+
+    def get_stats(self) -> Dict[str, Any]:
+        """📊 Contadores del proceso + filas vigentes por namespace"""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                rows: Dict[str, Tuple[int, int]] = {}
+                for (namespace, _), (_, negative, expires_at) in self._memory.items():
+                    if expires_at > now:
+                        total, negatives = rows.get(namespace, (0, 0))
+                        rows[namespace] = (total + 1, negatives + int(negative))
+            else:
+                rows = {
+                    namespace: (total, negatives)
+                    for namespace, total, negatives in conn.execute(
+                        'SELECT namespace, COUNT(*), SUM(negative) FROM enrichments '
+                        'WHERE expires_at > ? GROUP BY namespace', (now,)
+                    )
+                }
+        namespaces = {}
+        for namespace in set(rows) | set(self._stats):
+            total, negatives = rows.get(namespace, (0, 0))
+            namespaces[namespace] = {
+                **self._stats.get(namespace, {}),
+                'entries': total,
+                'negative_entries': negatives or 0,
+                'ttl_s': NAMESPACE_TTLS.get(namespace, DEFAULT_TTL),
+            }
+        return {
+            'sqlite_path': self.db_path,
+            'negative_ttl_s': NEGATIVE_TTL,
+            'namespaces': namespaces,
+        }
+
+
+# Instancia global compartida por todo el proceso
+enrichment_store = EnrichmentStore()
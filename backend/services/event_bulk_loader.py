@@ -0,0 +1,393 @@
+"""
+📦 EVENT BULK LOADER - Carga masiva de eventos normalizados a MySQL
+Camino compartido por los importadores (fase4_import, auto_import, import_generic):
+- INSERT multi-row en lotes configurables (una sentencia por lote, no por fila)
+- Upsert sobre clave natural (título, ciudad, fecha) en la columna events.natural_key
+- Mantiene event_location_keys de las filas que realmente quedaron en la tabla
+- Reporte final de throughput: filas/s, lotes, conflictos
+
+El loader NO hace commit: el importador decide el límite de transacción
+(uno por archivo), llamando flush() antes de su commit.
+
+Insertadas/actualizadas se cuentan con las claves que ya existían antes de cada
+lote, no con las filas afectadas (que dependen de CLIENT.FOUND_ROWS). Igual,
+toda conexión que se le pasa al loader se abre con client_flag=CLIENT.FOUND_ROWS
+(importadores y location_index.connect_db) para que rowcount signifique lo mismo.
+
+La columna natural_key se crea SOLO con la migración explícita de abajo; los
+importadores no alteran el esquema. Mientras falte, caen al modo fila por fila.
+Todo camino que inserte en events agrega la clave con natural_key_fields().
+
+Uso (migración + backfill de natural_key para eventos existentes):
+    python -m services.event_bulk_loader --migrate --backfill
+"""
+
+import hashlib
+import logging
+import re
+import sys
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from services.location_index import index_events
+
+logger = logging.getLogger(__name__)
+
+NATURAL_KEY_COLUMN = 'natural_key'
+NATURAL_KEY_INDEX = 'uq_events_natural_key'
+
+DEFAULT_BATCH_SIZE = 500
+
+# Qué hacer cuando la clave natural ya existe
+ON_CONFLICT_IGNORE = 'ignore'   # Conservar la fila existente (duplicado)
+ON_CONFLICT_UPDATE = 'update'   # Actualizar la fila existente con los datos nuevos
+ON_CONFLICT_MODES = (ON_CONFLICT_IGNORE, ON_CONFLICT_UPDATE)
+
+# Cada cuánto se vuelve a preguntar si la columna existe cuando no existía (segundos)
+COLUMN_RECHECK_SECONDS = 60
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def natural_key(title: Optional[str], city: Optional[str], start_datetime: Any) -> str:
+    """
+    Clave natural de un evento: mismo criterio que el chequeo
+    'title = %s AND city = %s AND DATE(start_datetime) = DATE(%s)' de los importadores
+    (sin distinguir mayúsculas ni espacios repetidos), como SHA1 hex de 40 caracteres
+    """
+    def fold(value) -> str:
+        return _WHITESPACE.sub(' ', str(value or '')).strip().casefold()
+
+    raw = f"{fold(title)}|{fold(city)}|{str(start_datetime or '')[:10]}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+# ============================================================================
+# 🔧 MIGRACIÓN (DB-API cursor, paramstyle %s - pymysql)
+# ============================================================================
+
+_column_exists = False
+_column_checked_at: Optional[float] = None
+
+
+def natural_key_exists(cursor) -> bool:
+    """
+    ¿Ya se migró events.natural_key?
+
+    Un "sí" se recuerda para todo el proceso; un "no" se vuelve a consultar
+    cada COLUMN_RECHECK_SECONDS.
+    """
+    global _column_exists, _column_checked_at
+    now = time.monotonic()
+    if _column_exists or (_column_checked_at is not None and now - _column_checked_at < COLUMN_RECHECK_SECONDS):
+        return _column_exists
+    cursor.execute("SHOW COLUMNS FROM events LIKE %s", (NATURAL_KEY_COLUMN,))
+    _column_exists = cursor.fetchone() is not None
+    _column_checked_at = now
+    return _column_exists
+
+
+def natural_key_fields(cursor, event: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Columna extra para el INSERT de una sola fila: {'natural_key': clave},
+    o {} si la columna todavía no fue migrada
+
+    Uso:
+        extra = natural_key_fields(cursor, evento)
+        columns = ['id', *extra, 'title', ...]; values = [event_id, *extra.values(), ...]
+    """
+    if not natural_key_exists(cursor):
+        return {}
+    return {NATURAL_KEY_COLUMN: natural_key(event.get('title'), event.get('city'), event.get('start_datetime'))}
+
+
+def ensure_natural_key(cursor) -> bool:
+    """
+    Agrega events.natural_key + índice UNIQUE si no existen (solo desde la CLI --migrate)
+
+    Returns:
+        True si la columna se acaba de crear (las filas existentes necesitan backfill)
+    """
+    cursor.execute('''
+        SELECT COUNT(*) AS total FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'events' AND COLUMN_NAME = %s
+    ''', (NATURAL_KEY_COLUMN,))
+    row = cursor.fetchone()
+    exists = (row['total'] if isinstance(row, dict) else row[0]) > 0
+
+    if exists:
+        return False
+
+    cursor.execute(f'''
+        ALTER TABLE events
+        ADD COLUMN {NATURAL_KEY_COLUMN} CHAR(40) NULL,
+        ADD UNIQUE KEY {NATURAL_KEY_INDEX} ({NATURAL_KEY_COLUMN})
+    ''')
+    logger.info(f"📦 Columna events.{NATURAL_KEY_COLUMN} creada")
+    return True
+
+
+def backfill_natural_keys(connection, batch_size: int = 2000) -> Dict[str, Any]:
+    """
+    Calcula natural_key para eventos existentes (keyset por id, un commit por lote)
+
+    Con UPDATE IGNORE, si dos filas viejas comparten clave solo la primera
+    la recibe; la otra queda en NULL (duplicado previo, ver clean_duplicates.py).
+    """
+    cursor = connection.cursor()
+    start = time.time()
+    last_id = ''
+    scanned = 0
+    updated = 0
+
+    while True:
+        cursor.execute(f'''
+            SELECT id, title, city, start_datetime FROM events
+            WHERE {NATURAL_KEY_COLUMN} IS NULL AND id > %s
+            ORDER BY id
+            LIMIT %s
+        ''', (last_id, batch_size))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+
+        params = []
+        for row in rows:
+            if not isinstance(row, dict):
+                row = dict(zip(('id', 'title', 'city', 'start_datetime'), row))
+            params.append((natural_key(row['title'], row['city'], row['start_datetime']), row['id']))
+            last_id = row['id']
+
+        updated += cursor.executemany(
+            f"UPDATE IGNORE events SET {NATURAL_KEY_COLUMN} = %s WHERE id = %s",
+            params
+        ) or 0
+        connection.commit()
+        scanned += len(rows)
+        logger.info(f"📦 Backfill natural_key: {scanned} eventos revisados")
+
+    cursor.close()
+    return {
+        'scanned': scanned,
+        'updated': updated,
+        'elapsed_s': round(time.time() - start, 2)
+    }
+
+
+# ============================================================================
+# 📦 LOADER
+# ============================================================================
+
+class EventBulkLoader:
+    """
+    📦 CARGADOR MASIVO DE EVENTOS
+
+    Uso:
+        loader = EventBulkLoader(cursor, columns=('title', 'city', ...))
+        loader.load(eventos)      # acumula y escribe cada batch_size filas
+        loader.flush()            # antes del commit del archivo
+        connection.commit()
+        print(loader.report())
+
+    Cada evento es un dict con las claves de `columns`; id y natural_key
+    los genera el loader. created_at/updated_at = NOW().
+    """
+
+    def __init__(
+        self,
+        cursor,
+        columns: Sequence[str],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        on_conflict: str = ON_CONFLICT_IGNORE,
+        update_columns: Optional[Sequence[str]] = None,
+        index_locations: bool = True
+    ):
+        if on_conflict not in ON_CONFLICT_MODES:
+            raise ValueError(f"on_conflict debe ser uno de {ON_CONFLICT_MODES}")
+
+        self.cursor = cursor
+        self.columns = tuple(c for c in columns if c not in ('id', NATURAL_KEY_COLUMN))
+        self.batch_size = max(1, batch_size)
+        self.on_conflict = on_conflict
+        self.update_columns = tuple(update_columns) if update_columns else tuple(
+            c for c in self.columns if c not in ('title', 'city', 'start_datetime')
+        )
+        self.index_locations = index_locations
+
+        self._buffer: List[Dict[str, Any]] = []
+        self._started: Optional[float] = None
+        self._write_time = 0.0
+        self.stats = {
+            'rows': 0,
+            'inserted': 0,
+            'updated': 0,
+            'conflicts': 0,
+            'batches': 0,
+            'location_keys': 0,
+        }
+
+    def _build_insert_sql(self, row_count: int) -> str:
+        all_columns = ('id', NATURAL_KEY_COLUMN) + self.columns
+        row_placeholder = '(' + ', '.join(['%s'] * len(all_columns)) + ', NOW(), NOW())'
+
+        if self.on_conflict == ON_CONFLICT_UPDATE:
+            # Conflicto: se actualizan las columnas de datos y updated_at
+            assignments = [f"{c} = VALUES({c})" for c in self.update_columns] + ['updated_at = NOW()']
+        else:
+            # No-op: la fila existente se conserva
+            assignments = [f"{NATURAL_KEY_COLUMN} = {NATURAL_KEY_COLUMN}"]
+
+        return (
+            f"INSERT INTO events ({', '.join(all_columns)}, created_at, updated_at) "
+            f"VALUES {', '.join([row_placeholder] * row_count)} "
+            f"ON DUPLICATE KEY UPDATE {', '.join(assignments)}"
+        )
+
+    def add(self, event: Dict[str, Any]):
+        """Agrega un evento al buffer; escribe el lote cuando se llena"""
+        if self._started is None:
+            self._started = time.perf_counter()
+        self._buffer.append(event)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def load(self, events: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """Agrega un stream de eventos (no hace flush del remanente)"""
+        for event in events:
+            self.add(event)
+        return self.stats
+
+    def flush(self) -> int:
+        """
+        Escribe lo que quede en el buffer en un INSERT multi-row
+
+        Returns:
+            Filas nuevas insertadas en este lote
+        """
+        if not self._buffer:
+            return 0
+
+        batch, self._buffer = self._buffer, []
+        write_start = time.perf_counter()
+
+        # Dentro del mismo lote la última aparición de una clave gana (igual que el upsert)
+        rows_by_key: Dict[str, tuple] = {}
+        for event in batch:
+            key = natural_key(event.get('title'), event.get('city'), event.get('start_datetime'))
+            values = tuple(event.get(column) for column in self.columns)
+            rows_by_key[key] = (str(uuid.uuid4()), key) + values
+        rows = list(rows_by_key.values())
+
+        existing = self._existing_keys([row[1] for row in rows])
+        params = [value for row in rows for value in row]
+        self.cursor.execute(self._build_insert_sql(len(rows)), params)
+
+        # Recién con el INSERT hecho: un lote fallido no suma a las estadísticas
+        inserted = sum(1 for row in rows if row[1] not in existing)
+        updated = len(rows) - inserted if self.on_conflict == ON_CONFLICT_UPDATE else 0
+
+        if self.index_locations:
+            self._index_locations(rows)
+
+        self._write_time += time.perf_counter() - write_start
+        self.stats['rows'] += len(batch)
+        self.stats['inserted'] += inserted
+        self.stats['updated'] += updated
+        self.stats['conflicts'] += len(batch) - inserted
+        self.stats['batches'] += 1
+        return inserted
+
+    def _existing_keys(self, keys: List[str]) -> set:
+        """Claves naturales del lote que ya están en events"""
+        placeholders = ', '.join(['%s'] * len(keys))
+        self.cursor.execute(
+            f"SELECT {NATURAL_KEY_COLUMN} FROM events WHERE {NATURAL_KEY_COLUMN} IN ({placeholders})",
+            keys
+        )
+        return {
+            row[NATURAL_KEY_COLUMN] if isinstance(row, dict) else row[0]
+            for row in self.cursor.fetchall()
+        }
+
+    def _index_locations(self, rows: List[tuple]):
+        """Re-indexa ubicaciones usando el id real de cada clave (nuevo o existente)"""
+        keys = [row[1] for row in rows]
+        placeholders = ', '.join(['%s'] * len(keys))
+        self.cursor.execute(
+            f"SELECT id, {NATURAL_KEY_COLUMN} FROM events WHERE {NATURAL_KEY_COLUMN} IN ({placeholders})",
+            keys
+        )
+        id_by_key = {}
+        for row in self.cursor.fetchall():
+            event_id, key = (row['id'], row[NATURAL_KEY_COLUMN]) if isinstance(row, dict) else row[:2]
+            id_by_key[key] = str(event_id)
+
+        to_index = []
+        for row in rows:
+            event_id = id_by_key.get(row[1])
+            # En modo ignore las filas existentes no cambiaron: no se tocan sus claves
+            if not event_id or (self.on_conflict == ON_CONFLICT_IGNORE and event_id != row[0]):
+                continue
+            to_index.append({'id': event_id, **dict(zip(self.columns, row[2:]))})
+
+        if to_index:
+            self.stats['location_keys'] += index_events(self.cursor, to_index)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas acumuladas + throughput"""
+        elapsed = (time.perf_counter() - self._started) if self._started else 0.0
+        return {
+            **self.stats,
+            'batch_size': self.batch_size,
+            'elapsed_s': round(elapsed, 2),
+            'write_s': round(self._write_time, 2),
+            'rows_per_s': round(self.stats['rows'] / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+    def report(self) -> str:
+        """Resumen de una línea para el final de la importación"""
+        stats = self.get_stats()
+        return (
+            f"📦 Bulk load: {stats['rows']} filas en {stats['batches']} lotes "
+            f"({stats['rows_per_s']} filas/s, {stats['elapsed_s']}s) | "
+            f"{stats['inserted']} insertadas, {stats['updated']} actualizadas, "
+            f"{stats['conflicts']} conflictos"
+        )
+
+
+def main(argv: Optional[List[str]] = None):
+    import argparse
+    from services.location_index import connect_db
+
+    parser = argparse.ArgumentParser(description='Clave natural para carga masiva de eventos')
+    parser.add_argument('--migrate', action='store_true', help='Crear columna events.natural_key')
+    parser.add_argument('--backfill', action='store_true', help='Calcular natural_key de eventos existentes')
+    parser.add_argument('--batch-size', type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    if not (args.migrate or args.backfill):
+        parser.print_help()
+        return 1
+
+    logging.basicConfig(level=logging.INFO)
+    connection = connect_db()
+    try:
+        if args.migrate:
+            cursor = connection.cursor()
+            created = ensure_natural_key(cursor)
+            connection.commit()
+            cursor.close()
+            print(f"✅ Columna events.{NATURAL_KEY_COLUMN} {'creada' if created else 'ya existía'}")
+
+        if args.backfill:
+            stats = backfill_natural_keys(connection, batch_size=args.batch_size)
+            print(f"✅ Backfill completado: {stats['updated']} de {stats['scanned']} eventos "
+                  f"en {stats['elapsed_s']}s")
+    finally:
+        connection.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
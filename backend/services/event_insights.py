@@ -0,0 +1,524 @@
+"""
+💡 EVENT INSIGHTS - Payloads de IA por evento, precalculados y servidos desde storage
+/api/ai/event-insight (hover), /api/ai/generate-event-context y
+/api/ai/event/conversation llamaban a la IA en cada hover o click, para los mismos
+eventos que ven miles de usuarios.
+
+- Un job batch (al final de cada importación) genera los payloads de los eventos
+  próximos con concurrencia acotada y prioridad BACKGROUND en el scheduler de IA
+- Se guardan en el enrichment store por id de evento (de la DB) + hash de los campos
+  que usa cada prompt: si el evento cambió, el hash no coincide y se regenera
+- Los endpoints resuelven el evento por id contra la tabla events antes de
+  hashear, así el hash sale de los mismos campos canónicos que usó el job
+  (no del payload del frontend: categoría normalizada, venue_address como location)
+- Los endpoints leen del store (milisegundos) y solo generan on-demand lo que
+  cambió o faltó; requests concurrentes del mismo evento comparten la generación
+
+Uso:
+    python -m services.event_insights --days 30
+    python -m services.event_insights --kinds insight,context --limit 500 --force
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from services.enrichment_store import (
+    EVENT_CONTEXT, EVENT_CONVERSATION, EVENT_INSIGHT, MISS, enrichment_store
+)
+from services.request_coalescer import ai_flight
+
+logger = logging.getLogger(__name__)
+
+# Tipos de payload
+INSIGHT = 'insight'              # Hover: quick_insight, venue_tip, transport...
+CONTEXT = 'context'              # curiosidades, que_llevar, ambiente_esperado, tip_local
+CONVERSATION = 'conversation'    # Diálogo Bot Entusiasta / Bot Práctico
+
+KINDS = (INSIGHT, CONTEXT, CONVERSATION)
+
+_NAMESPACES = {
+    INSIGHT: EVENT_INSIGHT,
+    CONTEXT: EVENT_CONTEXT,
+    CONVERSATION: EVENT_CONVERSATION,
+}
+
+# Job batch: días hacia adelante, generaciones en vuelo y tipos a precalcular
+PRECOMPUTE_DAYS = int(os.getenv('EVENT_INSIGHTS_DAYS', 30))
+PRECOMPUTE_CONCURRENCY = int(os.getenv('EVENT_INSIGHTS_CONCURRENCY', 4))
+PRECOMPUTE_KINDS = tuple(
+    kind.strip() for kind in os.getenv('EVENT_INSIGHTS_KINDS', ','.join(KINDS)).split(',')
+    if kind.strip() in KINDS
+)
+# Correr el job al final de los importadores (data/scripts/auto_import.py, ...)
+AFTER_IMPORT = os.getenv('EVENT_INSIGHTS_AFTER_IMPORT', 'true').lower() in ('1', 'true', 'yes')
+
+# Centinela de _read(): hay payload pero de otra versión del evento
+_STALE = object()
+
+# Columnas de events que necesitan los prompts
+EVENT_COLUMNS = ('id', 'title', 'category', 'venue_name', 'city', 'start_datetime', 'price')
+
+# Marca de fila leída de la tabla events: solo esas se guardan (clave = id real)
+DB_ROW = '_db_row'
+
+
+# ============================================================================
+# CAMPOS DE CADA PROMPT (lo que define la respuesta → hash)
+# ============================================================================
+
+def _title(event: Dict[str, Any]) -> str:
+    return str(event.get('title') or event.get('name') or '')
+
+
+def _datetime(value: Any) -> str:
+    """'2025-11-01 20:00:00' (DB) y '2025-11-01T20:00:00Z' (frontend) → '2025-11-01T20:00'"""
+    if value is None:
+        return ''
+    text = value.isoformat() if hasattr(value, 'isoformat') else str(value)
+    return text.replace(' ', 'T')[:16]
+
+
+def _category(value: Any) -> str:
+    """Misma normalización que aplica la API al devolver eventos ('música' → 'music')"""
+    from services.events_db_service import normalize_category
+    return normalize_category(str(value)) if value else ''
+
+
+def prompt_fields(kind: str, event: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Campos del evento que usa el prompt de cada tipo, normalizados
+
+    Acepta tanto filas de la tabla events (title, city) como los payloads del
+    frontend (name, location); la ciudad de la DB tiene prioridad sobre location.
+    """
+    city = str(event.get('city') or event.get('location') or '')
+    if kind == INSIGHT:
+        return {
+            'title': _title(event),
+            'venue_name': str(event.get('venue_name') or ''),
+            'category': _category(event.get('category')),
+            'location': city or 'Buenos Aires',
+        }
+    if kind == CONTEXT:
+        return {
+            'title': _title(event),
+            'category': _category(event.get('category')),
+            'venue_name': str(event.get('venue_name') or ''),
+            'city': city,
+            'start_datetime': _datetime(event.get('start_datetime')),
+        }
+    if kind == CONVERSATION:
+        return {
+            'name': _title(event),
+            'category': _category(event.get('category')) or 'general',
+            'venue_name': str(event.get('venue_name') or ''),
+            'location': city or 'Buenos Aires',
+            'start_datetime': _datetime(event.get('start_datetime')),
+            'price': str(event.get('price') or 0),
+        }
+    raise ValueError(f"Tipo de insight desconocido: {kind}")
+
+
+def content_hash(kind: str, event: Dict[str, Any]) -> str:
+    raw = json.dumps([kind, prompt_fields(kind, event)], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def storage_key(event: Dict[str, Any]) -> Optional[str]:
+    """Id real del evento si viene de la tabla events; None = no se guarda"""
+    event_id = event.get('id')
+    if not event.get(DB_ROW) or event_id in (None, ''):
+        return None
+    return str(event_id)
+
+
+def _db_row(row: Any) -> Dict[str, Any]:
+    event = dict(row._mapping) if hasattr(row, '_mapping') else dict(row)
+    event[DB_ROW] = True
+    return event
+
+
+async def load_event(event_id: Any) -> Optional[Dict[str, Any]]:
+    """Fila canónica de un evento por id (None si el id no existe, ej. un slug)"""
+    from services.async_db import async_db
+    from services.request_coalescer import db_flight
+
+    if not event_id or not isinstance(event_id, (str, int)):
+        return None
+
+    async def fetch():
+        rows = await async_db.fetch_all(
+            f"SELECT {', '.join(EVENT_COLUMNS)} FROM events WHERE id = :id LIMIT 1",
+            {'id': str(event_id)}
+        )
+        return _db_row(rows[0]) if rows else None
+
+    return await db_flight.do(('event_row', str(event_id)), fetch)
+
+
+# ============================================================================
+# PROMPTS Y GENERACIÓN
+# ============================================================================
+
+def build_insight_prompt(event: Dict[str, Any]) -> str:
+    """🎯 Prompt del hover con toda la información rica"""
+    fields = prompt_fields(INSIGHT, event)
+    return f"""Evento: {fields['title']}
+Lugar: {fields['venue_name']}
+Categoría: {fields['category']}
+Ciudad: {fields['location']}
+
+Dame información SUPER CONCISA y ÚTIL sobre este evento.
+
+FORMATO de respuesta (JSON):
+{{
+    "quick_insight": "1 línea sobre qué esperar del evento",
+    "venue_tip": "1 tip sobre el lugar",
+    "transport": "Colectivos/transporte que llegan ahí",
+    "nearby": "1 lugar copado para ir antes/después",
+    "vibe": "En 3 palabras el ambiente",
+    "pro_tip": "1 consejo que solo un local sabría",
+    "best_for": "Para quién es ideal este evento"
+}}
+
+Respondé SOLO el JSON, sin explicaciones adicionales."""
+
+
+def parse_insight_json(response_text: str) -> Dict[str, Any]:
+    """JSON de la respuesta, sin el markdown que a veces lo envuelve (JSONDecodeError si no parsea)"""
+    json_str = response_text.strip()
+    if json_str.startswith("```json"):
+        json_str = json_str[7:]
+    if json_str.startswith("```"):
+        json_str = json_str[3:]
+    if json_str.endswith("```"):
+        json_str = json_str[:-3]
+    data = json.loads(json_str.strip())
+    if not isinstance(data, dict):
+        raise json.JSONDecodeError("Se esperaba un objeto JSON", json_str, 0)
+    return data
+
+
+async def generate_payload(kind: str, event: Dict[str, Any], priority: Optional[int] = None) -> Optional[Any]:
+    """
+    Genera el payload de un tipo con la IA
+
+    Returns:
+        El payload, o None si la IA no respondió o la respuesta no sirve
+        (los fallbacks genéricos no se guardan)
+    """
+    if kind == INSIGHT:
+        from services.ai_manager import AIServiceManager
+
+        response_text = await AIServiceManager().generate(
+            prompt=build_insight_prompt(event),
+            temperature=0.7,
+            use_fallback=True,
+            priority=priority
+        )
+        if not response_text:
+            return None
+        try:
+            return parse_insight_json(response_text)
+        except json.JSONDecodeError as e:
+            logger.warning(f"⚠️ Insight con JSON inválido: {e}")
+            return None
+
+    if kind == CONTEXT:
+        from services.ai_manager import generate_event_context
+
+        return await generate_event_context(prompt_fields(CONTEXT, event), priority=priority)
+
+    if kind == CONVERSATION:
+        from api.event_ai_assistant import EventAIAssistant
+        from services.gemini_priority_queue import Priority
+
+        assistant = EventAIAssistant()
+        conversation_event = {**event, **prompt_fields(CONVERSATION, event)}
+        conversation = await assistant.generate_conversational_summary(
+            conversation_event, priority=Priority.LOW if priority is None else priority
+        )
+        # El asistente cae al guion fijo cuando la IA falla: eso no se guarda
+        if conversation == assistant.get_scripted_fallback_conversation(conversation_event):
+            return None
+        return conversation
+
+    raise ValueError(f"Tipo de insight desconocido: {kind}")
+
+
+# ============================================================================
+# SERVICIO
+# ============================================================================
+
+class EventInsightService:
+    """
+    💡 INSIGHTS POR EVENTO
+
+    Uso:
+        insight = await event_insights.get_or_generate(INSIGHT, event_data, priority=Priority.CRITICAL)
+        summary = await event_insights.precompute(upcoming_events)
+    """
+
+    def __init__(self, concurrency: int = PRECOMPUTE_CONCURRENCY):
+        self.concurrency = max(1, concurrency)
+        self._stats: Dict[str, Dict[str, int]] = {
+            kind: {'hits': 0, 'stale': 0, 'misses': 0, 'generated': 0, 'failed': 0, 'precomputed': 0}
+            for kind in KINDS
+        }
+
+    async def resolve(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Evento canónico para hashear/generar: la fila de la DB si el id existe,
+        o el payload recibido (se genera igual, pero no se guarda)
+        """
+        if event.get(DB_ROW):
+            return event
+        try:
+            row = await load_event(event.get('id') or event.get('event_id'))
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo leer el evento {event.get('id')}: {e}")
+            row = None
+        return row or event
+
+    def _read(self, kind: str, event: Dict[str, Any]) -> Any:
+        """Payload vigente para el contenido actual del evento, _STALE o MISS"""
+        key = storage_key(event)
+        if key is None:
+            return MISS
+        digest = content_hash(kind, event)
+        entry = enrichment_store.get(_NAMESPACES[kind], key)
+        if entry is MISS or not isinstance(entry, dict):
+            return MISS
+        if entry.get('hash') != digest:
+            return _STALE
+        return entry.get('payload')
+
+    def lookup(self, kind: str, event: Dict[str, Any]) -> Optional[Any]:
+        """
+        Payload guardado si el evento no cambió desde que se generó; None si hay que generar
+        (`event` ya resuelto con resolve())
+        """
+        found = self._read(kind, event)
+        stats = self._stats[kind]
+        if found is MISS:
+            stats['misses'] += 1
+            return None
+        if found is _STALE:
+            stats['stale'] += 1
+            return None
+        stats['hits'] += 1
+        return found
+
+    def save(self, kind: str, event: Dict[str, Any], payload: Any):
+        key = storage_key(event)
+        if key is None:
+            return
+        digest = content_hash(kind, event)
+        enrichment_store.put(_NAMESPACES[kind], key, {
+            'hash': digest,
+            'payload': payload,
+            'generated_at': time.time(),
+        })
+
+    async def get_or_generate(
+        self,
+        kind: str,
+        event: Dict[str, Any],
+        priority: Optional[int] = None
+    ) -> Optional[Any]:
+        """Payload del store o, si cambió o faltaba, generado on-demand y guardado"""
+        event = await self.resolve(event)
+        payload = await asyncio.to_thread(self.lookup, kind, event)
+        if payload is not None:
+            return payload
+        digest = content_hash(kind, event)
+        return await ai_flight.do(
+            ('event_insight', kind, digest),
+            lambda: self._generate_and_save(kind, event, priority)
+        )
+
+    async def _generate_and_save(self, kind: str, event: Dict[str, Any], priority: Optional[int]) -> Optional[Any]:
+        payload = await generate_payload(kind, event, priority)
+        if payload is None:
+            self._stats[kind]['failed'] += 1
+            return None
+        await asyncio.to_thread(self.save, kind, event, payload)
+        self._stats[kind]['generated'] += 1
+        return payload
+
+    async def precompute(
+        self,
+        events: Iterable[Dict[str, Any]],
+        kinds: Sequence[str] = PRECOMPUTE_KINDS,
+        concurrency: Optional[int] = None,
+        force: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Genera los payloads que faltan o quedaron viejos (todos con force=True)
+
+        Returns:
+            Resumen: generados, ya vigentes y fallidos por tipo
+        """
+        from services.gemini_priority_queue import Priority
+
+        started = time.monotonic()
+        events = list(events)
+        summary = {kind: {'generated': 0, 'fresh': 0, 'failed': 0} for kind in kinds}
+        semaphore = asyncio.Semaphore(max(1, concurrency or self.concurrency))
+
+        async def run(kind: str, event: Dict[str, Any]):
+            found = MISS if force else await asyncio.to_thread(self._read, kind, event)
+            if found is not MISS and found is not _STALE:
+                summary[kind]['fresh'] += 1
+                return
+            async with semaphore:
+                try:
+                    payload = await self._generate_and_save(kind, event, Priority.BACKGROUND)
+                except Exception as e:
+                    logger.warning(f"⚠️ {kind} de '{_title(event)[:40]}' falló: {e}")
+                    payload = None
+            if payload is None:
+                summary[kind]['failed'] += 1
+            else:
+                summary[kind]['generated'] += 1
+                self._stats[kind]['precomputed'] += 1
+
+        await asyncio.gather(*(run(kind, event) for event in events for kind in kinds))
+        return {
+            'events': len(events),
+            'kinds': summary,
+            'elapsed_s': round(time.monotonic() - started, 1),
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        kinds = {}
+        for kind, stats in self._stats.items():
+            lookups = stats['hits'] + stats['stale'] + stats['misses']
+            kinds[kind] = {**stats, 'hit_rate': round(stats['hits'] / lookups, 3) if lookups else 0.0}
+        return {
+            'concurrency': self.concurrency,
+            'precompute_days': PRECOMPUTE_DAYS,
+            'precompute_kinds': list(PRECOMPUTE_KINDS),
+            'kinds': kinds,
+        }
+
+
+# Instancia global compartida por todo el proceso
+event_insights = EventInsightService()
+
+
+# ============================================================================
+# JOB BATCH (después de cada importación)
+# ============================================================================
+
+def load_upcoming_events(connection, days: int = PRECOMPUTE_DAYS, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Eventos de los próximos `days` días, los más cercanos primero (DB-API, paramstyle %s)"""
+    sql = (
+        f"SELECT {', '.join(EVENT_COLUMNS)} FROM events "
+        "WHERE start_datetime >= NOW() AND start_datetime < DATE_ADD(NOW(), INTERVAL %s DAY) "
+        "ORDER BY start_datetime"
+    )
+    params: List[Any] = [days]
+    if limit:
+        sql += " LIMIT %s"
+        params.append(limit)
+
+    cursor = connection.cursor()
+    try:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    return [_db_row(row if isinstance(row, dict) else zip(EVENT_COLUMNS, row)) for row in rows]
+
+
+def _ai_configured() -> bool:
+    from services.ai_manager import AIServiceManager
+    return any(provider.is_configured() for provider in AIServiceManager().providers.values())
+
+
+def report(summary: Dict[str, Any]) -> str:
+    parts = [
+        f"{kind}: {counts['generated']} generados, {counts['fresh']} vigentes, {counts['failed']} fallidos"
+        for kind, counts in summary['kinds'].items()
+    ]
+    return f"💡 Insights de {summary['events']} eventos próximos en {summary['elapsed_s']}s | " + ' | '.join(parts)
+
+
+def run_precompute(
+    days: int = PRECOMPUTE_DAYS,
+    kinds: Sequence[str] = PRECOMPUTE_KINDS,
+    concurrency: Optional[int] = None,
+    limit: Optional[int] = None,
+    force: bool = False
+) -> Optional[Dict[str, Any]]:
+    """Carga los eventos próximos y precalcula sus payloads (None si no hay providers de IA)"""
+    from services.location_index import connect_db
+
+    if not _ai_configured():
+        logger.warning("⚠️ Ningún provider de IA configurado: no se precalculan insights")
+        return None
+
+    connection = connect_db()
+    try:
+        events = load_upcoming_events(connection, days, limit)
+    finally:
+        connection.close()
+    return asyncio.run(event_insights.precompute(events, kinds, concurrency, force))
+
+
+def precompute_after_import(inserted: int) -> Optional[Dict[str, Any]]:
+    """
+    Hook de los importadores: corre el job si entraron eventos
+
+    Nunca rompe la importación (ya commiteada): los errores solo se informan.
+    EVENT_INSIGHTS_AFTER_IMPORT=false lo apaga.
+    """
+    if not AFTER_IMPORT or inserted <= 0 or not PRECOMPUTE_KINDS:
+        return None
+    print("\n💡 Precalculando insights de IA de los eventos próximos...")
+    try:
+        summary = run_precompute()
+    except Exception as e:
+        print(f"⚠️ No se pudieron precalcular los insights: {e}")
+        return None
+    if summary is not None:
+        print(report(summary))
+    return summary
+
+
+def main(argv: Optional[List[str]] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Precalcular insights de IA de los eventos próximos')
+    parser.add_argument('--days', type=int, default=PRECOMPUTE_DAYS, help='Días hacia adelante')
+    parser.add_argument('--kinds', default=','.join(PRECOMPUTE_KINDS), help=f"Tipos: {','.join(KINDS)}")
+    parser.add_argument('--concurrency', type=int, default=PRECOMPUTE_CONCURRENCY)
+    parser.add_argument('--limit', type=int, help='Máximo de eventos')
+    parser.add_argument('--force', action='store_true', help='Regenerar aunque el payload esté vigente')
+    args = parser.parse_args(argv)
+
+    kinds = [kind.strip() for kind in args.kinds.split(',') if kind.strip()]
+    unknown = [kind for kind in kinds if kind not in KINDS]
+    if unknown:
+        parser.error(f"Tipos desconocidos: {', '.join(unknown)}")
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    summary = run_precompute(args.days, kinds, args.concurrency, args.limit, args.force)
+    if summary is None:
+        return 1
+    print(report(summary))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
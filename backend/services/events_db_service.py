@@ -4,23 +4,92 @@ Busca eventos en la base de datos por ubicación (incluye barrios)
 """
 import logging
 import os
+import time
 import unicodedata
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 
+from services.async_db import async_db
+from services.image_proxy import thumbnail_url
+from services.location_index import BACKFILL_MARKER, LOCATION_KEYS_TABLE, resolve_search_keys
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
 # Conexión a MySQL Aiven
+# ⚠️ engine/SessionLocal síncronos se mantienen solo para scripts y endpoints legacy.
+# Las funciones async de este módulo usan async_db (pool asíncrono compartido).
 DB_URL = os.getenv('DATABASE_URL')
 engine = create_engine(DB_URL, pool_pre_ping=True)
 SessionLocal = sessionmaker(bind=engine)
 
 
+# El índice se usa solo si el backfill completo dejó su fila marcador. El resultado
+# se recuerda INDEX_CHECK_TTL segundos; un error de DB se reintenta antes (no se fija).
+INDEX_CHECK_TTL = 300
+INDEX_ERROR_RETRY = 15
+_location_index_available = False
+_location_index_checked_until = 0.0
+
+
+async def has_location_index() -> bool:
+    """Verifica (con TTL) si el índice normalizado de ubicaciones está completo"""
+    global _location_index_available, _location_index_checked_until
+    now = time.monotonic()
+    if now < _location_index_checked_until:
+        return _location_index_available
+    try:
+        rows = await async_db.fetch_all(
+            f"SELECT 1 AS ok FROM {LOCATION_KEYS_TABLE} "
+            f"WHERE loc_key = :marker_key AND event_id = :marker_id LIMIT 1",
+            {'marker_key': BACKFILL_MARKER[1], 'marker_id': BACKFILL_MARKER[0]}
+        )
+        available = bool(rows)
+        if available != _location_index_available:
+            logger.info(f"📍 Índice de ubicaciones {'habilitado' if available else 'sin backfill completo, usando LIKE'}")
+        _location_index_available = available
+        _location_index_checked_until = now + INDEX_CHECK_TTL
+    except Exception as e:
+        logger.warning(f"⚠️ Índice de ubicaciones no disponible, usando LIKE: {e}")
+        _location_index_available = False
+        _location_index_checked_until = now + INDEX_ERROR_RETRY
+    return _location_index_available
+
+
+def _location_index_clause(prefix: str, locations: List[str], params: Dict[str, Any]) -> str:
+    """
+    Arma la condición indexada (igualdad + prefijo) sobre event_location_keys
+
+    Cada ubicación agrega sus claves exactas (con alias: CABA, cdmx...) y un
+    prefijo 'cordoba%' - ambos resueltos por el índice de loc_key.
+
+    Una ubicación que queda vacía al normalizar (en blanco o solo signos) no
+    filtra, igual que el LIKE '%%' del fallback.
+    """
+    resolved = [resolve_search_keys(location) for location in locations]
+    if not resolved or not all(folded_prefix for _, folded_prefix in resolved):
+        return '1 = 1'
+
+    conditions = []
+    for i, (keys, folded_prefix) in enumerate(resolved):
+        key_params = []
+        for j, key in enumerate(keys):
+            params[f'{prefix}_key_{i}_{j}'] = key
+            key_params.append(f':{prefix}_key_{i}_{j}')
+        params[f'{prefix}_prefix_{i}'] = f'{folded_prefix}%'
+        conditions.append(f"loc_key IN ({', '.join(key_params)})")
+        conditions.append(f"loc_key LIKE :{prefix}_prefix_{i}")
+
+    return f"""id IN (
+                SELECT event_id FROM {LOCATION_KEYS_TABLE}
+                WHERE {' OR '.join(conditions)}
+            )"""
+
+
 async def get_db_connection():
     """
     DEPRECATED: Esta función se mantiene solo para compatibilidad con código legacy.
@@ -165,8 +234,6 @@ async def search_events_by_location(
         Lista de eventos desde MySQL Aiven
     """
 
-    session = SessionLocal()
-
     try:
         # Extraer ubicación (puede venir como "Buenos Aires, Argentina" o solo "Brasil")
         search_location = location.split(',')[0].strip()
@@ -178,13 +245,24 @@ async def search_events_by_location(
             # Solo hacer lookup si NO viene parent_city del frontend
             # PRIMERO: Verificar en DB si la ubicación es un barrio
             try:
-                neighborhood_check = session.execute(text('''
-                    SELECT DISTINCT city FROM events
-                    WHERE neighborhood LIKE :pattern
-                    AND city IS NOT NULL AND city != ''
-                    LIMIT 1
-                '''), {'pattern': f'%%{search_location}%%'})
-                row = neighborhood_check.fetchone()
+                if await has_location_index():
+                    _, nb_prefix = resolve_search_keys(search_location)
+                    neighborhood_rows = await async_db.fetch_all(f'''
+                        SELECT e.city FROM {LOCATION_KEYS_TABLE} k
+                        JOIN events e ON e.id = k.event_id
+                        WHERE k.level = 'neighborhood'
+                        AND k.loc_key LIKE :prefix
+                        AND e.city IS NOT NULL AND e.city != ''
+                        LIMIT 1
+                    ''', {'prefix': f'{nb_prefix}%'})
+                else:
+                    neighborhood_rows = await async_db.fetch_all('''
+                        SELECT DISTINCT city FROM events
+                        WHERE neighborhood LIKE :pattern
+                        AND city IS NOT NULL AND city != ''
+                        LIMIT 1
+                    ''', {'pattern': f'%%{search_location}%%'})
+                row = neighborhood_rows[0] if neighborhood_rows else None
                 if row and row[0]:
                     parent_city = row[0]
                     logger.info(f"🏙️ '{search_location}' detectado como barrio de '{parent_city}' (DB lookup)")
@@ -211,63 +289,82 @@ async def search_events_by_location(
         yesterday = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
         end_date = yesterday + timedelta(days=days_ahead + 1)  # +1 para compensar el día restado
 
-        # Normalizar ubicación (sin acentos) para búsqueda más flexible
-        search_normalized = remove_accents(search_location)
+        params = {
+            'location_pattern': f'%{search_location}%',
+            'now': yesterday,
+            'end_date': end_date
+        }
 
-        # Query SQL - buscar SOLO en campos geográficos (NO en venue_name/venue_address)
-        # Busca con y sin acentos para máxima cobertura
-        # ⚠️ NO buscar en venue_name/venue_address porque "Av. Córdoba" en Buenos Aires
-        # aparecería en búsquedas de Córdoba
-        query = """
+        select_clause = """
         SELECT
             id, title, description, event_url, image_url,
             venue_name, venue_address, city, category,
             start_datetime, end_datetime, price, source, neighborhood
         FROM events
         WHERE
-            (
-                -- Búsqueda exacta (con acentos) SOLO en campos geográficos
-                country LIKE :location_pattern
-                OR city LIKE :location_pattern
-                OR province LIKE :location_pattern
-                OR neighborhood LIKE :location_pattern
-                -- Búsqueda normalizada (sin acentos) para Córdoba -> Cordoba, São Paulo -> Sao Paulo
-                OR country LIKE :location_normalized
-                OR city LIKE :location_normalized
-                OR province LIKE :location_normalized
-                OR neighborhood LIKE :location_normalized
         """
 
-        params = {
-            'location_pattern': f'%{search_location}%',
-            'location_normalized': f'%{search_normalized}%',
-            'now': yesterday,
-            'end_date': end_date
-        }
-
-        # Agregar búsqueda por ciudad principal si existe
-        if parent_city:
-            parent_normalized = remove_accents(parent_city)
-            query += """
-                OR country LIKE :parent_pattern
-                OR city LIKE :parent_pattern
-                OR province LIKE :parent_pattern
-                OR neighborhood LIKE :parent_pattern
-                OR country LIKE :parent_normalized
-                OR city LIKE :parent_normalized
-                OR province LIKE :parent_normalized
-                OR neighborhood LIKE :parent_normalized
-            """
-            params['parent_pattern'] = f'%{parent_city}%'
-            params['parent_normalized'] = f'%{parent_normalized}%'
-            logger.info(f"🔍 También buscando eventos en ciudad principal: {parent_city}")
+        if await has_location_index():
+            # ⚡ Índice normalizado: igualdad/prefijo sobre event_location_keys (sin full-scan)
+            # Las claves ya vienen sin acentos y con alias (CABA -> buenos aires)
+            search_locations = [search_location]
+            if parent_city:
+                search_locations.append(parent_city)
+                logger.info(f"🔍 También buscando eventos en ciudad principal: {parent_city}")
 
-        # Cerrar el WHERE
-        query += """
-            )
+            query = select_clause + f"""
+            {_location_index_clause('loc', search_locations, params)}
             AND start_datetime >= :now
             AND start_datetime <= :end_date
-        """
+            """
+        else:
+            # Fallback sin migración: LIKE '%x%' (full-scan)
+            # Normalizar ubicación (sin acentos) para búsqueda más flexible
+            search_normalized = remove_accents(search_location)
+
+            # Query SQL - buscar SOLO en campos geográficos (NO en venue_name/venue_address)
+            # Busca con y sin acentos para máxima cobertura
+            # ⚠️ NO buscar en venue_name/venue_address porque "Av. Córdoba" en Buenos Aires
+            # aparecería en búsquedas de Córdoba
+            query = select_clause + """
+                (
+                    -- Búsqueda exacta (con acentos) SOLO en campos geográficos
+                    country LIKE :location_pattern
+                    OR city LIKE :location_pattern
+                    OR province LIKE :location_pattern
+                    OR neighborhood LIKE :location_pattern
+                    -- Búsqueda normalizada (sin acentos) para Córdoba -> Cordoba, São Paulo -> Sao Paulo
+                    OR country LIKE :location_normalized
+                    OR city LIKE :location_normalized
+                    OR province LIKE :location_normalized
+                    OR neighborhood LIKE :location_normalized
+            """
+
+            params['location_normalized'] = f'%{search_normalized}%'
+
+            # Agregar búsqueda por ciudad principal si existe
+            if parent_city:
+                parent_normalized = remove_accents(parent_city)
+                query += """
+                    OR country LIKE :parent_pattern
+                    OR city LIKE :parent_pattern
+                    OR province LIKE :parent_pattern
+                    OR neighborhood LIKE :parent_pattern
+                    OR country LIKE :parent_normalized
+                    OR city LIKE :parent_normalized
+                    OR province LIKE :parent_normalized
+                    OR neighborhood LIKE :parent_normalized
+                """
+                params['parent_pattern'] = f'%{parent_city}%'
+                params['parent_normalized'] = f'%{parent_normalized}%'
+                logger.info(f"🔍 También buscando eventos en ciudad principal: {parent_city}")
+
+            # Cerrar el WHERE
+            query += """
+                )
+                AND start_datetime >= :now
+                AND start_datetime <= :end_date
+            """
 
         # Agregar filtro de categoría si existe
         if category and category.lower() != 'todas':
@@ -283,9 +380,8 @@ async def search_events_by_location(
         """
         params['limit'] = limit
 
-        # Ejecutar query
-        result = session.execute(text(query), params)
-        rows = result.fetchall()
+        # Ejecutar query (async, no bloquea el event loop)
+        rows = await async_db.fetch_all(query, params)
 
         # Convertir a diccionarios
         events = []
@@ -311,6 +407,7 @@ async def search_events_by_location(
                 'description': row[2] or '',
                 'url': row[3] or '',
                 'image_url': row[4] or '',
+                'thumbnail_url': thumbnail_url(str(row[0]), row[4]),  # /img/{id} (miniatura local)
                 'venue_name': row[5] or '',
                 'venue_address': row[6] or '',
                 'city': event_city,
@@ -359,9 +456,6 @@ async def search_events_by_location(
             'expanded_search': False
         }
 
-    finally:
-        session.close()
-
 
 async def get_available_cities(limit: int = 10) -> List[Dict[str, Any]]:
     """
@@ -370,8 +464,6 @@ async def get_available_cities(limit: int = 10) -> List[Dict[str, Any]]:
     Returns:
         Lista de ciudades con cantidad de eventos
     """
-    session = SessionLocal()
-
     try:
         logger.info(f" Obteniendo ciudades disponibles en MySQL")
 
@@ -394,8 +486,7 @@ async def get_available_cities(limit: int = 10) -> List[Dict[str, Any]]:
             'limit': limit
         }
 
-        result = session.execute(text(query), params)
-        rows = result.fetchall()
+        rows = await async_db.fetch_all(query, params)
 
         cities = []
         for row in rows:
@@ -412,9 +503,6 @@ async def get_available_cities(limit: int = 10) -> List[Dict[str, Any]]:
         logger.error(f"ERROR Error obteniendo ciudades: {e}")
         return []
 
-    finally:
-        session.close()
-
 
 async def get_available_cities_with_events(search_query: str, limit: int = 10) -> List[Dict[str, Any]]:
     """
@@ -435,8 +523,6 @@ async def get_available_cities_with_events(search_query: str, limit: int = 10) -
         - event_count: Cantidad de eventos
         - displayName: Nombre formateado para mostrar
     """
-    session = SessionLocal()
-
     try:
         logger.info(f" Buscando ubicaciones con eventos que contengan: '{search_query}'")
 
@@ -467,8 +553,7 @@ async def get_available_cities_with_events(search_query: str, limit: int = 10) -
             'search_pattern': f'%{search_query}%'
         }
 
-        result = session.execute(text(query), params)
-        rows = result.fetchall()
+        rows = await async_db.fetch_all(query, params)
 
         # Función para normalizar nombres de ciudades
         def normalize_city_name(city_name: str) -> str:
@@ -584,11 +669,8 @@ async def get_available_cities_with_events(search_query: str, limit: int = 10) -
         logger.error(f"ERROR Error buscando ubicaciones: {e}")
         return []
 
-    finally:
-        session.close()
 
-
-def get_related_events(
+async def get_related_events(
     category: Optional[str] = None,
     city: Optional[str] = None,
     exclude_id: Optional[str] = None,
@@ -611,8 +693,6 @@ def get_related_events(
     Returns:
         Dict con 'events' y 'total'
     """
-    session = SessionLocal()
-
     try:
         # Fecha desde ayer para incluir eventos de hoy
         yesterday = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
@@ -627,7 +707,7 @@ def get_related_events(
 
         # Query 1: Misma categoría + misma ciudad (prioridad máxima)
         if normalized_category and city:
-            query = text("""
+            query = """
                 SELECT id, title, description, event_url, image_url,
                        venue_name, venue_address, city, category, province, country,
                        start_datetime, end_datetime, price, source, neighborhood, is_free
@@ -638,8 +718,8 @@ def get_related_events(
                   AND (:exclude IS NULL OR id != :exclude)
                 ORDER BY start_datetime ASC
                 LIMIT :fetch_limit
-            """)
-            result = session.execute(query, {
+            """
+            rows = await async_db.fetch_all(query, {
                 'category': normalized_category,
                 'city_pattern': f'%{city}%',
                 'now': yesterday,
@@ -647,7 +727,7 @@ def get_related_events(
                 'fetch_limit': limit * 3  # Fetch más para filtrar duplicados
             })
 
-            for row in result.fetchall():
+            for row in rows:
                 event = _format_related_event(row, 'same_category_city')
                 # Solo agregar si el título no está duplicado
                 if event['title'] not in seen_titles and len(events) < limit:
@@ -660,7 +740,7 @@ def get_related_events(
             exclude_list = existing_ids + ([exclude_id] if exclude_id else [])
             remaining = limit - len(events)
 
-            query = text("""
+            query = """
                 SELECT id, title, description, event_url, image_url,
                        venue_name, venue_address, city, category, province, country,
                        start_datetime, end_datetime, price, source, neighborhood, is_free
@@ -670,20 +750,20 @@ def get_related_events(
                   AND id NOT IN :exclude_ids
                 ORDER BY start_datetime ASC
                 LIMIT :fetch_limit
-            """)
+            """
 
             # MySQL no soporta IN con lista vacía, usar workaround
             if not exclude_list:
                 exclude_list = ['__none__']
 
-            result = session.execute(query, {
+            rows = await async_db.fetch_all(query, {
                 'category': normalized_category,
                 'now': yesterday,
                 'exclude_ids': tuple(exclude_list),
                 'fetch_limit': remaining * 3  # Fetch más para filtrar duplicados
             })
 
-            for row in result.fetchall():
+            for row in rows:
                 event = _format_related_event(row, 'same_category')
                 # Solo agregar si el título no está duplicado
                 if event['title'] not in seen_titles and len(events) < limit:
@@ -696,7 +776,7 @@ def get_related_events(
             exclude_list = existing_ids + ([exclude_id] if exclude_id else [])
             remaining = limit - len(events)
 
-            query = text("""
+            query = """
                 SELECT id, title, description, event_url, image_url,
                        venue_name, venue_address, city, category, province, country,
                        start_datetime, end_datetime, price, source, neighborhood, is_free
@@ -706,19 +786,19 @@ def get_related_events(
                   AND id NOT IN :exclude_ids
                 ORDER BY start_datetime ASC
                 LIMIT :fetch_limit
-            """)
+            """
 
             if not exclude_list:
                 exclude_list = ['__none__']
 
-            result = session.execute(query, {
+            rows = await async_db.fetch_all(query, {
                 'city_pattern': f'%{city}%',
                 'now': yesterday,
                 'exclude_ids': tuple(exclude_list),
                 'fetch_limit': remaining * 3  # Fetch más para filtrar duplicados
             })
 
-            for row in result.fetchall():
+            for row in rows:
                 event = _format_related_event(row, 'same_city')
                 # Solo agregar si el título no está duplicado
                 if event['title'] not in seen_titles and len(events) < limit:
@@ -736,9 +816,6 @@ def get_related_events(
         logger.error(f"❌ Error buscando eventos relacionados: {e}")
         return {'events': [], 'total': 0, 'error': str(e)}
 
-    finally:
-        session.close()
-
 
 def _format_related_event(row, relation_type: str) -> Dict[str, Any]:
     """Formatea una fila de evento para respuesta de eventos relacionados"""
@@ -756,6 +833,7 @@ def _format_related_event(row, relation_type: str) -> Dict[str, Any]:
         'description': row[2] or '',
         'url': row[3] or '',
         'image_url': row[4] or '',
+        'thumbnail_url': thumbnail_url(str(row[0]), row[4]),
         'venue_name': row[5] or '',
         'venue_address': row[6] or '',
         'city': row[7] or '',
@@ -0,0 +1,501 @@
+"""
+🗺️ GAZETTEER - Índice geográfico local (ciudad metropolitana, provincia, ciudades cercanas)
+/api/events/stream le preguntaba a la IA la "ciudad metropolitana principal" en
+cada request, incluso para Buenos Aires. Este índice responde en microsegundos
+para las ubicaciones conocidas y deja la IA solo para los misses reales.
+
+Fuentes (en orden de autoridad):
+- data/regions: ciudades con provincia y coordenadas; los barrios apuntan a su ciudad
+- config/countries.py: ciudad por defecto y ciudades principales de cada país
+- nearby_cities_service: ciudades aledañas curadas (con provincia)
+- Enriquecimientos de IndustrialFactory en el enrichment store (provincia + ciudades cercanas)
+- Respuestas aprendidas: lo que la IA contestó para un miss (validado: un solo
+  nombre corto) se guarda por clave en el enrichment store (namespace
+  'gazetteer_learned', con TTL) y no se vuelve a preguntar hasta que vence.
+  El viejo data/cache/gazetteer_learned.json se importa una sola vez
+
+Las ciudades cercanas de data/regions se calculan por distancia (haversine)
+dentro del mismo país y se memorizan por entrada.
+"""
+
+import asyncio
+import glob
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from services.location_index import expand_aliases, fold_location
+
+logger = logging.getLogger(__name__)
+
+REGIONS_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'regions')
+# Archivo de aprendidos anterior al enrichment store (solo se migra)
+LEARNED_FILE = os.getenv(
+    'GAZETTEER_LEARNED_FILE',
+    os.path.join(os.path.dirname(__file__), '..', 'data', 'cache', 'gazetteer_learned.json')
+)
+
+# País preferido cuando un nombre existe en varios países y no viene calificado
+DEFAULT_COUNTRY = os.getenv('GAZETTEER_DEFAULT_COUNTRY', 'Argentina')
+
+NEARBY_LIMIT = 3
+
+CITY = 'city'
+BARRIO = 'barrio'
+COUNTRY = 'country'
+EXTRA = 'extra'          # Ciudad conocida sin coordenadas (countries.py, nearby_cities_service, enriquecimientos)
+
+# Preferencia entre homónimos del mismo país
+_KIND_RANK = {CITY: 0, COUNTRY: 1, BARRIO: 2, EXTRA: 3}
+
+# Nombre de ciudad aceptable como respuesta de la IA: letras, espacios, . ' -
+MAX_CITY_NAME_LENGTH = 60
+MAX_CITY_NAME_WORDS = 5
+_CITY_NAME = re.compile(r"^[^\W\d_][^\W\d_ .'\-]*(?:[ .'\-]+[^\W\d_]+)*\.?$")
+
+
+def clean_city_name(value: Optional[str]) -> Optional[str]:
+    """
+    Normaliza una respuesta de la IA a un único nombre de ciudad, o None si no lo es
+
+    'Buenos Aires.' -> 'Buenos Aires'; 'Córdoba, Argentina', respuestas de varias
+    líneas, explicaciones o nombres larguísimos -> None
+    """
+    if not value:
+        return None
+    name = str(value).strip().strip('"\'`*').strip()
+    if name.endswith('.') and name.count('.') == 1:
+        name = name[:-1].strip()
+    if (not name or len(name) > MAX_CITY_NAME_LENGTH
+            or len(name.split()) > MAX_CITY_NAME_WORDS or not _CITY_NAME.match(name)):
+        return None
+    return name
+
+
+def clean_nearby_city(value: Optional[str]) -> Optional[str]:
+    """
+    Normaliza una ciudad cercana en el formato de los enriquecimientos, o None
+
+    'San Fernando, Buenos Aires, Argentina' y 'San Fernando' se aceptan (cada
+    parte debe pasar clean_city_name()); más de 3 partes o partes vacías -> None
+    """
+    if not value:
+        return None
+    parts = [clean_city_name(part) for part in str(value).split(',')]
+    if len(parts) > 3 or not all(parts):
+        return None
+    return ', '.join(parts)
+
+
+@dataclass
+class Place:
+    """Entrada del gazetteer"""
+    name: str
+    kind: str
+    country: str
+    province: str = ''
+    metro_city: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    nearby: Optional[List[str]] = None
+    source: str = 'regions'
+    order: int = 0
+    aliases: List[str] = field(default_factory=list)
+
+
+def _distance_km(a: Place, b: Place) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (a.latitude, a.longitude, b.latitude, b.longitude))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 12742 * math.asin(math.sqrt(h))
+
+
+class Gazetteer:
+    """
+    🗺️ GAZETTEER LOCAL
+
+    Uso:
+        place = gazetteer.resolve('Palermo, Buenos Aires')
+        # {'main_city': 'Buenos Aires', 'province': 'Ciudad Autónoma de Buenos Aires',
+        #  'nearby_cities': [...], 'country': 'Argentina', 'source': 'regions'}
+        ...
+        await gazetteer.learn('Merlo, Buenos Aires', main_city='Buenos Aires')
+    """
+
+    def __init__(self, regions_dir: str = REGIONS_DIR, learned_file: Optional[str] = LEARNED_FILE):
+        self.regions_dir = regions_dir
+        self.learned_file = learned_file
+
+        self._by_name: Dict[str, List[Place]] = {}
+        self._by_country: Dict[str, List[Place]] = {}
+        self._learned: Dict[str, Dict[str, Any]] = {}
+        # TTL del namespace del store; también vence las entradas ya cargadas en memoria
+        self._learned_ttl: Optional[float] = None
+        self._built = False
+        self._build_lock = threading.Lock()
+        self._stats = {
+            'lookups': 0, 'hits': 0, 'partial': 0, 'misses': 0, 'learned_writes': 0, 'learned_rejected': 0,
+        }
+        self._lookup_ns = 0
+        self._build_ms = 0.0
+
+    # ------------------------------------------------------------------ construcción
+
+    def _add(self, place: Place):
+        keys = set(expand_aliases(fold_location(place.name)))
+        keys.update(fold_location(alias) for alias in place.aliases if alias)
+        for key in keys:
+            self._by_name.setdefault(key, []).append(place)
+        if place.kind in (CITY, BARRIO):
+            self._by_country.setdefault(fold_location(place.country), []).append(place)
+
+    def _known(self, name: str, country: str) -> bool:
+        folded_country = fold_location(country)
+        return any(
+            fold_location(p.country) == folded_country
+            for p in self._by_name.get(fold_location(name), [])
+        )
+
+    def _load_regions(self):
+        order = 0
+        for path in sorted(glob.glob(os.path.join(self.regions_dir, '**', '*.json'), recursive=True)):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"⚠️ Gazetteer: no se pudo leer {path}: {e}")
+                continue
+
+            country = data.get('country')
+            if not country:
+                continue
+            country_cities: List[str] = []
+            for value in data.values():
+                if not isinstance(value, list):
+                    continue
+                for subdivision in value:
+                    if not isinstance(subdivision, dict) or not isinstance(subdivision.get('cities'), list):
+                        continue
+                    province = subdivision.get('name') or ''
+                    for city in subdivision['cities']:
+                        if not city.get('name'):
+                            continue
+                        order += 1
+                        country_cities.append(city['name'])
+                        self._add(Place(
+                            name=city['name'], kind=CITY, country=country, province=province,
+                            metro_city=city['name'], latitude=city.get('latitude'),
+                            longitude=city.get('longitude'), order=order
+                        ))
+                        for barrio in city.get('barrios', []):
+                            if barrio.get('name'):
+                                order += 1
+                                self._add(Place(
+                                    name=barrio['name'], kind=BARRIO, country=country, province=province,
+                                    metro_city=city['name'], latitude=barrio.get('latitude'),
+                                    longitude=barrio.get('longitude'), order=order
+                                ))
+
+            if country_cities:
+                order += 1
+                self._add(Place(
+                    name=country, kind=COUNTRY, country=country, metro_city=country_cities[0],
+                    nearby=country_cities[1:NEARBY_LIMIT + 1], order=order,
+                    aliases=[data.get('country_code') or '']
+                ))
+
+    def _load_countries_config(self):
+        try:
+            from config.countries import SUPPORTED_COUNTRIES
+        except ImportError as e:
+            logger.debug(f"Gazetteer: config.countries no disponible: {e}")
+            return
+
+        for config in SUPPORTED_COUNTRIES.values():
+            country = next(
+                (p for p in self._by_name.get(fold_location(config.country_name), []) if p.kind == COUNTRY),
+                None
+            )
+            majors = [c for c in config.major_cities if fold_location(c) != fold_location(config.default_city)]
+            if country is None:
+                self._add(Place(
+                    name=config.country_name, kind=COUNTRY, country=config.country_name,
+                    source='countries', aliases=[config.country_code]
+                ))
+                country = self._by_name[fold_location(config.country_name)][-1]
+            # countries.py manda sobre el orden de los JSON para la ciudad por defecto
+            country.metro_city = config.default_city
+            country.nearby = majors[:NEARBY_LIMIT]
+
+            for city in config.major_cities:
+                if not self._known(city, country.country):
+                    self._add(Place(name=city, kind=EXTRA, country=country.country, source='countries'))
+
+    def _load_nearby_service(self):
+        try:
+            from services.nearby_cities_service import nearby_cities_service
+        except ImportError as e:
+            logger.debug(f"Gazetteer: nearby_cities_service no disponible: {e}")
+            return
+
+        for city_name, infos in nearby_cities_service.city_database.items():
+            if not infos:
+                continue
+            country = infos[0].country
+            # Las aledañas curadas (ordenadas a mano) reemplazan a las calculadas
+            for place in self._by_name.get(fold_location(city_name), []):
+                if place.kind == CITY and fold_location(place.country) == fold_location(country):
+                    place.nearby = [info.name for info in infos][:NEARBY_LIMIT]
+            for info in infos:
+                if not self._known(info.name, info.country):
+                    self._add(Place(
+                        name=info.name, kind=EXTRA, country=info.country,
+                        province=info.province or '', source='nearby_cities_service'
+                    ))
+
+    def _load_enrichments(self):
+        try:
+            from services.enrichment_store import LOCATION, enrichment_store
+            enrichments = enrichment_store.items(LOCATION)
+        except Exception as e:
+            logger.debug(f"Gazetteer: enriquecimientos no disponibles: {e}")
+            return
+
+        for _, entry in enrichments:
+            if not isinstance(entry, dict) or not entry.get('nearby_cities'):
+                continue
+            key = fold_location(entry.get('original'))
+            if key and key not in self._learned:
+                self._learned[key] = {
+                    'province': entry.get('state') or '',
+                    'country': entry.get('country') or '',
+                    'nearby_cities': list(entry['nearby_cities']),
+                    'source': 'enrichment',
+                }
+
+    def _import_learned_file(self, enrichment_store):
+        """Migra el JSON de aprendidos anterior (una sola vez, marca en _meta)"""
+        if not self.learned_file or not os.path.exists(self.learned_file):
+            return
+        try:
+            with open(self.learned_file, 'r', encoding='utf-8') as f:
+                locations = json.load(f).get('locations', {})
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"⚠️ Gazetteer: no se pudo leer {self.learned_file}: {e}")
+            return
+        from services.enrichment_store import GAZETTEER_LEARNED
+        enrichment_store.import_legacy(GAZETTEER_LEARNED, locations, os.path.basename(self.learned_file))
+
+    def _load_learned(self):
+        try:
+            from services.enrichment_store import GAZETTEER_LEARNED, NAMESPACE_TTLS, enrichment_store
+            self._learned_ttl = NAMESPACE_TTLS[GAZETTEER_LEARNED]
+            self._import_learned_file(enrichment_store)
+            learned = enrichment_store.items(GAZETTEER_LEARNED)
+        except Exception as e:
+            logger.warning(f"⚠️ Gazetteer: aprendidos no disponibles: {e}")
+            return
+
+        for key, entry in learned:
+            if isinstance(entry, dict):
+                self._learned[key] = entry
+
+    def build(self):
+        """Construye el índice (una vez por proceso; reload() lo rehace)"""
+        with self._build_lock:
+            if self._built:
+                return
+            started = time.perf_counter()
+            self._by_name.clear()
+            self._by_country.clear()
+            self._learned.clear()
+            self._load_regions()
+            self._load_countries_config()
+            self._load_nearby_service()
+            self._load_learned()
+            self._load_enrichments()
+            self._build_ms = (time.perf_counter() - started) * 1000
+            self._built = True
+            logger.info(
+                f"🗺️ Gazetteer: {len(self._by_name)} nombres, {len(self._learned)} aprendidos "
+                f"en {self._build_ms:.0f}ms"
+            )
+
+    def reload(self):
+        self._built = False
+        self.build()
+
+    # ------------------------------------------------------------------ consultas
+
+    def _match(self, location: str) -> Optional[Place]:
+        """Mejor entrada para 'Nombre[, Provincia][, País]' (None si nada calza)"""
+        parts = [fold_location(p) for p in location.split(',') if p.strip()]
+        if not parts:
+            return None
+        candidates = self._by_name.get(parts[0])
+        if not candidates:
+            return None
+
+        qualifiers = set()
+        for part in parts[1:]:
+            qualifiers |= expand_aliases(part)
+        default_country = fold_location(DEFAULT_COUNTRY)
+
+        def score(place: Place):
+            country = fold_location(place.country)
+            matched = (
+                2 * (bool(expand_aliases(country) & qualifiers))
+                + 2 * (fold_location(place.province) in qualifiers)
+                + (fold_location(place.metro_city) in qualifiers)
+            )
+            return (matched, country == default_country, -_KIND_RANK[place.kind], -place.order)
+
+        best = max(candidates, key=score)
+        # Calificadores que no calzan con ningún homónimo ('Córdoba, Veracruz'): no adivinar
+        if qualifiers and score(best)[0] == 0:
+            return None
+        return best
+
+    def _nearby(self, place: Place) -> List[str]:
+        if place.nearby is None:
+            place.nearby = []
+            if place.latitude is not None and place.longitude is not None:
+                peers = [
+                    p for p in self._by_country.get(fold_location(place.country), [])
+                    if p is not place and p.latitude is not None and p.kind == place.kind
+                    and (place.kind == CITY or p.metro_city == place.metro_city)
+                ]
+                peers.sort(key=lambda p: _distance_km(place, p))
+                place.nearby = [p.name for p in peers[:NEARBY_LIMIT]]
+        return place.nearby
+
+    def resolve(self, location: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Ciudad metropolitana, provincia y ciudades cercanas sin red
+
+        Returns:
+            Dict con main_city / province / country / nearby_cities (cada campo puede
+            faltar si la fuente no lo conoce) o None si la ubicación es desconocida
+        """
+        if not location or not location.strip():
+            return None
+        self.build()
+        started = time.perf_counter_ns()
+        self._stats['lookups'] += 1
+
+        place = self._match(location)
+        learned = self._learned.get(fold_location(location), {})
+        if self._learned_ttl and time.time() - learned.get('learned_at', time.time()) > self._learned_ttl:
+            learned = {}
+        result: Optional[Dict[str, Any]] = None
+        if place is not None or learned:
+            result = {
+                'main_city': (place.metro_city if place else None) or learned.get('main_city'),
+                'province': (place.province if place else '') or learned.get('province', ''),
+                'country': (place.country if place else '') or learned.get('country', ''),
+                'nearby_cities': (self._nearby(place) if place else []) or learned.get('nearby_cities', []),
+                'source': place.source if place else learned.get('source', 'learned'),
+            }
+
+        if result is None:
+            self._stats['misses'] += 1
+        elif result['main_city'] and result['nearby_cities']:
+            self._stats['hits'] += 1
+        else:
+            self._stats['partial'] += 1
+        self._lookup_ns += time.perf_counter_ns() - started
+        return result
+
+    def match(self, location: str) -> Optional[Place]:
+        """Entrada para 'Nombre[, Provincia][, País]' (la misma que usa resolve)"""
+        self.build()
+        return self._match(location)
+
+    def names(self) -> List[str]:
+        """Nombres normalizados (fold_location) del índice, alias incluidos"""
+        self.build()
+        return list(self._by_name)
+
+    def metro_city(self, location: str) -> Optional[str]:
+        return (self.resolve(location) or {}).get('main_city')
+
+    def province(self, location: str) -> Optional[str]:
+        return (self.resolve(location) or {}).get('province') or None
+
+    def nearby_cities(self, location: str) -> List[str]:
+        return (self.resolve(location) or {}).get('nearby_cities', [])
+
+    # ------------------------------------------------------------------ escritura
+
+    async def learn(
+        self,
+        location: str,
+        main_city: Optional[str] = None,
+        province: Optional[str] = None,
+        nearby_cities: Optional[List[str]] = None,
+        country: Optional[str] = None
+    ):
+        """
+        Guarda la respuesta de la IA para un miss (memoria + enrichment store)
+
+        Los nombres que no pasan clean_city_name() (main_city) o clean_nearby_city()
+        (nearby_cities, formato 'Ciudad, Provincia, País') se descartan. Se escribe solo
+        la clave de esta ubicación: otros workers no pisan sus entradas.
+        """
+        key = fold_location(location)
+        if not key:
+            return
+        self.build()
+
+        cleaned_city = clean_city_name(main_city)
+        cleaned_nearby = [name for name in (clean_nearby_city(c) for c in nearby_cities or []) if name]
+        if (main_city and not cleaned_city) or len(cleaned_nearby) < len(nearby_cities or []):
+            self._stats['learned_rejected'] += 1
+            logger.warning(f"⚠️ Gazetteer: respuesta de IA descartada para '{location}': {main_city!r} {nearby_cities!r}")
+
+        updates = {
+            'main_city': cleaned_city, 'province': province,
+            'nearby_cities': cleaned_nearby, 'country': country,
+        }
+        # Copia nueva en vez de mutar: resolve() nunca ve una entrada a medio escribir
+        entry = dict(self._learned.get(key, {}))
+        changed = False
+        for name, value in updates.items():
+            if value and entry.get(name) != value:
+                entry[name] = value
+                changed = True
+        if not changed:
+            return
+        entry['source'] = 'learned'
+        entry['learned_at'] = time.time()
+        self._learned[key] = entry
+        self._stats['learned_writes'] += 1
+
+        try:
+            from services.enrichment_store import GAZETTEER_LEARNED, enrichment_store
+            await asyncio.to_thread(enrichment_store.put, GAZETTEER_LEARNED, key, entry)
+        except Exception as e:
+            logger.error(f"❌ Gazetteer: error guardando aprendido '{key}': {e}")
+
+    # ------------------------------------------------------------------ métricas
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self._stats['lookups']
+        return {
+            **self._stats,
+            'built': self._built,
+            'build_ms': round(self._build_ms, 1),
+            'names': len(self._by_name),
+            'learned_entries': len(self._learned),
+            'avg_lookup_us': round(self._lookup_ns / lookups / 1000, 2) if lookups else 0.0,
+            'hit_rate': round(self._stats['hits'] / lookups, 3) if lookups else 0.0,
+        }
+
+
+# Instancia global compartida por todo el proceso
+gazetteer = Gazetteer()
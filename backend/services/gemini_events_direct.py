@@ -102,8 +102,8 @@ class GeminiEventsDirectService(BaseGlobalScraper):
             # 📝 LOG: Mostrar prompt exacto que se envía
             logger.info(f"📝 PROMPT ENVIADO A GEMINI:\n{prompt}\n{'='*60}")
 
-            # Llamar a Gemini API
-            response = await self.ai_service._call_gemini_api(prompt)
+            # Llamar a Gemini API (sin caché de prompts: pide eventos vigentes)
+            response = await self.ai_service._call_gemini_api(prompt, cache=False)
 
             if not response:
                 logger.warning(f"⚠️ Gemini no retornó respuesta para {location}")
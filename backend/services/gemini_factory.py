@@ -3,10 +3,13 @@
 Factory ultra-simplificado que SOLO usa Gemini Direct
 """
 
+import asyncio
 import logging
 import time
 from typing import List, Dict, Any, Optional
 
+from services.enrichment_store import MISS, PARENT_CITY, enrichment_store
+
 logger = logging.getLogger(__name__)
 
 
@@ -28,9 +31,6 @@ class GeminiFactory:
     ✅ Confiable - no se rompe con cambios de sitios web
     """
 
-    # Cache en memoria para resultados de get_parent_location
-    _parent_city_cache: Dict[str, Optional[str]] = {}
-
     def __init__(self):
         """Inicializa Gemini Factory"""
         logger.info("🔮 Gemini Factory inicializado - UN SOLO SCRAPER")
@@ -348,7 +348,9 @@ RECUERDA: Solo ciudades GRANDES y CONOCIDAS. Solo el JSON."""
 
             # Crear instancia y llamar a Gemini
             service = GeminiAIService()
-            response_text = await service._call_gemini_api(prompt)
+            response_text = await service._call_gemini_api(
+                prompt, cache_template='major_nearby_cities', cache_params={'location': location}
+            )
 
             # Parsear JSON (limpiando markdown si existe)
             import json
@@ -432,7 +434,7 @@ RECUERDA: Solo ciudades GRANDES y CONOCIDAS. Solo el JSON."""
         - "Medellín Centro" → "Medellín"
 
         Usa Gemini AI para detectar inteligentemente la ciudad principal.
-        Con cache en memoria para evitar llamadas repetidas.
+        Con cache en el enrichment store (compartido entre workers, sobrevive reinicios).
 
         Returns:
             Nombre de la ciudad principal, o None si la ubicación ya es la ciudad principal
@@ -483,14 +485,13 @@ RECUERDA: Solo ciudades GRANDES y CONOCIDAS. Solo el JSON."""
         logger.info(f"🔍 Verificando whitelist para: '{location}' (normalized: '{cache_key}')")
         if cache_key in IMPORTANT_CITIES:
             logger.info(f"✅ '{location}' está en whitelist de ciudades importantes - NO expandir")
-            self._parent_city_cache[cache_key] = None
             return None
         else:
             logger.info(f"⚠️ '{location}' NO está en whitelist - procederá a detectar parent city")
 
-        # 1. Revisar cache primero
-        if cache_key in self._parent_city_cache:
-            cached_result = self._parent_city_cache[cache_key]
+        # 1. Revisar cache primero (SQLite fuera del event loop)
+        cached_result = await asyncio.to_thread(enrichment_store.get, PARENT_CITY, cache_key)
+        if cached_result is not MISS:
             if cached_result:
                 logger.info(f"⚡ Ciudad principal (cache): {location} → {cached_result}")
             else:
@@ -523,7 +524,9 @@ Responde SOLO:
 
             service = GeminiAIService()
             # Esto usa el AI Service Manager que tiene Grok como provider preferido
-            response_text = await service._call_gemini_api(prompt)
+            response_text = await service._call_gemini_api(
+                prompt, cache_template='parent_city', cache_params={'location': location}
+            )
 
             if response_text:
                 response_cleaned = response_text.strip().strip('"').strip()
@@ -531,25 +534,27 @@ Responde SOLO:
                 # Si es principal, no hay ciudad padre
                 if response_cleaned.upper() == "PRINCIPAL":
                     logger.info(f"ℹ️ {location} es ciudad principal")
-                    # Guardar en cache
-                    self._parent_city_cache[cache_key] = None
+                    # Guardar en cache (None = ciudad principal)
+                    await asyncio.to_thread(enrichment_store.put, PARENT_CITY, cache_key, None)
                     return None
 
                 # Si es ambiguo (múltiples lugares con mismo nombre), no asumir nada
                 if response_cleaned.upper() == "AMBIGUO":
                     logger.info(f"⚠️ {location} es ambiguo - el usuario debe especificar (ej: 'Merlo, Buenos Aires')")
-                    # No guardar en cache para no asumir
+                    # No guardar en cache para no asumir (tampoco en la caché de prompts)
+                    from services.ai_prompt_cache import prompt_cache
+                    await prompt_cache.invalidate('parent_city', {'location': location}, 0.1)
                     return None
 
                 # Si hay respuesta, es la ciudad padre
                 if response_cleaned and len(response_cleaned) < 100:
                     logger.info(f"✅ Ciudad principal detectada: {location} → {response_cleaned}")
                     # Guardar en cache
-                    self._parent_city_cache[cache_key] = response_cleaned
+                    await asyncio.to_thread(enrichment_store.put, PARENT_CITY, cache_key, response_cleaned)
                     return response_cleaned
 
-            # Si no hay respuesta, asumir que es principal
-            self._parent_city_cache[cache_key] = None
+            # Si no hay respuesta, asumir que es principal (entrada negativa: se reintenta luego)
+            await asyncio.to_thread(enrichment_store.put, PARENT_CITY, cache_key, None, negative=True)
             return None
 
         except Exception as e:
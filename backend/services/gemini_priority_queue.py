@@ -1,16 +1,37 @@
 """
 Sistema de cola con prioridades para requests a Gemini AI
 Prioriza Análisis Inteligente sobre comentarios de asistentes
+
+Scheduler sobre un semáforo de N slots:
+- submit(prompt, priority) devuelve un future con la respuesta
+- El dispatcher solo elige el próximo request cuando hay un slot libre, así la
+  decisión de prioridad se toma en el último momento posible
+- Aging: cada AI_SCHEDULER_AGING_INTERVAL segundos de espera un request sube un
+  nivel de prioridad efectiva (las prioridades bajas no se mueren de hambre)
+- Cancelar el future saca el request de la cola o cancela su ejecución
+- Métricas por prioridad: profundidad de cola, espera, completados/cancelados
 """
 import asyncio
 import logging
-from typing import Dict, Any, Optional
+import os
+import time
+from collections import deque
 from dataclasses import dataclass, field
 from enum import IntEnum
-import time
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
 
 logger = logging.getLogger(__name__)
 
+# Requests de IA ejecutándose a la vez
+MAX_CONCURRENT = int(os.getenv('AI_SCHEDULER_CONCURRENCY', 3))
+
+# Segundos de espera que equivalen a subir un nivel de prioridad
+AGING_INTERVAL = float(os.getenv('AI_SCHEDULER_AGING_INTERVAL', 5))
+
+# Esperas recientes por prioridad usadas para los percentiles
+WAIT_WINDOW = 200
+
+
 class Priority(IntEnum):
     """Niveles de prioridad para requests"""
     CRITICAL = 0   # Análisis Inteligente de eventos (event-insight)
@@ -19,93 +40,257 @@ class Priority(IntEnum):
     LOW = 3        # Comentarios de Sofia/Juan
     BACKGROUND = 4 # Tareas background
 
-@dataclass(order=True)
+
+@dataclass
 class GeminiRequest:
     """Request a Gemini con prioridad"""
     priority: int
-    timestamp: float = field(default_factory=time.time)
-    prompt: str = field(compare=False)
-    request_id: str = field(compare=False)
-    callback: Optional[Any] = field(default=None, compare=False)
+    prompt: str
+    request_id: str
+    future: asyncio.Future
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    call: Optional[Callable[[], Awaitable[Any]]] = None
+    timestamp: float = field(default_factory=time.monotonic)
+
+    def effective_priority(self, now: float, aging_interval: float) -> int:
+        """Prioridad base menos un nivel por cada aging_interval esperado (mínimo CRITICAL)"""
+        if aging_interval <= 0:
+            return self.priority
+        return max(Priority.CRITICAL, self.priority - int((now - self.timestamp) // aging_interval))
+
+
+def _default_generate_fn() -> Callable[..., Awaitable[Optional[str]]]:
+    from services.ai_manager import AIServiceManager
+    return AIServiceManager().generate
+
 
 class GeminiPriorityQueue:
     """
     Cola de prioridad para requests a Gemini
     Garantiza que el Análisis Inteligente se procese primero
+
+    Uso:
+        queue = get_priority_queue()
+        response = await queue.submit(prompt, Priority.CRITICAL, temperature=0.7)
     """
-    def __init__(self, max_concurrent: int = 2):
-        self.queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
-        self.processing: Dict[str, bool] = {}
+    def __init__(
+        self,
+        max_concurrent: int = MAX_CONCURRENT,
+        generate_fn: Optional[Callable[..., Awaitable[Optional[str]]]] = None,
+        aging_interval: float = AGING_INTERVAL
+    ):
         self.max_concurrent = max_concurrent
-        self.active_requests = 0
-        self._lock = asyncio.Lock()
+        self.aging_interval = aging_interval
+        self._generate_fn = generate_fn
 
-    async def add_request(
+        # Una FIFO por nivel: dentro de un nivel la cabeza es la que más esperó
+        self._levels: Dict[int, Deque[GeminiRequest]] = {p.value: deque() for p in Priority}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._has_items: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._running: Dict[str, asyncio.Task] = {}
+        self._sequence = 0
+
+        self._stats: Dict[int, Dict[str, int]] = {
+            p.value: {'submitted': 0, 'completed': 0, 'failed': 0, 'cancelled': 0, 'aged': 0}
+            for p in Priority
+        }
+        self._waits: Dict[int, Deque[float]] = {p.value: deque(maxlen=WAIT_WINDOW) for p in Priority}
+
+    @property
+    def active_requests(self) -> int:
+        return len(self._running)
+
+    # ------------------------------------------------------------------ API
+
+    def submit(
         self,
         prompt: str,
         priority: Priority = Priority.NORMAL,
-        request_id: str = None
-    ) -> str:
+        request_id: Optional[str] = None,
+        **generate_kwargs
+    ) -> asyncio.Future:
         """
-        Agrega un request a la cola
-        Returns: request_id para tracking
+        Encola un prompt y devuelve un future con la respuesta (Optional[str])
+
+        generate_kwargs se pasan tal cual a la función de generación
+        (AIServiceManager.generate: temperature, cache_template, ...).
+        Cancelar el future cancela el request.
         """
+        return self._enqueue(priority, request_id, prompt=prompt, kwargs=generate_kwargs)
+
+    def submit_call(
+        self,
+        call: Callable[[], Awaitable[Any]],
+        priority: Priority = Priority.NORMAL,
+        request_id: Optional[str] = None
+    ) -> asyncio.Future:
+        """Como submit() pero ejecuta call() en el slot (lo usa AIServiceManager.generate)"""
+        return self._enqueue(priority, request_id, prompt='', call=call)
+
+    def _enqueue(
+        self,
+        priority: Priority,
+        request_id: Optional[str],
+        prompt: str,
+        kwargs: Optional[Dict[str, Any]] = None,
+        call: Optional[Callable[[], Awaitable[Any]]] = None
+    ) -> asyncio.Future:
+        self._ensure_started()
+        self._sequence += 1
         if request_id is None:
-            request_id = f"{priority.name}_{int(time.time() * 1000)}"
+            request_id = f"{Priority(priority).name}_{int(time.time() * 1000)}_{self._sequence}"
 
+        future = asyncio.get_running_loop().create_future()
         request = GeminiRequest(
-            priority=priority.value,
+            priority=int(priority),
             prompt=prompt,
-            request_id=request_id
+            request_id=request_id,
+            future=future,
+            kwargs=kwargs or {},
+            call=call
         )
+        future.add_done_callback(lambda f, rid=request_id: self._on_future_done(rid, f))
 
-        await self.queue.put(request)
-        logger.info(f"📥 Request agregado: {request_id} (Priority: {priority.name}, Queue size: {self.queue.qsize()})")
+        self._levels[request.priority].append(request)
+        self._stats[request.priority]['submitted'] += 1
+        self._has_items.set()
+        logger.info(f"📥 Request agregado: {request_id} (Priority: {Priority(priority).name}, Queue size: {self.queue_size()})")
+        return future
 
-        return request_id
-
-    async def process_queue(self, gemini_model):
+    async def add_request(
+        self,
+        prompt: str,
+        priority: Priority = Priority.NORMAL,
+        request_id: str = None
+    ) -> str:
         """
-        Procesa requests de la cola respetando prioridades
+        Agrega un request a la cola (compatibilidad)
+        Returns: request_id para tracking
         """
-        while True:
-            try:
-                # Esperar si ya hay demasiados requests concurrentes
-                async with self._lock:
-                    if self.active_requests >= self.max_concurrent:
-                        await asyncio.sleep(0.1)
-                        continue
+        self._sequence += 1
+        request_id = request_id or f"{priority.name}_{int(time.time() * 1000)}_{self._sequence}"
+        future = self.submit(prompt, priority, request_id)
+        # Nadie espera este future: consumir la excepción para que no quede sin recuperar
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        return request_id
 
-                    self.active_requests += 1
+    def cancel(self, request_id: str) -> bool:
+        """Cancela un request encolado o en ejecución"""
+        for level in self._levels.values():
+            for request in level:
+                if request.request_id == request_id:
+                    return request.future.cancel()
+        task = self._running.get(request_id)
+        return task.cancel() if task is not None else False
 
-                # Obtener el request de mayor prioridad
-                request: GeminiRequest = await self.queue.get()
+    def queue_size(self) -> int:
+        return sum(len(level) for level in self._levels.values())
 
-                logger.info(f"⚡ Procesando: {request.request_id} (Priority: {Priority(request.priority).name})")
+    # ------------------------------------------------------------------ internals
 
-                try:
-                    # Procesar con Gemini
-                    response = await asyncio.to_thread(
-                        gemini_model.generate_content,
-                        request.prompt
-                    )
+    def _ensure_started(self):
+        if self._dispatcher is None or self._dispatcher.done():
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+            self._has_items = asyncio.Event()
+            self._dispatcher = asyncio.create_task(self._dispatch_loop())
+
+    def _on_future_done(self, request_id: str, future: asyncio.Future):
+        if not future.cancelled():
+            return
+        # Cancelado por el que lo pidió: si ya corría, cortar la ejecución
+        task = self._running.get(request_id)
+        if task is not None:
+            task.cancel()
+
+    def _pop_next(self) -> Optional[GeminiRequest]:
+        """Cabeza de nivel con mejor prioridad efectiva; empate → base más alta, luego la más vieja"""
+        now = time.monotonic()
+        best_level = None
+        best_key = None
+        for level, requests in self._levels.items():
+            while requests and requests[0].future.done():
+                # Cancelado mientras esperaba
+                cancelled = requests.popleft()
+                self._stats[cancelled.priority]['cancelled'] += 1
+            if not requests:
+                continue
+            head = requests[0]
+            key = (head.effective_priority(now, self.aging_interval), head.priority, head.timestamp)
+            if best_key is None or key < best_key:
+                best_key, best_level = key, level
+
+        if best_level is None:
+            return None
+        request = self._levels[best_level].popleft()
+        if best_key[0] < request.priority:
+            self._stats[request.priority]['aged'] += 1
+        return request
+
+    async def _dispatch_loop(self):
+        """Toma un slot del semáforo y recién entonces elige el próximo request"""
+        while True:
+            await self._semaphore.acquire()
+            request = self._pop_next()
+            while request is None:
+                self._has_items.clear()
+                await self._has_items.wait()
+                request = self._pop_next()
 
-                    logger.info(f"✅ Completado: {request.request_id}")
+            self._waits[request.priority].append(time.monotonic() - request.timestamp)
+            task = asyncio.create_task(self._execute(request))
+            self._running[request.request_id] = task
 
-                    # Marcar como completado
-                    self.processing[request.request_id] = True
+    async def _execute(self, request: GeminiRequest):
+        logger.info(f"⚡ Procesando: {request.request_id} (Priority: {Priority(request.priority).name})")
+        stats = self._stats[request.priority]
+        try:
+            if request.call is not None:
+                response = await request.call()
+            else:
+                generate_fn = self._generate_fn or _default_generate_fn()
+                response = await generate_fn(request.prompt, **request.kwargs)
+            if not request.future.done():
+                request.future.set_result(response)
+            stats['completed'] += 1
+            logger.info(f"✅ Completado: {request.request_id}")
+        except asyncio.CancelledError:
+            stats['cancelled'] += 1
+            if not request.future.done():
+                request.future.cancel()
+        except Exception as e:
+            stats['failed'] += 1
+            logger.error(f"❌ Error procesando {request.request_id}: {e}")
+            if not request.future.done():
+                request.future.set_exception(e)
+        finally:
+            self._running.pop(request.request_id, None)
+            self._semaphore.release()
 
-                except Exception as e:
-                    logger.error(f"❌ Error procesando {request.request_id}: {e}")
+    # ------------------------------------------------------------------ métricas
 
-                finally:
-                    async with self._lock:
-                        self.active_requests -= 1
-                    self.queue.task_done()
+    def get_metrics(self) -> Dict[str, Any]:
+        """📊 Profundidad de cola, esperas y resultados por prioridad"""
+        now = time.monotonic()
+        priorities = {}
+        for priority in Priority:
+            waits = sorted(self._waits[priority.value])
+            queued = self._levels[priority.value]
+            priorities[priority.name] = {
+                **self._stats[priority.value],
+                'queue_depth': len(queued),
+                'oldest_waiting_s': round(now - queued[0].timestamp, 3) if queued else 0.0,
+                'wait_avg_s': round(sum(waits) / len(waits), 3) if waits else 0.0,
+                'wait_p95_s': round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 3) if waits else 0.0,
+            }
+        return {
+            'max_concurrent': self.max_concurrent,
+            'active_requests': self.active_requests,
+            'queue_size': self.queue_size(),
+            'aging_interval_s': self.aging_interval,
+            'priorities': priorities,
+        }
 
-            except Exception as e:
-                logger.error(f"Error en process_queue: {e}")
-                await asyncio.sleep(1)
 
 # Singleton global
 _queue_instance: Optional[GeminiPriorityQueue] = None
@@ -114,5 +299,5 @@ def get_priority_queue() -> GeminiPriorityQueue:
     """Obtiene la instancia singleton de la cola"""
     global _queue_instance
     if _queue_instance is None:
-        _queue_instance = GeminiPriorityQueue(max_concurrent=3)
+        _queue_instance = GeminiPriorityQueue()
     return _queue_instance
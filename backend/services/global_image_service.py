@@ -3,16 +3,193 @@
 Servicio para obtener imágenes de calidad para eventos sin imágenes o con imágenes pobres
 """
 
-import asyncio
-import aiohttp
 import logging
+import os
 import re
 import hashlib
-from typing import Optional, Dict, Any, List
-from urllib.parse import urljoin, quote_plus
+import sys
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Límites de la caché LRU de imágenes generadas (entradas y bytes aproximados)
+CACHE_MAX_ENTRIES = int(os.getenv('GLOBAL_IMAGE_CACHE_MAX_ENTRIES', 5000))
+CACHE_MAX_BYTES = int(os.getenv('GLOBAL_IMAGE_CACHE_MAX_BYTES', 4 * 1024 * 1024))
+
+# ============================================================================
+# 🔎 REGLAS PRECOMPILADAS (se construyen una sola vez al importar el módulo)
+# ============================================================================
+
+BAD_IMAGE_PATTERNS = (
+    'placeholder', 'default', 'avatar', 'profile',
+    'logo', 'icon', 'thumb', 'small', '50x50', '100x100',
+    'no-image', 'missing', 'blank', 'empty'
+)
+VALID_IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif')
+TRUSTED_IMAGE_HOSTS = ('unsplash', 'pexels')
+
+
+def _alternation(words) -> str:
+    """Alternancia regex de literales, los más largos primero"""
+    return '|'.join(re.escape(w) for w in sorted(set(words), key=len, reverse=True))
+
+
+_BAD_IMAGE_RE = re.compile(_alternation(BAD_IMAGE_PATTERNS))
+_GOOD_IMAGE_RE = re.compile(_alternation(VALID_IMAGE_EXTENSIONS + TRUSTED_IMAGE_HOSTS))
+_WIDTH_RE = re.compile(r'w[idth]*=(\d+)')
+
+# Mapeo de categorías comunes (español/inglés) a la categoría de imagen
+CATEGORY_MAPPING = {
+    'música': 'music', 'musica': 'music', 'concierto': 'music',
+    'deportes': 'sports', 'deporte': 'sports', 'futbol': 'sports',
+    'cultura': 'cultural', 'cultural': 'cultural', 'arte': 'cultural',
+    'tecnología': 'tech', 'tecnologia': 'tech', 'tech': 'tech',
+    'gastronomía': 'food', 'gastronomia': 'food', 'comida': 'food',
+    'teatro': 'theater', 'obra': 'theater', 'espectáculo': 'theater',
+    'fiesta': 'party', 'party': 'party', 'celebración': 'party',
+    'negocio': 'business', 'empresarial': 'business', 'conferencia': 'business',
+    'educación': 'education', 'educacion': 'education', 'curso': 'education'
+}
+
+# Indicadores de contenido → tema específico (el orden desempata igual que antes)
+THEME_INDICATORS = {
+    "wine": ["vino", "wine", "bodega", "winery", "malbec", "degustación", "vineyard", "maridaje", "cata"],
+    "concert": ["concierto", "concert", "música", "music", "band", "festival", "rock", "jazz", "pop", "live"],
+    "food": ["gastronom", "comida", "food", "restaurant", "cocina", "chef", "degustación", "culinar"],
+    "sports": ["deporte", "sport", "fútbol", "football", "tennis", "basketball", "stadium", "match"],
+    "cultural": ["cultural", "arte", "art", "museo", "museum", "exposición", "gallery", "teatro"],
+    "business": ["business", "empresa", "conference", "networking", "workshop", "seminario", "corporate"],
+    "outdoor": ["outdoor", "aire libre", "parque", "park", "hiking", "camping", "nature", "aventura"],
+    "party": ["fiesta", "party", "celebración", "celebration", "baile", "dance", "nightlife"],
+    "tech": ["tech", "technology", "startup", "digital", "innovation", "hackathon", "coding", "software"],
+    "theater": ["teatro", "theater", "obra", "drama", "performance", "espectáculo", "musical"]
+}
+
+_THEMES: Tuple[str, ...] = tuple(THEME_INDICATORS)
+
+# Tabla plana keyword → índices de tema: cada keyword compartida se busca una sola vez
+_THEME_KEYWORDS: Tuple[Tuple[str, Tuple[int, ...]], ...] = tuple(
+    (keyword, tuple(i for i, theme in enumerate(_THEMES) if keyword in THEME_INDICATORS[theme]))
+    for keyword in dict.fromkeys(k for keywords in THEME_INDICATORS.values() for k in keywords)
+)
+
+# Una keyword sin espacios aparece en el contenido sii aparece dentro de alguno de
+# sus tokens, así que las coincidencias se indexan por token (el vocabulario de
+# títulos/venues se repite mucho entre eventos). El puntaje exacto necesita contar
+# keywords solapadas ("art" dentro de "party"), cosa que un regex único no hace.
+_TOKEN_KEYWORD_IDS = tuple(i for i, (k, _) in enumerate(_THEME_KEYWORDS) if not any(c.isspace() for c in k))
+_SPACED_KEYWORD_IDS = tuple(i for i, (k, _) in enumerate(_THEME_KEYWORDS) if any(c.isspace() for c in k))
+TOKEN_MEMO_MAX = int(os.getenv('GLOBAL_IMAGE_TOKEN_MEMO_MAX', 50000))
+_token_keyword_hits: Dict[str, Tuple[int, ...]] = {}
+
+
+def theme_scores(content: str) -> List[int]:
+    """Puntaje por tema (orden de THEME_INDICATORS): keywords distintas presentes en `content`"""
+    found = set()
+    memo = _token_keyword_hits
+    for token in set(content.split()):
+        hits = memo.get(token)
+        if hits is None:
+            hits = tuple(i for i in _TOKEN_KEYWORD_IDS if _THEME_KEYWORDS[i][0] in token)
+            if len(memo) >= TOKEN_MEMO_MAX:
+                memo.clear()
+            memo[token] = hits
+        if hits:
+            found.update(hits)
+    for i in _SPACED_KEYWORD_IDS:
+        if _THEME_KEYWORDS[i][0] in content:
+            found.add(i)
+
+    scores = [0] * len(_THEMES)
+    for i in found:
+        for theme_index in _THEME_KEYWORDS[i][1]:
+            scores[theme_index] += 1
+    return scores
+
+# Colección de IDs de fotos de Unsplash de alta calidad por tema específico
+THEME_PHOTO_COLLECTIONS = {
+    "wine": [
+        "1506485338023-6ce5f36692df",  # Wine tasting
+        "1551218808-419d4f39d7e8",     # Vineyard landscape  
+        "1504674900406-8394e5e3e9b4",  # Wine glasses
+        "1560472354-b33ff0c44a43",     # Wine barrels
+        "1574269909862-7e1d70841ce6"   # Wine bottles
+    ],
+    "concert": [
+        "1514525253161-7a46d19cd819",  # Concert crowd
+        "1493225457124-a3eb161ffa5f",  # Live performance
+        "1506905925346-21bea4d5618d",  # Music stage
+        "1518611012118-696072aa579a",  # Music festival
+        "1571019613454-1cb2f99b2d8b"   # Guitar performance
+    ],
+    "food": [
+        "1555939594-f7405c7ecaed",     # Gourmet plating
+        "1504674900406-8394e5e3e9b4",  # Fine dining
+        "1551218808-419d4f39d7e8",     # Food presentation
+        "1565958011703-00e083a8b7e2",  # Restaurant atmosphere
+        "1546833999-b9fcbecd74dd"      # Culinary art
+    ],
+    "sports": [
+        "1551698618-1dfe5d97a563",     # Stadium view
+        "1577212014992-8f598e5e9b30",  # Sports action
+        "1461896836934-ffe607ba8211",  # Athletic event
+        "1571019613454-1cb2f99b2d8b",  # Team sports
+        "1606107688070-b7f7c9e8f9c5"   # Sports fans
+    ],
+    "cultural": [
+        "1518998053901-5348d3961a04",  # Art gallery
+        "1507003211169-0a1dd7228f2d",  # Museum interior
+        "1578662996442-48f60103fc96",  # Cultural exhibition
+        "1544947950-5b1c4b0d6b8d",     # Art installation
+        "1518611012118-696072aa579a"   # Cultural event
+    ],
+    "business": [
+        "1552664730-d307ca884978",     # Business meeting
+        "1531482615713-2afd69097998",  # Conference room
+        "1542626991-22e93d36c9d8",     # Professional networking
+        "1517245386807-bb43f82c33c4",  # Corporate event
+        "1523240795612-9a054b0db644"   # Business seminar
+    ],
+    "outdoor": [
+        "1441974231531-c6227db76b6e",  # Outdoor activity
+        "1506905925346-21bea4d5618d",  # Park gathering
+        "1571019613454-1cb2f99b2d8b",  # Adventure sports
+        "1544947950-5b1c4b0d6b8d",     # Nature event
+        "1560472354-b33ff0c44a43"      # Outdoor festival
+    ],
+    "party": [
+        "1530103862676-de2619d7c022",  # Party celebration
+        "1492684223066-81342ee5ff30",  # Social gathering
+        "1516450360452-9312f5e86fc7",  # Nightlife
+        "1518611012118-696072aa579a",  # Dance event
+        "1571019613454-1cb2f99b2d8b"   # Celebration
+    ],
+    "tech": [
+        "1517077304055-6e89abbcd4df",  # Tech conference
+        "1531482615713-2afd69097998",  # Innovation event
+        "1542626991-22e93d36c9d8",     # Tech networking
+        "1523240795612-9a054b0db644",  # Digital workshop
+        "1517245386807-bb43f82c33c4"   # Startup event
+    ],
+    "theater": [
+        "1507003211169-0a1dd7228f2d",  # Theater stage
+        "1518998053901-5348d3961a04",  # Performance venue
+        "1544947950-5b1c4b0d6b8d",     # Theater interior
+        "1578662996442-48f60103fc96",  # Dramatic performance
+        "1506905925346-21bea4d5618d"   # Live theater
+    ],
+    "default": [
+        "1492684223066-81342ee5ff30",  # General event
+        "1530103862676-de2619d7c022",  # Social gathering
+        "1514525253161-7a46d19cd819",  # Community event
+        "1518611012118-696072aa579a",  # Celebration
+        "1506905925346-21bea4d5618d"   # Group activity
+    ]
+}
+
+
+
 class GlobalImageService:
     """
     🎨 Servicio global de imágenes para eventos
@@ -21,11 +198,19 @@ class GlobalImageService:
     - Genera imágenes usando APIs gratuitas (Unsplash, Pexels, etc.)
     - Mejora imágenes de baja resolución
     - Fallbacks inteligentes por categoría y ubicación
-    - Cache de imágenes generadas
+    - Cache LRU acotada de imágenes generadas (entradas y bytes)
     """
     
-    def __init__(self):
-        self.cache = {}  # Cache simple en memoria
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES):
+        # Cache LRU acotada por entradas y por bytes aproximados
+        self.cache: "OrderedDict[str, str]" = OrderedDict()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._cache_bytes = 0
+        self._stats = {
+            'hits': 0, 'misses': 0, 'evictions': 0,
+            'batches': 0, 'batch_events': 0, 'batch_improved': 0,
+        }
         
         # APIs gratuitas para imágenes (sin key requerida)
         self.image_apis = {
@@ -75,29 +260,20 @@ class GlobalImageService:
         if not image_url or image_url.strip() == '':
             return False
             
-        # Filtrar imágenes genéricas o de baja calidad
-        bad_patterns = [
-            'placeholder', 'default', 'avatar', 'profile',
-            'logo', 'icon', 'thumb', 'small', '50x50', '100x100',
-            'no-image', 'missing', 'blank', 'empty'
-        ]
-        
         url_lower = image_url.lower()
-        for pattern in bad_patterns:
-            if pattern in url_lower:
-                return False
-        
-        # Verificar que tenga una extensión de imagen válida
-        valid_extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif']
-        has_valid_ext = any(ext in url_lower for ext in valid_extensions)
+
+        # Filtrar imágenes genéricas o de baja calidad
+        if _BAD_IMAGE_RE.search(url_lower):
+            return False
         
         # Si tiene parámetros de tamaño, verificar que no sea muy pequeña
         if 'w=' in url_lower or 'width=' in url_lower:
-            width_match = re.search(r'w[idth]*=(\d+)', url_lower)
+            width_match = _WIDTH_RE.search(url_lower)
             if width_match and int(width_match.group(1)) < 200:
                 return False
         
-        return has_valid_ext or 'unsplash' in url_lower or 'pexels' in url_lower
+        # Extensión de imagen válida o banco de imágenes conocido
+        return _GOOD_IMAGE_RE.search(url_lower) is not None
 
     def normalize_category(self, category: Optional[str]) -> str:
         """
@@ -113,21 +289,7 @@ class GlobalImageService:
             return 'default'
             
         category_lower = category.lower()
-        
-        # Mapeo de categorías comunes
-        category_mapping = {
-            'música': 'music', 'musica': 'music', 'concierto': 'music',
-            'deportes': 'sports', 'deporte': 'sports', 'futbol': 'sports',
-            'cultura': 'cultural', 'cultural': 'cultural', 'arte': 'cultural',
-            'tecnología': 'tech', 'tecnologia': 'tech', 'tech': 'tech',
-            'gastronomía': 'food', 'gastronomia': 'food', 'comida': 'food',
-            'teatro': 'theater', 'obra': 'theater', 'espectáculo': 'theater',
-            'fiesta': 'party', 'party': 'party', 'celebración': 'party',
-            'negocio': 'business', 'empresarial': 'business', 'conferencia': 'business',
-            'educación': 'education', 'educacion': 'education', 'curso': 'education'
-        }
-        
-        return category_mapping.get(category_lower, category_lower if category_lower in self.category_keywords else 'default')
+        return CATEGORY_MAPPING.get(category_lower, category_lower if category_lower in self.category_keywords else 'default')
 
     def get_event_image(self, title: str, category: Optional[str] = None, venue: Optional[str] = None, country: Optional[str] = None, description: Optional[str] = None) -> str:
         """
@@ -144,29 +306,81 @@ class GlobalImageService:
             str: URL de imagen apropiada basada en contenido
         """
         try:
-            # Crear cache key único incluyendo descripción
-            cache_key = hashlib.md5(f"{title}_{category}_{venue}_{description}".encode()).hexdigest()
-            
-            if cache_key in self.cache:
-                return self.cache[cache_key]
-            
-            # Analizar contenido completo del evento
-            full_content = f"{title} {description or ''} {venue or ''}".lower()
-            
-            # Determinar tema específico basado en análisis de contenido
-            specific_theme = self._analyze_event_content(full_content, category)
-            
-            # Generar imagen contextual basada en tema específico
-            contextual_image = self._generate_contextual_image(title, specific_theme, full_content)
-            
-            self.cache[cache_key] = contextual_image
-            logger.info(f"🎯 Contextual image for '{title[:40]}...': theme={specific_theme}")
-            return contextual_image
-            
+            return self._resolve_image(self.cache_key(title, category, venue, description),
+                                       title, category, venue, description)
         except Exception as e:
             logger.warning(f"⚠️ Error getting image for '{title}': {e}")
             return self.default_images.get('default')
 
+    # ------------------------------------------------------------------ caché LRU
+
+    @staticmethod
+    def cache_key(title: str, category: Optional[str], venue: Optional[str], description: Optional[str]) -> str:
+        """Cache key único incluyendo descripción (md5 acota el tamaño de la clave)"""
+        return hashlib.md5(f"{title}_{category}_{venue}_{description}".encode()).hexdigest()
+
+    @staticmethod
+    def _entry_size(key: str, value: str) -> int:
+        return sys.getsizeof(key) + sys.getsizeof(value)
+
+    def _cache_get(self, key: str) -> Optional[str]:
+        value = self.cache.get(key)
+        if value is None:
+            self._stats['misses'] += 1
+            return None
+        self.cache.move_to_end(key)
+        self._stats['hits'] += 1
+        return value
+
+    def _cache_put(self, key: str, value: str):
+        previous = self.cache.pop(key, None)
+        if previous is not None:
+            self._cache_bytes -= self._entry_size(key, previous)
+        self.cache[key] = value
+        self._cache_bytes += self._entry_size(key, value)
+        while self.cache and (len(self.cache) > self.max_entries or self._cache_bytes > self.max_bytes):
+            old_key, old_value = self.cache.popitem(last=False)
+            self._cache_bytes -= self._entry_size(old_key, old_value)
+            self._stats['evictions'] += 1
+
+    def clear_cache(self) -> int:
+        """Vacía la caché y devuelve cuántas entradas tenía"""
+        count = len(self.cache)
+        self.cache.clear()
+        self._cache_bytes = 0
+        return count
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self._stats['hits'] + self._stats['misses']
+        return {
+            **self._stats,
+            'hit_rate': round(self._stats['hits'] / lookups, 3) if lookups else 0.0,
+            'entries': len(self.cache),
+            'max_entries': self.max_entries,
+            'bytes': self._cache_bytes,
+            'max_bytes': self.max_bytes,
+        }
+
+    def _resolve_image(self, cache_key: str, title: str, category: Optional[str],
+                       venue: Optional[str], description: Optional[str]) -> str:
+        """Imagen contextual para un evento, pasando por la caché LRU"""
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
+        # Analizar contenido completo del evento
+        full_content = f"{title} {description or ''} {venue or ''}".lower()
+        
+        # Determinar tema específico basado en análisis de contenido
+        specific_theme = self._analyze_event_content(full_content, category)
+        
+        # Generar imagen contextual basada en tema específico
+        contextual_image = self._generate_contextual_image(title, specific_theme, full_content)
+        
+        self._cache_put(cache_key, contextual_image)
+        logger.debug(f"🎯 Contextual image for '{title[:40]}...': theme={specific_theme}")
+        return contextual_image
+
     def _get_specific_image(self, title: str, category: str) -> Optional[str]:
         """
         🎯 Obtiene imagen específica basada en título del evento
@@ -230,30 +444,13 @@ class GlobalImageService:
         Returns:
             str: Tema específico determinado del análisis
         """
-        # Definir indicadores específicos con sus temas correspondientes
-        theme_indicators = {
-            "wine": ["vino", "wine", "bodega", "winery", "malbec", "degustación", "vineyard", "maridaje", "cata"],
-            "concert": ["concierto", "concert", "música", "music", "band", "festival", "rock", "jazz", "pop", "live"],
-            "food": ["gastronom", "comida", "food", "restaurant", "cocina", "chef", "degustación", "culinar"],
-            "sports": ["deporte", "sport", "fútbol", "football", "tennis", "basketball", "stadium", "match"],
-            "cultural": ["cultural", "arte", "art", "museo", "museum", "exposición", "gallery", "teatro"],
-            "business": ["business", "empresa", "conference", "networking", "workshop", "seminario", "corporate"],
-            "outdoor": ["outdoor", "aire libre", "parque", "park", "hiking", "camping", "nature", "aventura"],
-            "party": ["fiesta", "party", "celebración", "celebration", "baile", "dance", "nightlife"],
-            "tech": ["tech", "technology", "startup", "digital", "innovation", "hackathon", "coding", "software"],
-            "theater": ["teatro", "theater", "obra", "drama", "performance", "espectáculo", "musical"]
-        }
-        
         # Contar coincidencias para cada tema
-        theme_scores = {}
-        for theme, keywords in theme_indicators.items():
-            score = sum(1 for keyword in keywords if keyword in content)
-            if score > 0:
-                theme_scores[theme] = score
+        scores = theme_scores(content)
         
-        # Si hay coincidencias específicas, usar el tema con mayor score
-        if theme_scores:
-            best_theme = max(theme_scores, key=theme_scores.get)
+        # Si hay coincidencias específicas, usar el tema con mayor score (el primero si empatan)
+        best_score = max(scores)
+        if best_score > 0:
+            best_theme = _THEMES[scores.index(best_score)]
             logger.debug(f"🧠 Content analysis: '{content[:50]}...' → theme: {best_theme}")
             return best_theme
         
@@ -274,89 +471,8 @@ class GlobalImageService:
         Returns:
             str: URL de imagen contextual
         """
-        # Colección de IDs de fotos de Unsplash de alta calidad por tema específico
-        theme_photo_collections = {
-            "wine": [
-                "1506485338023-6ce5f36692df",  # Wine tasting
-                "1551218808-419d4f39d7e8",     # Vineyard landscape  
-                "1504674900406-8394e5e3e9b4",  # Wine glasses
-                "1560472354-b33ff0c44a43",     # Wine barrels
-                "1574269909862-7e1d70841ce6"   # Wine bottles
-            ],
-            "concert": [
-                "1514525253161-7a46d19cd819",  # Concert crowd
-                "1493225457124-a3eb161ffa5f",  # Live performance
-                "1506905925346-21bea4d5618d",  # Music stage
-                "1518611012118-696072aa579a",  # Music festival
-                "1571019613454-1cb2f99b2d8b"   # Guitar performance
-            ],
-            "food": [
-                "1555939594-f7405c7ecaed",     # Gourmet plating
-                "1504674900406-8394e5e3e9b4",  # Fine dining
-                "1551218808-419d4f39d7e8",     # Food presentation
-                "1565958011703-00e083a8b7e2",  # Restaurant atmosphere
-                "1546833999-b9fcbecd74dd"      # Culinary art
-            ],
-            "sports": [
-                "1551698618-1dfe5d97a563",     # Stadium view
-                "1577212014992-8f598e5e9b30",  # Sports action
-                "1461896836934-ffe607ba8211",  # Athletic event
-                "1571019613454-1cb2f99b2d8b",  # Team sports
-                "1606107688070-b7f7c9e8f9c5"   # Sports fans
-            ],
-            "cultural": [
-                "1518998053901-5348d3961a04",  # Art gallery
-                "1507003211169-0a1dd7228f2d",  # Museum interior
-                "1578662996442-48f60103fc96",  # Cultural exhibition
-                "1544947950-5b1c4b0d6b8d",     # Art installation
-                "1518611012118-696072aa579a"   # Cultural event
-            ],
-            "business": [
-                "1552664730-d307ca884978",     # Business meeting
-                "1531482615713-2afd69097998",  # Conference room
-                "1542626991-22e93d36c9d8",     # Professional networking
-                "1517245386807-bb43f82c33c4",  # Corporate event
-                "1523240795612-9a054b0db644"   # Business seminar
-            ],
-            "outdoor": [
-                "1441974231531-c6227db76b6e",  # Outdoor activity
-                "1506905925346-21bea4d5618d",  # Park gathering
-                "1571019613454-1cb2f99b2d8b",  # Adventure sports
-                "1544947950-5b1c4b0d6b8d",     # Nature event
-                "1560472354-b33ff0c44a43"      # Outdoor festival
-            ],
-            "party": [
-                "1530103862676-de2619d7c022",  # Party celebration
-                "1492684223066-81342ee5ff30",  # Social gathering
-                "1516450360452-9312f5e86fc7",  # Nightlife
-                "1518611012118-696072aa579a",  # Dance event
-                "1571019613454-1cb2f99b2d8b"   # Celebration
-            ],
-            "tech": [
-                "1517077304055-6e89abbcd4df",  # Tech conference
-                "1531482615713-2afd69097998",  # Innovation event
-                "1542626991-22e93d36c9d8",     # Tech networking
-                "1523240795612-9a054b0db644",  # Digital workshop
-                "1517245386807-bb43f82c33c4"   # Startup event
-            ],
-            "theater": [
-                "1507003211169-0a1dd7228f2d",  # Theater stage
-                "1518998053901-5348d3961a04",  # Performance venue
-                "1544947950-5b1c4b0d6b8d",     # Theater interior
-                "1578662996442-48f60103fc96",  # Dramatic performance
-                "1506905925346-21bea4d5618d"   # Live theater
-            ],
-            "default": [
-                "1492684223066-81342ee5ff30",  # General event
-                "1530103862676-de2619d7c022",  # Social gathering
-                "1514525253161-7a46d19cd819",  # Community event
-                "1518611012118-696072aa579a",  # Celebration
-                "1506905925346-21bea4d5618d"   # Group activity
-            ]
-        }
-        
         # Obtener colección de fotos para el tema
-        photo_ids = theme_photo_collections.get(theme, theme_photo_collections["default"])
+        photo_ids = THEME_PHOTO_COLLECTIONS.get(theme, THEME_PHOTO_COLLECTIONS["default"])
         
         # Seleccionar foto específica basada en hash del título para consistencia
         title_hash = abs(hash(title.lower())) % len(photo_ids)
@@ -378,38 +494,53 @@ class GlobalImageService:
         Returns:
             List[Dict[str, Any]]: Eventos con imágenes mejoradas
         """
-        improved_events = []
+        # Un solo recorrido: la calidad se evalúa una vez por URL distinta y la
+        # imagen contextual una vez por cache key distinta dentro del lote
+        quality: Dict[Any, bool] = {}
+        resolved: Dict[str, str] = {}
+        total_improved = 0
         
         for event in events:
             try:
                 current_image = event.get('image_url', '')
+                is_good = quality.get(current_image)
+                if is_good is None:
+                    is_good = quality[current_image] = self.is_good_image(current_image)
                 
-                # Si la imagen actual no es buena, generar una mejor
-                if not self.is_good_image(current_image):
-                    better_image = self.get_event_image(
-                        title=event.get('title', ''),
-                        category=event.get('category', ''),
-                        venue=event.get('venue_name', ''),
-                        country=event.get('country', ''),
-                        description=event.get('description', '')
-                    )
-                    
-                    event['image_url'] = better_image
-                    event['image_improved'] = True
-                    logger.info(f"🔧 Improved image for: {event.get('title', 'Unknown')[:50]}...")
-                else:
+                if is_good:
                     event['image_improved'] = False
+                    continue
+                
+                # Si la imagen actual no es buena, generar una mejor
+                title = event.get('title', '')
+                category = event.get('category', '')
+                venue = event.get('venue_name', '')
+                description = event.get('description', '')
+                cache_key = self.cache_key(title, category, venue, description)
+                
+                better_image = resolved.get(cache_key)
+                if better_image is None:
+                    try:
+                        better_image = self._resolve_image(cache_key, title, category, venue, description)
+                    except Exception as e:
+                        logger.warning(f"⚠️ Error getting image for '{title}': {e}")
+                        better_image = self.default_images.get('default')
+                    resolved[cache_key] = better_image
                 
-                improved_events.append(event)
+                event['image_url'] = better_image
+                event['image_improved'] = True
+                total_improved += 1
                 
             except Exception as e:
                 logger.warning(f"⚠️ Error improving image for event: {e}")
-                improved_events.append(event)
         
-        total_improved = sum(1 for e in improved_events if e.get('image_improved', False))
-        logger.info(f"🖼️ Image service: {total_improved}/{len(events)} events improved")
+        self._stats['batches'] += 1
+        self._stats['batch_events'] += len(events)
+        self._stats['batch_improved'] += total_improved
+        logger.info(f"🖼️ Image service: {total_improved}/{len(events)} events improved "
+                    f"({len(resolved)} distinct images generated)")
         
-        return improved_events
+        return list(events)
 
 # Singleton global
 global_image_service = GlobalImageService()
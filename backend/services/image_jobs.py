@@ -0,0 +1,659 @@
+"""
+🖼️ IMAGE JOBS - Jobs persistentes y reanudables de actualización masiva de imágenes
+/api/events/bulk-update-images-stream lanzaba una task por evento (tope 50), abría
+una conexión MySQL por evento y perdía todo si el cliente se desconectaba.
+
+Cada actualización masiva es ahora un job con id persistente (data/cache/image_jobs.sqlite3):
+- Los eventos del job se guardan como items en SQLite y se leen por páginas: un job
+  de decenas de miles de eventos nunca está entero en memoria
+- Pool de workers configurable (IMAGE_JOB_WORKERS) sobre image_resolver, que ya
+  limita concurrencia y ritmo por host upstream
+- Los UPDATE a MySQL se agrupan en lotes (IMAGE_JOB_BATCH_SIZE, una conexión y un
+  commit por lote) junto con el estado de los items en SQLite
+- El job corre aparte del stream SSE: si el cliente se desconecta sigue corriendo, y
+  GET /api/image-jobs/{job_id}/stream?after=N se vuelve a enganchar desde el último
+  resultado visto (cada resultado tiene un número de progreso = id del evento SSE)
+- Reanudable: un job interrumpido (reinicio del proceso) retoma sus items pendientes,
+  y los eventos ya resueltos en corridas anteriores se marcan omitidos sin buscar
+
+Uso (CLI):
+    python -m services.image_jobs --city "Buenos Aires"      # eventos sin imagen de la DB
+    python -m services.image_jobs --resume <job_id>
+    python -m services.image_jobs --list
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+import uuid
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+JOBS_DB = os.getenv(
+    'IMAGE_JOBS_DB',
+    os.path.join(os.path.dirname(__file__), '..', 'data', 'cache', 'image_jobs.sqlite3')
+)
+
+# Workers simultáneos por job (el límite por host lo pone image_resolver)
+WORKERS = int(os.getenv('IMAGE_JOB_WORKERS', 5))
+# Tope del pool: 'workers' llega en el body del request
+MAX_WORKERS = int(os.getenv('IMAGE_JOB_MAX_WORKERS', 20))
+
+# Un evento que solo dio placeholder vuelve a buscarse pasado el TTL de misses del resolver
+MISS_TTL = int(os.getenv('IMAGE_RESOLVER_MISS_TTL', 86400))
+
+# Resultados por lote de UPDATE y espera máxima antes de escribir un lote incompleto
+BATCH_SIZE = int(os.getenv('IMAGE_JOB_BATCH_SIZE', 50))
+FLUSH_INTERVAL = float(os.getenv('IMAGE_JOB_FLUSH_INTERVAL', 2))
+
+# Items por página al encolar y al leer pendientes
+PAGE_SIZE = 500
+
+# Cada cuánto un stream revisa el job si no recibió aviso (jobs de otro worker)
+STREAM_POLL_SECONDS = 1.0
+
+# Un job 'running' sin avances en este tiempo y sin task en este proceso quedó
+# huérfano (reinicio): el stream lo marca interrumpido para que se pueda reanudar
+STALE_AFTER_SECONDS = 120
+
+PENDING = 'pending'
+UPDATED = 'updated'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_INTERRUPTED = 'interrupted'
+JOB_FAILED = 'failed'
+
+PLACEHOLDER_PATTERNS = (
+    'unsplash', 'placeholder', 'lorem', 'picsum', 'via.placeholder',
+    'placehold', 'dummyimage', 'fakeimg', 'lorempixel'
+)
+
+EVENT_FIELDS = ('id', 'title', 'venue_name', 'city', 'description', 'image_url')
+
+# UPDATE por título normalizado (eventos que llegan del frontend sin id de la DB)
+_TITLE_UPDATE = '''
+    UPDATE events
+    SET image_url = %s
+    WHERE LOWER(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(
+        title, 'á', 'a'), 'é', 'e'), 'í', 'i'), 'ó', 'o'), 'ú', 'u'),
+        'Á', 'A'), 'É', 'E'), 'Í', 'I'), 'Ó', 'O'), 'Ú', 'U'))
+    LIKE LOWER(%s)
+'''
+
+
+def _strip_accents(text: str) -> str:
+    return ''.join(c for c in unicodedata.normalize('NFD', text) if unicodedata.category(c) != 'Mn')
+
+
+def is_placeholder(image_url: Optional[str]) -> bool:
+    url = (image_url or '').lower()
+    return any(pattern in url for pattern in PLACEHOLDER_PATTERNS)
+
+
+def decide(current_image: Optional[str], image_url: Optional[str]) -> Tuple[str, str]:
+    """
+    (estado, motivo) para una imagen encontrada, con las reglas del stream original:
+    nunca empeorar una imagen real con un placeholder ni reescribir la misma URL
+    """
+    if not image_url or 'gstatic' in image_url:
+        return FAILED, 'not_found'
+    if is_placeholder(image_url):
+        # placeholder → placeholder no mejora; real → placeholder empeoraría
+        return SKIPPED, 'placeholder'
+    if current_image == image_url:
+        return SKIPPED, 'same_image'
+    return UPDATED, 'placeholder_replaced' if is_placeholder(current_image) else 'image_changed'
+
+
+def event_key(event: Dict[str, Any]) -> str:
+    """Identidad del evento entre jobs: id de la DB o título normalizado"""
+    if event.get('id'):
+        return f"id:{event['id']}"
+    return 'title:' + ' '.join(_strip_accents(event.get('title') or '').lower().split())
+
+
+def render_sse(message: Dict[str, Any]) -> str:
+    """Arma el texto SSE (event:/id:/data:) de un mensaje de stream()"""
+    lines = [f"event: {message['event']}"]
+    if 'id' in message:
+        lines.append(f"id: {message['id']}")
+    lines.extend(f"data: {line}" for line in message['data'].splitlines() or [''])
+    return '\n'.join(lines) + '\n\n'
+
+
+def _mysql_connect():
+    import pymysql
+
+    return pymysql.connect(
+        host=os.getenv('MYSQL_HOST', 'localhost'),
+        port=int(os.getenv('MYSQL_PORT', 3306)),
+        user=os.getenv('MYSQL_USER', 'root'),
+        password=os.getenv('MYSQL_PASSWORD', ''),
+        database=os.getenv('MYSQL_DATABASE', 'events'),
+        charset='utf8mb4',
+        cursorclass=pymysql.cursors.DictCursor
+    )
+
+
+def iter_events_from_db(city: Optional[str] = None, only_missing: bool = True,
+                        page_size: int = PAGE_SIZE) -> Iterable[List[Dict[str, Any]]]:
+    """Páginas de eventos de MySQL por keyset sobre id (sin OFFSET ni todo en memoria)"""
+    where = ['id > %s']
+    params: List[Any] = []
+    if city:
+        where.append('city = %s')
+        params.append(city)
+    if only_missing:
+        placeholders = ' OR '.join(['image_url LIKE %s'] * len(PLACEHOLDER_PATTERNS))
+        where.append(f"(image_url IS NULL OR image_url = '' OR {placeholders})")
+        params.extend(f'%{pattern}%' for pattern in PLACEHOLDER_PATTERNS)
+    sql = f"SELECT {', '.join(EVENT_FIELDS)} FROM events WHERE {' AND '.join(where)} ORDER BY id LIMIT %s"
+
+    connection = _mysql_connect()
+    try:
+        last_id = ''
+        while True:
+            cursor = connection.cursor()
+            cursor.execute(sql, [last_id, *params, page_size])
+            rows = cursor.fetchall()
+            cursor.close()
+            if not rows:
+                return
+            # Los eventos de la DB se actualizan por id exacto
+            yield [{**row, 'id': str(row['id']), 'match': 'id'} for row in rows]
+            last_id = str(rows[-1]['id'])
+    finally:
+        connection.close()
+
+
+def apply_updates(updates: List[Dict[str, Any]]) -> None:
+    """Un lote de UPDATE en una conexión y un commit (por id o por título, según el origen)"""
+    by_id = [(u['image_url'], u['id']) for u in updates if u.get('match') == 'id']
+    by_title = [
+        (u['image_url'], f"%{_strip_accents(u['title'])}%")
+        for u in updates if u.get('match') != 'id' and u.get('title')
+    ]
+    connection = _mysql_connect()
+    try:
+        cursor = connection.cursor()
+        if by_id:
+            cursor.executemany('UPDATE events SET image_url = %s WHERE id = %s', by_id)
+        if by_title:
+            cursor.executemany(_TITLE_UPDATE, by_title)
+        connection.commit()
+        cursor.close()
+    finally:
+        connection.close()
+
+
+class ImageJobStore:
+    """
+    🗄️ ESTADO DE LOS JOBS EN SQLITE (WAL)
+
+    image_jobs: un registro por job con contadores
+    image_job_items: un item por evento; progress_seq ordena los resultados para
+    que un stream se reenganche con ?after=N
+    """
+
+    def __init__(self, db_path: str = JOBS_DB):
+        self.db_path = os.path.normpath(db_path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS image_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    options TEXT NOT NULL,
+                    total INTEGER NOT NULL DEFAULT 0,
+                    updated INTEGER NOT NULL DEFAULT 0,
+                    skipped INTEGER NOT NULL DEFAULT 0,
+                    failed INTEGER NOT NULL DEFAULT 0,
+                    progress_seq INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS image_job_items (
+                    job_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    event_key TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    reason TEXT,
+                    image_url TEXT,
+                    progress_seq INTEGER,
+                    PRIMARY KEY (job_id, seq)
+                );
+                CREATE INDEX IF NOT EXISTS idx_image_job_items_key ON image_job_items (event_key, status);
+                CREATE INDEX IF NOT EXISTS idx_image_job_items_progress ON image_job_items (job_id, progress_seq);
+            ''')
+            self._conn = conn
+        return self._conn
+
+    def create_job(self, source: str, options: Dict[str, Any]) -> str:
+        job_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._lock:
+            self._connect().execute(
+                'INSERT INTO image_jobs (job_id, status, source, options, created_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, JOB_RUNNING, source, json.dumps(options, ensure_ascii=False), now, now)
+            )
+        return job_id
+
+    def add_items(self, job_id: str, events: List[Dict[str, Any]], force: bool = False) -> Tuple[int, int]:
+        """
+        Agrega una página de eventos al job → (agregados, ya resueltos antes)
+
+        Los eventos actualizados o ya con la misma imagen en cualquier job anterior
+        entran como omitidos ('previous_run') salvo force=True. Los que solo dieron
+        placeholder cuentan como resueltos durante MISS_TTL; después se reintentan.
+        """
+        keyed = [(event_key(event), event) for event in events if event.get('title') or event.get('id')]
+        if not keyed:
+            return 0, 0
+        with self._lock:
+            conn = self._connect()
+            done = set()
+            if not force:
+                keys = [key for key, _ in keyed]
+                marks = ','.join('?' * len(keys))
+                done = {row[0] for row in conn.execute(
+                    f'SELECT DISTINCT i.event_key FROM image_job_items i JOIN image_jobs j ON j.job_id = i.job_id '
+                    f'WHERE i.event_key IN ({marks}) AND (i.status = ? OR (i.status = ? AND '
+                    f"(i.reason = 'same_image' OR (i.reason = 'placeholder' AND j.updated_at > ?))))",
+                    (*keys, UPDATED, SKIPPED, time.time() - MISS_TTL)
+                )}
+            start = conn.execute('SELECT COALESCE(MAX(seq), 0) FROM image_job_items WHERE job_id = ?',
+                                 (job_id,)).fetchone()[0]
+            rows = []
+            for offset, (key, event) in enumerate(keyed, 1):
+                payload = {field: event.get(field) for field in (*EVENT_FIELDS, 'match')}
+                previous = key in done
+                rows.append((
+                    job_id, start + offset, key, json.dumps(payload, ensure_ascii=False, default=str),
+                    SKIPPED if previous else PENDING, 'previous_run' if previous else None
+                ))
+            conn.execute('BEGIN')
+            conn.executemany(
+                'INSERT INTO image_job_items (job_id, seq, event_key, payload, status, reason) VALUES (?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            conn.execute(
+                'UPDATE image_jobs SET total = total + ?, skipped = skipped + ?, updated_at = ? WHERE job_id = ?',
+                (len(rows), len(done), time.time(), job_id)
+            )
+            conn.execute('COMMIT')
+        return len(rows), len(done)
+
+    def pending_page(self, job_id: str, after_seq: int, limit: int = PAGE_SIZE) -> List[Tuple[int, Dict[str, Any]]]:
+        with self._lock:
+            rows = self._connect().execute(
+                'SELECT seq, payload FROM image_job_items WHERE job_id = ? AND seq > ? AND status = ? '
+                'ORDER BY seq LIMIT ?', (job_id, after_seq, PENDING, limit)
+            ).fetchall()
+        return [(row['seq'], json.loads(row['payload'])) for row in rows]
+
+    def record_results(self, job_id: str, results: List[Dict[str, Any]]):
+        """Estado final de un lote de items + contadores del job, en una transacción"""
+        counts = {UPDATED: 0, SKIPPED: 0, FAILED: 0}
+        with self._lock:
+            conn = self._connect()
+            conn.execute('BEGIN IMMEDIATE')
+            progress = conn.execute('SELECT progress_seq FROM image_jobs WHERE job_id = ?', (job_id,)).fetchone()[0]
+            rows = []
+            for result in results:
+                progress += 1
+                counts[result['status']] += 1
+                rows.append((result['status'], result.get('reason'), result.get('image_url'), progress,
+                             job_id, result['seq']))
+            conn.executemany(
+                'UPDATE image_job_items SET status = ?, reason = ?, image_url = ?, progress_seq = ? '
+                'WHERE job_id = ? AND seq = ?', rows
+            )
+            conn.execute(
+                'UPDATE image_jobs SET updated = updated + ?, skipped = skipped + ?, failed = failed + ?, '
+                'progress_seq = ?, updated_at = ? WHERE job_id = ?',
+                (counts[UPDATED], counts[SKIPPED], counts[FAILED], progress, time.time(), job_id)
+            )
+            conn.execute('COMMIT')
+
+    def results_after(self, job_id: str, after: int, limit: int = 200) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._connect().execute(
+                'SELECT progress_seq, payload, status, reason, image_url FROM image_job_items '
+                'WHERE job_id = ? AND progress_seq > ? ORDER BY progress_seq LIMIT ?', (job_id, after, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def set_status(self, job_id: str, status: str, error: Optional[str] = None):
+        with self._lock:
+            self._connect().execute(
+                'UPDATE image_jobs SET status = ?, error = ?, updated_at = ? WHERE job_id = ?',
+                (status, error, time.time(), job_id)
+            )
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connect().execute('SELECT * FROM image_jobs WHERE job_id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['options'] = json.loads(job['options'])
+        job['processed'] = job['updated'] + job['skipped'] + job['failed']
+        return job
+
+    def list_jobs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._lock:
+            ids = [row[0] for row in self._connect().execute(
+                'SELECT job_id FROM image_jobs ORDER BY created_at DESC LIMIT ?', (limit,)
+            )]
+        return [self.get_job(job_id) for job_id in ids]
+
+
+class ImageJobService:
+    """
+    🖼️ JOBS DE IMÁGENES
+
+        async for chunk in image_jobs.stream(job['job_id']):         # texto SSE
+        job = await image_jobs.start(events=events)                 # o source='db', city=...
+        async for message in image_jobs.stream(job['job_id']):     # SSE
+            ...
+    """
+
+    def __init__(self, store: Optional[ImageJobStore] = None):
+        self.store = store or ImageJobStore()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._wakeups: Dict[str, asyncio.Event] = {}
+
+    # ------------------------------------------------------------------ ciclo de vida
+
+    def is_running(self, job_id: str) -> bool:
+        task = self._tasks.get(job_id)
+        return task is not None and not task.done()
+
+    async def start(
+        self,
+        events: Optional[List[Dict[str, Any]]] = None,
+        source: str = 'payload',
+        city: Optional[str] = None,
+        only_missing: bool = True,
+        force: bool = False,
+        workers: int = WORKERS,
+        job_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Crea un job (eventos del request o de la DB) o reanuda job_id y lo lanza en background
+
+        Raises:
+            KeyError: job_id no existe
+        """
+        # SQLite siempre en un thread: un payload grande no frena el event loop
+        if job_id:
+            job = await asyncio.to_thread(self.store.get_job, job_id)
+            if job is None:
+                raise KeyError(job_id)
+            if job['status'] != JOB_COMPLETED and not self.is_running(job_id):
+                logger.info(f"🔁 Reanudando job de imágenes {job_id} ({job['processed']}/{job['total']})")
+                await self._launch(job_id, job['options'].get('workers', workers))
+            return await asyncio.to_thread(self.store.get_job, job_id)
+
+        options = {'city': city, 'only_missing': only_missing, 'force': force, 'workers': workers}
+        job_id = await asyncio.to_thread(self.store.create_job, source, options)
+        if source == 'db':
+            # Páginas de la DB directo a SQLite, en un thread (pymysql es bloqueante)
+            await asyncio.to_thread(self._enqueue_from_db, job_id, city, only_missing, force)
+        else:
+            for start in range(0, len(events or []), PAGE_SIZE):
+                page = [{**event, 'match': 'title'} for event in events[start:start + PAGE_SIZE]]
+                await asyncio.to_thread(self.store.add_items, job_id, page, force)
+
+        job = await asyncio.to_thread(self.store.get_job, job_id)
+        logger.info(f"🚀 Job de imágenes {job_id}: {job['total']} eventos ({job['skipped']} ya resueltos)")
+        await self._launch(job_id, workers)
+        return job
+
+    def _enqueue_from_db(self, job_id: str, city: Optional[str], only_missing: bool, force: bool):
+        for page in iter_events_from_db(city, only_missing):
+            self.store.add_items(job_id, page, force)
+
+    async def _launch(self, job_id: str, workers: int):
+        await asyncio.to_thread(self.store.set_status, job_id, JOB_RUNNING)
+        self._wakeups.setdefault(job_id, asyncio.Event())
+        self._tasks[job_id] = asyncio.create_task(self._run(job_id, max(1, min(workers, MAX_WORKERS))))
+
+    def _notify(self, job_id: str):
+        wakeup = self._wakeups.get(job_id)
+        if wakeup is not None:
+            wakeup.set()
+
+    async def _run(self, job_id: str, workers: int):
+        from services.image_resolver import image_resolver
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+        results: List[Dict[str, Any]] = []
+        flush_lock = asyncio.Lock()
+        last_flush = time.monotonic()
+
+        async def flush():
+            nonlocal results, last_flush
+            async with flush_lock:
+                batch, results = results, []
+                last_flush = time.monotonic()
+                if not batch:
+                    return
+                updates = [r for r in batch if r['status'] == UPDATED]
+                if updates:
+                    try:
+                        await asyncio.to_thread(apply_updates, updates)
+                    except Exception as e:
+                        logger.error(f"❌ Job {job_id}: falló el lote de {len(updates)} UPDATE: {e}")
+                        for result in updates:
+                            result.update(status=FAILED, reason='db_error')
+                await asyncio.to_thread(self.store.record_results, job_id, batch)
+                self._notify(job_id)
+
+        async def produce():
+            after = 0
+            while True:
+                page = await asyncio.to_thread(self.store.pending_page, job_id, after)
+                if not page:
+                    break
+                for seq, event in page:
+                    await queue.put((seq, event))
+                after = page[-1][0]
+            for _ in range(workers):
+                await queue.put(None)
+
+        async def work():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                seq, event = item
+                try:
+                    image_url = await image_resolver.resolve(
+                        event.get('title') or '', venue=event.get('venue_name') or '',
+                        city=event.get('city') or '', description=event.get('description') or ''
+                    )
+                    status, reason = decide(event.get('image_url'), image_url)
+                except Exception as e:
+                    logger.error(f"❌ Error procesando '{event.get('title', 'unknown')}': {e}")
+                    image_url, status, reason = None, FAILED, 'error'
+                results.append({**event, 'seq': seq, 'status': status, 'reason': reason, 'image_url': image_url})
+                if len(results) >= BATCH_SIZE or time.monotonic() - last_flush >= FLUSH_INTERVAL:
+                    await flush()
+
+        tasks = [asyncio.create_task(produce()), *(asyncio.create_task(work()) for _ in range(workers))]
+        try:
+            await asyncio.gather(*tasks)
+            await flush()
+            await asyncio.to_thread(self.store.set_status, job_id, JOB_COMPLETED)
+            job = await asyncio.to_thread(self.store.get_job, job_id)
+            logger.info(f"✅ Job de imágenes {job_id}: {job['updated']} actualizadas, "
+                        f"{job['skipped']} omitidas, {job['failed']} fallidas")
+        except asyncio.CancelledError:
+            await flush()
+            await asyncio.to_thread(self.store.set_status, job_id, JOB_INTERRUPTED)
+            raise
+        except Exception as e:
+            logger.error(f"❌ Job de imágenes {job_id} falló: {e}")
+            await asyncio.to_thread(self.store.set_status, job_id, JOB_FAILED, str(e))
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._notify(job_id)
+
+    async def shutdown(self):
+        """Cancela los jobs en curso; quedan 'interrupted' y se reanudan con start(job_id=...)"""
+        tasks = [task for task in self._tasks.values() if not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # ------------------------------------------------------------------ SSE
+
+    async def stream(self, job_id: str, after: int = 0) -> AsyncIterator[str]:
+        """Texto SSE del job desde el resultado `after`, listo para un StreamingResponse"""
+        async for message in self.messages(job_id, after):
+            yield render_sse(message)
+
+    async def messages(self, job_id: str, after: int = 0) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Mensajes SSE del job desde el resultado `after`: update_start, image_updated
+        (id = número de progreso), progress y update_complete
+        """
+        job = await asyncio.to_thread(self.store.get_job, job_id)
+        if job is None:
+            yield {"event": "error", "data": json.dumps({"message": f"Job {job_id} not found"})}
+            return
+
+        yield {
+            "event": "update_start",
+            "data": json.dumps({
+                "job_id": job_id,
+                "total": job['total'],
+                "processed": job['processed'],
+                "resumed": after > 0 or job['processed'] > 0,
+                "message": "Iniciando actualización de imágenes en paralelo..."
+            })
+        }
+
+        wakeup = self._wakeups.setdefault(job_id, asyncio.Event())
+        cursor = after
+        while True:
+            rows = await asyncio.to_thread(self.store.results_after, job_id, cursor)
+            job = await asyncio.to_thread(self.store.get_job, job_id)
+            total = job['total'] or 1
+            for row in rows:
+                cursor = row['progress_seq']
+                if row['status'] != UPDATED:
+                    continue
+                event = json.loads(row['payload'])
+                yield {
+                    "event": "image_updated",
+                    "id": str(cursor),
+                    "data": json.dumps({
+                        "id": event.get('id'),
+                        "title": event.get('title'),
+                        "image_url": row['image_url'],
+                        "progress": int(job['processed'] / total * 100)
+                    })
+                }
+            if rows:
+                yield {
+                    "event": "progress",
+                    "id": str(cursor),
+                    "data": json.dumps({
+                        "job_id": job_id, "processed": job['processed'], "total": job['total'],
+                        "successful": job['updated'], "skipped": job['skipped'], "failed": job['failed']
+                    })
+                }
+                continue
+            if job['status'] != JOB_RUNNING:
+                break
+            if not self.is_running(job_id) and time.time() - job['updated_at'] > STALE_AFTER_SECONDS:
+                await asyncio.to_thread(self.store.set_status, job_id, JOB_INTERRUPTED)
+                job = await asyncio.to_thread(self.store.get_job, job_id)
+                break
+            wakeup.clear()
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=STREAM_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+        yield {
+            "event": "update_complete",
+            "data": json.dumps({
+                "job_id": job_id,
+                "status": job['status'],
+                "successful": job['updated'],
+                "skipped": job['skipped'],
+                "failed": job['failed'],
+                "total": job['total']
+            })
+        }
+
+
+# Instancia global compartida por todo el proceso
+image_jobs = ImageJobService()
+
+
+def main(argv: Optional[List[str]] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Actualización masiva de imágenes de eventos (jobs reanudables)')
+    parser.add_argument('--city', help='Solo eventos de esta ciudad')
+    parser.add_argument('--all', action='store_true', help='Incluir eventos que ya tienen imagen real')
+    parser.add_argument('--force', action='store_true', help='No omitir eventos resueltos en corridas anteriores')
+    parser.add_argument('--workers', type=int, default=WORKERS)
+    parser.add_argument('--resume', metavar='JOB_ID', help='Reanudar un job interrumpido')
+    parser.add_argument('--list', action='store_true', help='Listar los últimos jobs')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    if args.list:
+        for job in image_jobs.store.list_jobs():
+            print(f"{job['job_id']}  {job['status']:<12} {job['processed']}/{job['total']}  "
+                  f"✅ {job['updated']}  ⏭️ {job['skipped']}  ❌ {job['failed']}")
+        return
+
+    async def run():
+        from services.image_resolver import image_resolver
+
+        try:
+            job = await image_jobs.start(
+                source='db', city=args.city, only_missing=not args.all, force=args.force,
+                workers=args.workers, job_id=args.resume
+            )
+            if image_jobs.is_running(job['job_id']):
+                await image_jobs._tasks[job['job_id']]
+            return image_jobs.store.get_job(job['job_id'])
+        finally:
+            await image_resolver.aclose()
+
+    job = asyncio.run(run())
+    print(json.dumps({key: job[key] for key in ('job_id', 'status', 'total', 'updated', 'skipped', 'failed')},
+                     indent=2))
+
+
+if __name__ == '__main__':
+    main()
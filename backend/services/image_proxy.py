@@ -0,0 +1,587 @@
+"""
+🖼️ IMAGE PROXY - Miniaturas locales de las imágenes de eventos (/img/{event_id})
+Las cards cargaban el image_url original (resultados de Google, Unsplash, CDNs de
+ticketeras) directo en el browser: imágenes enormes, lentas o con hotlinking
+bloqueado. Sin Cloudinary configurado no había ninguna versión chica.
+
+- El original se descarga UNA vez (single-flight por URL, tope IMAGE_PROXY_MAX_SOURCE_BYTES)
+  y se guarda; las miniaturas (sm/md/lg) se generan a pedido desde ese original,
+  en WebP si el browser lo acepta y si no en JPEG
+- Caché en disco direccionada por contenido (data/cache/img/ab/<sha256>): el
+  sha256 del archivo es a la vez su nombre y su ETag fuerte; dos eventos con la
+  misma imagen comparten archivos
+- Índice y LRU en SQLite (data/cache/image_proxy.sqlite3): cuando el total supera
+  IMAGE_PROXY_CACHE_BYTES se borran los archivos menos usados hasta el 90%
+- thumbnail_url() lleva ?v=<hash del image_url>: la URL versionada se cachea
+  IMAGE_PROXY_MAX_AGE; sin versión (o con una vieja) se sirve no-cache + ETag
+- Respuestas con ETag fuerte, 304 en If-None-Match y Vary: Accept
+- Solo descarga http(s) hacia IPs públicas: cada salto de redirect se resuelve y
+  se rechaza si apunta a redes privadas, loopback, link-local o reservadas; la
+  conexión va a la IP ya validada (Host y SNI del original), así un DNS que
+  cambia entre la validación y el connect no puede redirigirla
+- Sin Pillow instalado se sirve el original cacheado (mismas garantías de caché)
+
+Los eventos de Cloudinary no pasan por acá (Cloudinary ya transforma): ver thumbnail_url().
+"""
+
+import asyncio
+import hashlib
+import io
+import ipaddress
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from services.request_coalescer import image_flight
+
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv('IMAGE_PROXY_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+# Prefijo de thumbnail_url() cuando el frontend está en otro origen (ej. https://api.midominio.com)
+BASE_URL = os.getenv('IMAGE_PROXY_BASE_URL', '').rstrip('/')
+
+CACHE_DIR = os.getenv(
+    'IMAGE_PROXY_CACHE_DIR',
+    os.path.join(os.path.dirname(__file__), '..', 'data', 'cache', 'img')
+)
+INDEX_DB = os.getenv(
+    'IMAGE_PROXY_INDEX_DB',
+    os.path.join(os.path.dirname(__file__), '..', 'data', 'cache', 'image_proxy.sqlite3')
+)
+
+# Tope total de la caché en disco (originales + miniaturas)
+CACHE_BYTES = int(os.getenv('IMAGE_PROXY_CACHE_BYTES', 512 * 1024 * 1024))
+
+# Originales más grandes que esto no se descargan (se redirige al original)
+MAX_SOURCE_BYTES = int(os.getenv('IMAGE_PROXY_MAX_SOURCE_BYTES', 15 * 1024 * 1024))
+
+# Cache-Control de las URLs versionadas (?v=); las demás se sirven no-cache + ETag
+MAX_AGE = int(os.getenv('IMAGE_PROXY_MAX_AGE', 7 * 86400))
+
+# Un original que no se pudo bajar se reintenta después de este tiempo
+ERROR_TTL = int(os.getenv('IMAGE_PROXY_ERROR_TTL', 3600))
+
+FETCH_TIMEOUT = 15.0
+
+# Redirects seguidos a mano (cada destino se valida antes de conectarse)
+MAX_REDIRECTS = 5
+
+# Prefijo del error de un original que apunta a una red interna (nunca se redirige a él)
+BLOCKED = 'blocked'
+
+# Ancho máximo de cada tamaño (nunca se agranda una imagen)
+SIZES = {'sm': 320, 'md': 640, 'lg': 1280}
+DEFAULT_SIZE = 'md'
+
+WEBP = 'webp'
+JPEG = 'jpeg'
+ORIGINAL = 'original'
+CONTENT_TYPES = {WEBP: 'image/webp', JPEG: 'image/jpeg'}
+QUALITY = {WEBP: 80, JPEG: 82}
+
+# Segundos entre actualizaciones de last_access de un mismo archivo (LRU aproximado)
+TOUCH_INTERVAL = 300
+
+# event_id → image_url, para no ir a la DB en cada request de una card
+EVENT_URL_CACHE_SIZE = 5000
+EVENT_URL_TTL = 600
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'image/avif,image/webp,image/apng,image/*,*/*;q=0.8',
+}
+
+
+class ProxyError(Exception):
+    """El original no se pudo descargar o decodificar (ver redirect_allowed)"""
+
+
+def is_http_url(url: Optional[str]) -> bool:
+    """¿URL absoluta http(s) con host?"""
+    if not url:
+        return False
+    parts = urlsplit(url)
+    return parts.scheme in ('http', 'https') and bool(parts.hostname)
+
+
+def image_version(image_url: str) -> str:
+    """Versión corta del image_url (cambia cuando cambia la imagen del evento)"""
+    return hashlib.sha256(image_url.encode('utf-8')).hexdigest()[:12]
+
+
+def redirect_allowed(image_url: str, error: ProxyError) -> bool:
+    """El endpoint solo redirige al original si es http(s) y no apunta a una red interna"""
+    return is_http_url(image_url) and not str(error).startswith(BLOCKED)
+
+
+def thumbnail_url(event_id: str, image_url: Optional[str], size: str = DEFAULT_SIZE) -> str:
+    """
+    URL para las cards: /img/{event_id}?v=<versión> si el proxy está habilitado,
+    o el image_url tal cual (vacío, data: o ya en Cloudinary)
+    """
+    if not ENABLED or not event_id or not is_http_url(image_url):
+        return image_url or ''
+    if 'res.cloudinary.com' in image_url:
+        return image_url
+    return f"{BASE_URL}/img/{event_id}?v={image_version(image_url)}" + (f"&size={size}" if size != DEFAULT_SIZE else '')
+
+
+def _is_public_ip(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split('%', 1)[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+async def check_public_url(url: str) -> str:
+    """
+    Valida un destino de descarga: http(s) y TODAS sus IPs públicas
+
+    Returns:
+        La IP validada a la que hay que conectarse (ver pinned_request())
+
+    Raises:
+        ProxyError: 'blocked_*' si es otro esquema o resuelve a una red interna
+    """
+    if not is_http_url(url):
+        raise ProxyError(f'{BLOCKED}_scheme')
+    parts = urlsplit(url)
+    try:
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+    except ValueError:
+        raise ProxyError(f'{BLOCKED}_port')
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError):
+        raise ProxyError('dns_error')
+    if not infos or not all(_is_public_ip(info[4][0]) for info in infos):
+        raise ProxyError(f'{BLOCKED}_address')
+    return infos[0][4][0].split('%', 1)[0]
+
+
+def pinned_request(url: str, address: str) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+    """
+    (url, headers, extensions) para pedir url conectándose a address: la URL lleva
+    la IP y el Host original va en el header y en el SNI (el certificado se
+    verifica contra el hostname, no contra la IP)
+    """
+    parts = urlsplit(url)
+    host = f'[{address}]' if ':' in address else address
+    if parts.port:
+        host = f'{host}:{parts.port}'
+    pinned = parts._replace(netloc=host).geturl()
+    headers = {'Host': parts.netloc.rsplit('@', 1)[-1]}
+    extensions = {'sni_hostname': parts.hostname} if parts.scheme == 'https' else {}
+    return pinned, headers, extensions
+
+
+def negotiate_format(accept: Optional[str]) -> str:
+    return WEBP if 'image/webp' in (accept or '') else JPEG
+
+
+def render_thumbnail(data: bytes, width: int, fmt: str) -> bytes:
+    """Miniatura de ancho máximo `width` (respeta orientación EXIF, sin agrandar)"""
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        image.thumbnail((width, width * 4))
+        output = io.BytesIO()
+        if fmt == WEBP:
+            # WebP conserva la transparencia; JPEG no la soporta
+            image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+            image.save(output, 'WEBP', quality=QUALITY[WEBP], method=4)
+        else:
+            image = image.convert('RGB')
+            image.save(output, 'JPEG', quality=QUALITY[JPEG], optimize=True, progressive=True)
+        return output.getvalue()
+
+
+def sniff_content_type(data: bytes, declared: Optional[str]) -> Optional[str]:
+    """Tipo real del original por magic bytes (muchos CDNs mandan text/html o octet-stream)"""
+    if data.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if data.startswith(b'\x89PNG'):
+        return 'image/png'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif'
+    if declared and declared.startswith('image/'):
+        return declared.split(';')[0]
+    return None
+
+
+class BlobIndex:
+    """
+    🗄️ ÍNDICE DE LA CACHÉ (SQLite WAL)
+
+    blobs: un archivo por sha256 con tamaño y último acceso (LRU)
+    sources: URL original → blob del original (o error con fecha para reintentar)
+    variants: (URL, tamaño, formato) → blob de la miniatura
+    """
+
+    def __init__(self, db_path: str = INDEX_DB):
+        self.db_path = os.path.normpath(db_path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS blobs (
+                    digest TEXT PRIMARY KEY,
+                    bytes INTEGER NOT NULL,
+                    content_type TEXT NOT NULL,
+                    last_access REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_blobs_access ON blobs (last_access);
+                CREATE TABLE IF NOT EXISTS sources (
+                    url_hash TEXT PRIMARY KEY,
+                    digest TEXT,
+                    error TEXT,
+                    fetched_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS variants (
+                    url_hash TEXT NOT NULL,
+                    size TEXT NOT NULL,
+                    format TEXT NOT NULL,
+                    digest TEXT NOT NULL,
+                    PRIMARY KEY (url_hash, size, format)
+                );
+                CREATE INDEX IF NOT EXISTS idx_variants_digest ON variants (digest);
+            ''')
+            self._conn = conn
+        return self._conn
+
+    def source(self, url_hash: str) -> Optional[Tuple[Optional[str], Optional[str], float]]:
+        with self._lock:
+            return self._connect().execute(
+                'SELECT digest, error, fetched_at FROM sources WHERE url_hash = ?', (url_hash,)
+            ).fetchone()
+
+    def variant(self, url_hash: str, size: str, fmt: str) -> Optional[Tuple[str, str, float]]:
+        with self._lock:
+            return self._connect().execute(
+                'SELECT v.digest, b.content_type, b.last_access FROM variants v '
+                'JOIN blobs b ON b.digest = v.digest WHERE v.url_hash = ? AND v.size = ? AND v.format = ?',
+                (url_hash, size, fmt)
+            ).fetchone()
+
+    def blob_type(self, digest: str) -> Optional[str]:
+        with self._lock:
+            row = self._connect().execute('SELECT content_type FROM blobs WHERE digest = ?', (digest,)).fetchone()
+        return row[0] if row else None
+
+    def add_blob(self, digest: str, size: int, content_type: str):
+        with self._lock:
+            self._connect().execute(
+                'INSERT INTO blobs (digest, bytes, content_type, last_access) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT(digest) DO UPDATE SET last_access = excluded.last_access',
+                (digest, size, content_type, time.time())
+            )
+
+    def set_source(self, url_hash: str, digest: Optional[str], error: Optional[str] = None):
+        with self._lock:
+            self._connect().execute(
+                'INSERT OR REPLACE INTO sources (url_hash, digest, error, fetched_at) VALUES (?, ?, ?, ?)',
+                (url_hash, digest, error, time.time())
+            )
+
+    def set_variant(self, url_hash: str, size: str, fmt: str, digest: str):
+        with self._lock:
+            self._connect().execute(
+                'INSERT OR REPLACE INTO variants (url_hash, size, format, digest) VALUES (?, ?, ?, ?)',
+                (url_hash, size, fmt, digest)
+            )
+
+    def touch(self, digest: str):
+        with self._lock:
+            self._connect().execute('UPDATE blobs SET last_access = ? WHERE digest = ?', (time.time(), digest))
+
+    def total_bytes(self) -> Tuple[int, int]:
+        with self._lock:
+            count, total = self._connect().execute('SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM blobs').fetchone()
+        return count, total
+
+    def evict_until(self, target_bytes: int) -> list:
+        """Saca del índice los blobs menos usados hasta quedar bajo target_bytes → digests a borrar"""
+        with self._lock:
+            conn = self._connect()
+            total = conn.execute('SELECT COALESCE(SUM(bytes), 0) FROM blobs').fetchone()[0]
+            evicted = []
+            for digest, size in conn.execute('SELECT digest, bytes FROM blobs ORDER BY last_access').fetchall():
+                if total <= target_bytes:
+                    break
+                evicted.append(digest)
+                total -= size
+            if evicted:
+                conn.execute('BEGIN')
+                for start in range(0, len(evicted), 500):
+                    chunk = evicted[start:start + 500]
+                    marks = ','.join('?' * len(chunk))
+                    conn.execute(f'DELETE FROM blobs WHERE digest IN ({marks})', chunk)
+                    conn.execute(f'DELETE FROM variants WHERE digest IN ({marks})', chunk)
+                    conn.execute(f'DELETE FROM sources WHERE digest IN ({marks})', chunk)
+                conn.execute('COMMIT')
+        return evicted
+
+
+class ImageProxy:
+    """
+    🖼️ PROXY DE IMÁGENES CON MINIATURAS
+
+    Uso:
+        digest, content_type = await image_proxy.get(image_url, size='md', fmt='webp')
+        data = image_proxy.read_blob(digest)
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, index: Optional[BlobIndex] = None):
+        self.cache_dir = os.path.normpath(cache_dir)
+        self.index = index or BlobIndex()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._event_urls: 'OrderedDict[str, Tuple[Optional[str], float]]' = OrderedDict()
+        self._evicting = False
+        self._stats = {
+            'requests': 0, 'variant_hits': 0, 'not_modified': 0, 'source_fetches': 0, 'source_errors': 0,
+            'renders': 0, 'render_ms': 0.0, 'evicted_blobs': 0,
+        }
+
+    # ------------------------------------------------------------------ disco
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, digest[:2], digest)
+
+    def _write_blob(self, data: bytes, content_type: str) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        self.index.add_blob(digest, len(data), content_type)
+        return digest
+
+    def read_blob(self, digest: str) -> Optional[bytes]:
+        try:
+            with open(self.blob_path(digest), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _evict(self):
+        count, total = self.index.total_bytes()
+        if total <= CACHE_BYTES:
+            return
+        evicted = self.index.evict_until(int(CACHE_BYTES * 0.9))
+        for digest in evicted:
+            try:
+                os.remove(self.blob_path(digest))
+            except OSError:
+                pass
+        self._stats['evicted_blobs'] += len(evicted)
+        logger.info(f"🧹 Image proxy: {len(evicted)} archivos desalojados (caché sobre {CACHE_BYTES // 2**20} MB)")
+
+    async def _maybe_evict(self):
+        if self._evicting:
+            return
+        self._evicting = True
+        try:
+            await asyncio.to_thread(self._evict)
+        finally:
+            self._evicting = False
+
+    # ------------------------------------------------------------------ HTTP
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(timeout=FETCH_TIMEOUT, follow_redirects=False, headers=HEADERS)
+            self._client_loop = loop
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+    async def _download(self, image_url: str) -> Tuple[bytes, str]:
+        """
+        Original completo con tope de tamaño; valida que sea una imagen
+
+        Los redirects se siguen a mano para validar cada destino con check_public_url()
+        y conectarse a la IP validada
+        """
+        url = image_url
+        for _ in range(MAX_REDIRECTS + 1):
+            address = await check_public_url(url)
+            pinned, headers, extensions = pinned_request(url, address)
+            async with self._get_client().stream('GET', pinned, headers=headers, extensions=extensions) as response:
+                if response.is_redirect:
+                    # Location relativa se resuelve contra la URL original, no la de la IP
+                    url = str(httpx.URL(url).join(response.headers.get('location', '')))
+                    continue
+                if response.status_code != 200:
+                    raise ProxyError(f"http_{response.status_code}")
+                declared_length = int(response.headers.get('content-length') or 0)
+                if declared_length > MAX_SOURCE_BYTES:
+                    raise ProxyError('too_large')
+                chunks, size = [], 0
+                async for chunk in response.aiter_bytes():
+                    size += len(chunk)
+                    if size > MAX_SOURCE_BYTES:
+                        raise ProxyError('too_large')
+                    chunks.append(chunk)
+            data = b''.join(chunks)
+            content_type = sniff_content_type(data, response.headers.get('content-type'))
+            if content_type is None:
+                raise ProxyError('not_an_image')
+            return data, content_type
+        raise ProxyError('too_many_redirects')
+
+    async def _source(self, image_url: str, url_hash: str) -> str:
+        """Digest del original (descargado una vez; errores recordados ERROR_TTL)"""
+        row = await asyncio.to_thread(self.index.source, url_hash)
+        if row is not None:
+            digest, error, fetched_at = row
+            if digest and os.path.exists(self.blob_path(digest)):
+                return digest
+            if error and time.time() - fetched_at < ERROR_TTL:
+                raise ProxyError(error)
+
+        async def fetch() -> str:
+            self._stats['source_fetches'] += 1
+            try:
+                data, content_type = await self._download(image_url)
+            except ProxyError as e:
+                self._stats['source_errors'] += 1
+                await asyncio.to_thread(self.index.set_source, url_hash, None, str(e))
+                raise
+            except httpx.HTTPError as e:
+                # Errores de red no se recuerdan: el próximo request reintenta
+                self._stats['source_errors'] += 1
+                raise ProxyError(type(e).__name__)
+            digest = await asyncio.to_thread(self._write_blob, data, content_type)
+            await asyncio.to_thread(self.index.set_source, url_hash, digest)
+            return digest
+
+        return await image_flight.do(('proxy_source', url_hash), fetch)
+
+    # ------------------------------------------------------------------ API
+
+    async def get(self, image_url: str, size: str = DEFAULT_SIZE, fmt: str = WEBP) -> Tuple[str, str]:
+        """
+        (digest, content_type) de la miniatura pedida, generándola si falta
+
+        Raises:
+            ProxyError: El original no se pudo obtener o decodificar
+        """
+        self._stats['requests'] += 1
+        size = size if size in SIZES else DEFAULT_SIZE
+        if not PIL_AVAILABLE:
+            size, fmt = ORIGINAL, ORIGINAL
+        url_hash = hashlib.sha256(image_url.encode('utf-8')).hexdigest()
+
+        # El índice comparte lock con el desalojo (en un thread): nunca se consulta en el event loop
+        cached = await asyncio.to_thread(self.index.variant, url_hash, size, fmt)
+        if cached is not None and os.path.exists(self.blob_path(cached[0])):
+            digest, content_type, last_access = cached
+            self._stats['variant_hits'] += 1
+            if time.time() - last_access > TOUCH_INTERVAL:
+                await asyncio.to_thread(self.index.touch, digest)
+            return digest, content_type
+
+        source_digest = await self._source(image_url, url_hash)
+        if fmt == ORIGINAL:
+            await asyncio.to_thread(self.index.set_variant, url_hash, size, fmt, source_digest)
+            digest = source_digest
+            content_type = await asyncio.to_thread(self.index.blob_type, source_digest)
+        else:
+            digest = await image_flight.do(
+                ('proxy_variant', url_hash, size, fmt), lambda: self._render(url_hash, source_digest, size, fmt)
+            )
+            content_type = CONTENT_TYPES[fmt]
+
+        await self._maybe_evict()
+        return digest, content_type
+
+    async def _render(self, url_hash: str, source_digest: str, size: str, fmt: str) -> str:
+        data = await asyncio.to_thread(self.read_blob, source_digest)
+        if data is None:
+            raise ProxyError('source_evicted')
+        started = time.perf_counter()
+        try:
+            thumbnail = await asyncio.to_thread(render_thumbnail, data, SIZES[size], fmt)
+        except Exception as e:
+            # Formatos que Pillow no decodifica (SVG, HEIC...): se recuerda como error del original
+            await asyncio.to_thread(self.index.set_source, url_hash, None, 'undecodable')
+            raise ProxyError(f"undecodable: {e}")
+        self._stats['renders'] += 1
+        self._stats['render_ms'] += (time.perf_counter() - started) * 1000
+        digest = await asyncio.to_thread(self._write_blob, thumbnail, CONTENT_TYPES[fmt])
+        await asyncio.to_thread(self.index.set_variant, url_hash, size, fmt, digest)
+        return digest
+
+    async def event_image_url(self, event_id: str, version: Optional[str] = None) -> Optional[str]:
+        """
+        image_url del evento (caché LRU en memoria de EVENT_URL_TTL segundos)
+
+        Si el cliente pide una `version` distinta de la cacheada se vuelve a leer la DB
+        """
+        cached = self._event_urls.get(event_id)
+        if cached is not None and time.time() - cached[1] < EVENT_URL_TTL:
+            if version is None or (cached[0] and image_version(cached[0]) == version):
+                self._event_urls.move_to_end(event_id)
+                return cached[0]
+
+        from services.async_db import async_db
+
+        rows = await async_db.fetch_all('SELECT image_url FROM events WHERE id = :id LIMIT 1', {'id': event_id})
+        image_url = rows[0][0] if rows else None
+        self._event_urls[event_id] = (image_url, time.time())
+        self._event_urls.move_to_end(event_id)
+        while len(self._event_urls) > EVENT_URL_CACHE_SIZE:
+            self._event_urls.popitem(last=False)
+        return image_url
+
+    def forget_event(self, event_id: str):
+        """Descarta el image_url cacheado de un evento (llamar al cambiar su imagen)"""
+        self._event_urls.pop(event_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        count, total = self.index.total_bytes()
+        requests = self._stats['requests']
+        return {
+            **self._stats,
+            'render_ms': round(self._stats['render_ms'], 1),
+            'hit_rate': round(self._stats['variant_hits'] / requests, 3) if requests else 0.0,
+            'enabled': ENABLED,
+            'pillow': PIL_AVAILABLE,
+            'cache_files': count,
+            'cache_bytes': total,
+            'cache_limit_bytes': CACHE_BYTES,
+        }
+
+
+# Instancia global compartida por todo el proceso
+image_proxy = ImageProxy()
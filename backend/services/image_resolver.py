@@ -0,0 +1,316 @@
+"""
+🖼️ IMAGE RESOLVER - Resolución de imágenes de eventos con caché persistente
+google_images_service abría un httpx.AsyncClient nuevo por query, bajaba la página
+completa de Google Images y la recorría con tres re.findall (jpg, png, jpeg) sin
+cachear nada: /api/events/{id}/update-image y el bulk stream volvían a resolver
+el mismo título/venue en cada corrida.
+
+- Un solo cliente HTTP con pool de conexiones (keep-alive) por proceso
+- Una sola pasada con un regex precompilado que corta apenas tiene las 2
+  primeras URLs válidas (antes se recorría el HTML entero tres veces)
+- Caché en el enrichment store (SQLite WAL, compartido entre workers):
+  - IMAGE_RESOLUTION: (título, venue, ciudad) normalizados → URL final
+  - IMAGE_QUERY: query de Google → URL, para que dos eventos con el mismo venue
+    no repitan la búsqueda
+  - Los misses se guardan como negativos con TTL corto (IMAGE_RESOLVER_MISS_TTL)
+- Concurrencia y ritmo acotados por host upstream (IMAGE_RESOLVER_HOST_CONCURRENCY,
+  IMAGE_RESOLVER_HOST_RATE) y
+  single-flight por query (scope 'image' del request coalescer)
+- Métricas: hits/misses por nivel de caché y latencia por etapa
+  (título → keywords → venue) para /api/image-resolver/stats
+"""
+
+import asyncio
+import logging
+import os
+import re
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from services.enrichment_store import IMAGE_QUERY, IMAGE_RESOLUTION, MISS, enrichment_store
+from services.location_index import fold_location
+from services.request_coalescer import image_flight
+from services.scraper_latency import percentile
+
+logger = logging.getLogger(__name__)
+
+SEARCH_URL = 'https://www.google.com/search'
+
+# Imagen genérica cuando ninguna etapa encuentra nada
+FALLBACK_IMAGE_URL = 'https://picsum.photos/800/600'
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+}
+
+REQUEST_TIMEOUT = float(os.getenv('IMAGE_RESOLVER_TIMEOUT', 10))
+
+# Requests simultáneos por host upstream (google.com) y tamaño del pool
+HOST_CONCURRENCY = int(os.getenv('IMAGE_RESOLVER_HOST_CONCURRENCY', 4))
+MAX_CONNECTIONS = int(os.getenv('IMAGE_RESOLVER_MAX_CONNECTIONS', 20))
+
+# Requests por segundo por host upstream (0 = sin límite); los bulk jobs lo respetan
+HOST_RATE = float(os.getenv('IMAGE_RESOLVER_HOST_RATE', 0))
+
+# TTL (segundos) de los misses: se reintenta al día siguiente, no en cada request
+MISS_TTL = int(os.getenv('IMAGE_RESOLVER_MISS_TTL', 86400))
+
+# Muestras por etapa para los percentiles de latencia
+LATENCY_WINDOW = 200
+
+STAGE_TITLE = 'title'
+STAGE_KEYWORDS = 'keywords'
+STAGE_VENUE = 'venue'
+STAGES = (STAGE_TITLE, STAGE_KEYWORDS, STAGE_VENUE)
+
+# URLs directas de imágenes por preferencia: todas las .jpg, después .png y .jpeg
+_IMAGE_URLS = tuple(
+    re.compile(rf'https://[^\s"\'<>)]+\.{ext}', re.IGNORECASE) for ext in ('jpg', 'png', 'jpeg')
+)
+
+# Wikipedia/páginas web, miniaturas de Google e Instagram (no embebibles)
+_EXCLUDED = re.compile(
+    r'wikipedia\.org/wiki/|wikimedia\.org/wiki/|gstatic\.com|googleusercontent\.com/youtube'
+    r'|instagram\.com|cdninstagram\.com',
+    re.IGNORECASE
+)
+
+
+def extract_image_url(html: str) -> Optional[str]:
+    """
+    Segunda URL válida (la primera suele ser un logo), o la primera si es la única.
+    Las .jpg van antes que .png y .jpeg como en google_images_service; corta en
+    la segunda válida sin armar la lista completa.
+    """
+    first = None
+    for pattern in _IMAGE_URLS:
+        for match in pattern.finditer(html):
+            url = match.group(0)
+            if _EXCLUDED.search(url):
+                continue
+            if first is not None:
+                return url
+            first = url
+    return first
+
+
+def _normalize(text: str) -> str:
+    return ' '.join(fold_location(text or '').split())
+
+
+def resolution_key(title: str, venue: str = '', city: str = '') -> str:
+    """Clave de IMAGE_RESOLUTION: 'titulo|venue|ciudad' normalizados"""
+    return '|'.join(_normalize(part) for part in (title, venue, city))
+
+
+def clean_title(title: str) -> str:
+    """'Artista / Gira 2025' → 'Artista'; 'Festival: Día 1' → 'Festival'"""
+    if '/' in title:
+        return title.split('/')[0].strip()
+    if ':' in title:
+        return title.split(':')[0].strip()
+    return title
+
+
+class ImageResolver:
+    """
+    🖼️ RESOLVER DE IMÁGENES DE EVENTOS
+
+    Uso:
+        image_url = await image_resolver.resolve(title, venue=venue, city=city, description=description)
+    """
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._next_slot: Dict[str, float] = {}
+        self._latencies: Dict[str, Deque[float]] = {stage: deque(maxlen=LATENCY_WINDOW) for stage in STAGES}
+        self._stats: Dict[str, Any] = {
+            'resolutions': 0,
+            'resolution_hits': 0,
+            'resolution_negative_hits': 0,
+            'query_hits': 0,
+            'query_negative_hits': 0,
+            'searches': 0,
+            'search_errors': 0,
+            'throttled': 0,
+            'fallbacks': 0,
+            'found_by_stage': {stage: 0 for stage in STAGES},
+        }
+
+    # ------------------------------------------------------------------ HTTP
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Cliente compartido; se recrea si cambia el event loop (scripts con asyncio.run)"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=REQUEST_TIMEOUT,
+                follow_redirects=True,
+                headers=HEADERS,
+                limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS)
+            )
+            self._client_loop = loop
+            self._host_limits = {}
+            self._next_slot = {}
+        return self._client
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).hostname or ''
+        semaphore = self._host_limits.get(host)
+        if semaphore is None:
+            semaphore = self._host_limits[host] = asyncio.Semaphore(HOST_CONCURRENCY)
+        return semaphore
+
+    async def _throttle(self, url: str):
+        """Espacia los requests a un host según HOST_RATE (turnos reservados, sin lock)"""
+        if HOST_RATE <= 0:
+            return
+        host = urlsplit(url).hostname or ''
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next_slot.get(host, 0.0))
+        self._next_slot[host] = slot + 1 / HOST_RATE
+        if slot > now:
+            self._stats['throttled'] += 1
+            await asyncio.sleep(slot - now)
+
+    async def aclose(self):
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+    # ------------------------------------------------------------------ búsqueda
+
+    async def search(self, search_query: str) -> Optional[str]:
+        """Una query de Google Images → URL de imagen o None (cacheado por query)"""
+        image_url, _ = await self._search(search_query)
+        return image_url
+
+    async def _search(self, search_query: str, refresh: bool = False) -> Tuple[Optional[str], bool]:
+        """(URL o None, si la respuesta es definitiva y se puede cachear)"""
+        key = _normalize(search_query)
+        if not key:
+            return None, True
+
+        cached = MISS if refresh else await asyncio.to_thread(enrichment_store.get, IMAGE_QUERY, key)
+        if cached is not MISS:
+            self._stats['query_negative_hits' if cached is None else 'query_hits'] += 1
+            return cached, True
+
+        # Eventos del mismo venue en un bulk paralelo esperan la misma búsqueda
+        return await image_flight.do(('query', key), lambda: self._fetch(search_query, key))
+
+    async def _fetch(self, search_query: str, key: str) -> Tuple[Optional[str], bool]:
+        client = self._get_client()
+        self._stats['searches'] += 1
+        try:
+            async with self._host_limit(SEARCH_URL):
+                await self._throttle(SEARCH_URL)
+                response = await client.get(SEARCH_URL, params={'q': search_query, 'tbm': 'isch'})
+            response.raise_for_status()
+        except Exception as e:
+            # Errores de red no se cachean: la próxima vez se reintenta
+            self._stats['search_errors'] += 1
+            logger.debug(f"Error en búsqueda de imagen '{search_query}': {e}")
+            return None, False
+
+        image_url = extract_image_url(response.text)
+        if image_url:
+            await asyncio.to_thread(enrichment_store.put, IMAGE_QUERY, key, image_url)
+        else:
+            await asyncio.to_thread(enrichment_store.put, IMAGE_QUERY, key, None, ttl=MISS_TTL, negative=True)
+        return image_url, True
+
+    async def _run_stage(self, stage: str, search_query: str, refresh: bool = False) -> Tuple[Optional[str], bool]:
+        started = time.perf_counter()
+        image_url, definitive = await self._search(search_query, refresh=refresh)
+        self._latencies[stage].append(time.perf_counter() - started)
+        if image_url:
+            self._stats['found_by_stage'][stage] += 1
+        return image_url, definitive
+
+    async def resolve(
+        self,
+        title: str,
+        venue: str = '',
+        city: str = '',
+        description: str = '',
+        refresh: bool = False
+    ) -> str:
+        """
+        Imagen para un evento en 3 etapas (título → keywords de la descripción → venue)
+        con fallback genérico. city forma parte de la clave de caché, no de las búsquedas.
+
+        refresh=True ignora lo cacheado (por evento y por query), vuelve a buscar y
+        reemplaza la caché: para cuando el usuario pide otra imagen explícitamente.
+        """
+        from services.google_images_service import extract_keywords
+
+        self._stats['resolutions'] += 1
+        key = resolution_key(title, venue, city)
+        cached = MISS if refresh else await asyncio.to_thread(enrichment_store.get, IMAGE_RESOLUTION, key)
+        if cached is not MISS:
+            self._stats['resolution_negative_hits' if cached is None else 'resolution_hits'] += 1
+            return cached or FALLBACK_IMAGE_URL
+
+        cleaned_title = clean_title(title or '')
+        stages = [(STAGE_TITLE, cleaned_title)]
+        if description and description.strip():
+            stages.append((STAGE_KEYWORDS, extract_keywords(description)))
+        if venue and venue.strip():
+            stages.append((STAGE_VENUE, venue.strip()))
+
+        definitive = True
+        for index, (stage, search_query) in enumerate(stages, 1):
+            if not search_query:
+                continue
+            logger.info(f"🔍 Etapa {index}/{len(stages)} - {stage}: '{search_query}'")
+            image_url, stage_definitive = await self._run_stage(stage, search_query, refresh=refresh)
+            definitive = definitive and stage_definitive
+            if image_url:
+                logger.info(f"✅ Imagen encontrada en etapa {stage}: {image_url[:60]}...")
+                await asyncio.to_thread(enrichment_store.put, IMAGE_RESOLUTION, key, image_url)
+                return image_url
+
+        self._stats['fallbacks'] += 1
+        logger.warning(f"⚠️ No se encontraron imágenes después de {len(stages)} etapas para: {cleaned_title}")
+        if definitive:
+            # Con errores de red no se recuerda el miss: el próximo request reintenta
+            await asyncio.to_thread(enrichment_store.put, IMAGE_RESOLUTION, key, None, ttl=MISS_TTL, negative=True)
+        return FALLBACK_IMAGE_URL
+
+    def invalidate(self, title: str, venue: str = '', city: str = '') -> int:
+        """Olvida la resolución de un evento (ej. el usuario rechazó la imagen)"""
+        return enrichment_store.delete(IMAGE_RESOLUTION, resolution_key(title, venue, city))
+
+    # ------------------------------------------------------------------ métricas
+
+    def get_stats(self) -> Dict[str, Any]:
+        resolutions = self._stats['resolutions']
+        cached = self._stats['resolution_hits'] + self._stats['resolution_negative_hits']
+        lookups = self._stats['searches'] + self._stats['query_hits'] + self._stats['query_negative_hits']
+        latency = {}
+        for stage, samples in self._latencies.items():
+            ordered = sorted(samples)
+            latency[stage] = {
+                'samples': len(ordered),
+                'p50_ms': round(percentile(ordered, 50) * 1000, 1),
+                'p95_ms': round(percentile(ordered, 95) * 1000, 1),
+            }
+        return {
+            **self._stats,
+            'resolution_hit_rate': round(cached / resolutions, 3) if resolutions else 0.0,
+            'query_hit_rate': round((lookups - self._stats['searches']) / lookups, 3) if lookups else 0.0,
+            'stage_latency': latency,
+            'host_concurrency': HOST_CONCURRENCY,
+            'host_rate': HOST_RATE,
+        }
+
+
+# Instancia global compartida por todo el proceso
+image_resolver = ImageResolver()
@@ -9,10 +9,27 @@ import time
 import os
 import json
 from typing import List, Dict, Any, Optional
-from services.auto_discovery import AutoDiscoveryEngine
+from services.scraper_registry import scraper_registry
+from services.scraper_cache import scraper_result_cache
+from services.enrichment_store import LOCATION, MISS, enrichment_store
+from services.location_enrichment_batch import (
+    build_enriched_location, location_cache_key, split_location
+)
+from services.scraper_latency import (
+    BACKGROUND, ERROR, EMPTY, REQUEST_BUDGET, SUCCESS, TIMEOUT, scraper_latency
+)
 
 logger = logging.getLogger(__name__)
 
+
+class ScraperTimeout(asyncio.TimeoutError):
+    """Timeout de un scraper con el deadline que efectivamente se le aplicó"""
+
+    def __init__(self, deadline: float):
+        super().__init__(f"deadline {deadline:.1f}s")
+        self.deadline = deadline
+
+
 class IndustrialFactory:
     """
     🏭 FÁBRICA INDUSTRIAL DE SCRAPERS
@@ -24,17 +41,22 @@ class IndustrialFactory:
     - Estadísticas de rendimiento en tiempo real
     - Patrón factory para instanciación dinámica
     """
-    
+
+    # Caché viejo de enriquecimientos: se migra una vez al enrichment store
+    _legacy_cache_file = os.path.join(os.path.dirname(__file__), '../data/location_enrichments_cache.json')
+    _legacy_cache_checked = False
+
     def __init__(self):
-        """Inicializa la factory con auto-discovery"""
+        """Inicializa la factory (los scrapers vienen del registry del proceso)"""
         logger.info("🏭 Industrial Factory inicializado")
-        self.discovery_engine = AutoDiscoveryEngine()
-        logger.info("📋 Funcionando con auto-discovery puro (sin JSON)")
 
-        # Inicializar caché persistente de ubicaciones enriquecidas
-        self._location_cache = {}
-        self._cache_file = os.path.join(os.path.dirname(__file__), '../data/location_enrichments_cache.json')
-        self._load_location_cache()
+        if not IndustrialFactory._legacy_cache_checked:
+            self._migrate_legacy_cache()
+
+    @property
+    def discovery_engine(self):
+        """AutoDiscoveryEngine compartido del scraper registry (compatibilidad)"""
+        return scraper_registry.engine
         
     async def execute_global_scrapers(
         self,
@@ -56,13 +78,9 @@ class IndustrialFactory:
             Lista consolidada de eventos de todos los scrapers
         """
         
-        logger.info("🔍 Ejecutando auto-discovery de scrapers...")
-        
-        # Auto-descubrir scrapers disponibles
-        scrapers_map = self.discovery_engine.discover_all_scrapers()
-        
-        global_scrapers = scrapers_map.get('global', {})
-        logger.info(f"🌍 Global scrapers instanciados: {len(global_scrapers)}")
+        # Scrapers ya instanciados del registry del proceso (sin re-discovery)
+        global_scrapers = scraper_registry.borrow_global()
+        logger.info(f"🌍 Global scrapers disponibles: {len(global_scrapers)}")
         
         if not global_scrapers:
             logger.warning("⚠️ No se encontraron scrapers globales")
@@ -127,13 +145,9 @@ class IndustrialFactory:
         """
         
         start_time = time.time()
-        logger.info("🔍 Ejecutando auto-discovery de scrapers...")
-        
-        # Auto-descubrir scrapers disponibles
-        scrapers_map = self.discovery_engine.discover_all_scrapers()
-        
-        global_scrapers = scrapers_map.get('global', {})
-        logger.info(f"🌍 Global scrapers instanciados: {len(global_scrapers)}")
+        # Scrapers ya instanciados del registry del proceso (sin re-discovery)
+        global_scrapers = scraper_registry.borrow_global()
+        logger.info(f"🌍 Global scrapers disponibles: {len(global_scrapers)}")
         
         if not global_scrapers:
             logger.warning("⚠️ No se encontraron scrapers globales")
@@ -208,8 +222,8 @@ class IndustrialFactory:
                     'name': scraper_name.title(),
                     'status': 'timeout',
                     'events_count': 0,
-                    'response_time': '10.0s',
-                    'message': 'Timeout después de 10 segundos'
+                    'response_time': f'{REQUEST_BUDGET:.1f}s',
+                    'message': 'Resultado inesperado del scraper'
                 })
                 logger.warning(f"⚠️ {scraper_name.title()}Scraper: Resultado inesperado")
         
@@ -245,10 +259,9 @@ class IndustrialFactory:
         Ejecuta un scraper individual con manejo de errores y timeout
         """
         
-        start_time = time.time()
+        deadline = REQUEST_BUDGET
         
         try:
-            # Timeout de 10 segundos por scraper
             # Intentar pasar contexto completo si el scraper lo soporta
             if hasattr(scraper_instance, 'set_context'):
                 full_context = {'detected_country': detected_country}
@@ -256,18 +269,16 @@ class IndustrialFactory:
                     full_context.update(context_data)
                 scraper_instance.set_context(full_context)
             
-            events = await asyncio.wait_for(
-                scraper_instance.scrape_events(location, category, limit),
-                timeout=10.0
+            # Deadline según el p95 del scraper (ver _run_scraper)
+            events, _cache_status, deadline = await self._run_scraper(
+                scraper_instance, scraper_name, location, category, limit
             )
             
-            execution_time = time.time() - start_time
-            self._record_scraper_time(scraper_name, execution_time)
-            
             return events if isinstance(events, list) else []
             
-        except asyncio.TimeoutError:
-            logger.warning(f"⏰ {scraper_name.title()}Scraper: Timeout después de 10s")
+        except asyncio.TimeoutError as e:
+            deadline = getattr(e, 'deadline', deadline)
+            logger.warning(f"⏰ {scraper_name.title()}Scraper: Timeout después de {deadline:.1f}s")
             return []
         except Exception as e:
             logger.error(f"❌ {scraper_name.title()}Scraper: {str(e)}")
@@ -291,9 +302,9 @@ class IndustrialFactory:
         """
         
         start_time = time.time()
+        deadline = REQUEST_BUDGET
         
         try:
-            # Timeout de 5 segundos por scraper para mayor velocidad
             # Intentar pasar contexto completo si el scraper lo soporta
             if hasattr(scraper_instance, 'set_context'):
                 full_context = {'detected_country': detected_country}
@@ -301,9 +312,9 @@ class IndustrialFactory:
                     full_context.update(context_data)
                 scraper_instance.set_context(full_context)
                 
-            events = await asyncio.wait_for(
-                scraper_instance.scrape_events(location, category, limit),
-                timeout=5.0
+            # Deadline según el p95 del scraper (ver _run_scraper)
+            events, cache_status, deadline = await self._run_scraper(
+                scraper_instance, scraper_name, location, category, limit
             )
             
             execution_time = time.time() - start_time
@@ -313,18 +324,22 @@ class IndustrialFactory:
                 'events': events_list,
                 'execution_time': f"{execution_time:.2f}s",
                 'status': 'success',
-                'events_count': len(events_list)
+                'events_count': len(events_list),
+                'cache': cache_status,
+                'deadline': round(deadline, 2)
             }
             
-        except asyncio.TimeoutError:
+        except asyncio.TimeoutError as e:
+            deadline = getattr(e, 'deadline', deadline)
             execution_time = time.time() - start_time
-            logger.warning(f"⏰ {scraper_name.title()}Scraper: Timeout después de 5s")
+            logger.warning(f"⏰ {scraper_name.title()}Scraper: Timeout después de {deadline:.1f}s")
             return {
                 'events': [],
                 'execution_time': f"{execution_time:.2f}s",
                 'status': 'timeout',
                 'events_count': 0,
-                'error': 'Timeout después de 5 segundos'
+                'error': f'Timeout después de {deadline:.1f} segundos',
+                'deadline': round(deadline, 2)
             }
         except Exception as e:
             execution_time = time.time() - start_time
@@ -337,17 +352,77 @@ class IndustrialFactory:
                 'error': str(e)
             }
     
-    def _record_scraper_time(self, scraper_name: str, execution_time: float):
-        """Registra tiempo de ejecución del scraper"""
-        if not hasattr(self, '_scraper_times'):
-            self._scraper_times = {}
-        self._scraper_times[scraper_name] = execution_time
+    async def _run_scraper(
+        self,
+        scraper_instance,
+        scraper_name: str,
+        location: str,
+        category: Optional[str],
+        limit: int,
+        budget: float = REQUEST_BUDGET
+    ):
+        """
+        ⏱️ EJECUCIÓN CON DEADLINE ADAPTATIVO
+
+        - Foreground: caché + scrape_events con deadline = p95 * margen (<= budget)
+        - Background (scraper lento/fallando): devuelve lo que haya en caché
+          (memoria o disco) al instante y corre el scraper aparte para llenarla.
+          Solo si el scraper cachea: sin caché el resultado aparte se perdería,
+          así que corre en foreground, pero recortado al budget del request
+
+        Cada ejecución real (no los hits de caché) alimenta scraper_latency.
+
+        Returns:
+            (eventos, estado_caché, deadline) — un timeout se propaga como
+            ScraperTimeout con el deadline aplicado
+        """
+        config = getattr(scraper_instance, 'config', None)
+        mode, deadline = scraper_latency.plan(scraper_name, location, budget)
+
+        async def fetch(timeout: float = deadline):
+            started = time.perf_counter()
+            try:
+                events = await asyncio.wait_for(
+                    scraper_instance.scrape_events(location, category, limit),
+                    timeout=timeout
+                )
+            except asyncio.TimeoutError:
+                scraper_latency.record(scraper_name, location, time.perf_counter() - started, TIMEOUT)
+                raise ScraperTimeout(timeout) from None
+            except Exception:
+                scraper_latency.record(scraper_name, location, time.perf_counter() - started, ERROR)
+                raise
+            scraper_latency.record(scraper_name, location, time.perf_counter() - started, SUCCESS if events else EMPTY)
+            return events
+
+        if mode == BACKGROUND and scraper_result_cache.is_enabled(config):
+            cached, cache_status = await scraper_result_cache.peek(scraper_name, config, location, category, limit)
+            if cache_status != 'hit':
+                launched = scraper_latency.run_in_background(
+                    scraper_name,
+                    location,
+                    lambda: scraper_result_cache.get_or_fetch(
+                        scraper_name, config, location, category, limit, fetch
+                    )
+                )
+                if launched:
+                    logger.info(f"🐢 {scraper_name.title()}Scraper: lento/fallando → background (caché: {cache_status})")
+            return cached or [], f"background_{cache_status}", deadline
+
+        if mode == BACKGROUND:
+            # Sin caché no hay background posible: nunca más que el budget del request
+            deadline = min(budget, deadline)
+
+        # Caché por (scraper, ubicación, categoría, límite) según ScraperConfig
+        events, cache_status = await scraper_result_cache.get_or_fetch(
+            scraper_name, config, location, category, limit, lambda: fetch(deadline)
+        )
+        return events, cache_status, deadline
     
     def _get_scraper_time(self, scraper_name: str) -> str:
-        """Obtiene tiempo formateado del scraper"""
-        if hasattr(self, '_scraper_times') and scraper_name in self._scraper_times:
-            return f"{self._scraper_times[scraper_name]:.2f}s"
-        return "0.0s"
+        """Obtiene tiempo formateado de la última ejecución real del scraper"""
+        duration = scraper_latency.last_duration(scraper_name)
+        return f"{duration:.2f}s" if duration is not None else "0.0s"
 
     async def execute_streaming(
         self,
@@ -378,9 +453,8 @@ class IndustrialFactory:
         # 🌍 ENRIQUECIMIENTO INTELIGENTE DE UBICACIÓN (UNA SOLA VEZ)
         enriched_location = await self._enrich_location_once(location, detected_country)
 
-        # Auto-descubrir scrapers
-        scrapers_map = self.discovery_engine.discover_all_scrapers()
-        global_scrapers = scrapers_map.get('global', {})
+        # Scrapers ya instanciados del registry del proceso (sin re-discovery)
+        global_scrapers = scraper_registry.borrow_global()
 
         if not global_scrapers:
             logger.warning("⚠️ No se encontraron scrapers globales")
@@ -440,7 +514,8 @@ class IndustrialFactory:
                         'execution_time': execution_time,
                         'success': status == 'success',
                         'error': error,
-                        'count': len(events)
+                        'count': len(events),
+                        'cache': result.get('cache')
                     }
 
                     logger.info(f"📡 STREAMED: {scraper_name.title()} - {len(events)} eventos en {execution_time}")
@@ -485,11 +560,11 @@ class IndustrialFactory:
             }
         """
 
-        cache_key = f"{location}_{detected_country or 'unknown'}"
+        cache_key = location_cache_key(location, detected_country)
 
-        # Verificar caché (persistente)
-        if cache_key in self._location_cache:
-            cached_data = self._location_cache[cache_key]
+        # Verificar caché (enrichment store compartido entre workers; SQLite fuera del loop)
+        cached_data = await asyncio.to_thread(self.get_cached_location, cache_key)
+        if cached_data is not None:
             logger.info(f"✅ CACHE HIT: '{location}' → {cached_data.get('city')}, {cached_data.get('state')}")
             return cached_data
 
@@ -504,20 +579,7 @@ class IndustrialFactory:
             #   "Moreno, Buenos Aires, Argentina" → base: "Moreno, Buenos Aires", país: "Argentina"
             #   "Paris, Francia" → base: "Paris", país: "Francia"
             #   "Salta" → base: "Salta", país: "Argentina" (fallback)
-            parts = [p.strip() for p in location.split(',')]
-
-            if len(parts) >= 3:
-                # 3 partes: localidad, provincia, país
-                extracted_country = parts[-1]
-                location_base = ', '.join(parts[:-1])  # "Moreno, Buenos Aires"
-            elif len(parts) == 2:
-                # 2 partes: ciudad, país
-                extracted_country = parts[-1]
-                location_base = parts[0]  # "Paris"
-            else:
-                # 1 parte: solo nombre
-                extracted_country = detected_country or 'Argentina'
-                location_base = location
+            location_base, extracted_country = split_location(location, detected_country)
 
             logger.info(f"🌍 Ubicación base: '{location_base}' | País: '{extracted_country}'")
 
@@ -541,7 +603,11 @@ Devuelve SOLO JSON válido con este formato EXACTO:
 Return ONLY valid JSON, sin explicaciones adicionales.
 """
 
-            response = await ai_service._call_gemini_api(prompt)
+            response = await ai_service._call_gemini_api(
+                prompt,
+                cache_template='nearby_cities',
+                cache_params={'location': location_base, 'country': extracted_country}
+            )
 
             # DEBUG: Ver respuesta de Gemini
             print(f"\n🤖 GEMINI RESPONSE for '{location}':\n{response}\n")
@@ -556,50 +622,14 @@ Return ONLY valid JSON, sin explicaciones adicionales.
                 enriched_data = json.loads(json_match.group())
 
                 # POST-PROCESAR nearby_cities para asegurar formato completo
-                raw_nearby = enriched_data.get('nearby_cities', [])
-                state = enriched_data.get('state', '')
-                country = enriched_data.get('country', extracted_country)
-
-                formatted_nearby = []
-                for city in raw_nearby:
-                    comma_count = city.count(',')
-
-                    if comma_count == 0:
-                        # Solo nombre: "Pinamar" → "Pinamar, Buenos Aires, Argentina"
-                        if state and country:
-                            formatted_nearby.append(f"{city}, {state}, {country}")
-                        elif country:
-                            formatted_nearby.append(f"{city}, {country}")
-                        else:
-                            formatted_nearby.append(city)
-                    elif comma_count == 1:
-                        # Nombre + algo: "Pinamar, Buenos Aires" → "Pinamar, Buenos Aires, Argentina"
-                        if country and country not in city:
-                            formatted_nearby.append(f"{city}, {country}")
-                        else:
-                            formatted_nearby.append(city)
-                    else:
-                        # Formato completo o más: dejar como está
-                        formatted_nearby.append(city)
-
-                logger.info(f"✅ Formatted nearby_cities: {formatted_nearby}")
-
-                enriched_location = {
-                    'original': location,
-                    'city': enriched_data.get('city', location),
-                    'state': state,
-                    'country': country,
-                    'nearby_cities': formatted_nearby,
-                    'needs_expansion': enriched_data.get('needs_expansion', False)
-                }
+                enriched_location = build_enriched_location(location, enriched_data, extracted_country)
+                logger.info(f"✅ Formatted nearby_cities: {enriched_location['nearby_cities']}")
 
-                # Guardar en caché (memoria + disco)
-                self._location_cache[cache_key] = enriched_location
-                self._save_location_cache()  # ← Persistir a disco
+                # Guardar en caché (una sola clave en el enrichment store)
+                await asyncio.to_thread(self.store_location, cache_key, enriched_location)
 
                 logger.info(f"🌍 ENRIQUECIDO: {location} → {enriched_location['city']}, {enriched_location['state']}, {enriched_location['country']}")
                 logger.info(f"📍 Ciudades cercanas: {enriched_location['nearby_cities']} (expandir: {enriched_location['needs_expansion']})")
-                logger.info(f"💾 Caché guardado en: {self._cache_file}")
 
                 return enriched_location
             else:
@@ -616,48 +646,32 @@ Return ONLY valid JSON, sin explicaciones adicionales.
                 'nearby_cities': [],
                 'needs_expansion': False
             }
-            self._location_cache[cache_key] = fallback
-            self._save_location_cache()  # ← Persistir fallback también
+            # Entrada negativa: TTL corto para volver a intentar más tarde
+            await asyncio.to_thread(self.store_location, cache_key, fallback, negative=True)
             return fallback
 
-    def _load_location_cache(self):
-        """💾 Carga caché de enriquecimientos desde JSON"""
-        import json
-        import os
+    def get_cached_location(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """💾 Ubicación enriquecida del store (None si no hay o venció)"""
+        cached = enrichment_store.get(LOCATION, cache_key)
+        return None if cached is MISS else cached
 
+    def store_location(self, cache_key: str, enriched_location: Dict[str, Any], negative: bool = False):
+        """💾 Guarda UNA ubicación (upsert atómico, visible para todos los workers)"""
         try:
-            if os.path.exists(self._cache_file):
-                with open(self._cache_file, 'r', encoding='utf-8') as f:
-                    cache_data = json.load(f)
-                    self._location_cache = cache_data.get('enrichments', {})
-                    logger.info(f"✅ Caché de ubicaciones cargado: {len(self._location_cache)} ubicaciones")
-            else:
-                logger.info("📝 Caché de ubicaciones vacío, se creará automáticamente")
+            enrichment_store.put(LOCATION, cache_key, enriched_location, negative=negative)
         except Exception as e:
-            logger.warning(f"⚠️ Error cargando caché de ubicaciones: {e}")
-            self._location_cache = {}
-
-    def _save_location_cache(self):
-        """💾 Guarda caché de enriquecimientos en JSON"""
-        import json
-        import os
+            logger.error(f"❌ Error guardando ubicación enriquecida: {e}")
 
+    def _migrate_legacy_cache(self):
+        """💾 Importa data/location_enrichments_cache.json al store (una vez)"""
         try:
-            os.makedirs(os.path.dirname(self._cache_file), exist_ok=True)
-
-            cache_data = {
-                'version': '1.0',
-                'last_updated': str(time.time()),
-                'enrichments': self._location_cache,
-                'metadata': {
-                    'total_enrichments': len(self._location_cache),
-                    'cache_file': self._cache_file
-                }
-            }
-
-            with open(self._cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, indent=2, ensure_ascii=False)
-
-            logger.info(f"💾 Caché de ubicaciones guardado: {len(self._location_cache)} ubicaciones")
+            if os.path.exists(self._legacy_cache_file):
+                with open(self._legacy_cache_file, 'r', encoding='utf-8') as f:
+                    enrichments = json.load(f).get('enrichments', {})
+                # Los fallbacks viejos (sin ciudades cercanas) no se migran: se reintentan
+                enrichments = {k: v for k, v in enrichments.items() if v.get('nearby_cities')}
+                enrichment_store.import_legacy(LOCATION, enrichments, 'location_enrichments_cache.json')
         except Exception as e:
-            logger.error(f"❌ Error guardando caché de ubicaciones: {e}")
\ No newline at end of file
+            logger.warning(f"⚠️ Error migrando caché de ubicaciones: {e}")
+        finally:
+            IndustrialFactory._legacy_cache_checked = True
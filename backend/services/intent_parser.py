@@ -0,0 +1,412 @@
+"""
+🧭 INTENT PARSER - Parser determinístico de búsquedas antes de la IA
+/api/ai/analyze-intent, smart_recommendations y universal_search mandaban a la IA
+consultas simples como "rock en Córdoba este finde". Casi todas se resuelven con lo
+que ya tenemos localmente:
+
+- Ubicación: nombres del gazetteer (data/regions, countries.py, aprendidos) + alias
+  de ai_chat ('la docta', 'bcn', 'mza'...)
+- Categoría: vocabulario de categorize_event (data/final_guide/scripts/event_utils.py)
+- Fecha: hoy, mañana, este finde, la semana que viene, el sábado, 15/11, 15 de noviembre
+- Precio: gratis, barato, vip...
+
+Todas las frases se compilan una vez en un trie de tokens; parse() recorre la consulta
+con match más largo (microsegundos). La confianza es la fracción de palabras con
+contenido que el parser entendió: por debajo de INTENT_FAST_PATH_THRESHOLD el
+llamador usa la IA como antes.
+"""
+
+import calendar
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Confianza mínima para responder sin IA
+FAST_PATH_THRESHOLD = float(os.getenv('INTENT_FAST_PATH_THRESHOLD', 0.75))
+
+# Largo máximo (en tokens) de una frase del trie
+MAX_PHRASE_TOKENS = 6
+
+LOCATION = 'location'
+CATEGORY = 'category'
+DATE = 'date'
+PRICE = 'price'
+
+# Alias coloquiales del location_mapping de ai_chat que el gazetteer no conoce
+CITY_ALIASES = {
+    'la docta': 'Córdoba',
+    'mza': 'Mendoza',
+    'bcn': 'Barcelona',
+    'barna': 'Barcelona',
+    'gdl': 'Guadalajara',
+    'seville': 'Sevilla',
+    'marsella': 'Marseille',
+    'santiago chile': 'Santiago',
+    'capital espana': 'Madrid',
+}
+
+# (categoría, subcategoría) con el mismo vocabulario que categorize_event
+CATEGORY_KEYWORDS: Dict[Tuple[str, Optional[str]], List[str]] = {
+    ('music', None): ['musica', 'music', 'concierto', 'concert', 'recital', 'banda', 'show', 'shows',
+                      'cantante', 'festival de musica', 'pena', 'en vivo', 'live'],
+    ('music', 'rock'): ['rock', 'punk', 'metal', 'hardcore'],
+    ('music', 'pop'): ['pop', 'k pop', 'kpop'],
+    ('music', 'jazz'): ['jazz', 'blues', 'soul'],
+    ('music', 'electronic'): ['electronica', 'electronic', 'techno', 'house', 'trance', 'edm', 'dj'],
+    ('music', 'folk'): ['folklore', 'folclore', 'tango', 'flamenco', 'cumbia', 'salsa', 'reggaeton', 'fado'],
+    ('music', 'classical'): ['clasica', 'classical', 'sinfonica', 'orquesta', 'opera', 'piano'],
+    ('music', 'hiphop'): ['hip hop', 'hiphop', 'rap', 'trap', 'reggae'],
+    ('sports', None): ['deporte', 'deportes', 'sport', 'sports'],
+    ('sports', 'football'): ['futbol', 'football', 'soccer', 'partido'],
+    ('sports', 'basketball'): ['basquet', 'basket', 'basketball'],
+    ('sports', 'tennis'): ['tenis', 'tennis'],
+    ('sports', 'running'): ['running', 'maraton', 'marathon', 'carrera', '5k', '10k', '21k'],
+    ('cultural', None): ['cultural', 'cultura', 'arte', 'art', 'exposicion', 'exhibition', 'muestra',
+                         'galeria', 'gallery', 'feria', 'visita guiada', 'tour'],
+    ('cultural', 'theater'): ['teatro', 'theater', 'theatre', 'obra', 'obra de teatro', 'musical'],
+    ('cultural', 'museum'): ['museo', 'museum'],
+    ('cultural', 'cinema'): ['cine', 'cinema', 'pelicula', 'film', 'documental'],
+    ('cultural', 'literature'): ['literatura', 'libro', 'feria del libro', 'lectura'],
+    ('nightlife', 'party'): ['fiesta', 'party', 'boliche', 'nightclub', 'disco', 'rave', 'after',
+                             'afterparty', 'bar', 'bares', 'salir de noche', 'joda'],
+    ('entertainment', 'comedy'): ['stand up', 'standup', 'comedia', 'comedy', 'humor', 'humorista'],
+    ('entertainment', 'circus'): ['circo', 'circus', 'magia', 'magic'],
+    ('food', None): ['gastronomia', 'gastronomico', 'comida', 'food', 'restaurante', 'cocina', 'chef',
+                     'degustacion', 'food truck', 'vino', 'wine', 'cerveza', 'beer', 'cata'],
+    ('tech', 'conference'): ['tech', 'tecnologia', 'technology', 'hackathon', 'conferencia',
+                             'conference', 'summit', 'networking', 'startup', 'meetup',
+                             'programacion', 'workshop'],
+}
+
+PRICE_KEYWORDS = {
+    'free': ['gratis', 'gratuito', 'gratuita', 'free', 'sin cargo', 'entrada libre',
+             'entrada libre y gratuita', 'de graca', 'gratuit'],
+    'cheap': ['barato', 'barata', 'economico', 'economica', 'low cost', 'cheap', 'accesible', 'precio bajo'],
+    'expensive': ['caro', 'cara', 'premium', 'vip', 'exclusivo', 'exclusiva', 'lujo', 'expensive'],
+}
+
+# Frases de fecha → preferencia (el rango se calcula al parsear)
+DATE_KEYWORDS = {
+    'today': ['hoy', 'today', 'esta noche', 'tonight', 'hoje', 'aujourd hui'],
+    'tomorrow': ['manana', 'tomorrow', 'amanha', 'demain'],
+    'day_after_tomorrow': ['pasado manana'],
+    'weekend': ['finde', 'fin de semana', 'fines de semana', 'weekend', 'fim de semana', 'week end'],
+    'this_week': ['esta semana', 'this week', 'essa semana', 'esta semana que corre'],
+    'next_week': ['semana que viene', 'proxima semana', 'next week', 'semana proxima'],
+    'this_month': ['este mes', 'this month', 'en el mes'],
+}
+
+WEEKDAYS = {
+    'lunes': 0, 'monday': 0, 'martes': 1, 'tuesday': 1, 'miercoles': 2, 'wednesday': 2,
+    'jueves': 3, 'thursday': 3, 'viernes': 4, 'friday': 4, 'sabado': 5, 'saturday': 5,
+    'domingo': 6, 'sunday': 6,
+}
+
+MONTHS = {
+    'enero': 1, 'febrero': 2, 'marzo': 3, 'abril': 4, 'mayo': 5, 'junio': 6, 'julio': 7,
+    'agosto': 8, 'septiembre': 9, 'setiembre': 9, 'octubre': 10, 'noviembre': 11, 'diciembre': 12,
+    'january': 1, 'february': 2, 'march': 3, 'april': 4, 'june': 6, 'july': 7, 'august': 8,
+    'september': 9, 'october': 10, 'november': 11, 'december': 12,
+}
+
+# Palabras sin contenido: no suman ni restan confianza
+STOPWORDS = frozenset('''
+a al algo alguna algun alguno algunos ahi alla aca buscar busco cerca che como con cual cuales de del le les
+donde el ella en entre es esta estan este esto hay hacer ir la las lo los me mi mis muy para pero por
+que quiero quisiera recomenda recomendame recomendas salir se ser sobre su sus te tengo tiene un una
+unas uno unos ver vamos y o u ya evento eventos plan planes actividad actividades cosas onda piola
+copado copada zona barrio ciudad
+an and any anything at best events event find for fun get good i in is me near of on or show me some
+something the these things this to want what whats where with
+em no na nos nas o os as um uma uns umas para com perto eventos coisas
+'''.split())
+
+_TOKEN = re.compile(r'[a-z0-9/]+')
+_NUMERIC_DATE = re.compile(r'^(\d{1,2})/(\d{1,2})(?:/(\d{2,4}))?$')
+
+
+def fold_query(text: str) -> List[str]:
+    """Minúsculas, sin acentos, tokens alfanuméricos ('/' se conserva para 15/11)"""
+    nfd = unicodedata.normalize('NFD', (text or '').lower())
+    without_accents = ''.join(c for c in nfd if unicodedata.category(c) != 'Mn')
+    return _TOKEN.findall(without_accents)
+
+
+@dataclass
+class ParsedIntent:
+    """Resultado de IntentParser.parse()"""
+    query: str
+    location: Optional[str] = None       # Nombre canónico del gazetteer
+    city: Optional[str] = None
+    province: Optional[str] = None
+    country: Optional[str] = None
+    metro_city: Optional[str] = None
+    category: Optional[str] = None       # music, sports, cultural, nightlife, entertainment, food, tech
+    subcategory: Optional[str] = None
+    date_preference: Optional[str] = None
+    date_from: Optional[str] = None      # ISO, inclusive
+    date_to: Optional[str] = None
+    price_preference: Optional[str] = None   # free | cheap | expensive
+    confidence: float = 0.0
+    matched: List[str] = field(default_factory=list)
+    unknown: List[str] = field(default_factory=list)
+    parse_us: float = 0.0
+
+    @property
+    def confident(self) -> bool:
+        return self.confidence >= FAST_PATH_THRESHOLD
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class IntentParser:
+    """
+    🧭 PARSER DE INTENCIONES SIN IA
+
+    Uso:
+        parsed = intent_parser.parse('rock en Córdoba este finde')
+        if parsed.confident:
+            ...  # ubicación, categoría, fechas y precio sin llamar a la IA
+    """
+
+    def __init__(self):
+        self._trie: Dict[str, Any] = {}
+        self._compiled = False
+        self._compile_lock = threading.Lock()
+        self._compile_ms = 0.0
+        self._stats = {'parses': 0, 'confident': 0}
+        self._parse_ns = 0
+
+    # ------------------------------------------------------------------ compilación
+
+    def _insert(self, phrase: str, slot: str, value: Any):
+        tokens = fold_query(phrase)
+        if not tokens or len(tokens) > MAX_PHRASE_TOKENS:
+            return
+        node = self._trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        # El primer valor registrado gana (las categorías específicas van antes)
+        node.setdefault('$', (slot, value))
+
+    def _insert_with_plural(self, phrase: str, slot: str, value: Any):
+        """Frase + su plural ('concierto' → 'conciertos', 'festival' → 'festivales')"""
+        self._insert(phrase, slot, value)
+        if phrase[-1] in 'aeiou':
+            self._insert(phrase + 's', slot, value)
+        elif phrase[-1] not in 'sx':
+            self._insert(phrase + 'es', slot, value)
+
+    def compile(self):
+        """Arma el trie una vez por proceso (gazetteer + vocabularios)"""
+        with self._compile_lock:
+            if self._compiled:
+                return
+            started = time.perf_counter()
+            self._trie = {}
+            # Orden de autoridad ante frases idénticas: fecha/precio/categoría antes que lugar
+            # ('mayo' es mes, no la Plaza de Mayo)
+            for preference, phrases in DATE_KEYWORDS.items():
+                for phrase in phrases:
+                    self._insert(phrase, DATE, preference)
+            for name, weekday in WEEKDAYS.items():
+                self._insert(name, DATE, ('weekday', weekday))
+            for preference, phrases in PRICE_KEYWORDS.items():
+                for phrase in phrases:
+                    self._insert_with_plural(phrase, PRICE, preference)
+            for category, phrases in sorted(CATEGORY_KEYWORDS.items(), key=lambda item: item[0][1] is None):
+                for phrase in phrases:
+                    self._insert_with_plural(phrase, CATEGORY, category)
+            for alias, city in CITY_ALIASES.items():
+                self._insert(alias, LOCATION, city)
+            try:
+                from services.gazetteer import gazetteer
+                for name in gazetteer.names():
+                    if len(name) >= 3 and name not in STOPWORDS:
+                        self._insert(name, LOCATION, name)
+            except Exception as e:
+                logger.warning(f"⚠️ Intent parser sin gazetteer: {e}")
+            self._compile_ms = (time.perf_counter() - started) * 1000
+            self._compiled = True
+            logger.info(f"🧭 Intent parser compilado en {self._compile_ms:.0f}ms")
+
+    # ------------------------------------------------------------------ parseo
+
+    def _longest_match(self, tokens: List[str], start: int) -> Tuple[int, Optional[Tuple[str, Any]]]:
+        node = self._trie
+        best_end, best_value = start, None
+        for index in range(start, min(len(tokens), start + MAX_PHRASE_TOKENS)):
+            node = node.get(tokens[index])
+            if node is None:
+                break
+            if '$' in node:
+                best_end, best_value = index + 1, node['$']
+        return best_end, best_value
+
+    @staticmethod
+    def _explicit_date(tokens: List[str], start: int, today: date) -> Tuple[int, Optional[date]]:
+        """'15/11', '15/11/2026', '15 de noviembre', '15 noviembre' → (fin, fecha)"""
+        token = tokens[start]
+        numeric = _NUMERIC_DATE.match(token)
+        if numeric:
+            day, month, year = int(numeric.group(1)), int(numeric.group(2)), numeric.group(3)
+            end = start + 1
+        elif token.isdigit() and len(token) <= 2:
+            index = start + 1
+            if index < len(tokens) and tokens[index] == 'de':
+                index += 1
+            if index >= len(tokens) or tokens[index] not in MONTHS:
+                return start, None
+            day, month, year = int(token), MONTHS[tokens[index]], None
+            end = index + 1
+        else:
+            return start, None
+
+        try:
+            if year:
+                full_year = int(year) + (2000 if len(year) == 2 else 0)
+                return end, date(full_year, month, day)
+            candidate = date(today.year, month, day)
+            # Sin año: la próxima ocurrencia
+            return end, candidate if candidate >= today else date(today.year + 1, month, day)
+        except ValueError:
+            return start, None
+
+    @staticmethod
+    def _date_range(preference: Any, today: date) -> Tuple[str, date, date]:
+        if isinstance(preference, tuple):
+            days_ahead = (preference[1] - today.weekday()) % 7
+            day = today + timedelta(days=days_ahead)
+            return 'weekday', day, day
+        if preference == 'today':
+            return preference, today, today
+        if preference == 'tomorrow':
+            return preference, today + timedelta(days=1), today + timedelta(days=1)
+        if preference == 'day_after_tomorrow':
+            return 'date', today + timedelta(days=2), today + timedelta(days=2)
+        if preference == 'weekend':
+            # Viernes a domingo; ya en el finde, desde hoy
+            if today.weekday() >= 4:
+                return preference, today, today + timedelta(days=6 - today.weekday())
+            friday = today + timedelta(days=4 - today.weekday())
+            return preference, friday, friday + timedelta(days=2)
+        if preference == 'this_week':
+            return preference, today, today + timedelta(days=6 - today.weekday())
+        if preference == 'next_week':
+            monday = today + timedelta(days=7 - today.weekday())
+            return preference, monday, monday + timedelta(days=6)
+        # this_month
+        last_day = calendar.monthrange(today.year, today.month)[1]
+        return preference, today, today.replace(day=last_day)
+
+    def parse(self, query: str, today: Optional[date] = None) -> ParsedIntent:
+        """Extrae ubicación, categoría, rango de fechas y precio; confianza 0..1"""
+        self.compile()
+        started = time.perf_counter_ns()
+        today = today or date.today()
+        result = ParsedIntent(query=query)
+
+        tokens = fold_query(query)
+        locations: List[str] = []
+        content = 0
+        recognized = 0
+        index = 0
+        while index < len(tokens):
+            end, explicit = self._explicit_date(tokens, index, today)
+            if explicit is not None:
+                if result.date_preference is None:
+                    result.date_preference = 'date'
+                    result.date_from = result.date_to = explicit.isoformat()
+                result.matched.append(' '.join(tokens[index:end]))
+                content += 1
+                recognized += 1
+                index = end
+                continue
+
+            end, match = self._longest_match(tokens, index)
+            if match is None:
+                token = tokens[index]
+                if token not in STOPWORDS:
+                    content += 1
+                    result.unknown.append(token)
+                index += 1
+                continue
+
+            slot, value = match
+            result.matched.append(' '.join(tokens[index:end]))
+            content += 1
+            recognized += 1
+            if slot == LOCATION:
+                locations.append(value)
+            elif slot == CATEGORY:
+                category, subcategory = value
+                # Un género ('rock') precisa a una categoría genérica ('show')
+                if result.category is None or (result.category == category and result.subcategory is None):
+                    result.category, result.subcategory = category, subcategory
+            elif slot == DATE and result.date_preference is None:
+                preference, date_from, date_to = self._date_range(value, today)
+                result.date_preference = preference
+                result.date_from, result.date_to = date_from.isoformat(), date_to.isoformat()
+            elif slot == PRICE and result.price_preference is None:
+                result.price_preference = value
+            index = end
+
+        if locations:
+            self._resolve_location(result, locations)
+            if result.location is None:
+                # Nombres sueltos que el gazetteer no pudo ubicar: no cuentan como entendidos
+                recognized -= len(locations)
+                result.unknown.extend(locations)
+
+        result.confidence = round(recognized / content, 3) if content else 0.0
+        elapsed = time.perf_counter_ns() - started
+        result.parse_us = round(elapsed / 1000, 1)
+        self._stats['parses'] += 1
+        self._stats['confident'] += int(result.confident)
+        self._parse_ns += elapsed
+        return result
+
+    @staticmethod
+    def _resolve_location(result: ParsedIntent, locations: List[str]):
+        """Primer lugar mencionado, calificado por los siguientes ('palermo buenos aires')"""
+        from services.gazetteer import CITY, gazetteer
+
+        place = None
+        if len(locations) > 1:
+            place = gazetteer.match(', '.join(locations))
+        if place is None:
+            place = gazetteer.match(locations[0])
+        if place is None:
+            return
+        result.location = place.name
+        # Un barrio busca en su ciudad; un país, en su ciudad por defecto
+        result.city = place.name if place.kind == CITY else place.metro_city
+        result.province = place.province or None
+        result.country = place.country or None
+        result.metro_city = place.metro_city
+
+    # ------------------------------------------------------------------ métricas
+
+    def get_stats(self) -> Dict[str, Any]:
+        parses = self._stats['parses']
+        return {
+            **self._stats,
+            'threshold': FAST_PATH_THRESHOLD,
+            'compiled': self._compiled,
+            'compile_ms': round(self._compile_ms, 1),
+            'avg_parse_us': round(self._parse_ns / parses / 1000, 2) if parses else 0.0,
+            'fast_path_rate': round(self._stats['confident'] / parses, 3) if parses else 0.0,
+        }
+
+
+# Instancia global compartida por todo el proceso
+intent_parser = IntentParser()
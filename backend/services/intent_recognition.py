@@ -6,6 +6,7 @@ Servicio para analizar strings de búsqueda y extraer ubicación estructurada
 import logging
 from typing import Dict, Any, Optional
 from services.ai_service import GeminiAIService
+from services.intent_parser import intent_parser
 
 logger = logging.getLogger(__name__)
 
@@ -56,7 +57,11 @@ class IntentRecognitionService:
                     "country": str,
                     "confidence": float,
                     "category": str,
-                    "type": str
+                    "type": str,
+                    "resolved_by": "fast_path" | "llm",
+                    "date_preference": str | None,
+                    "date_range": {"from": str, "to": str} | None,
+                    "price_preference": str | None
                 },
                 "apis": dict  # Para compatibilidad
             }
@@ -65,12 +70,25 @@ class IntentRecognitionService:
         try:
             logger.info(f"🧠 Analizando intent: '{query}'")
             
-            # Usar el servicio de IA existente para detectar ubicación
-            import time
-            start_time = time.time()
-            location_info = await self._detect_location_async(query)
-            ai_time = time.time() - start_time
-            logger.info(f"⏱️ GEMINI TIMING: {ai_time:.3f}s para detectar ubicación de '{query}'")
+            # ⚡ Fast path: parser determinístico (gazetteer + vocabularios), sin IA
+            parsed = intent_parser.parse(query)
+            if parsed.confident and parsed.location:
+                resolved_by = "fast_path"
+                location_info = {
+                    'city': parsed.city or parsed.location,
+                    'province': parsed.province or '',
+                    'country': parsed.country or '',
+                    'confidence': parsed.confidence
+                }
+                logger.info(f"⚡ Intent resuelto sin IA en {parsed.parse_us}µs: '{query}'")
+            else:
+                # Usar el servicio de IA existente para detectar ubicación
+                import time
+                resolved_by = "llm"
+                start_time = time.time()
+                location_info = await self._detect_location_async(query)
+                ai_time = time.time() - start_time
+                logger.info(f"⏱️ GEMINI TIMING: {ai_time:.3f}s para detectar ubicación de '{query}' (parser: {parsed.confidence})")
             
             # Detectar categoría básica (por ahora simple)
             category = self._detect_category(query)
@@ -85,6 +103,12 @@ class IntentRecognitionService:
                 "category": category,
                 "type": "location_search",
                 "keywords": query.split(),
+                "resolved_by": resolved_by,
+                # Fecha y precio salen siempre del parser (la IA solo detecta ubicación)
+                "date_preference": parsed.date_preference,
+                "date_range": {"from": parsed.date_from, "to": parsed.date_to} if parsed.date_from else None,
+                "price_preference": parsed.price_preference,
+                "parse_us": parsed.parse_us,
                 # Jerarquía para factory pattern
                 "geographic_hierarchy": {
                     "country": location_info.get('country', ''),
@@ -126,7 +150,8 @@ class IntentRecognitionService:
                     "confidence": 0.1,
                     "category": "general",
                     "type": "location_search",
-                    "keywords": query.split()
+                    "keywords": query.split(),
+                    "resolved_by": "fallback"
                 },
                 "apis": {
                     "location": query,
@@ -0,0 +1,433 @@
+"""
+🌍 LOCATION ENRICHMENT BATCH - Enriquecimiento de N ubicaciones por llamada a la IA
+IndustrialFactory._enrich_location_once y GeminiFactory.get_parent_location mandan
+un prompt por ubicación: calentar la caché para los cientos de ciudades de
+data/regions costaba cientos de round trips secuenciales.
+
+- Un prompt estructurado con N ubicaciones → un array JSON de vuelta
+- Cada item se valida por separado; solo los que fallan van al camino individual
+- Los items válidos llenan el enrichment store de IndustrialFactory (mismo formato y clave)
+  y las ciudades padre (PARENT_CITY) que consulta get_parent_location
+- CLI para pre-calentar todas las ciudades de data/regions con concurrencia acotada
+
+Fuera del batch: nearby_cities_service no llama a la IA (tabla curada en código)
+y get_nearby_cities_with_ai (/api/ai/nearby-cities) pide hasta `limit` ciudades
+con distancia y coordenadas para UNA ubicación interactiva; ese formato no entra
+en este prompt y sigue individual, cacheado por la caché de prompts.
+
+Uso:
+    python -m services.location_enrichment_batch --regions data/regions
+    python -m services.location_enrichment_batch --country Argentina --include-barrios
+    python -m services.location_enrichment_batch --dry-run
+"""
+
+import asyncio
+import glob
+import json
+import logging
+import os
+import re
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from services.location_index import fold_location
+
+logger = logging.getLogger(__name__)
+
+# Ubicaciones por prompt y prompts en vuelo a la vez
+BATCH_SIZE = int(os.getenv('LOCATION_ENRICH_BATCH_SIZE', 15))
+BATCH_CONCURRENCY = int(os.getenv('LOCATION_ENRICH_CONCURRENCY', 3))
+
+REGIONS_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'regions')
+
+DEFAULT_COUNTRY = 'Argentina'
+
+_JSON_ARRAY = re.compile(r'\[.*\]', re.DOTALL)
+
+
+# ============================================================================
+# FORMATO COMPARTIDO CON IndustrialFactory._enrich_location_once
+# ============================================================================
+
+def split_location(location: str, detected_country: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Separa la ubicación base del país
+
+    "Moreno, Buenos Aires, Argentina" → ("Moreno, Buenos Aires", "Argentina")
+    "Paris, Francia" → ("Paris", "Francia")
+    "Salta" → ("Salta", detected_country o Argentina)
+    """
+    parts = [p.strip() for p in location.split(',')]
+    if len(parts) >= 3:
+        return ', '.join(parts[:-1]), parts[-1]
+    if len(parts) == 2:
+        return parts[0], parts[-1]
+    return location, detected_country or DEFAULT_COUNTRY
+
+
+def location_cache_key(location: str, detected_country: Optional[str] = None) -> str:
+    """Clave de las ubicaciones de IndustrialFactory en el enrichment store"""
+    return f"{location}_{detected_country or 'unknown'}"
+
+
+def format_nearby_cities(raw_nearby: Iterable[str], state: str, country: str) -> List[str]:
+    """Completa cada ciudad cercana a 'Ciudad, Provincia/Estado, País'"""
+    formatted = []
+    for city in raw_nearby:
+        comma_count = city.count(',')
+        if comma_count == 0:
+            # Solo nombre: "Pinamar" → "Pinamar, Buenos Aires, Argentina"
+            if state and country:
+                formatted.append(f"{city}, {state}, {country}")
+            elif country:
+                formatted.append(f"{city}, {country}")
+            else:
+                formatted.append(city)
+        elif comma_count == 1 and country and country not in city:
+            # Nombre + algo: "Pinamar, Buenos Aires" → "Pinamar, Buenos Aires, Argentina"
+            formatted.append(f"{city}, {country}")
+        else:
+            formatted.append(city)
+    return formatted
+
+
+def build_enriched_location(location: str, data: Dict[str, Any], extracted_country: str) -> Dict[str, Any]:
+    """Arma el dict de ubicación enriquecida a partir de la respuesta de la IA"""
+    state = data.get('state') or ''
+    country = data.get('country') or extracted_country
+    return {
+        'original': location,
+        'city': data.get('city') or location,
+        'state': state,
+        'country': country,
+        'nearby_cities': format_nearby_cities(data.get('nearby_cities') or [], state, country),
+        'needs_expansion': bool(data.get('needs_expansion', False)),
+    }
+
+
+# ============================================================================
+# PROMPT Y VALIDACIÓN DEL BATCH
+# ============================================================================
+
+def build_batch_prompt(items: List[Tuple[str, str]]) -> str:
+    """
+    Args:
+        items: [(location_base, country), ...] — el id de cada uno es su posición
+    """
+    lines = '\n'.join(
+        f'{index}. "{base}" (país: {country})' for index, (base, country) in enumerate(items)
+    )
+    return f"""Para cada ubicación de la lista, buscame 3 ciudades cercanas y decime si es un
+BARRIO/SUBURBIO de una ciudad más grande o una CIUDAD INDEPENDIENTE.
+
+UBICACIONES:
+{lines}
+
+IMPORTANTE:
+- Las ciudades cercanas DEBEN estar en el mismo país que la ubicación
+- Formato OBLIGATORIO para cada ciudad cercana: "Ciudad, Provincia/Estado, País"
+- parent_city: nombre de la ciudad principal si es barrio/suburbio (ej: Tigre → "Buenos Aires"),
+  "PRINCIPAL" si es ciudad independiente, "AMBIGUO" si hay varios lugares con ese nombre
+- Un objeto por ubicación, con el mismo "id" de la lista
+
+Devuelve SOLO un array JSON válido con este formato EXACTO:
+
+[
+    {{
+        "id": 0,
+        "city": "nombre_ciudad_original",
+        "state": "provincia_o_estado",
+        "country": "país",
+        "nearby_cities": ["Ciudad1, Estado1, País", "Ciudad2, Estado2, País", "Ciudad3, Estado3, País"],
+        "needs_expansion": true,
+        "parent_city": "PRINCIPAL"
+    }}
+]
+
+Return ONLY valid JSON, sin explicaciones adicionales.
+"""
+
+
+def validate_item(item: Any) -> Optional[Dict[str, Any]]:
+    """Item del array con los campos mínimos, o None si no sirve"""
+    if not isinstance(item, dict):
+        return None
+    city = item.get('city')
+    nearby = item.get('nearby_cities')
+    if not isinstance(city, str) or not city.strip():
+        return None
+    if not isinstance(nearby, list) or not nearby or not all(isinstance(c, str) and c.strip() for c in nearby):
+        return None
+    for field_name in ('state', 'country'):
+        if item.get(field_name) is not None and not isinstance(item[field_name], str):
+            return None
+    parent = item.get('parent_city')
+    if parent is not None and (not isinstance(parent, str) or len(parent) >= 100):
+        return None
+    return item
+
+
+def parse_batch_response(response: Optional[str], count: int) -> Dict[int, Dict[str, Any]]:
+    """
+    Parsea el array y valida cada item por separado
+
+    Returns:
+        {posición: item válido} — las posiciones que faltan van al camino individual
+    """
+    if not response:
+        return {}
+    match = _JSON_ARRAY.search(response)
+    if not match:
+        return {}
+    try:
+        items = json.loads(match.group())
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(items, list):
+        return {}
+
+    valid: Dict[int, Dict[str, Any]] = {}
+    for position, item in enumerate(items):
+        index = item.get('id', position) if isinstance(item, dict) else position
+        try:
+            index = int(index)
+        except (TypeError, ValueError):
+            continue
+        if not 0 <= index < count or index in valid:
+            continue
+        checked = validate_item(item)
+        if checked is not None:
+            valid[index] = checked
+    return valid
+
+
+# ============================================================================
+# ENRIQUECEDOR
+# ============================================================================
+
+class LocationBatchEnricher:
+    """
+    🌍 ENRIQUECIMIENTO POR LOTES
+
+    Uso:
+        results = await location_batch_enricher.enrich(['Tigre, Buenos Aires, Argentina', ...])
+        # {'Tigre, Buenos Aires, Argentina': {'city': ..., 'nearby_cities': [...]}, ...}
+    """
+
+    def __init__(self, batch_size: int = BATCH_SIZE, concurrency: int = BATCH_CONCURRENCY):
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self._stats = {
+            'locations': 0,
+            'cache_hits': 0,
+            'batch_calls': 0,
+            'batch_items_ok': 0,
+            'fallback_calls': 0,
+            'parent_cities_primed': 0,
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        batched = self._stats['batch_items_ok'] + self._stats['fallback_calls']
+        return {
+            **self._stats,
+            'batch_size': self.batch_size,
+            'concurrency': self.concurrency,
+            'batch_success_rate': round(self._stats['batch_items_ok'] / batched, 3) if batched else 0.0,
+        }
+
+    async def enrich(
+        self,
+        locations: Iterable[str],
+        detected_country: Optional[str] = None,
+        priority: Optional[int] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Enriquece muchas ubicaciones con un prompt cada batch_size
+
+        Args:
+            locations: Ubicaciones tal como las recibe _enrich_location_once
+            detected_country: País detectado (mismo significado que en _enrich_location_once)
+            priority: Priority del scheduler de IA (None = sin cola)
+
+        Returns:
+            {ubicación: dict enriquecido} con el formato de IndustrialFactory
+        """
+        from services.industrial_factory import IndustrialFactory
+
+        factory = IndustrialFactory()
+        unique = list(dict.fromkeys(loc.strip() for loc in locations if loc and loc.strip()))
+        self._stats['locations'] += len(unique)
+
+        results: Dict[str, Dict[str, Any]] = {}
+        pending: List[str] = []
+        # Una sola pasada por el store fuera del event loop (SQLite es síncrono)
+        lookups = await asyncio.to_thread(
+            lambda: [factory.get_cached_location(location_cache_key(location, detected_country)) for location in unique]
+        )
+        for location, cached in zip(unique, lookups):
+            if cached is not None:
+                results[location] = cached
+            else:
+                pending.append(location)
+        self._stats['cache_hits'] += len(unique) - len(pending)
+
+        if not pending:
+            return results
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+
+        async def run(batch: List[str]):
+            async with semaphore:
+                results.update(await self._enrich_batch(factory, batch, detected_country, priority))
+
+        await asyncio.gather(*(run(batch) for batch in batches))
+        return results
+
+    async def _enrich_batch(
+        self,
+        factory,
+        batch: List[str],
+        detected_country: Optional[str],
+        priority: Optional[int]
+    ) -> Dict[str, Dict[str, Any]]:
+        from services.ai_service import GeminiAIService
+
+        split = [split_location(location, detected_country) for location in batch]
+        try:
+            # Sin caché de prompts: el texto depende de cómo se agrupó el batch
+            response = await GeminiAIService()._call_gemini_api(
+                build_batch_prompt(split), cache=False, priority=priority
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Batch de {len(batch)} ubicaciones falló: {e}")
+            response = None
+        self._stats['batch_calls'] += 1
+
+        valid = parse_batch_response(response, len(batch))
+        self._stats['batch_items_ok'] += len(valid)
+
+        results: Dict[str, Dict[str, Any]] = {}
+        for index, item in valid.items():
+            location = batch[index]
+            base, country = split[index]
+            enriched = build_enriched_location(location, item, country)
+            await asyncio.to_thread(factory.store_location, location_cache_key(location, detected_country), enriched)
+            results[location] = enriched
+            await asyncio.to_thread(self._prime_parent_city, base, item.get('parent_city'))
+        failed = [location for index, location in enumerate(batch) if index not in valid]
+        if failed:
+            logger.info(f"🔁 {len(failed)}/{len(batch)} ubicaciones del batch van al camino individual")
+            self._stats['fallback_calls'] += len(failed)
+            # De a una: este batch ya ocupa un lugar del semáforo y, si el batch
+            # falló entero, el provider probablemente también está fallando
+            for location in failed:
+                results[location] = await factory._enrich_location_once(location, detected_country)
+
+        logger.info(f"🌍 Batch: {len(valid)}/{len(batch)} ubicaciones en 1 llamada")
+        return results
+
+    def _prime_parent_city(self, location_base: str, parent_city: Optional[str]):
+        """Deja la respuesta donde la busca GeminiFactory.get_parent_location (AMBIGUO no se guarda)"""
+        if not parent_city or parent_city.strip().upper() == 'AMBIGUO':
+            return
+        from services.enrichment_store import PARENT_CITY, enrichment_store
+
+        # Misma clave y valores que get_parent_location: None = ciudad principal
+        key = location_base.split(',')[0].lower().strip()
+        value = None if parent_city.strip().upper() == 'PRINCIPAL' else parent_city.strip()
+        enrichment_store.put(PARENT_CITY, key, value)
+        self._stats['parent_cities_primed'] += 1
+
+
+# ============================================================================
+# PRE-CALENTADO DESDE data/regions
+# ============================================================================
+
+def iter_region_locations(
+    regions_dir: str = REGIONS_DIR,
+    country: Optional[str] = None,
+    include_barrios: bool = False
+) -> List[str]:
+    """
+    Ubicaciones "Ciudad, Subdivisión, País" de todos los JSON de data/regions
+
+    Cada país nombra distinto sus subdivisiones (provinces, states, communities...):
+    se toma toda lista cuyos items tengan 'cities'.
+    """
+    wanted = fold_location(country) if country else None
+    locations: List[str] = []
+    for path in sorted(glob.glob(os.path.join(regions_dir, '**', '*.json'), recursive=True)):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"⚠️ No se pudo leer {path}: {e}")
+            continue
+
+        country_name = data.get('country')
+        if not country_name or (wanted and fold_location(country_name) != wanted):
+            continue
+
+        for value in data.values():
+            if not isinstance(value, list):
+                continue
+            for subdivision in value:
+                if not isinstance(subdivision, dict) or not isinstance(subdivision.get('cities'), list):
+                    continue
+                for city in subdivision['cities']:
+                    if not city.get('name'):
+                        continue
+                    locations.append(f"{city['name']}, {subdivision.get('name') or country_name}, {country_name}")
+                    if include_barrios:
+                        locations.extend(
+                            f"{barrio['name']}, {city['name']}, {country_name}"
+                            for barrio in city.get('barrios', []) if barrio.get('name')
+                        )
+    return list(dict.fromkeys(locations))
+
+
+# Instancia global compartida por todo el proceso
+location_batch_enricher = LocationBatchEnricher()
+
+
+def main(argv: Optional[List[str]] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Pre-calentar la caché de enriquecimiento de ubicaciones')
+    parser.add_argument('--regions', default=REGIONS_DIR, help='Directorio data/regions')
+    parser.add_argument('--country', help='Solo un país (ej: Argentina)')
+    parser.add_argument('--include-barrios', action='store_true', help='Incluir barrios de cada ciudad')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--concurrency', type=int, default=BATCH_CONCURRENCY)
+    parser.add_argument('--limit', type=int, help='Máximo de ubicaciones a procesar')
+    parser.add_argument('--dry-run', action='store_true', help='Solo listar ubicaciones')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    locations = iter_region_locations(args.regions, args.country, args.include_barrios)
+    if args.limit:
+        locations = locations[:args.limit]
+
+    if args.dry_run:
+        for location in locations:
+            print(location)
+        print(f"📍 {len(locations)} ubicaciones")
+        return 0
+
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    enricher = LocationBatchEnricher(batch_size=args.batch_size, concurrency=args.concurrency)
+    started = time.monotonic()
+    results = asyncio.run(enricher.enrich(locations))
+    stats = enricher.get_stats()
+    print(f"✅ {len(results)}/{len(locations)} ubicaciones en caché en {time.monotonic() - started:.1f}s "
+          f"({stats['cache_hits']} ya estaban, {stats['batch_calls']} llamadas batch, "
+          f"{stats['fallback_calls']} individuales)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,368 @@
+"""
+📍 LOCATION INDEX - Índice normalizado de ubicaciones por evento
+Claves de ubicación sin acentos (país, provincia, ciudad, barrio + alias como CABA)
+guardadas en la tabla lateral event_location_keys con índice sobre loc_key.
+
+Reemplaza los LIKE '%x%' de search_events_by_location por búsquedas indexadas
+de igualdad / prefijo.
+
+La búsqueda solo usa el índice cuando existe la fila marcador de backfill completo
+(la escribe --backfill sin --since al terminar); antes sigue con LIKE. Los
+importadores indexan sus inserts únicamente si la tabla ya fue creada por la CLI.
+
+Uso (migración + backfill de la tabla existente):
+    python -m services.location_index --migrate --backfill
+    python -m services.location_index --backfill --batch-size 2000
+    python -m services.location_index --backfill --since 2025-11-01
+"""
+
+import logging
+import re
+import sys
+import time
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+LOCATION_KEYS_TABLE = 'event_location_keys'
+
+# Largo máximo de una clave (debe coincidir con la columna loc_key)
+MAX_KEY_LENGTH = 150
+
+# Niveles geográficos indexados (columna de events -> nivel)
+LOCATION_LEVELS = ('country', 'province', 'city', 'neighborhood')
+
+# Alias conocidos: cada grupo se expande completo (cualquier variante encuentra a todas)
+LOCATION_ALIAS_GROUPS = [
+    ['buenos aires', 'caba', 'c.a.b.a.', 'ciudad de buenos aires', 'ciudad autonoma de buenos aires',
+     'capital federal', 'bsas', 'bs as'],
+    ['ciudad de mexico', 'mexico city', 'cdmx', 'df', 'mexico df'],
+    ['sao paulo', 'sampa'],
+    ['rio de janeiro', 'rio'],
+    ['nueva york', 'new york', 'new york city', 'nyc'],
+    ['estados unidos', 'usa', 'united states', 'eeuu', 'ee.uu.'],
+    ['espana', 'spain'],
+    ['mexico', 'mejico'],
+    ['brasil', 'brazil'],
+    ['mar del plata', 'mardel', 'mdq'],
+    ['cordoba capital', 'cordoba'],
+]
+
+CREATE_TABLE_SQL = f"""
+CREATE TABLE IF NOT EXISTS {LOCATION_KEYS_TABLE} (
+    event_id VARCHAR(64) NOT NULL,
+    loc_key VARCHAR({MAX_KEY_LENGTH}) NOT NULL,
+    level VARCHAR(24) NOT NULL,
+    PRIMARY KEY (loc_key, event_id),
+    KEY idx_location_keys_event (event_id),
+    KEY idx_location_keys_level (level, loc_key)
+) DEFAULT CHARSET=utf8mb4
+"""
+
+# Fila marcador: el backfill completo terminó y el índice cubre toda la tabla events.
+# Las claves reales pasan por fold_location (solo [a-z0-9 ]), así que nunca colisionan.
+BACKFILL_MARKER = ('__index__', '__backfill_complete__', 'meta')
+
+# Cada cuánto se vuelve a preguntar si la tabla existe cuando no existía (segundos)
+TABLE_RECHECK_SECONDS = 60
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+
+def fold_location(value: Optional[str]) -> str:
+    """
+    Normaliza un nombre de ubicación para indexar/buscar
+    'Córdoba ' -> 'cordoba', 'São Paulo' -> 'sao paulo', 'C.A.B.A.' -> 'c a b a'
+    """
+    if not value:
+        return ''
+    nfd = unicodedata.normalize('NFD', str(value).lower())
+    without_accents = ''.join(c for c in nfd if unicodedata.category(c) != 'Mn')
+    return _NON_ALNUM.sub(' ', without_accents).strip()[:MAX_KEY_LENGTH]
+
+
+def _build_alias_map() -> Dict[str, Set[str]]:
+    alias_map: Dict[str, Set[str]] = {}
+    for group in LOCATION_ALIAS_GROUPS:
+        folded_group = {fold_location(alias) for alias in group}
+        for alias in folded_group:
+            alias_map.setdefault(alias, set()).update(folded_group)
+    return alias_map
+
+
+_ALIAS_MAP = _build_alias_map()
+
+
+def expand_aliases(folded: str) -> Set[str]:
+    """Devuelve la clave + todos sus alias conocidos (ya normalizados)"""
+    if not folded:
+        return set()
+    return {folded} | _ALIAS_MAP.get(folded, set())
+
+
+def build_location_keys(event: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """
+    Construye el set de claves (loc_key, level) de un evento
+
+    Para cada campo geográfico se indexa:
+    - el valor completo normalizado y sus alias (nivel = campo; provincia sin alias)
+    - cada sufijo desde un límite de palabra ('villa carlos paz' -> 'carlos paz', 'paz')
+      con nivel '<campo>_word', para que una búsqueda por prefijo encuentre palabras internas
+
+    Args:
+        event: Dict con country/province/city/neighborhood (faltantes se ignoran)
+
+    Returns:
+        Lista de tuplas únicas (loc_key, level)
+    """
+    keys: Dict[Tuple[str, str], None] = {}
+
+    for level in LOCATION_LEVELS:
+        folded = fold_location(event.get(level))
+        if not folded:
+            continue
+
+        # Los alias son de ciudad/país: en provincia solo el valor propio
+        # (evita que 'Buenos Aires' provincia responda a búsquedas de CABA)
+        level_keys = [folded] if level == 'province' else sorted(expand_aliases(folded))
+        for key in level_keys:
+            keys[(key, level)] = None
+
+        words = folded.split()
+        for i in range(1, len(words)):
+            keys[(' '.join(words[i:]), f'{level}_word')] = None
+
+    return list(keys)
+
+
+def resolve_search_keys(location: str) -> Tuple[List[str], str]:
+    """
+    Claves exactas + prefijo a consultar para una ubicación de búsqueda
+
+    Returns:
+        (keys_exactas_con_alias, prefijo_normalizado)
+    """
+    folded = fold_location(location)
+    return sorted(expand_aliases(folded)), folded
+
+
+# ============================================================================
+# 🔧 MANTENIMIENTO (DB-API cursor, paramstyle %s - pymysql)
+# ============================================================================
+
+def ensure_location_index(cursor):
+    """Crea la tabla event_location_keys si no existe (solo desde la CLI --migrate)"""
+    cursor.execute(CREATE_TABLE_SQL)
+
+
+_table_exists = False
+_table_checked_at: Optional[float] = None
+
+
+def location_index_exists(cursor) -> bool:
+    """
+    ¿Ya se migró la tabla event_location_keys?
+
+    Los importadores no la crean: si no existe, index_events() no hace nada y el
+    backfill posterior indexa esas filas. Un "sí" se recuerda para todo el proceso;
+    un "no" se vuelve a consultar cada TABLE_RECHECK_SECONDS.
+    """
+    global _table_exists, _table_checked_at
+    now = time.monotonic()
+    if _table_exists or (_table_checked_at is not None and now - _table_checked_at < TABLE_RECHECK_SECONDS):
+        return _table_exists
+    cursor.execute("SHOW TABLES LIKE %s", (LOCATION_KEYS_TABLE,))
+    _table_exists = cursor.fetchone() is not None
+    _table_checked_at = now
+    return _table_exists
+
+
+def mark_backfill_complete(cursor):
+    """Escribe la fila marcador que habilita la búsqueda indexada"""
+    cursor.execute(
+        f"INSERT IGNORE INTO {LOCATION_KEYS_TABLE} (event_id, loc_key, level) VALUES (%s, %s, %s)",
+        BACKFILL_MARKER
+    )
+
+
+def index_events(cursor, events: Iterable[Dict[str, Any]], replace: bool = True) -> int:
+    """
+    Indexa (o re-indexa) las claves de ubicación de varios eventos
+
+    Llamar después de cada INSERT/UPDATE de events que toque country/province/
+    city/neighborhood. Usa executemany para escribir todas las claves de una vez.
+    Si la tabla todavía no fue migrada no escribe nada (ver location_index_exists).
+
+    Args:
+        cursor: Cursor DB-API (pymysql)
+        events: Dicts con 'id' y los campos geográficos
+        replace: Si True borra primero las claves previas de esos eventos
+
+    Returns:
+        Cantidad de claves escritas
+    """
+    rows = []
+    event_ids = []
+    for event in events:
+        event_id = event.get('id')
+        if not event_id:
+            continue
+        event_ids.append(str(event_id))
+        rows.extend((str(event_id), key, level) for key, level in build_location_keys(event))
+
+    if not event_ids or not location_index_exists(cursor):
+        return 0
+
+    if replace:
+        placeholders = ', '.join(['%s'] * len(event_ids))
+        cursor.execute(
+            f"DELETE FROM {LOCATION_KEYS_TABLE} WHERE event_id IN ({placeholders})",
+            event_ids
+        )
+
+    if rows:
+        cursor.executemany(
+            f"INSERT IGNORE INTO {LOCATION_KEYS_TABLE} (event_id, loc_key, level) VALUES (%s, %s, %s)",
+            rows
+        )
+    return len(rows)
+
+
+def index_event(cursor, event_id: str, event: Dict[str, Any]) -> int:
+    """Atajo para indexar un solo evento recién insertado/actualizado"""
+    return index_events(cursor, [{**event, 'id': event_id}])
+
+
+def backfill(connection, batch_size: int = 1000, since: Optional[str] = None) -> Dict[str, Any]:
+    """
+    📦 BACKFILL de event_location_keys para la tabla events existente
+
+    Recorre events por keyset (id) en lotes y re-indexa cada lote en una transacción.
+    Un backfill completo (sin `since`) escribe al final la fila marcador que
+    habilita la búsqueda indexada en events_db_service.
+
+    Args:
+        connection: Conexión DB-API (pymysql)
+        batch_size: Eventos por lote
+        since: Solo eventos con updated_at >= since (YYYY-MM-DD) para re-sincronizar
+
+    Returns:
+        Estadísticas del backfill
+    """
+    cursor = connection.cursor()
+    start = time.time()
+    last_id = ''
+    total_events = 0
+    total_keys = 0
+
+    while True:
+        query = f"""
+            SELECT id, country, province, city, neighborhood
+            FROM events
+            WHERE id > %s {'AND updated_at >= %s' if since else ''}
+            ORDER BY id
+            LIMIT %s
+        """
+        params = (last_id, since, batch_size) if since else (last_id, batch_size)
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        if not rows:
+            break
+
+        events = [_row_to_event(row) for row in rows]
+        total_keys += index_events(cursor, events)
+        connection.commit()
+
+        total_events += len(events)
+        last_id = events[-1]['id']
+        logger.info(f"📍 Backfill: {total_events} eventos indexados ({total_keys} claves)")
+
+    if not since:
+        mark_backfill_complete(cursor)
+        connection.commit()
+
+    cursor.close()
+    elapsed = time.time() - start
+    return {
+        'events': total_events,
+        'keys': total_keys,
+        'elapsed_s': round(elapsed, 2),
+        'events_per_s': round(total_events / elapsed, 1) if elapsed > 0 else total_events
+    }
+
+
+def _row_to_event(row) -> Dict[str, Any]:
+    if isinstance(row, dict):
+        return {**row, 'id': str(row['id'])}
+    return {
+        'id': str(row[0]),
+        'country': row[1],
+        'province': row[2],
+        'city': row[3],
+        'neighborhood': row[4]
+    }
+
+
+def connect_db():
+    """
+    Conexión DB-API cruda a partir de DATABASE_URL (mismo origen que events_db_service)
+
+    Compartida por los CLIs de location_index, event_bulk_loader y event_insights
+    """
+    import os
+    from dotenv import load_dotenv
+    from sqlalchemy import create_engine
+
+    load_dotenv()
+    db_url = os.getenv('DATABASE_URL')
+    connect_args = {}
+    if db_url and db_url.startswith('mysql+pymysql'):
+        from pymysql.constants import CLIENT
+        # Mismo rowcount que las conexiones de los importadores (ver event_bulk_loader)
+        connect_args['client_flag'] = CLIENT.FOUND_ROWS
+    engine = create_engine(db_url, connect_args=connect_args)
+    return engine.raw_connection()
+
+
+def main(argv: Optional[List[str]] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Índice normalizado de ubicaciones de eventos')
+    parser.add_argument('--migrate', action='store_true', help='Crear tabla event_location_keys')
+    parser.add_argument('--backfill', action='store_true', help='Indexar eventos existentes')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--since', help='Solo eventos actualizados desde YYYY-MM-DD')
+    args = parser.parse_args(argv)
+
+    if not (args.migrate or args.backfill):
+        parser.print_help()
+        return 1
+
+    logging.basicConfig(level=logging.INFO)
+    connection = connect_db()
+    try:
+        if args.migrate:
+            cursor = connection.cursor()
+            ensure_location_index(cursor)
+            connection.commit()
+            cursor.close()
+            print(f"✅ Tabla {LOCATION_KEYS_TABLE} lista")
+
+        if args.backfill:
+            cursor = connection.cursor()
+            exists = location_index_exists(cursor)
+            cursor.close()
+            if not exists:
+                print(f"❌ La tabla {LOCATION_KEYS_TABLE} no existe: correr con --migrate --backfill")
+                return 1
+            stats = backfill(connection, batch_size=args.batch_size, since=args.since)
+            print(f"✅ Backfill completado: {stats['events']} eventos, {stats['keys']} claves "
+                  f"en {stats['elapsed_s']}s ({stats['events_per_s']} eventos/s)")
+    finally:
+        connection.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+🔗 REQUEST COALESCER - Single-flight para búsquedas idénticas concurrentes
+Si llegan N requests iguales (misma ubicación/categoría/límite/parent_city) mientras
+el primero todavía calcula, los N-1 restantes esperan ese mismo resultado en vez
+de repetir la query, el prompt de IA o el fan-out de scrapers.
+
+Cada recurso tiene su propio scope (db, ai, scraper_fanout, image) para que un cálculo
+lento de uno no bloquee a los otros y los contadores se lean por separado.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from services.location_index import fold_location
+
+logger = logging.getLogger(__name__)
+
+
+def search_key(
+    location: Optional[str],
+    category: Optional[str] = None,
+    limit: Optional[int] = None,
+    parent_city: Optional[str] = None
+) -> Tuple[str, str, int, str]:
+    """Clave normalizada (location, category, limit, parent_city) sin acentos ni mayúsculas"""
+    return (
+        fold_location(location),
+        (category or '').strip().lower(),
+        int(limit or 0),
+        fold_location(parent_city),
+    )
+
+
+class SingleFlight:
+    """
+    🔗 SCOPE DE COALESCING
+
+    El cálculo corre en su propia task: si el request que lo inició se cancela
+    (cliente desconectado), los demás que esperan igual reciben el resultado.
+    Las excepciones se propagan a todos los que esperaban esa clave.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self._stats = {
+            'calls': 0,
+            'executions': 0,
+            'coalesced': 0,     # Llamadas ahorradas (esperaron un cálculo en curso)
+            'errors': 0,
+            'max_waiters': 0,
+        }
+        self._waiters: Dict[Hashable, int] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Ejecuta fn() una sola vez por clave entre llamadas concurrentes
+
+        Args:
+            key: Clave del cálculo (ver search_key)
+            fn: Fábrica de la corutina (solo se invoca si no hay uno en curso)
+        """
+        self._stats['calls'] += 1
+        task = self._in_flight.get(key)
+
+        if task is None:
+            self._stats['executions'] += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            self._waiters[key] = 1
+            task.add_done_callback(lambda t, k=key: self._finish(k, t))
+        else:
+            self._stats['coalesced'] += 1
+            self._waiters[key] = self._waiters.get(key, 1) + 1
+            self._stats['max_waiters'] = max(self._stats['max_waiters'], self._waiters[key])
+            logger.debug(f"🔗 [{self.name}] coalesced {key} ({self._waiters[key]} esperando)")
+
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+            self._waiters.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            self._stats['errors'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        calls = self._stats['calls']
+        return {
+            **self._stats,
+            'in_flight': len(self._in_flight),
+            'saved_ratio': round(self._stats['coalesced'] / calls, 3) if calls else 0.0,
+        }
+
+
+# Scopes compartidos por todo el proceso
+db_flight = SingleFlight('db')
+ai_flight = SingleFlight('ai')
+fanout_flight = SingleFlight('scraper_fanout')
+image_flight = SingleFlight('image')
+
+
+def get_coalescing_stats() -> Dict[str, Any]:
+    """📊 Contadores por scope + total de llamadas ahorradas"""
+    scopes = {flight.name: flight.get_stats() for flight in (db_flight, ai_flight, fanout_flight, image_flight)}
+    return {
+        'scopes': scopes,
+        'total_saved': sum(stats['coalesced'] for stats in scopes.values()),
+    }
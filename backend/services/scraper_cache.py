@@ -0,0 +1,357 @@
+"""
+🗃️ SCRAPER CACHE - Caché de resultados por (scraper, ubicación, categoría, límite)
+Aplica ScraperConfig.use_cache / cache_ttl de cada scraper:
+- Tier en memoria acotado (LRU)
+- Tier opcional en disco (JSON por clave) que sobrevive reinicios: los archivos
+  vencidos se borran al leerlos y en un barrido periódico que además lo acota a
+  SCRAPER_CACHE_DISK_MAX_FILES (se van primero los más viejos)
+- Stale-while-revalidate: un resultado vencido (dentro de la ventana stale) se
+  devuelve al instante y se refresca en background (un refresh por clave)
+- Contadores hit/miss/stale por scraper
+
+Solo se cachean lotes NO vacíos de llamadas que terminaron sin excepción
+(muchos scrapers devuelven [] cuando fallan internamente).
+
+Cada lectura y cada escritura copia los eventos (deepcopy): los callers
+enriquecen/normalizan los dicts en el lugar y no deben tocar la caché.
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from services.location_index import fold_location
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 1800
+
+# Entradas máximas en memoria
+MAX_ENTRIES = int(os.getenv('SCRAPER_CACHE_MAX_ENTRIES', 500))
+
+# Ventana stale = cache_ttl * factor (pasada esa edad la entrada es miss)
+STALE_FACTOR = float(os.getenv('SCRAPER_CACHE_STALE_FACTOR', 2))
+
+# Tier en disco (SCRAPER_CACHE_DISK=false lo deshabilita)
+DISK_ENABLED = os.getenv('SCRAPER_CACHE_DISK', 'true').lower() in ('1', 'true', 'yes')
+DISK_DIR = os.getenv(
+    'SCRAPER_CACHE_DIR',
+    os.path.join(os.path.dirname(__file__), '..', 'data', 'cache', 'scrapers')
+)
+DISK_MAX_FILES = int(os.getenv('SCRAPER_CACHE_DISK_MAX_FILES', 2000))
+
+# Como mucho un barrido del disco cada tanto (se dispara al guardar)
+DISK_SWEEP_INTERVAL = 600
+
+CacheKey = Tuple[str, str, str, int]
+
+FRESH = 'hit'
+STALE = 'stale'
+MISS = 'miss'
+BYPASS = 'bypass'
+
+
+def _copy_events(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Copia independiente de un lote (los dicts pueden tener listas/dicts anidados)"""
+    return copy.deepcopy(events)
+
+
+def make_cache_key(scraper_name: str, location: str, category: Optional[str], limit: int) -> CacheKey:
+    """Clave normalizada: 'Córdoba ' y 'cordoba' comparten entrada"""
+    return (scraper_name, fold_location(location), (category or '').strip().lower(), int(limit or 0))
+
+
+class ScraperResultCache:
+    """
+    🗃️ CACHÉ DE RESULTADOS DE SCRAPERS
+
+    Uso:
+        events, status = await scraper_result_cache.get_or_fetch(
+            'eventbrite', scraper.config, location, category, limit,
+            lambda: scraper.scrape_events(location, category, limit)
+        )
+    """
+
+    def __init__(
+        self,
+        max_entries: int = MAX_ENTRIES,
+        stale_factor: float = STALE_FACTOR,
+        disk_dir: Optional[str] = DISK_DIR if DISK_ENABLED else None,
+        disk_max_files: int = DISK_MAX_FILES
+    ):
+        self.max_entries = max_entries
+        self.stale_factor = max(1.0, stale_factor)
+        self.disk_dir = os.path.normpath(disk_dir) if disk_dir else None
+        self.disk_max_files = max(1, disk_max_files)
+        self._last_sweep = 0.0
+
+        self._memory: "OrderedDict[CacheKey, Dict[str, Any]]" = OrderedDict()
+        self._refreshing: Dict[CacheKey, asyncio.Task] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    # ------------------------------------------------------------------ stats
+
+    def _count(self, scraper_name: str, counter: str):
+        stats = self._stats.setdefault(scraper_name, {
+            'hits': 0, 'stale_hits': 0, 'misses': 0, 'bypass': 0,
+            'disk_hits': 0, 'stores': 0, 'refreshes': 0, 'refresh_errors': 0,
+        })
+        stats[counter] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """📊 Contadores por scraper + estado de los tiers"""
+        per_scraper = {}
+        for name, stats in self._stats.items():
+            lookups = stats['hits'] + stats['stale_hits'] + stats['misses']
+            per_scraper[name] = {
+                **stats,
+                'hit_rate': round((stats['hits'] + stats['stale_hits']) / lookups, 3) if lookups else 0.0
+            }
+        return {
+            'memory_entries': len(self._memory),
+            'max_entries': self.max_entries,
+            'stale_factor': self.stale_factor,
+            'disk_dir': self.disk_dir,
+            'disk_max_files': self.disk_max_files,
+            'refreshing': len(self._refreshing),
+            'scrapers': per_scraper,
+        }
+
+    # ------------------------------------------------------------------ tiers
+
+    def _disk_path(self, key: CacheKey) -> str:
+        digest = hashlib.sha1(json.dumps(key, ensure_ascii=False).encode('utf-8')).hexdigest()
+        return os.path.join(self.disk_dir, f"{key[0]}_{digest}.json")
+
+    def _expired(self, entry: Dict[str, Any]) -> bool:
+        """¿Pasó la ventana stale? (ya no sirve ni para stale-while-revalidate)"""
+        ttl = entry.get('ttl') or DEFAULT_TTL
+        return time.time() - entry.get('stored_at', 0) >= ttl * self.stale_factor
+
+    @staticmethod
+    def _load_disk_entry(path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            return entry if isinstance(entry, dict) and isinstance(entry.get('events'), list) else None
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _remove_file(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def _read_disk(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        """Entrada del disco; si está vencida o corrupta se borra el archivo"""
+        path = self._disk_path(key)
+        entry = self._load_disk_entry(path)
+        if entry is None or self._expired(entry):
+            self._remove_file(path)
+            return None
+        return entry
+
+    def _sweep_disk(self) -> int:
+        """Borra archivos vencidos o corruptos y los más viejos por encima de disk_max_files"""
+        try:
+            paths = [
+                os.path.join(self.disk_dir, filename)
+                for filename in os.listdir(self.disk_dir) if filename.endswith('.json')
+            ]
+        except OSError:
+            return 0
+
+        files = []
+        for path in paths:
+            try:
+                files.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+        # Más nuevos primero: lo que sobra del tope se borra sin leerlo
+        files.sort(reverse=True)
+        removed = 0
+        for index, (_, path) in enumerate(files):
+            if index >= self.disk_max_files:
+                removed += self._remove_file(path)
+                continue
+            entry = self._load_disk_entry(path)
+            if entry is None or self._expired(entry):
+                removed += self._remove_file(path)
+        if removed:
+            logger.info(f"🧹 Caché de scrapers en disco: {removed} archivos borrados")
+        return removed
+
+    async def _maybe_sweep(self):
+        now = time.time()
+        if now - self._last_sweep < DISK_SWEEP_INTERVAL:
+            return
+        self._last_sweep = now
+        await asyncio.to_thread(self._sweep_disk)
+
+    def _write_disk(self, key: CacheKey, entry: Dict[str, Any]):
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            path = self._disk_path(key)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo guardar caché de scraper en disco: {e}")
+
+    def _remember(self, key: CacheKey, entry: Dict[str, Any]):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def _lookup(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            return entry
+
+        if self.disk_dir:
+            entry = await asyncio.to_thread(self._read_disk, key)
+            if entry is not None:
+                self._count(key[0], 'disk_hits')
+                self._remember(key, entry)
+        return entry
+
+    async def _store(self, key: CacheKey, events: List[Dict[str, Any]], ttl: int):
+        entry = {'events': _copy_events(events), 'stored_at': time.time(), 'ttl': ttl}
+        self._remember(key, entry)
+        self._count(key[0], 'stores')
+        if self.disk_dir:
+            await asyncio.to_thread(self._write_disk, key, entry)
+            await self._maybe_sweep()
+
+    # ------------------------------------------------------------------ API
+
+    async def get_or_fetch(
+        self,
+        scraper_name: str,
+        config: Any,
+        location: str,
+        category: Optional[str],
+        limit: int,
+        fetch: Callable[[], Awaitable[List[Dict[str, Any]]]]
+    ) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        Devuelve el lote cacheado o llama a fetch()
+
+        Args:
+            config: ScraperConfig del scraper (use_cache / cache_ttl); None = defaults
+            fetch: Corutina que ejecuta el scraper (sus excepciones se propagan en un miss)
+
+        Returns:
+            (eventos, estado) con estado en 'hit' | 'stale' | 'miss' | 'bypass'
+        """
+        if not self.is_enabled(config):
+            self._count(scraper_name, 'bypass')
+            return await fetch(), BYPASS
+
+        ttl = int(getattr(config, 'cache_ttl', DEFAULT_TTL) or DEFAULT_TTL)
+        key = make_cache_key(scraper_name, location, category, limit)
+        entry = await self._lookup(key)
+
+        if entry is not None:
+            age = time.time() - entry['stored_at']
+            if age < ttl:
+                self._count(scraper_name, 'hits')
+                return _copy_events(entry['events']), FRESH
+            if age < ttl * self.stale_factor:
+                self._count(scraper_name, 'stale_hits')
+                self._schedule_refresh(key, ttl, fetch)
+                return _copy_events(entry['events']), STALE
+
+        self._count(scraper_name, 'misses')
+        events = await fetch()
+        if isinstance(events, list) and events:
+            await self._store(key, events, ttl)
+        return events, MISS
+
+    @staticmethod
+    def is_enabled(config: Any) -> bool:
+        """¿El scraper cachea sus resultados? (ScraperConfig.use_cache; None = sí)"""
+        return config is None or bool(getattr(config, 'use_cache', True))
+
+    async def peek(
+        self,
+        scraper_name: str,
+        config: Any,
+        location: str,
+        category: Optional[str],
+        limit: int
+    ) -> Tuple[Optional[List[Dict[str, Any]]], str]:
+        """
+        Lote cacheado (memoria o disco) sin llamar al scraper ni programar refresh
+
+        Returns:
+            (eventos, 'hit' | 'stale'), (None, 'miss') o (None, 'bypass') si el scraper no cachea
+        """
+        if not self.is_enabled(config):
+            return None, BYPASS
+
+        ttl = int(getattr(config, 'cache_ttl', DEFAULT_TTL) or DEFAULT_TTL)
+        entry = await self._lookup(make_cache_key(scraper_name, location, category, limit))
+        if entry is None:
+            return None, MISS
+
+        age = time.time() - entry['stored_at']
+        if age < ttl:
+            return _copy_events(entry['events']), FRESH
+        if age < ttl * self.stale_factor:
+            return _copy_events(entry['events']), STALE
+        return None, MISS
+
+    def _schedule_refresh(self, key: CacheKey, ttl: int, fetch: Callable[[], Awaitable[List[Dict[str, Any]]]]):
+        """Refresca en background; si ya hay un refresh en curso para la clave no hace nada"""
+        if key in self._refreshing:
+            return
+
+        async def _refresh():
+            try:
+                events = await fetch()
+                if isinstance(events, list) and events:
+                    await self._store(key, events, ttl)
+                self._count(key[0], 'refreshes')
+            except Exception as e:
+                self._count(key[0], 'refresh_errors')
+                logger.warning(f"⚠️ Refresh en background de {key[0]} falló: {e}")
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(_refresh())
+
+    def clear(self, scraper_name: Optional[str] = None) -> int:
+        """Borra entradas (de un scraper o todas) en memoria y disco"""
+        keys = [k for k in self._memory if scraper_name is None or k[0] == scraper_name]
+        for key in keys:
+            self._memory.pop(key, None)
+
+        removed_files = 0
+        if self.disk_dir and os.path.isdir(self.disk_dir):
+            for filename in os.listdir(self.disk_dir):
+                # Formato: <scraper>_<sha1 de 40>.json
+                owner = filename[:-len('_.json') - 40]
+                if filename.endswith('.json') and (scraper_name is None or owner == scraper_name):
+                    try:
+                        os.remove(os.path.join(self.disk_dir, filename))
+                        removed_files += 1
+                    except OSError:
+                        pass
+        return max(len(keys), removed_files)
+
+
+# Instancia global compartida por todo el proceso
+scraper_result_cache = ScraperResultCache()
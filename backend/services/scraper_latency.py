@@ -0,0 +1,228 @@
+"""
+⏱️ SCRAPER LATENCY - Percentiles de latencia por scraper y ubicación
+Reemplaza los timeouts fijos (10s / 5s) de IndustrialFactory:
+- Ventana móvil de duraciones por (scraper, ubicación) y por scraper
+- Deadline por scraper = p95 * margen, acotado al presupuesto del request
+- Scrapers crónicamente lentos o fallando pasan a modo 'background': el request
+  usa lo que haya en caché y el scraper corre aparte (sin deadline corto) para
+  llenar la caché y seguir alimentando sus percentiles
+- Histograma acumulado por scraper para el endpoint admin
+
+Los timeouts se registran con la duración del deadline (valor censurado): el
+p95 sube hasta pasar el presupuesto y el scraper termina en background.
+"""
+
+import asyncio
+import logging
+import math
+import os
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from services.location_index import fold_location
+
+logger = logging.getLogger(__name__)
+
+# Presupuesto total de un fan-out de scrapers (segundos)
+REQUEST_BUDGET = float(os.getenv('SCRAPER_REQUEST_BUDGET', 8))
+
+# Deadline mientras un scraper no tiene muestras suficientes
+DEFAULT_DEADLINE = float(os.getenv('SCRAPER_DEFAULT_DEADLINE', 5))
+MIN_DEADLINE = float(os.getenv('SCRAPER_MIN_DEADLINE', 1))
+
+# Deadline = p95 * margen
+DEADLINE_MARGIN = float(os.getenv('SCRAPER_DEADLINE_MARGIN', 1.5))
+
+# Deadline de las corridas en background (llenado de caché)
+BACKGROUND_DEADLINE = float(os.getenv('SCRAPER_BACKGROUND_DEADLINE', 30))
+
+# Tamaño de la ventana móvil y muestras mínimas para confiar en los percentiles
+WINDOW_SIZE = int(os.getenv('SCRAPER_LATENCY_WINDOW', 50))
+MIN_SAMPLES = int(os.getenv('SCRAPER_LATENCY_MIN_SAMPLES', 5))
+
+# Ventanas por (scraper, ubicación) en memoria: LRU, las ubicaciones vienen del query string
+MAX_LOCATIONS = int(os.getenv('SCRAPER_LATENCY_MAX_LOCATIONS', 2000))
+
+# Ubicaciones por scraper en el snapshot admin (las más recientes)
+SNAPSHOT_LOCATIONS = 20
+
+# Tasa de timeouts+errores en la ventana que manda un scraper a background
+FAILURE_RATE_THRESHOLD = float(os.getenv('SCRAPER_FAILURE_RATE_THRESHOLD', 0.6))
+
+# Bordes (segundos) del histograma acumulado
+HISTOGRAM_BUCKETS = (0.25, 0.5, 1, 2, 3, 5, 8, 10, 15, 20, 30)
+
+SUCCESS = 'success'
+EMPTY = 'empty'
+TIMEOUT = 'timeout'
+ERROR = 'error'
+
+FOREGROUND = 'foreground'
+BACKGROUND = 'background'
+
+Sample = Tuple[float, str]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Percentil por rango más cercano sobre una lista ya ordenada"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class ScraperLatencyTracker:
+    """
+    ⏱️ TRACKER DE LATENCIAS
+
+    Uso:
+        mode, deadline = scraper_latency.plan('eventbrite', location, budget)
+        ...
+        scraper_latency.record('eventbrite', location, duration, 'success')
+    """
+
+    def __init__(
+        self,
+        window_size: int = WINDOW_SIZE,
+        min_samples: int = MIN_SAMPLES,
+        max_locations: int = MAX_LOCATIONS
+    ):
+        self.window_size = window_size
+        self.min_samples = min_samples
+        self.max_locations = max_locations
+
+        self._by_location: 'OrderedDict[Tuple[str, str], Deque[Sample]]' = OrderedDict()
+        self._by_scraper: Dict[str, Deque[Sample]] = {}
+        self._histograms: Dict[str, List[int]] = {}
+        self._totals: Dict[str, Dict[str, int]] = {}
+        self._last: Dict[str, float] = {}
+        self._background: Dict[Tuple[str, str], asyncio.Task] = {}
+
+    # ------------------------------------------------------------------ registro
+
+    def record(self, scraper_name: str, location: str, duration: float, outcome: str):
+        """Registra una ejecución real del scraper (no los hits de caché)"""
+        sample = (duration, outcome)
+        key = (scraper_name, fold_location(location))
+        self._by_location.setdefault(key, deque(maxlen=self.window_size)).append(sample)
+        self._by_location.move_to_end(key)
+        while len(self._by_location) > self.max_locations:
+            self._by_location.popitem(last=False)
+        self._by_scraper.setdefault(scraper_name, deque(maxlen=self.window_size)).append(sample)
+        self._last[scraper_name] = duration
+
+        histogram = self._histograms.setdefault(scraper_name, [0] * (len(HISTOGRAM_BUCKETS) + 1))
+        bucket = next((i for i, edge in enumerate(HISTOGRAM_BUCKETS) if duration <= edge), len(HISTOGRAM_BUCKETS))
+        histogram[bucket] += 1
+
+        totals = self._totals.setdefault(scraper_name, {SUCCESS: 0, EMPTY: 0, TIMEOUT: 0, ERROR: 0})
+        totals[outcome] = totals.get(outcome, 0) + 1
+
+    def last_duration(self, scraper_name: str) -> Optional[float]:
+        return self._last.get(scraper_name)
+
+    def _window(self, scraper_name: str, location: str) -> Deque[Sample]:
+        """Ventana de la ubicación si tiene muestras suficientes; si no, la del scraper"""
+        window = self._by_location.get((scraper_name, fold_location(location)))
+        if window is not None and len(window) >= self.min_samples:
+            return window
+        return self._by_scraper.get(scraper_name, deque())
+
+    @staticmethod
+    def _summarize(window: Deque[Sample]) -> Dict[str, Any]:
+        durations = sorted(duration for duration, _ in window)
+        failures = sum(1 for _, outcome in window if outcome in (TIMEOUT, ERROR))
+        return {
+            'samples': len(durations),
+            'p50': round(percentile(durations, 50), 3),
+            'p90': round(percentile(durations, 90), 3),
+            'p95': round(percentile(durations, 95), 3),
+            'p99': round(percentile(durations, 99), 3),
+            'failure_rate': round(failures / len(durations), 3) if durations else 0.0,
+        }
+
+    # ------------------------------------------------------------------ decisiones
+
+    def plan(self, scraper_name: str, location: str, budget: float = REQUEST_BUDGET) -> Tuple[str, float]:
+        """
+        Decide cómo correr un scraper en este request
+
+        Returns:
+            (modo, deadline): modo 'foreground' con deadline <= budget,
+            o 'background' (usar caché y llenar aparte) con BACKGROUND_DEADLINE
+        """
+        window = self._window(scraper_name, location)
+        if len(window) < self.min_samples:
+            return FOREGROUND, max(MIN_DEADLINE, min(DEFAULT_DEADLINE, budget))
+
+        summary = self._summarize(window)
+        if summary['failure_rate'] >= FAILURE_RATE_THRESHOLD or summary['p95'] > budget:
+            return BACKGROUND, BACKGROUND_DEADLINE
+
+        deadline = min(budget, max(MIN_DEADLINE, summary['p95'] * DEADLINE_MARGIN))
+        return FOREGROUND, deadline
+
+    def run_in_background(
+        self,
+        scraper_name: str,
+        location: str,
+        job: Callable[[], Awaitable[Any]]
+    ) -> bool:
+        """
+        Lanza job() desacoplado del request (uno por scraper+ubicación)
+
+        Returns:
+            False si ya había una corrida en background para esa clave
+        """
+        key = (scraper_name, fold_location(location))
+        if key in self._background:
+            return False
+
+        async def _run():
+            try:
+                await job()
+            except Exception as e:
+                logger.debug(f"⏱️ Background de {scraper_name} terminó con error: {e}")
+            finally:
+                self._background.pop(key, None)
+
+        self._background[key] = asyncio.create_task(_run())
+        return True
+
+    # ------------------------------------------------------------------ API
+
+    def get_snapshot(self) -> Dict[str, Any]:
+        """📊 Percentiles, histograma y modo actual por scraper (y por ubicación)"""
+        bucket_labels = [f"<={edge}s" for edge in HISTOGRAM_BUCKETS] + [f">{HISTOGRAM_BUCKETS[-1]}s"]
+        scrapers = {}
+        for name, window in self._by_scraper.items():
+            recent = [
+                (location, location_window)
+                for (scraper, location), location_window in reversed(self._by_location.items())
+                if scraper == name
+            ]
+            locations = {
+                location: self._summarize(location_window)
+                for location, location_window in recent[:SNAPSHOT_LOCATIONS]
+            }
+            mode, deadline = self.plan(name, '')
+            scrapers[name] = {
+                **self._summarize(window),
+                'mode': mode,
+                'deadline_s': round(deadline, 2),
+                'totals': self._totals.get(name, {}),
+                'histogram': dict(zip(bucket_labels, self._histograms.get(name, []))),
+                'locations': locations,
+                'tracked_locations': len(recent),
+            }
+        return {
+            'request_budget_s': REQUEST_BUDGET,
+            'default_deadline_s': DEFAULT_DEADLINE,
+            'deadline_margin': DEADLINE_MARGIN,
+            'background_running': len(self._background),
+            'scrapers': scrapers,
+        }
+
+
+# Instancia global compartida por todo el proceso
+scraper_latency = ScraperLatencyTracker()
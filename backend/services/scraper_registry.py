@@ -0,0 +1,221 @@
+"""
+📚 SCRAPER REGISTRY - Registro de scrapers por proceso
+Descubre e instancia los scrapers UNA sola vez (de forma lazy, en el primer uso)
+en lugar de listar la carpeta, importar módulos e instanciar en cada búsqueda.
+
+- Los requests solo "toman prestadas" las instancias (borrow_*): nunca las crean.
+  El préstamo es una copia superficial con su propio `context`, así set_context()
+  de un request no pisa al de otro concurrente (config/servicios se comparten)
+- Hot-reload explícito: por cambio de archivos (mtime de *_scraper.py y del
+  config de habilitados) o por llamada admin (POST /api/admin/scrapers/reload)
+- El chequeo por archivos corre en un hilo de fondo: borrow_*() nunca espera
+  un reload ni el lock (solo el primer build, cuando todavía no hay mapa)
+- Un reload arma un mapa nuevo y lo intercambia atómicamente: los requests en
+  curso siguen usando el mapa que tomaron
+"""
+
+import copy
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Cada cuántos segundos borrow_*() revisa si cambiaron archivos (0 = solo reload manual)
+WATCH_INTERVAL = float(os.getenv('SCRAPER_REGISTRY_WATCH_INTERVAL', 10))
+
+# Carpetas de scrapers (relativas a services/) y config de habilitados/deshabilitados
+SCRAPER_DIRS = ('global_scrapers', 'regional', 'local')
+SCRAPERS_CONFIG_FILE = os.path.join('..', 'data', 'url_patterns_cache.json')
+
+
+class ScraperRegistry:
+    """
+    📚 REGISTRO DE SCRAPERS COMPARTIDO
+
+    Uso:
+        from services.scraper_registry import scraper_registry
+        global_scrapers = scraper_registry.borrow_global()   # {name: instance}
+    """
+
+    def __init__(self, base_path: Optional[str] = None, watch_interval: float = WATCH_INTERVAL):
+        self.base_path = base_path or os.path.dirname(os.path.abspath(__file__))
+        self.watch_interval = watch_interval
+
+        self._engine = None
+        self._scrapers_map: Optional[Dict[str, Dict[str, Any]]] = None
+        self._fingerprint: Dict[str, float] = {}
+        self._last_check = 0.0
+        self._lock = threading.RLock()
+        # Un solo chequeo de archivos en vuelo (se toma sin bloquear)
+        self._watch_lock = threading.Lock()
+
+        # 📊 Métricas
+        self._stats = {
+            'generation': 0,
+            'builds': 0,
+            'reloads': 0,
+            'borrows': 0,
+            'last_built_at': None,
+            'last_build_ms': 0.0,
+            'last_reload_reason': None,
+            'watch_checks': 0,
+            'watch_errors': 0,
+        }
+
+    @property
+    def engine(self):
+        """AutoDiscoveryEngine creado lazy (importa servicios de IA solo al primer uso)"""
+        if self._engine is None:
+            from services.auto_discovery import AutoDiscoveryEngine
+            self._engine = AutoDiscoveryEngine(self.base_path)
+        return self._engine
+
+    def _watched_files(self):
+        for folder in SCRAPER_DIRS:
+            path = os.path.join(self.base_path, folder)
+            if not os.path.isdir(path):
+                continue
+            for root, _, files in os.walk(path):
+                if '_legacy' in root or '__pycache__' in root:
+                    continue
+                for filename in files:
+                    if filename.endswith('.py'):
+                        yield os.path.join(root, filename)
+        yield os.path.normpath(os.path.join(self.base_path, SCRAPERS_CONFIG_FILE))
+
+    def _compute_fingerprint(self) -> Dict[str, float]:
+        fingerprint = {}
+        for path in self._watched_files():
+            try:
+                fingerprint[path] = os.path.getmtime(path)
+            except OSError:
+                continue
+        return fingerprint
+
+    def _build(self, reload_modules: bool = False):
+        start = time.perf_counter()
+        if reload_modules:
+            # Re-leer enabled/disabled además del código de los scrapers
+            self.engine._load_scrapers_config()
+
+        scrapers_map = self.engine.discover_all_scrapers(reload_modules=reload_modules)
+
+        # Intercambio atómico: quien ya tomó el mapa anterior lo sigue usando
+        self._scrapers_map = scrapers_map
+        self._fingerprint = self._compute_fingerprint()
+        self._last_check = time.monotonic()
+
+        self._stats['generation'] += 1
+        self._stats['builds'] += 1
+        self._stats['last_built_at'] = time.time()
+        self._stats['last_build_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        logger.info(
+            f"📚 Scraper registry generación {self._stats['generation']}: "
+            f"{len(scrapers_map.get('global', {}))} globales en {self._stats['last_build_ms']}ms"
+        )
+
+    def _ensure_current(self) -> Dict[str, Dict[str, Any]]:
+        if self._scrapers_map is None:
+            with self._lock:
+                if self._scrapers_map is None:
+                    self._build()
+        elif self.watch_interval > 0 and time.monotonic() - self._last_check >= self.watch_interval:
+            self._schedule_watch_check()
+        return self._scrapers_map
+
+    def _schedule_watch_check(self):
+        """Lanza reload_if_changed() en un hilo de fondo (si no hay otro en curso)"""
+        if not self._watch_lock.acquire(blocking=False):
+            return
+        self._last_check = time.monotonic()
+        try:
+            threading.Thread(target=self._watch_check, name='scraper-registry-watch', daemon=True).start()
+        except RuntimeError:
+            self._watch_lock.release()
+            raise
+
+    def _watch_check(self):
+        try:
+            self._stats['watch_checks'] += 1
+            self.reload_if_changed()
+        except Exception as e:
+            # El mapa anterior sigue vigente; se reintenta en el próximo intervalo
+            self._stats['watch_errors'] += 1
+            logger.error(f"❌ Error recargando scraper registry: {e}")
+        finally:
+            self._watch_lock.release()
+
+    def borrow_all(self) -> Dict[str, Dict[str, Any]]:
+        """Mapa completo {'global': {...}, 'regional': {...}, 'local': {...}} (no modificar)"""
+        self._stats['borrows'] += 1
+        return self._ensure_current()
+
+    def borrow_global(self) -> Dict[str, Any]:
+        """{nombre: instancia prestada} de scrapers globales habilitados"""
+        return {
+            name: self._lend(instance)
+            for name, instance in self.borrow_all().get('global', {}).items()
+        }
+
+    @staticmethod
+    def _lend(instance):
+        """Copia superficial por request: comparte todo menos el contexto mutable"""
+        borrowed = copy.copy(instance)
+        if isinstance(getattr(instance, 'context', None), dict):
+            borrowed.context = dict(instance.context)
+        return borrowed
+
+    def reload_if_changed(self) -> bool:
+        """
+        Recarga si cambió algún archivo de scraper o el config de habilitados
+
+        Returns:
+            True si hubo reload
+        """
+        with self._lock:
+            self._last_check = time.monotonic()
+            current = self._compute_fingerprint()
+            if current == self._fingerprint:
+                return False
+
+            changed = sorted(
+                os.path.basename(path)
+                for path in set(current) | set(self._fingerprint)
+                if current.get(path) != self._fingerprint.get(path)
+            )
+            self._reload(f"archivos modificados: {', '.join(changed[:5])}")
+            return True
+
+    def reload(self, reason: str = 'manual') -> Dict[str, Any]:
+        """🔄 Hot-reload explícito (admin): re-importa módulos y re-instancia scrapers"""
+        with self._lock:
+            self._reload(reason)
+        return self.get_status()
+
+    def _reload(self, reason: str):
+        logger.info(f"🔄 Recargando scraper registry ({reason})")
+        self._stats['reloads'] += 1
+        self._stats['last_reload_reason'] = reason
+        self._build(reload_modules=self._scrapers_map is not None)
+
+    def get_status(self) -> Dict[str, Any]:
+        """📊 Estado del registry para endpoints admin"""
+        scrapers_map = self._scrapers_map or {}
+        return {
+            **self._stats,
+            'loaded': self._scrapers_map is not None,
+            'watch_interval_s': self.watch_interval,
+            'global_scrapers': sorted(scrapers_map.get('global', {}).keys()),
+            'regional_scrapers': {
+                country: sorted(scrapers.keys())
+                for country, scrapers in scrapers_map.get('regional', {}).items()
+            },
+            'local_scrapers': sorted(scrapers_map.get('local', {}).keys()),
+        }
+
+
+# Instancia global compartida por todo el proceso
+scraper_registry = ScraperRegistry()
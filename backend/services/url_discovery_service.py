@@ -4,12 +4,15 @@ Servicio que genera URLs inteligentes para scrapers usando IA con caché persist
 """
 
 import logging
+import asyncio
 import json
 import os
 from typing import Optional, Protocol, Dict, Any
 from dataclasses import dataclass
 from datetime import datetime
 
+from services.enrichment_store import MISS, URL_PATTERN, enrichment_store
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -32,10 +35,13 @@ class UrlDiscoveryService:
     🔗 SERVICIO DE DESCUBRIMIENTO DE URLs CON CACHÉ PERSISTENTE
     
     FUNCIONALIDADES:
-    - Cache JSON persistente (elimina 6s de overhead por cada llamada)
+    - Patrones en el enrichment store (elimina 6s de overhead por cada llamada;
+      compartido entre workers, un patrón nuevo = una escritura chica)
+    - data/url_patterns_cache.json se lee una sola vez como semilla (solo lectura:
+      también es la config de scrapers que vigila el registry)
     - Genera URLs inteligentes usando IA SOLO UNA VEZ
     - Adapta URLs por plataforma y ubicación
-    - Actualización mensual automática de patrones
+    - Actualización mensual automática de patrones (TTL del namespace)
     - Estadísticas de cache hits/misses
     """
     
@@ -47,46 +53,30 @@ class UrlDiscoveryService:
             ai_service: Servicio de IA inyectado
         """
         self.ai_service = ai_service
-        self.cache_file = "/mnt/c/Code/eventos-visualizer/backend/data/url_patterns_cache.json"
-        self._cache = self._load_cache()
+        self.seed_file = os.path.join(os.path.dirname(__file__), '..', 'data', 'url_patterns_cache.json')
+        self._seed_patterns: Optional[Dict[str, Any]] = None
+        self._stats = {'cache_hits': 0, 'ai_calls_saved': 0, 'patterns_saved': 0}
         logger.info("🔗 URL Discovery Service initialized with persistent cache")
-        logger.info(f"📋 Cache cargado: {self._cache['metadata']['total_patterns']} patrones, {self._cache['metadata']['cache_hits']} hits")
-    
-    def _load_cache(self) -> Dict[str, Any]:
-        """🗃️ Carga el caché desde JSON"""
-        try:
-            if os.path.exists(self.cache_file):
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            else:
-                logger.warning("⚠️ Cache file not found, creating empty cache")
-                return self._create_empty_cache()
-        except Exception as e:
-            logger.error(f"❌ Error loading cache: {e}")
-            return self._create_empty_cache()
-    
-    def _create_empty_cache(self) -> Dict[str, Any]:
-        """📝 Crea un caché vacío"""
-        return {
-            "version": "1.0",
-            "last_updated": datetime.now().strftime("%Y-%m-%d"),
-            "patterns": {},
-            "metadata": {
-                "total_patterns": 0,
-                "cache_hits": 0,
-                "ai_calls_saved": 0,
-                "next_update": datetime.now().replace(month=datetime.now().month + 1).strftime("%Y-%m-%d")
-            }
-        }
     
-    def _save_cache(self):
-        """💾 Guarda el caché en JSON"""
-        try:
-            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self._cache, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            logger.error(f"❌ Error saving cache: {e}")
+    def _get_pattern(self, platform: str) -> Optional[Dict[str, Any]]:
+        """🗃️ Patrón aprendido (store) o, si no hay, el de la semilla JSON"""
+        pattern_data = enrichment_store.get(URL_PATTERN, platform)
+        if pattern_data is not MISS:
+            return pattern_data
+
+        if self._seed_patterns is None:
+            try:
+                with open(self.seed_file, 'r', encoding='utf-8') as f:
+                    self._seed_patterns = json.load(f).get('patterns', {})
+                logger.info(f"📋 Semilla de patrones cargada: {len(self._seed_patterns)} patrones")
+            except FileNotFoundError:
+                self._seed_patterns = {}
+            except Exception as e:
+                logger.error(f"❌ Error loading cache: {e}")
+                self._seed_patterns = {}
+
+        pattern_data = self._seed_patterns.get(platform)
+        return pattern_data if isinstance(pattern_data, dict) and pattern_data.get('pattern') else None
     
     def _get_from_cache(self, platform: str, location: str, detected_country: Optional[str] = None) -> Optional[str]:
         """🔍 Busca patrón en caché SOLO para Argentina"""
@@ -97,7 +87,7 @@ class UrlDiscoveryService:
             return None
             
         # 🇦🇷 Solo usar caché para Argentina
-        pattern_data = self._cache['patterns'].get(platform)
+        pattern_data = self._get_pattern(platform)
         if not pattern_data:
             return None
         
@@ -131,10 +121,9 @@ class UrlDiscoveryService:
             pattern = pattern_data['pattern']
             url = pattern.replace('{city}', city).replace('{location}', city)
             
-            # Estadísticas
-            self._cache['metadata']['cache_hits'] += 1
-            self._cache['metadata']['ai_calls_saved'] += 1
-            self._save_cache()
+            # Estadísticas (en memoria: un hit no escribe a disco)
+            self._stats['cache_hits'] += 1
+            self._stats['ai_calls_saved'] += 1
             
             logger.info(f"✅ CACHE HIT (Argentina): {platform} → {url}")
             return url
@@ -146,17 +135,14 @@ class UrlDiscoveryService:
     def _save_to_cache(self, platform: str, pattern: str, url: str):
         """💾 Guarda nuevo patrón en caché"""
         try:
-            self._cache['patterns'][platform] = {
+            enrichment_store.put(URL_PATTERN, platform, {
                 "pattern": pattern,
                 "example": url,
                 "confidence": 0.8,
                 "last_tested": datetime.now().strftime("%Y-%m-%d"),
                 "status": "working"
-            }
-            
-            self._cache['metadata']['total_patterns'] = len(self._cache['patterns'])
-            self._cache['last_updated'] = datetime.now().strftime("%Y-%m-%d")
-            self._save_cache()
+            })
+            self._stats['patterns_saved'] += 1
             
             logger.info(f"💾 PATTERN SAVED: {platform} → {pattern}")
             
@@ -168,7 +154,7 @@ class UrlDiscoveryService:
         🎯 DESCUBRIMIENTO INTELIGENTE DE URL CON CACHÉ
         
         PROCESO:
-        1. 🔍 Buscar primero en caché JSON (0.001s)
+        1. 🔍 Buscar primero en caché (0.001s)
         2. 🤖 Solo si no existe, llamar a IA (6s+)
         3. 💾 Guardar patrón para próximas veces
         
@@ -181,7 +167,10 @@ class UrlDiscoveryService:
         
         try:
             # 1. 🔍 BUSCAR PRIMERO EN CACHÉ (súper rápido)
-            cached_url = self._get_from_cache(request.platform, request.location, request.detected_country)
+            # El store (SQLite) y la semilla JSON se leen en un thread, fuera del event loop
+            cached_url = await asyncio.to_thread(
+                self._get_from_cache, request.platform, request.location, request.detected_country
+            )
             if cached_url:
                 logger.info(f"🚀 CACHE HIT - NO AI CALL: {request.platform}")
                 return cached_url
@@ -197,7 +186,7 @@ class UrlDiscoveryService:
             
             if url:
                 # 3. 💾 GUARDAR PATRÓN PARA PRÓXIMAS VECES
-                self._extract_and_save_pattern(request.platform, url, request.location)
+                await asyncio.to_thread(self._extract_and_save_pattern, request.platform, url, request.location)
                 logger.info(f"🌐 URL discovered and cached: {url}")
                 return url
             else:
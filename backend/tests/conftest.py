@@ -0,0 +1,6 @@
+"""Hace importables los módulos de backend (services.*) desde los tests"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
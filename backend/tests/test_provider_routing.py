@@ -0,0 +1,188 @@
+"""
+🩺 Ruteo por salud de providers de IA (services.ai_providers.ProviderHealth
++ services.ai_manager.rank_providers) con providers falsos y reloj controlado
+"""
+
+import pytest
+
+from services import ai_providers
+from services.ai_manager import rank_providers
+from services.ai_providers import (
+    CIRCUIT_COOLDOWN,
+    CIRCUIT_FAILURE_THRESHOLD,
+    FAILURE_TIMEOUT,
+    ProviderHealth,
+    ProviderType,
+)
+
+GROQ, GEMINI, OPENROUTER = ProviderType.GROQ, ProviderType.GEMINI, ProviderType.OPENROUTER
+STATIC_ORDER = [GROQ, GEMINI, OPENROUTER]
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+class FakeProvider:
+    """Lo único que rank_providers mira de un provider: is_configured() y health"""
+
+    def __init__(self, name: str, configured: bool = True):
+        self.health = ProviderHealth(name)
+        self._configured = configured
+
+    def is_configured(self) -> bool:
+        return self._configured
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(ai_providers.time, 'monotonic', fake)
+    return fake
+
+
+@pytest.fixture
+def providers(clock):
+    return {provider_type: FakeProvider(provider_type.value) for provider_type in STATIC_ORDER}
+
+
+def trip(health: ProviderHealth):
+    for _ in range(CIRCUIT_FAILURE_THRESHOLD):
+        health.record_failure()
+
+
+def test_without_samples_keeps_static_order(providers):
+    assert rank_providers(providers, STATIC_ORDER) == STATIC_ORDER
+
+
+def test_unconfigured_providers_are_skipped(providers):
+    providers[GROQ]._configured = False
+    assert rank_providers(providers, STATIC_ORDER) == [GEMINI, OPENROUTER]
+
+
+def test_ewma_latency_orders_providers(providers):
+    for _ in range(5):
+        providers[GROQ].health.record_success(4.0)
+        providers[GEMINI].health.record_success(0.5)
+        providers[OPENROUTER].health.record_success(1.5)
+
+    assert rank_providers(providers, STATIC_ORDER) == [GEMINI, OPENROUTER, GROQ]
+
+
+def test_errors_penalize_a_fast_provider(providers):
+    providers[GROQ].health.record_success(0.5)
+    providers[GROQ].health.record_failure()
+    providers[GEMINI].health.record_success(1.0)
+
+    assert providers[GROQ].health.score() > providers[GEMINI].health.score()
+    assert rank_providers(providers, STATIC_ORDER)[0] == GEMINI
+
+
+def test_ewma_moves_towards_recent_latency(providers):
+    health = providers[GROQ].health
+    health.record_success(1.0)
+    health.record_success(5.0)
+    assert 1.0 < health.latency_ewma < 5.0
+
+    for _ in range(30):
+        health.record_success(5.0)
+    assert health.latency_ewma == pytest.approx(5.0, abs=0.01)
+
+
+def test_timeout_latency_counts_in_the_ewma(providers):
+    health = providers[GROQ].health
+    health.record_success(1.0)
+    health.record_failure(FAILURE_TIMEOUT, latency=10.0)
+    assert health.latency_ewma > 1.0
+    assert health.timeouts == 1
+
+
+def test_circuit_opens_after_consecutive_failures(providers, clock):
+    health = providers[GROQ].health
+    for _ in range(CIRCUIT_FAILURE_THRESHOLD - 1):
+        health.record_failure()
+    assert health.is_available()
+
+    health.record_failure()
+    assert not health.is_available()
+    assert health.snapshot()['circuit'] == 'open'
+    assert GROQ not in rank_providers(providers, STATIC_ORDER)
+
+
+def test_success_resets_the_failure_streak(providers):
+    health = providers[GROQ].health
+    for _ in range(CIRCUIT_FAILURE_THRESHOLD - 1):
+        health.record_failure()
+    health.record_success(1.0)
+    health.record_failure()
+    assert health.is_available()
+
+
+def test_all_open_returns_earliest_cooldown_first(providers, clock):
+    trip(providers[OPENROUTER].health)
+    clock.advance(1)
+    trip(providers[GEMINI].health)
+    clock.advance(1)
+    trip(providers[GROQ].health)
+
+    assert rank_providers(providers, STATIC_ORDER) == [OPENROUTER, GEMINI, GROQ]
+
+
+def test_half_open_lets_a_single_probe_through(providers, clock):
+    health = providers[GROQ].health
+    trip(health)
+    assert not health.is_available()
+
+    clock.advance(CIRCUIT_COOLDOWN)
+    assert health.is_available()
+    assert GROQ in rank_providers(providers, STATIC_ORDER)
+
+    assert health.try_acquire()
+    assert not health.try_acquire()
+    assert not health.is_available()
+    assert GROQ not in rank_providers(providers, STATIC_ORDER)
+
+
+def test_successful_probe_closes_the_circuit(providers, clock):
+    health = providers[GROQ].health
+    trip(health)
+    clock.advance(CIRCUIT_COOLDOWN)
+    assert health.try_acquire()
+
+    health.record_success(1.0)
+    assert health.snapshot()['circuit'] == 'closed'
+    assert health.try_acquire() and health.try_acquire()
+
+
+def test_failed_probe_reopens_immediately_with_longer_cooldown(providers, clock):
+    health = providers[GROQ].health
+    trip(health)
+    clock.advance(CIRCUIT_COOLDOWN)
+    assert health.try_acquire()
+
+    health.record_failure()             # Un solo fallo alcanza: era la prueba
+    assert not health.is_available()
+    assert health.circuit_trips == 2
+
+    clock.advance(CIRCUIT_COOLDOWN)
+    assert not health.is_available()    # Cooldown duplicado
+    clock.advance(CIRCUIT_COOLDOWN)
+    assert health.is_available()
+
+
+def test_released_probe_lets_the_next_call_probe(providers, clock):
+    health = providers[GROQ].health
+    trip(health)
+    clock.advance(CIRCUIT_COOLDOWN)
+    assert health.try_acquire()
+
+    health.release_probe()
+    assert health.is_available()
+    assert health.try_acquire()
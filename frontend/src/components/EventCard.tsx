@@ -1,5 +1,6 @@
 import React, { useState } from 'react'
 import { useNavigate } from 'react-router-dom'
+import { cardImageUrl } from '../config/api'
 
 interface Event {
   title: string
@@ -12,6 +13,7 @@ interface Event {
   currency: string
   is_free: boolean
   image_url: string
+  thumbnail_url?: string | null
   latitude?: number
   longitude?: number
   source?: string
@@ -127,9 +129,9 @@ const EventCard: React.FC<EventCardProps> = ({
     <div className="bg-white rounded-xl shadow-lg overflow-hidden hover:shadow-xl transition-shadow duration-300 max-w-sm">
       {/* Image Section - EXACTO del template */}
       <div className="relative aspect-video">
-        {!imageError && event.image_url && event.image_url.trim() !== "" ? (
+        {!imageError && cardImageUrl(event).trim() !== "" ? (
           <img
-            src={event.image_url}
+            src={cardImageUrl(event)}
             alt={event.title}
             className="w-full h-full object-cover"
             onError={() => setImageError(true)}
@@ -3,20 +3,23 @@ import { useNavigate } from 'react-router-dom'
 import EventAIHover from './EventAIHover'
 import EventDetailOverlay from './EventDetailOverlay'
 import { useAssistants } from '../contexts/AssistantsContext'
-import { API_BASE_URL } from '../config/api'
+import { API_BASE_URL, cardImageUrl } from '../config/api'
 
 interface Event {
+  id?: string
   title: string
   description?: string
   start_datetime?: string | null
   end_datetime?: string | null
   venue_name: string
   venue_address?: string
+  city?: string
   category: string
   price?: number | null
   currency?: string
   is_free?: boolean
   image_url?: string | null
+  thumbnail_url?: string | null
   latitude?: number
   longitude?: number
   source?: string
@@ -46,12 +49,14 @@ const EventCardModern: React.FC<EventCardModernProps> = ({
   const [aiLoading, setAiLoading] = useState(false)
   const { triggerEventComment } = useAssistants()
 
+  const imageUrl = cardImageUrl(event)
+
   // 🔄 Resetear estados de error cuando cambie la URL de imagen
   useEffect(() => {
-    console.log('🖼️ [EventCardModern] image_url cambió:', event.image_url)
+    console.log('🖼️ [EventCardModern] imagen cambió:', imageUrl)
     setImageError(false)
     setDefaultImageError(false)
-  }, [event.image_url])
+  }, [imageUrl])
 
   // 🔍 DEBUG: Log en cada render para Calamaro
   useEffect(() => {
@@ -59,10 +64,10 @@ const EventCardModern: React.FC<EventCardModernProps> = ({
       console.log('🎸 [CALAMARO DEBUG]', {
         title: event.title,
         image_url: event.image_url,
-        isValidUrl: isValidImageUrl(event.image_url),
+        isValidUrl: isValidImageUrl(imageUrl),
         imageError,
         defaultImageError,
-        willShowUrl: (!imageError && isValidImageUrl(event.image_url)) ? event.image_url : 'DEFAULT'
+        willShowUrl: (!imageError && isValidImageUrl(imageUrl)) ? imageUrl : 'DEFAULT'
       })
     }
   })
@@ -164,7 +169,7 @@ const EventCardModern: React.FC<EventCardModernProps> = ({
 
   const handleCardClick = () => {
     // 🔥 UUID real del evento (para operaciones de DB)
-    const uuid = (event as any).id
+    const uuid = event.id
 
     // 🔥 Slug amigable (para SEO y URL legible)
     const slug = event.title
@@ -227,12 +232,15 @@ const EventCardModern: React.FC<EventCardModernProps> = ({
       const response = await fetch(`${API_BASE_URL}/api/ai/event-insight`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
+        // id real de la DB: el backend arma el prompt (y el hash del insight precalculado) desde la fila
         body: JSON.stringify({
-          id: event.title.toLowerCase().replace(/\s+/g, '-').replace(/[.,]/g, ''),
+          id: event.id,
           title: event.title,
           venue_name: event.venue_name,
           category: event.category,
-          location: event.venue_address || 'Buenos Aires'
+          city: event.city,
+          location: event.city || 'Buenos Aires',
+          start_datetime: event.start_datetime
         })
       })
 
@@ -293,10 +301,10 @@ const EventCardModern: React.FC<EventCardModernProps> = ({
             </div>
           ) : (
             <img
-              src={(!imageError && isValidImageUrl(event.image_url)) ? event.image_url : getDefaultImage(event.category)}
+              src={(!imageError && isValidImageUrl(imageUrl)) ? imageUrl : getDefaultImage(event.category)}
               alt={event.title}
               className="w-full h-full object-cover transform transition-transform duration-700 group-hover:scale-110"
-              key={event.image_url}
+              key={imageUrl}
               onError={() => {
                 if (!imageError) {
                   // Primera vez: intentar con imagen por defecto
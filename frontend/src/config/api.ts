@@ -1,4 +1,11 @@
 // URL de la API - Se configura automáticamente por ambiente
 // Eliminar barra final si existe para evitar doble barra en las rutas
 const rawApiUrl = import.meta.env.VITE_API_URL || 'http://localhost:8001'
-export const API_BASE_URL = rawApiUrl.endsWith('/') ? rawApiUrl.slice(0, -1) : rawApiUrl
\ No newline at end of file
+export const API_BASE_URL = rawApiUrl.endsWith('/') ? rawApiUrl.slice(0, -1) : rawApiUrl
+
+// Imagen para las cards: la miniatura del backend (/img/{id}?v=...) o el image_url original
+// thumbnail_url viene relativa si el backend no tiene IMAGE_PROXY_BASE_URL
+export const cardImageUrl = (event: { thumbnail_url?: string | null; image_url?: string | null }): string => {
+  const url = event.thumbnail_url || event.image_url || ''
+  return url.startsWith('/') && !url.startsWith('//') ? `${API_BASE_URL}${url}` : url
+}
\ No newline at end of file
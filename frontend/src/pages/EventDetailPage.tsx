@@ -4,7 +4,7 @@ import SidePanel from '../components/SidePanel'
 import Header from '../components/Header'
 import { useAssistants } from '../contexts/AssistantsContext'
 import { useEvents } from '../stores/EventsStore'
-import { API_BASE_URL } from '../config/api'
+import { API_BASE_URL, cardImageUrl } from '../config/api'
 import bgImage from '../assets/bg.webp'
 
 interface Event {
@@ -19,6 +19,7 @@ interface Event {
   currency: string
   is_free: boolean
   image_url: string
+  thumbnail_url?: string | null
   latitude?: number
   longitude?: number
   source?: string
@@ -198,12 +199,15 @@ const EventDetailPage: React.FC = () => {
       const response = await fetch(`${API_BASE_URL}/api/ai/event-insight`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
+        // uuid = id real de la DB: el backend arma el prompt (y el hash del insight precalculado) desde la fila
         body: JSON.stringify({
-          id: event.title.toLowerCase().replace(/\s+/g, '-').replace(/[.,]/g, ''),
+          id: uuid,
           title: event.title,
           venue_name: event.venue_name,
           category: event.category,
-          location: event.venue_address || 'Buenos Aires'
+          city: event.city,
+          location: event.city || 'Buenos Aires',
+          start_datetime: event.start_datetime
         })
       })
 
@@ -861,7 +865,7 @@ const EventDetailPage: React.FC = () => {
                   >
                     <div className="aspect-[4/3] relative overflow-hidden">
                       <img
-                        src={relEvent.image_url || getDefaultImage(relEvent.category)}
+                        src={cardImageUrl(relEvent) || getDefaultImage(relEvent.category)}
                         alt={relEvent.title}
                         className="w-full h-full object-cover transition-transform duration-500 group-hover:scale-110"
                         onError={(e) => {
@@ -53,6 +53,7 @@ export interface Event {
   currency?: string
   is_free?: boolean
   image_url?: string | null
+  thumbnail_url?: string | null
   latitude?: number
   longitude?: number
   source?: string
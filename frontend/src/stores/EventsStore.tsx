@@ -21,6 +21,7 @@ interface Event {
   is_free?: boolean
   source?: string
   image_url?: string | null
+  thumbnail_url?: string | null
   status?: string
   is_duplicate?: boolean
   duplicate_of?: string | null
@@ -1076,7 +1077,7 @@ const useEventsStore = create<EventsState>((set, get) => ({
                           const { events } = get()
                           const updatedEvents = events.map(event =>
                             event.id === data.id || event.title === data.title
-                              ? { ...event, image_url: data.image_url }
+                              ? { ...event, image_url: data.image_url, thumbnail_url: null }
                               : event
                           )
                           set({ events: updatedEvents })
@@ -1161,7 +1162,7 @@ const useEventsStore = create<EventsState>((set, get) => ({
                     const { events: currentEvents } = get()
                     const updatedEvents = currentEvents.map(event => {
                       if (event.id === data.id || event.title === data.title) {
-                        const updatedEvent = { ...event, image_url: data.image_url }
+                        const updatedEvent = { ...event, image_url: data.image_url, thumbnail_url: null }
 
                         // Actualizar en sessionStorage también
                         const eventId = event.title.toLowerCase()
@@ -1515,7 +1516,7 @@ const useEventsStore = create<EventsState>((set, get) => ({
       if (isMatch) {
         console.log('✅ [STORE] Evento encontrado para actualizar imagen:', event.title)
         found = true
-        return { ...event, image_url: newImageUrl }
+        return { ...event, image_url: newImageUrl, thumbnail_url: null }
       }
       return event
     })